@@ -0,0 +1,71 @@
+"""Benchmark ``gemm`` with float16 operand storage.
+
+Compares a product with float16 operands (widened to float32 block by block
+inside ``gemm``) against the same product on float32 operands, and against
+converting the float16 operands to float32 up front. Reports the memory
+saved by the float16 storage next to the time spent widening it.
+
+Usage: python benchmarks/gemm_float16.py [m n k] [--repeat N]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import pyblis
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("shape", nargs="*", type=int, default=[2000, 2000, 2000],
+                        help="m, n and k (default 2000 2000 2000)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if len(args.shape) != 3:
+        parser.error("expected 3 dimensions, m n k")
+    m, n, k = args.shape
+
+    a32 = np.random.normal(size=(m, k)).astype('f4')
+    b32 = np.random.normal(size=(k, n)).astype('f4')
+    a16 = a32.astype('f2')
+    b16 = b32.astype('f2')
+    out = np.empty((m, n), dtype='f4')
+
+    t_single = best_of(lambda: pyblis.lib.gemm(a32, b32, out=out), args.repeat)
+    t_half = best_of(lambda: pyblis.lib.gemm(a16, b16, out=out), args.repeat)
+    t_upfront = best_of(
+        lambda: pyblis.lib.gemm(a16.astype('f4'), b16.astype('f4'), out=out),
+        args.repeat
+    )
+
+    saved = (a32.nbytes + b32.nbytes) - (a16.nbytes + b16.nbytes)
+    overhead = t_half - t_single
+    gflops = 2.0 * m * n * k * 1e-9
+
+    print("shape (m, n, k):           %d x %d x %d" % (m, n, k))
+    print("operand storage saved:     %.1f MiB (%.1f MiB -> %.1f MiB)"
+          % (saved / 2 ** 20, (a32.nbytes + b32.nbytes) / 2 ** 20,
+             (a16.nbytes + b16.nbytes) / 2 ** 20))
+    print("float32 operands:          %.4f s (%.1f GFLOP/s)"
+          % (t_single, gflops / t_single))
+    print("float16 operands:          %.4f s (%.1f GFLOP/s)"
+          % (t_half, gflops / t_half))
+    print("float16, widened up front: %.4f s" % t_upfront)
+    print("widening overhead:         %.4f s (%.1f%% of the float32 product)"
+          % (overhead, 100 * overhead / t_single))
+    if overhead > 0:
+        print("storage saved per second of overhead: %.1f MiB/s"
+              % (saved / 2 ** 20 / overhead))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+/* A CBLAS interface to the pyblis kernels
+ *
+ * Built into the pyblis library when configured with ``PYBLIS_CBLAS=ON``.
+ * Each ``pyblis_cblas_<name>`` function has the signature of ``cblas_<name>``
+ * (see ``pyblis_cblas.h``), and calls the matching ``pybli_*`` kernel, so it
+ * runs on the bundled BLIS with the same process-wide thread default
+ * (``pyblis.set_num_threads``) and instrumentation as the Python API.
+ *
+ * Like the CBLAS reference, matrices are given by a layout and a leading
+ * dimension, and vectors with a negative increment are read from the end.
+ * Arguments aren't validated.
+ *
+ * Generated by lib/generate.py, do not edit.
+ */
+#include <stdbool.h>
+#include <stdint.h>
+#include "blis/blis.h"
+
+/* The CBLAS enum values */
+#define CBLAS_ROW_MAJOR 101
+#define CBLAS_TRANSPOSE 112
+#define CBLAS_CONJ_TRANSPOSE 113
+#define CBLAS_UPPER 121
+#define CBLAS_UNIT 132
+#define CBLAS_RIGHT 142
+
+/* The pybli_* kernels, defined in pyblis.c */
+typedef dim_t pybli_dim_t;
+typedef inc_t pybli_inc_t;
+typedef scomplex pybli_scomplex;
+typedef dcomplex pybli_dcomplex;
+{% for k in kernels %}
+{{ k.restype }} pybli_{{ k.name }}({{ k.c_params() }});
+{%- endfor %}
+
+/* Row and column strides of a matrix with leading dimension ``ld`` */
+#define RS(layout, ld) ((layout) == CBLAS_ROW_MAJOR ? (inc_t)(ld) : 1)
+#define CS(layout, ld) ((layout) == CBLAS_ROW_MAJOR ? 1 : (inc_t)(ld))
+
+/* The first element of a vector of ``n`` elements, as BLAS indexes vectors
+ * with a negative increment from the end */
+#define VEC(T, x, n, inc) \
+    ((T*)(x) + ((inc) < 0 && (n) > 0 ? ((inc_t)(n) - 1) * -(inc_t)(inc) : 0))
+
+#define IS_TRANS(t) ((t) == CBLAS_TRANSPOSE || (t) == CBLAS_CONJ_TRANSPOSE)
+#define IS_CONJ(t) ((t) == CBLAS_CONJ_TRANSPOSE)
+
+/* A complex scalar passed by pointer, as the real and imaginary parts */
+#define CSCALAR(T, p) ((const T*)(p))->real, ((const T*)(p))->imag
+
+{% for T in all_types %}
+{%- if T.is_complex %}
+{%- set VT = "void" %}
+{%- set ST = "const void*" %}
+{%- set alpha = "CSCALAR(%s, alpha)" % T.ctype %}
+{%- set beta = "CSCALAR(%s, beta)" % T.ctype %}
+{%- else %}
+{%- set VT = T.ctype %}
+{%- set ST = "const " + T.ctype %}
+{%- set alpha = "alpha" %}
+{%- set beta = "beta" %}
+{%- endif %}
+/* {{ T.ctype }} */
+
+/* Level 1 */
+{% if T.is_complex %}
+{%- for name, conj in [("dotu", "false"), ("dotc", "true")] %}
+void pyblis_cblas_{{ T.char }}{{ name }}_sub(
+    const int N, const void* X, const int incX, const void* Y, const int incY,
+    void* dot
+) {
+    pybli_{{ T.char }}dotv(
+        {{ conj }}, false, N, VEC({{ T.ctype }}, X, N, incX), incX,
+        VEC({{ T.ctype }}, Y, N, incY), incY, ({{ T.ctype }}*)dot, -1
+    );
+}
+{% endfor %}
+{%- else %}
+{{ T.ctype }} pyblis_cblas_{{ T.char }}dot(
+    const int N, const {{ T.ctype }}* X, const int incX,
+    const {{ T.ctype }}* Y, const int incY
+) {
+    {{ T.ctype }} rho;
+    pybli_{{ T.char }}dotv(
+        false, false, N, VEC({{ T.ctype }}, X, N, incX), incX,
+        VEC({{ T.ctype }}, Y, N, incY), incY, &rho, -1
+    );
+    return rho;
+}
+{% endif %}
+void pyblis_cblas_{{ T.char }}axpy(
+    const int N, {{ ST }} alpha, const {{ VT }}* X, const int incX,
+    {{ VT }}* Y, const int incY
+) {
+    pybli_{{ T.char }}axpyv(
+        false, N, {{ alpha }}, VEC({{ T.ctype }}, X, N, incX), incX,
+        VEC({{ T.ctype }}, Y, N, incY), incY, -1
+    );
+}
+
+void pyblis_cblas_{{ T.char }}copy(
+    const int N, const {{ VT }}* X, const int incX, {{ VT }}* Y, const int incY
+) {
+    pybli_{{ T.char }}copyv(
+        false, N, VEC({{ T.ctype }}, X, N, incX), incX,
+        VEC({{ T.ctype }}, Y, N, incY), incY, -1
+    );
+}
+
+void pyblis_cblas_{{ T.char }}scal(
+    const int N, {{ ST }} alpha, {{ VT }}* X, const int incX
+) {
+    /* Reference BLAS does nothing for non-positive increments */
+    if (incX <= 0) {
+        return;
+    }
+    pybli_{{ T.char }}scalv(N, {{ alpha }}, ({{ T.ctype }}*)X, incX, -1);
+}
+{% if T.is_complex %}
+void pyblis_cblas_{{ T.char }}{{ "s" if T.char == "c" else "d" }}scal(
+    const int N, const {{ T.rtype }} alpha, void* X, const int incX
+) {
+    if (incX <= 0) {
+        return;
+    }
+    pybli_{{ T.char }}scalv(N, alpha, 0, ({{ T.ctype }}*)X, incX, -1);
+}
+{% endif %}
+/* Level 2 */
+
+void pyblis_cblas_{{ T.char }}gemv(
+    const int layout, const int TransA, const int M, const int N,
+    {{ ST }} alpha, const {{ VT }}* A, const int lda,
+    const {{ VT }}* X, const int incX, {{ ST }} beta,
+    {{ VT }}* Y, const int incY
+) {
+    int nx = IS_TRANS(TransA) ? M : N;
+    int ny = IS_TRANS(TransA) ? N : M;
+    pybli_{{ T.char }}gemv(
+        IS_TRANS(TransA), IS_CONJ(TransA), false, M, N, {{ alpha }},
+        ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda),
+        VEC({{ T.ctype }}, X, nx, incX), incX, {{ beta }},
+        VEC({{ T.ctype }}, Y, ny, incY), incY, -1
+    );
+}
+{% for name, conj in ([("geru", "false"), ("gerc", "true")] if T.is_complex else [("ger", "false")]) %}
+void pyblis_cblas_{{ T.char }}{{ name }}(
+    const int layout, const int M, const int N, {{ ST }} alpha,
+    const {{ VT }}* X, const int incX, const {{ VT }}* Y, const int incY,
+    {{ VT }}* A, const int lda
+) {
+    pybli_{{ T.char }}ger(
+        false, {{ conj }}, M, N, {{ alpha }}, VEC({{ T.ctype }}, X, M, incX), incX,
+        VEC({{ T.ctype }}, Y, N, incY), incY,
+        ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda), -1
+    );
+}
+{% endfor %}
+void pyblis_cblas_{{ T.char }}{{ "hemv" if T.is_complex else "symv" }}(
+    const int layout, const int Uplo, const int N, {{ ST }} alpha,
+    const {{ VT }}* A, const int lda, const {{ VT }}* X, const int incX,
+    {{ ST }} beta, {{ VT }}* Y, const int incY
+) {
+    pybli_{{ T.char }}{{ "hemv" if T.is_complex else "symv" }}(
+        Uplo == CBLAS_UPPER, false, false, N, {{ alpha }}, {{ beta }},
+        ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda),
+        VEC({{ T.ctype }}, X, N, incX), incX,
+        VEC({{ T.ctype }}, Y, N, incY), incY, -1
+    );
+}
+{% for name in ["trmv", "trsv"] %}
+void pyblis_cblas_{{ T.char }}{{ name }}(
+    const int layout, const int Uplo, const int TransA, const int Diag,
+    const int N, const {{ VT }}* A, const int lda, {{ VT }}* X, const int incX
+) {
+    pybli_{{ T.char }}{{ name }}(
+        Uplo == CBLAS_UPPER, IS_TRANS(TransA), IS_CONJ(TransA),
+        Diag == CBLAS_UNIT, N, {{ "1, 0" if T.is_complex else "1" }},
+        ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda),
+        VEC({{ T.ctype }}, X, N, incX), incX, -1
+    );
+}
+{% endfor %}
+/* Level 3 */
+
+void pyblis_cblas_{{ T.char }}gemm(
+    const int layout, const int TransA, const int TransB,
+    const int M, const int N, const int K, {{ ST }} alpha,
+    const {{ VT }}* A, const int lda, const {{ VT }}* B, const int ldb,
+    {{ ST }} beta, {{ VT }}* C, const int ldc
+) {
+    pybli_{{ T.char }}gemm(
+        IS_TRANS(TransA), IS_CONJ(TransA), IS_TRANS(TransB), IS_CONJ(TransB),
+        M, N, K, {{ alpha }},
+        ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda),
+        ({{ T.ctype }}*)B, RS(layout, ldb), CS(layout, ldb), {{ beta }},
+        ({{ T.ctype }}*)C, RS(layout, ldc), CS(layout, ldc), -1
+    );
+}
+{% for name in (["symm", "hemm"] if T.is_complex else ["symm"]) %}
+void pyblis_cblas_{{ T.char }}{{ name }}(
+    const int layout, const int Side, const int Uplo, const int M,
+    const int N, {{ ST }} alpha, const {{ VT }}* A, const int lda,
+    const {{ VT }}* B, const int ldb, {{ ST }} beta, {{ VT }}* C,
+    const int ldc
+) {
+    pybli_{{ T.char }}{{ name }}(
+        Side == CBLAS_RIGHT, Uplo == CBLAS_UPPER, false, false, false, M, N,
+        {{ alpha }}, ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda),
+        ({{ T.ctype }}*)B, RS(layout, ldb), CS(layout, ldb), {{ beta }},
+        ({{ T.ctype }}*)C, RS(layout, ldc), CS(layout, ldc), -1
+    );
+}
+{% endfor %}
+void pyblis_cblas_{{ T.char }}syrk(
+    const int layout, const int Uplo, const int Trans, const int N,
+    const int K, {{ ST }} alpha, const {{ VT }}* A, const int lda,
+    {{ ST }} beta, {{ VT }}* C, const int ldc
+) {
+    pybli_{{ T.char }}syrk(
+        IS_TRANS(Trans), false, Uplo == CBLAS_UPPER, false, N, K, {{ alpha }},
+        ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda), {{ beta }},
+        ({{ T.ctype }}*)C, RS(layout, ldc), CS(layout, ldc), -1
+    );
+}
+
+void pyblis_cblas_{{ T.char }}syr2k(
+    const int layout, const int Uplo, const int Trans, const int N,
+    const int K, {{ ST }} alpha, const {{ VT }}* A, const int lda,
+    const {{ VT }}* B, const int ldb, {{ ST }} beta, {{ VT }}* C,
+    const int ldc
+) {
+    pybli_{{ T.char }}syr2k(
+        IS_TRANS(Trans), false, IS_TRANS(Trans), false, Uplo == CBLAS_UPPER,
+        N, K, {{ alpha }}, ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda),
+        ({{ T.ctype }}*)B, RS(layout, ldb), CS(layout, ldb), {{ beta }},
+        ({{ T.ctype }}*)C, RS(layout, ldc), CS(layout, ldc), -1
+    );
+}
+{% if T.is_complex %}
+void pyblis_cblas_{{ T.char }}herk(
+    const int layout, const int Uplo, const int Trans, const int N,
+    const int K, const {{ T.rtype }} alpha, const void* A, const int lda,
+    const {{ T.rtype }} beta, void* C, const int ldc
+) {
+    pybli_{{ T.char }}herk(
+        IS_TRANS(Trans), IS_TRANS(Trans), Uplo == CBLAS_UPPER, false, N, K,
+        alpha, ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda), beta,
+        ({{ T.ctype }}*)C, RS(layout, ldc), CS(layout, ldc), -1
+    );
+}
+
+void pyblis_cblas_{{ T.char }}her2k(
+    const int layout, const int Uplo, const int Trans, const int N,
+    const int K, const void* alpha, const void* A, const int lda,
+    const void* B, const int ldb, const {{ T.rtype }} beta, void* C,
+    const int ldc
+) {
+    pybli_{{ T.char }}her2k(
+        IS_TRANS(Trans), IS_TRANS(Trans), IS_TRANS(Trans), IS_TRANS(Trans),
+        Uplo == CBLAS_UPPER, N, K, {{ alpha }},
+        ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda),
+        ({{ T.ctype }}*)B, RS(layout, ldb), CS(layout, ldb), beta,
+        ({{ T.ctype }}*)C, RS(layout, ldc), CS(layout, ldc), -1
+    );
+}
+{% endif %}
+{%- for name in ["trmm", "trsm"] %}
+void pyblis_cblas_{{ T.char }}{{ name }}(
+    const int layout, const int Side, const int Uplo, const int TransA,
+    const int Diag, const int M, const int N, {{ ST }} alpha,
+    const {{ VT }}* A, const int lda, {{ VT }}* B, const int ldb
+) {
+    pybli_{{ T.char }}{{ name }}(
+        Side == CBLAS_RIGHT, Uplo == CBLAS_UPPER, IS_TRANS(TransA),
+        IS_CONJ(TransA), Diag == CBLAS_UNIT, M, N, {{ alpha }},
+        ({{ T.ctype }}*)A, RS(layout, lda), CS(layout, lda),
+        ({{ T.ctype }}*)B, RS(layout, ldb), CS(layout, ldb), -1
+    );
+}
+{% endfor %}
+{% endfor %}
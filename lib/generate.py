@@ -1,6 +1,19 @@
+import os
+import re
+import runpy
 import sys
+
 import jinja2
 
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+SPEC_PATH = os.path.join(LIB_DIR, os.pardir, "pyblis", "_spec.py")
+C_TEMPLATE = os.path.join(LIB_DIR, "pyblis-template.c")
+CBLAS_TEMPLATE = os.path.join(LIB_DIR, "cblas-template.c")
+
+# Bump when the signature of an existing kernel in the C API changes.
+# Adding kernels doesn't need a bump, as they're looked up by name.
+CAPI_VERSION = 1
+
 
 class Type(object):
     def __init__(self, char, ctype, is_complex, rtype=None):
@@ -8,30 +21,28 @@ class Type(object):
         self.ctype = ctype
         self.rtype = rtype or ctype
         self.is_complex = is_complex
-        if is_complex:
-            alpha_sig = "{0} alpha_real, {0} alpha_imag".format(self.rtype)
-            beta_sig = "{0} beta_real, {0} beta_imag".format(self.rtype)
-            alpha_init = "%s alpha = {alpha_real, alpha_imag}" % (self.ctype)
-            beta_init = "%s beta = {beta_real, beta_imag}" % (self.ctype)
-            alpha_py_sig = "ct.c_%s, ct.c_%s" % (self.rtype, self.rtype)
-            alpha_py_call = "alpha.real, alpha.imag"
-            beta_py_sig = "ct.c_%s, ct.c_%s" % (self.rtype, self.rtype)
-            beta_py_call = "beta.real, beta.imag"
-        else:
-            alpha_sig = "{0} alpha".format(self.ctype)
-            beta_sig = "{0} beta".format(self.ctype)
-            alpha_init = beta_init = ""
-            alpha_py_sig = beta_py_sig = "ct.c_%s" % self.ctype
-            alpha_py_call = "alpha"
-            beta_py_call = "beta"
-        self.alpha_sig = alpha_sig
-        self.beta_sig = beta_sig
-        self.alpha_init = alpha_init
-        self.beta_init = beta_init
-        self.alpha_py_sig = alpha_py_sig
-        self.alpha_py_call = alpha_py_call
-        self.beta_py_sig = beta_py_sig
-        self.beta_py_call = beta_py_call
+
+    # ``real`` marks scalars of the real type corresponding to this type, as
+    # used by the Hermitian operations
+    def scalar_sig(self, name, real=False):
+        if self.is_complex and not real:
+            return "{0} {1}_real, {0} {1}_imag".format(self.rtype, name)
+        return "{0} {1}".format(self.rtype, name)
+
+    def scalar_init(self, name):
+        if self.is_complex:
+            return "{0} {1} = {{{1}_real, {1}_imag}}".format(self.ctype, name)
+        return ""
+
+    def scalar_py_sig(self, name, real=False):
+        if self.is_complex and not real:
+            return ["ct.c_%s" % self.rtype] * 2
+        return ["ct.c_%s" % self.rtype]
+
+    def scalar_py_call(self, name, real=False):
+        if self.is_complex and not real:
+            return ["%s.real" % name, "%s.imag" % name]
+        return [name]
 
 
 float32 = Type("s", "float", False)
@@ -41,14 +52,241 @@ complex128 = Type("z", "dcomplex", True, "double")
 
 all_types = [float32, float64, complex64, complex128]
 
-parameters = dict(all_types=all_types)
+
+class Operation(object):
+    """Renders an ``Op`` from ``pyblis/_spec.py`` into C and Python source.
+
+    The C shim takes the flags, dimensions, scalars, operands (pointers
+    followed by strides, or just a pointer for scalar outputs) and
+    ``nthreads``, in that order. Only dimensions
+    passed on to BLIS are part of the shim, others (e.g. the order of a
+    triangular matrix, given by a flag and the other dimensions) are only
+    used to check the shapes of the operands.
+    """
+    FLAG_CONVERSIONS = {
+        "conj": "from_conj({0})",
+        "upper": "from_upper({0})",
+        "right": "from_right({0})",
+        "unit": "from_unit({0})",
+    }
+
+    def __init__(self, op):
+        self.op = op
+        self.name = op.name
+        self.dims = op.dims
+        self.signature = op.signature()
+        self._flags = {f.name: f for f in op.flags}
+        self._dims = dict(op.dims)
+        self._scalars = {s.name: s for s in op.scalars}
+        self._operands = {o.name: o for o in op.operands}
+
+    # The types of scalar outputs, by ``Operand.dtype``
+    NP_REAL_TYPES = {"float": "np.float32", "double": "np.float64"}
+
+    @staticmethod
+    def strides(o):
+        if o.is_scalar:
+            return []
+        if o.ndim == 1:
+            return ["inc" + o.name]
+        return ["rs" + o.name, "cs" + o.name]
+
+    @staticmethod
+    def c_type(o, T):
+        """The C element type of an operand"""
+        return {None: T.ctype, "real": T.rtype, "index": "dim_t"}[o.dtype]
+
+    def var(self, o):
+        """The local holding an operand, after any ``out`` allocation"""
+        return "result" if o.mode == "out" else o.name
+
+    def c_dims(self):
+        """The dimensions passed to the C shim"""
+        return [name for name, _ in self.op.dims if name in self.op.call]
+
+    def c_params(self, T):
+        params = ["bool %s" % f.name for f in self.op.flags]
+        params.extend("dim_t %s" % name for name in self.c_dims())
+        params.extend(T.scalar_sig(s.name, s.real) for s in self.op.scalars)
+        for o in self.op.operands:
+            params.append(", ".join(
+                ["%s* %s" % (self.c_type(o, T), o.name)] +
+                ["inc_t %s" % s for s in self.strides(o)]
+            ))
+        params.append("dim_t nthreads")
+        return params
+
+    def c_call(self, T):
+        args = []
+        for name in self.op.call:
+            if name.startswith("="):
+                args.append(name[1:].format(ch=T.char))
+            elif name in self._flags:
+                flag = self._flags[name]
+                if flag.kind == "trans":
+                    args.append("from_trans_conj(%s, %s)"
+                                % (name, flag.conj or "false"))
+                else:
+                    args.append(self.FLAG_CONVERSIONS[flag.kind].format(name))
+            elif name in self._dims:
+                args.append(name)
+            elif name in self._scalars:
+                args.append("&" + name)
+            else:
+                o = self._operands[name]
+                args.append(", ".join([name] + self.strides(o)))
+        return args
+
+    def py_argtypes(self, T):
+        """(ctype, name) pairs for the ctypes argtypes"""
+        argtypes = [("ct.c_bool", f.name) for f in self.op.flags]
+        argtypes.extend(("ct.c_long", name) for name in self.c_dims())
+        for s in self.op.scalars:
+            argtypes.extend((t, s.name)
+                            for t in T.scalar_py_sig(s.name, s.real))
+        for o in self.op.operands:
+            argtypes.append(("ct.c_void_p", o.name))
+            argtypes.extend(("ct.c_long", s) for s in self.strides(o))
+        argtypes.append(("ct.c_long", "nthreads"))
+        return argtypes
+
+    def py_call(self, T):
+        args = [f.name for f in self.op.flags]
+        args.extend(self.c_dims())
+        for s in self.op.scalars:
+            args.extend(T.scalar_py_call(s.name, s.real))
+        for o in self.op.operands:
+            var = self.var(o)
+            args.append("%s.ctypes" % var)
+            args.extend("%s.strides[%d] // %s.itemsize" % (var, i, var)
+                        for i in range(o.ndim))
+        args.append("nthreads")
+        return args
+
+    def py_checks(self):
+        """(condition, message) pairs validating the required operands"""
+        checks = []
+        for o in self.op.operands:
+            if o.mode == "out" or o.is_scalar:
+                continue
+            conds = []
+            for i, expr in enumerate(o.stored_shape()):
+                axis = "%s.shape[%d]" % (o.name, i)
+                if self._dims.get(expr) == axis:
+                    continue
+                conds.append("%s != %s" % (axis, expr))
+            if conds:
+                checks.append((" or ".join(conds), "%s shape mismatch" % o.name))
+        return checks
+
+    def py_outputs(self):
+        """(name, shape, mismatch condition, operand to allocate like) for
+        the ``out`` operands"""
+        like = next(o.name for o in self.op.operands if o.mode != "out")
+        outputs = []
+        for o in self.op.operands:
+            if o.mode == "out" and not o.is_scalar:
+                shape = "(%s,)" % o.shape[0] if o.ndim == 1 else \
+                    "(%s)" % ", ".join(o.shape)
+                cond = " or ".join("%s.shape[%d] != %s" % (o.name, i, d)
+                                   for i, d in enumerate(o.shape))
+                outputs.append((o.name, shape, cond, like))
+        return outputs
+
+    def py_scalar_outputs(self, T):
+        """The dtypes of the scalar outputs, allocated as 1 element arrays"""
+        like = next(o.name for o in self.op.operands if o.mode != "out")
+        dtypes = {None: "%s.dtype" % like,
+                  "real": self.NP_REAL_TYPES[T.rtype],
+                  "index": "np.int64"}
+        return [dtypes[o.dtype] for o in self.op.operands if o.is_scalar]
+
+    @property
+    def result(self):
+        return ", ".join("%s[0]" % self.var(o) if o.is_scalar else self.var(o)
+                         for o in self.op.outputs)
+
+
+ops = [Operation(op) for op in runpy.run_path(SPEC_PATH)["OPS"]]
+
+parameters = dict(all_types=all_types, ops=ops, capi_version=CAPI_VERSION)
+
+
+class Kernel(object):
+    """A public function in the C shims, as exported by the C API.
+
+    Parameter types are spelled with the ``pybli_`` types from ``pyblis.h``
+    (``pybli_dim_t`` for ``dim_t``, etc...), so users don't need the BLIS
+    headers."""
+    TYPES = {
+        "dim_t": "pybli_dim_t",
+        "inc_t": "pybli_inc_t",
+        "scomplex": "pybli_scomplex",
+        "dcomplex": "pybli_dcomplex",
+    }
+
+    # Cython spellings of the C types, where they differ
+    CYTHON_TYPES = {"bool": "bint"}
+
+    PATTERN = re.compile(
+        r"^(?P<restype>\w+) pybli_(?P<name>\w+)\((?P<params>[^)]*)\)\s*\{",
+        re.MULTILINE
+    )
+
+    def __init__(self, restype, name, params):
+        self.restype = self.TYPES.get(restype, restype)
+        self.name = name
+        self.params = []
+        for param in params.split(","):
+            param = " ".join(param.split())
+            if not param or param == "void":
+                continue
+            ctype, pname = param.rsplit(" ", 1)
+            ctype = ctype.replace(" ", "")
+            pointer = ctype.endswith("*")
+            base = ctype.rstrip("*")
+            self.params.append(
+                (self.TYPES.get(base, base), "*" if pointer else "", pname)
+            )
+
+    def c_params(self):
+        if not self.params:
+            return "void"
+        return ", ".join("%s%s %s" % p for p in self.params)
+
+    def cython_params(self):
+        return ", ".join("%s%s %s" % (self.CYTHON_TYPES.get(t, t), ptr, name)
+                         for t, ptr, name in self.params)
+
+
+def kernels():
+    """The public functions defined in the C shims, in order"""
+    with open(C_TEMPLATE) as f:
+        source = jinja2.Template(f.read()).render(kernels=[], **parameters)
+    return [Kernel(m.group("restype"), m.group("name"), m.group("params"))
+            for m in Kernel.PATTERN.finditer(source)]
+
+
+CBLAS_PATTERN = re.compile(r"^\w+ pyblis_cblas_(\w+)\(", re.MULTILINE)
+
+
+def cblas_names(kernels):
+    """The names of the CBLAS functions, without the ``cblas_`` prefix"""
+    with open(CBLAS_TEMPLATE) as f:
+        source = jinja2.Template(f.read()).render(
+            kernels=kernels, cblas_names=[], **parameters
+        )
+    return CBLAS_PATTERN.findall(source)
 
 
 def generate_source(template, target):
     with open(template) as f:
         data = f.read()
     template = jinja2.Template(data)
-    output = template.render(**parameters)
+    kernel_list = kernels()
+    output = template.render(kernels=kernel_list,
+                             cblas_names=cblas_names(kernel_list),
+                             **parameters)
     with open(target, 'w') as f:
         f.write(output)
 
@@ -9,10 +9,22 @@
  * - Remove pointers to scalars, as numba can't currently handle these easily.
  */
 #include <stdbool.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+#include <pthread.h>
 #include "blis/blis.h"
 
+/* The process-wide default number of threads, used by operations called
+ * with ``nthreads <= 0``. If unset (-1), BLIS's own default is used (e.g.
+ * from ``BLIS_NUM_THREADS``). Not locked, it's a single aligned word. */
+static dim_t pybli_default_nthreads = -1;
+
 #define INIT_RNTM \
     rntm_t rntm = BLIS_RNTM_INITIALIZER; \
+    if (nthreads <= 0) { \
+        nthreads = pybli_default_nthreads; \
+    } \
     if (nthreads > 0) { \
         bli_rntm_set_num_threads(nthreads, &rntm); \
     }
@@ -21,33 +33,1027 @@
     (c) ? ((t) ? BLIS_CONJ_TRANSPOSE : BLIS_CONJ_NO_TRANSPOSE) : \
           ((t) ? BLIS_TRANSPOSE : BLIS_NO_TRANSPOSE)
 
-#define from_upper(u) \
-    (u) ? BLIS_UPPER : BLIS_LOWER
+#define from_upper(u) \
+    (u) ? BLIS_UPPER : BLIS_LOWER
+
+#define from_conj(c) \
+    (c) ? BLIS_CONJUGATE : BLIS_NO_CONJUGATE
+
+#define from_right(r) \
+    (r) ? BLIS_RIGHT : BLIS_LEFT
+
+#define from_unit(u) \
+    (u) ? BLIS_UNIT_DIAG : BLIS_NONUNIT_DIAG
+
+/* Parallel loops over independent problems
+ *
+ * Used by the batched operations, where many small products are better run
+ * concurrently (each single threaded) than one after another with BLIS
+ * threading within each. Tasks are handed out from a shared counter, so
+ * problems of uneven size are balanced across the threads.
+ */
+typedef void (*pybli_task_t)(dim_t i, void* data);
+
+typedef struct {
+    pybli_task_t task;
+    void* data;
+    dim_t ntasks;
+    dim_t next;
+    pthread_mutex_t lock;
+} pybli_taskq_t;
+
+static void* pybli_worker(void* arg) {
+    pybli_taskq_t* q = arg;
+    while (true) {
+        pthread_mutex_lock(&q->lock);
+        dim_t i = q->next++;
+        pthread_mutex_unlock(&q->lock);
+        if (i >= q->ntasks) {
+            break;
+        }
+        q->task(i, q->data);
+    }
+    return NULL;
+}
+
+static void pybli_parallel_for(
+    dim_t ntasks, dim_t nthreads, pybli_task_t task, void* data
+) {
+    if (nthreads > ntasks) {
+        nthreads = ntasks;
+    }
+    pthread_t* threads = NULL;
+    if (nthreads > 1) {
+        threads = malloc(sizeof(pthread_t) * (nthreads - 1));
+    }
+    if (threads == NULL) {
+        for (dim_t i = 0; i < ntasks; i++) {
+            task(i, data);
+        }
+        return;
+    }
+    pybli_taskq_t q = {task, data, ntasks, 0};
+    pthread_mutex_init(&q.lock, NULL);
+    dim_t started = 0;
+    for (; started < nthreads - 1; started++) {
+        if (pthread_create(&threads[started], NULL, pybli_worker, &q) != 0) {
+            break;
+        }
+    }
+    /* The calling thread takes part, and finishes the loop alone if no
+     * threads could be started */
+    pybli_worker(&q);
+    for (dim_t t = 0; t < started; t++) {
+        pthread_join(threads[t], NULL);
+    }
+    pthread_mutex_destroy(&q.lock);
+    free(threads);
+}
+
+static dim_t pybli_resolve_nthreads(dim_t nthreads) {
+    if (nthreads <= 0) {
+        nthreads = pybli_default_nthreads;
+    }
+    if (nthreads <= 0) {
+        nthreads = bli_thread_get_num_threads();
+    }
+    return nthreads > 0 ? nthreads : 1;
+}
+
+void pybli_set_num_threads(dim_t nthreads) {
+    pybli_default_nthreads = nthreads > 0 ? nthreads : -1;
+}
+
+dim_t pybli_get_num_threads(void) {
+    return pybli_resolve_nthreads(-1);
+}
+
+/* Products with at most this many multiply-adds don't benefit from BLIS
+ * threading, and are run concurrently across a batch instead */
+#define PYBLI_SMALL_GEMM (128 * 128 * 128)
+
+/* Split ``nthreads`` into threads across the batch (outer) and threads
+ * within each product (inner) */
+static void pybli_batch_threads(
+    dim_t nbatch, dim_t m, dim_t n, dim_t k, dim_t nthreads,
+    dim_t* outer, dim_t* inner
+) {
+    *outer = 1;
+    *inner = nthreads;
+    if (nthreads <= 1 || nbatch <= 1) {
+        return;
+    }
+    if ((double)m * n * k <= PYBLI_SMALL_GEMM || nbatch >= 4 * nthreads) {
+        *outer = nthreads;
+        *inner = 1;
+    } else if (nbatch % bli_min(nbatch, nthreads) == 0) {
+        /* Only split large products across the batch if the split is
+         * balanced, otherwise threading within each product is better */
+        *outer = bli_min(nbatch, nthreads);
+        *inner = nthreads / *outer;
+    }
+}
+
+/* DOTV */
+{% for T in all_types %}
+void pybli_{{ T.char }}dotv(
+    bool x_conj,
+    bool y_conj,
+    dim_t   n,
+    {{ T.ctype }}*  x, inc_t incx,
+    {{ T.ctype }}*  y, inc_t incy,
+    {{ T.ctype }}*  rho,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    bli_{{ T.char }}dotv_ex(
+        from_conj(x_conj),
+        from_conj(y_conj),
+        n,
+        x, incx,
+        y, incy,
+        rho,
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
+
+/* GEMV */
+{% for T in all_types %}
+void pybli_{{ T.char }}gemv(
+    bool a_trans, bool a_conj,
+    bool x_conj,
+    dim_t   m,
+    dim_t   n,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.ctype }}*  x, inc_t incx,
+    {{ T.scalar_sig("beta") }},
+    {{ T.ctype }}*  y, inc_t incy,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    bli_{{ T.char }}gemv_ex(
+        from_trans_conj(a_trans, a_conj),
+        from_conj(x_conj),
+        m, n,
+        &alpha,
+        a, rsa, csa,
+        x, incx,
+        &beta,
+        y, incy,
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
+
+/* GEMM */
+{% for T in all_types %}
+void pybli_{{ T.char }}gemm(
+    bool a_trans, bool a_conj,
+    bool b_trans, bool b_conj,
+    dim_t   m,
+    dim_t   n,
+    dim_t   k,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.ctype }}*  b, inc_t rsb, inc_t csb,
+    {{ T.scalar_sig("beta") }},
+    {{T.ctype }}*  c, inc_t rsc, inc_t csc,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    bli_{{ T.char }}gemm_ex(
+        from_trans_conj(a_trans, a_conj),
+        from_trans_conj(b_trans, b_conj),
+        m, n, k,
+        &alpha,
+        a, rsa, csa,
+        b, rsb, csb,
+        &beta,
+        c, rsc, csc,
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
+
+/* GEMM_MIXED
+ *
+ * A product where ``a``, ``b`` and ``c`` may each have a different dtype,
+ * in precision or domain. The typed API requires a single dtype, so this
+ * goes through the object API, which converts the operands while packing
+ * rather than with separate copies. Real operands of a complex product are
+ * used as is, not promoted to complex. Datatypes are given as indices into
+ * ``pybli_datatypes`` (or ``PYBLI_HALF``, see below), and ``comp_prec``
+ * selects the precision of the computation (0 for single, 1 for double, or
+ * -1 for the precision of ``c``).
+ */
+static const num_t pybli_datatypes[] = {
+    BLIS_FLOAT, BLIS_DOUBLE, BLIS_SCOMPLEX, BLIS_DCOMPLEX
+};
+
+/* Half precision operands
+ *
+ * BLIS has no half precision datatype, so products with float16 operands
+ * (and float32 everything else) are run as a sequence of float32 products
+ * over tiles of at most ``PYBLI_WIDEN_MC x PYBLI_WIDEN_KC`` of ``a`` and
+ * ``PYBLI_WIDEN_KC x PYBLI_WIDEN_NC`` of ``b``. Each tile of a float16
+ * operand is widened into a fixed size float32 buffer just before it's used,
+ * so a full float32 copy of an operand never exists. If the buffers can't be
+ * allocated, smaller tiles are widened into buffers on the stack instead.
+ */
+#define PYBLI_HALF 4
+#define PYBLI_WIDEN_MC 1024
+#define PYBLI_WIDEN_KC 256
+#define PYBLI_WIDEN_NC 4096
+#define PYBLI_WIDEN_SMALL 64
+/* Rows widened per task when widening in parallel */
+#define PYBLI_WIDEN_ROWS 64
+
+static float pybli_half_table[1 << 16];
+static pthread_once_t pybli_half_once = PTHREAD_ONCE_INIT;
+
+static float pybli_half_to_float(uint16_t h) {
+    uint32_t sign = (uint32_t)(h & 0x8000) << 16;
+    uint32_t exp = (h >> 10) & 0x1f;
+    uint32_t mant = h & 0x3ff;
+    uint32_t bits;
+    if (exp == 0x1f) {
+        /* inf or nan */
+        bits = sign | 0x7f800000 | (mant << 13);
+    } else if (exp != 0) {
+        bits = sign | ((exp + 112) << 23) | (mant << 13);
+    } else if (mant == 0) {
+        bits = sign;
+    } else {
+        /* Subnormal halves are normal floats */
+        exp = 113;
+        while (!(mant & 0x400)) {
+            mant <<= 1;
+            exp--;
+        }
+        bits = sign | (exp << 23) | ((mant & 0x3ff) << 13);
+    }
+    float f;
+    memcpy(&f, &bits, sizeof(f));
+    return f;
+}
+
+static void pybli_half_init(void) {
+    for (uint32_t h = 0; h < (1 << 16); h++) {
+        pybli_half_table[h] = pybli_half_to_float((uint16_t)h);
+    }
+}
+
+typedef struct {
+    uint16_t* src; inc_t rs; inc_t cs;
+    float* dst; dim_t rows; dim_t cols;
+} pybli_widen_t;
+
+/* Widen rows ``[i * PYBLI_WIDEN_ROWS, ...)`` of ``src`` into the row major
+ * ``dst`` */
+static void pybli_widen_task(dim_t i, void* data) {
+    pybli_widen_t* w = data;
+    dim_t start = i * PYBLI_WIDEN_ROWS;
+    dim_t stop = bli_min(start + PYBLI_WIDEN_ROWS, w->rows);
+    for (dim_t r = start; r < stop; r++) {
+        uint16_t* src = w->src + r * w->rs;
+        float* dst = w->dst + r * w->cols;
+        for (dim_t c = 0; c < w->cols; c++) {
+            dst[c] = pybli_half_table[src[c * w->cs]];
+        }
+    }
+}
+
+static void pybli_widen(
+    uint16_t* src, inc_t rs, inc_t cs, dim_t rows, dim_t cols, float* dst,
+    dim_t nthreads
+) {
+    pybli_widen_t w = {src, rs, cs, dst, rows, cols};
+    dim_t ntasks = (rows + PYBLI_WIDEN_ROWS - 1) / PYBLI_WIDEN_ROWS;
+    pybli_parallel_for(ntasks, nthreads, pybli_widen_task, &w);
+}
+
+static void pybli_gemm_half(
+    bool a_trans, bool b_trans,
+    dim_t m, dim_t n, dim_t k,
+    float alpha,
+    bool a_half, void* a, inc_t rsa, inc_t csa,
+    bool b_half, void* b, inc_t rsb, inc_t csb,
+    float beta,
+    float* c, inc_t rsc, inc_t csc,
+    dim_t nthreads
+) {
+    pthread_once(&pybli_half_once, pybli_half_init);
+    nthreads = pybli_resolve_nthreads(nthreads);
+    rntm_t rntm = BLIS_RNTM_INITIALIZER;
+    bli_rntm_set_num_threads(nthreads, &rntm);
+
+    /* Strides of op(a) and op(b) */
+    inc_t rso_a = a_trans ? csa : rsa, cso_a = a_trans ? rsa : csa;
+    inc_t rso_b = b_trans ? csb : rsb, cso_b = b_trans ? rsb : csb;
+    /* Only the dimensions of a float16 operand are tiled */
+    dim_t mc = a_half ? bli_min(m, PYBLI_WIDEN_MC) : m;
+    dim_t nc = b_half ? bli_min(n, PYBLI_WIDEN_NC) : n;
+    dim_t kc = bli_min(k, PYBLI_WIDEN_KC);
+    float* a_buf = a_half ? malloc(sizeof(float) * (mc * kc + 1)) : NULL;
+    float* b_buf = b_half ? malloc(sizeof(float) * (kc * nc + 1)) : NULL;
+    float a_small[PYBLI_WIDEN_SMALL * PYBLI_WIDEN_SMALL];
+    float b_small[PYBLI_WIDEN_SMALL * PYBLI_WIDEN_SMALL];
+    bool on_heap = !(a_half && a_buf == NULL) && !(b_half && b_buf == NULL);
+    if (!on_heap) {
+        free(a_buf);
+        free(b_buf);
+        a_buf = a_small;
+        b_buf = b_small;
+        mc = a_half ? bli_min(m, PYBLI_WIDEN_SMALL) : m;
+        nc = b_half ? bli_min(n, PYBLI_WIDEN_SMALL) : n;
+        kc = bli_min(k, PYBLI_WIDEN_SMALL);
+    }
+    float one = 1;
+
+    for (dim_t j = 0; j < n; j += nc) {
+        dim_t nb = bli_min(nc, n - j);
+        /* A single pass with ``k == 0`` scales ``c`` by ``beta`` */
+        dim_t p = 0;
+        do {
+            dim_t kb = bli_min(kc, k - p);
+            float* b_p;
+            inc_t rs_bp, cs_bp;
+            if (b_half) {
+                pybli_widen((uint16_t*)b + p * rso_b + j * cso_b, rso_b, cso_b,
+                            kb, nb, b_buf, nthreads);
+                b_p = b_buf;
+                rs_bp = nb;
+                cs_bp = 1;
+            } else {
+                b_p = (float*)b + p * rso_b + j * cso_b;
+                rs_bp = rso_b;
+                cs_bp = cso_b;
+            }
+            for (dim_t i = 0; i < m; i += mc) {
+                dim_t mb = bli_min(mc, m - i);
+                float* a_p;
+                inc_t rs_ap, cs_ap;
+                if (a_half) {
+                    pybli_widen((uint16_t*)a + i * rso_a + p * cso_a, rso_a,
+                                cso_a, mb, kb, a_buf, nthreads);
+                    a_p = a_buf;
+                    rs_ap = kb;
+                    cs_ap = 1;
+                } else {
+                    a_p = (float*)a + i * rso_a + p * cso_a;
+                    rs_ap = rso_a;
+                    cs_ap = cso_a;
+                }
+                bli_sgemm_ex(
+                    BLIS_NO_TRANSPOSE, BLIS_NO_TRANSPOSE,
+                    mb, nb, kb,
+                    &alpha,
+                    a_p, rs_ap, cs_ap,
+                    b_p, rs_bp, cs_bp,
+                    p == 0 ? &beta : &one,
+                    c + i * rsc + j * csc, rsc, csc,
+                    NULL,
+                    &rntm
+                );
+            }
+            p += kb;
+        } while (p < k);
+    }
+    if (on_heap) {
+        free(a_buf);
+        free(b_buf);
+    }
+}
+
+void pybli_gemm_mixed(
+    bool a_trans, bool a_conj,
+    bool b_trans, bool b_conj,
+    dim_t   m,
+    dim_t   n,
+    dim_t   k,
+    double alpha_real, double alpha_imag,
+    int a_dt, void*  a, inc_t rsa, inc_t csa,
+    int b_dt, void*  b, inc_t rsb, inc_t csb,
+    double beta_real, double beta_imag,
+    int c_dt, void*  c, inc_t rsc, inc_t csc,
+    int comp_prec,
+    dim_t nthreads
+) {
+    if (a_dt == PYBLI_HALF || b_dt == PYBLI_HALF) {
+        pybli_gemm_half(
+            a_trans, b_trans, m, n, k, alpha_real,
+            a_dt == PYBLI_HALF, a, rsa, csa,
+            b_dt == PYBLI_HALF, b, rsb, csb,
+            beta_real, c, rsc, csc, nthreads
+        );
+        return;
+    }
+    INIT_RNTM;
+    num_t dt_c = pybli_datatypes[c_dt];
+    /* Mixed datatype gemm only supports a real alpha, so a complex alpha is
+     * applied after computing ``a b + (beta / alpha) c`` */
+    bool scale_after = bli_is_complex(dt_c) && alpha_imag != 0;
+    dcomplex scale = {alpha_real, alpha_imag};
+    if (scale_after) {
+        double norm = alpha_real * alpha_real + alpha_imag * alpha_imag;
+        double real = (beta_real * alpha_real + beta_imag * alpha_imag) / norm;
+        double imag = (beta_imag * alpha_real - beta_real * alpha_imag) / norm;
+        alpha_real = 1.0;
+        alpha_imag = 0.0;
+        beta_real = real;
+        beta_imag = imag;
+    }
+    dcomplex alpha = {alpha_real, alpha_imag};
+    dcomplex beta = {beta_real, beta_imag};
+    /* Scalars are cast to the computation datatype by BLIS */
+    num_t dt_scalar = bli_is_complex(dt_c) ? BLIS_DCOMPLEX : BLIS_DOUBLE;
+
+    /* Initialized as in the typed API, which allows any strides */
+    obj_t alpha_o = BLIS_OBJECT_INITIALIZER_1X1;
+    obj_t beta_o = BLIS_OBJECT_INITIALIZER_1X1;
+    obj_t a_o = BLIS_OBJECT_INITIALIZER;
+    obj_t b_o = BLIS_OBJECT_INITIALIZER;
+    obj_t c_o = BLIS_OBJECT_INITIALIZER;
+    bli_obj_init_finish_1x1(dt_scalar, &alpha, &alpha_o);
+    bli_obj_init_finish_1x1(dt_scalar, &beta, &beta_o);
+    bli_obj_init_finish(
+        pybli_datatypes[a_dt], a_trans ? k : m, a_trans ? m : k,
+        a, rsa, csa, &a_o
+    );
+    bli_obj_init_finish(
+        pybli_datatypes[b_dt], b_trans ? n : k, b_trans ? k : n,
+        b, rsb, csb, &b_o
+    );
+    bli_obj_init_finish(dt_c, m, n, c, rsc, csc, &c_o);
+    bli_obj_set_conjtrans(from_trans_conj(a_trans, a_conj), &a_o);
+    bli_obj_set_conjtrans(from_trans_conj(b_trans, b_conj), &b_o);
+    if (comp_prec >= 0) {
+        bli_obj_set_comp_prec(
+            comp_prec ? BLIS_DOUBLE_PREC : BLIS_SINGLE_PREC, &c_o
+        );
+    }
+    bli_gemm_ex(&alpha_o, &a_o, &b_o, &beta_o, &c_o, NULL, &rntm);
+    if (scale_after) {
+        obj_t scale_o = BLIS_OBJECT_INITIALIZER_1X1;
+        bli_obj_init_finish_1x1(BLIS_DCOMPLEX, &scale, &scale_o);
+        bli_scalm_ex(&scale_o, &c_o, NULL, &rntm);
+    }
+}
+
+/* Batches with a shared operand
+ *
+ * When one operand is shared by every product in a batch, and the other
+ * operand and the output of each product tile one larger matrix in order
+ * (e.g. ``[a[i] @ w for i in range(n)]`` with ``a`` and the output
+ * contiguous), the batch is run as a single large product instead, which
+ * makes much better use of the caches and threads. The number of times this
+ * happens is counted, so callers can check whether it applies.
+ */
+static pthread_mutex_t pybli_collapsed_lock = PTHREAD_MUTEX_INITIALIZER;
+static int64_t pybli_collapsed = 0;
+
+int64_t pybli_get_collapsed_count(void) {
+    pthread_mutex_lock(&pybli_collapsed_lock);
+    int64_t out = pybli_collapsed;
+    pthread_mutex_unlock(&pybli_collapsed_lock);
+    return out;
+}
+
+void pybli_reset_collapsed_count(void) {
+    pthread_mutex_lock(&pybli_collapsed_lock);
+    pybli_collapsed = 0;
+    pthread_mutex_unlock(&pybli_collapsed_lock);
+}
+
+static void pybli_count_collapsed(void) {
+    pthread_mutex_lock(&pybli_collapsed_lock);
+    pybli_collapsed++;
+    pthread_mutex_unlock(&pybli_collapsed_lock);
+}
+
+/* Whether an operand with batch strides ``bs`` is the same matrix
+ * throughout the batch */
+static bool pybli_is_broadcast(dim_t ndim, dim_t* shape, inc_t* bs) {
+    for (dim_t d = 0; d < ndim; d++) {
+        if (shape[d] > 1 && bs[d] != 0) {
+            return false;
+        }
+    }
+    return true;
+}
+
+/* Whether the matrices of an operand with batch strides ``bs`` follow each
+ * other every ``step`` elements, in batch order */
+static bool pybli_is_tiled(dim_t ndim, dim_t* shape, inc_t* bs, inc_t step) {
+    for (dim_t d = ndim - 1; d >= 0; d--) {
+        if (shape[d] > 1 && bs[d] != step) {
+            return false;
+        }
+        step *= shape[d];
+    }
+    return true;
+}
+
+/* GEMM_BATCH
+ *
+ * A batch of products, where the batch may have any number of dimensions.
+ * Batch dimension ``d`` has extent ``batch_shape[d]``, and strides ``bsa[d]``,
+ * ``bsb[d]`` and ``bsc[d]`` (in elements) in ``a``, ``b`` and ``c``. A stride
+ * of 0 broadcasts an operand across that dimension.
+ */
+{% for T in all_types %}
+typedef struct {
+    trans_t transa;
+    trans_t transb;
+    dim_t m, n, k;
+    {{ T.ctype }} alpha;
+    {{ T.ctype }} beta;
+    {{ T.ctype }}* a; inc_t rsa, csa;
+    {{ T.ctype }}* b; inc_t rsb, csb;
+    {{ T.ctype }}* c; inc_t rsc, csc;
+    dim_t ndim;
+    dim_t* shape;
+    inc_t* bsa;
+    inc_t* bsb;
+    inc_t* bsc;
+    dim_t nthreads;
+} {{ T.char }}gemm_batch_t;
+
+static void {{ T.char }}gemm_batch_task(dim_t i, void* data) {
+    {{ T.char }}gemm_batch_t* p = data;
+    {{ T.ctype }}* a = p->a;
+    {{ T.ctype }}* b = p->b;
+    {{ T.ctype }}* c = p->c;
+    for (dim_t d = p->ndim - 1; d >= 0; d--) {
+        dim_t j = i % p->shape[d];
+        i /= p->shape[d];
+        a += j * p->bsa[d];
+        b += j * p->bsb[d];
+        c += j * p->bsc[d];
+    }
+    rntm_t rntm = BLIS_RNTM_INITIALIZER;
+    bli_rntm_set_num_threads(p->nthreads, &rntm);
+    bli_{{ T.char }}gemm_ex(
+        p->transa, p->transb,
+        p->m, p->n, p->k,
+        &p->alpha,
+        a, p->rsa, p->csa,
+        b, p->rsb, p->csb,
+        &p->beta,
+        c, p->rsc, p->csc,
+        NULL,
+        &rntm
+    );
+}
+
+/* Run the whole batch as one product if it has a shared operand (see
+ * above). Returns whether it did. */
+static bool {{ T.char }}gemm_batch_collapse(
+    {{ T.char }}gemm_batch_t* p,
+    bool a_trans, bool a_conj,
+    bool b_trans, bool b_conj,
+    dim_t nbatch, dim_t nthreads
+) {
+    /* Strides of op_a(a) and op_b(b), ignoring conjugation */
+    inc_t rso_a = a_trans ? p->csa : p->rsa;
+    inc_t cso_a = a_trans ? p->rsa : p->csa;
+    inc_t rso_b = b_trans ? p->csb : p->rsb;
+    inc_t cso_b = b_trans ? p->rsb : p->csb;
+    dim_t m = p->m, n = p->n;
+
+    if (nbatch < 2 || m == 0 || n == 0) {
+        return false;
+    }
+    if (pybli_is_broadcast(p->ndim, p->shape, p->bsb) &&
+            pybli_is_tiled(p->ndim, p->shape, p->bsa, m * rso_a) &&
+            pybli_is_tiled(p->ndim, p->shape, p->bsc, m * p->rsc)) {
+        m *= nbatch;
+    } else if (pybli_is_broadcast(p->ndim, p->shape, p->bsa) &&
+            pybli_is_tiled(p->ndim, p->shape, p->bsb, n * cso_b) &&
+            pybli_is_tiled(p->ndim, p->shape, p->bsc, n * p->csc)) {
+        n *= nbatch;
+    } else {
+        return false;
+    }
+    rntm_t rntm = BLIS_RNTM_INITIALIZER;
+    bli_rntm_set_num_threads(nthreads, &rntm);
+    bli_{{ T.char }}gemm_ex(
+        from_trans_conj(false, a_conj),
+        from_trans_conj(false, b_conj),
+        m, n, p->k,
+        &p->alpha,
+        p->a, rso_a, cso_a,
+        p->b, rso_b, cso_b,
+        &p->beta,
+        p->c, p->rsc, p->csc,
+        NULL,
+        &rntm
+    );
+    pybli_count_collapsed();
+    return true;
+}
+
+void pybli_{{ T.char }}gemm_batch(
+    bool a_trans, bool a_conj,
+    bool b_trans, bool b_conj,
+    dim_t   m,
+    dim_t   n,
+    dim_t   k,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.ctype }}*  b, inc_t rsb, inc_t csb,
+    {{ T.scalar_sig("beta") }},
+    {{T.ctype }}*  c, inc_t rsc, inc_t csc,
+    dim_t batch_ndim, dim_t* batch_shape,
+    inc_t* bsa, inc_t* bsb, inc_t* bsc,
+    dim_t nthreads
+) {
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    dim_t nbatch = 1;
+    for (dim_t d = 0; d < batch_ndim; d++) {
+        nbatch *= batch_shape[d];
+    }
+    nthreads = pybli_resolve_nthreads(nthreads);
+    dim_t outer, inner;
+    pybli_batch_threads(nbatch, m, n, k, nthreads, &outer, &inner);
+    {{ T.char }}gemm_batch_t p = {
+        from_trans_conj(a_trans, a_conj),
+        from_trans_conj(b_trans, b_conj),
+        m, n, k,
+        alpha, beta,
+        a, rsa, csa,
+        b, rsb, csb,
+        c, rsc, csc,
+        batch_ndim, batch_shape, bsa, bsb, bsc,
+        inner
+    };
+    if ({{ T.char }}gemm_batch_collapse(
+            &p, a_trans, a_conj, b_trans, b_conj, nbatch, nthreads)) {
+        return;
+    }
+    pybli_parallel_for(nbatch, outer, {{ T.char }}gemm_batch_task, &p);
+}
+{% endfor %}
+
+/* GEMM_BATCH_STRIDED
+ *
+ * A batch of identically shaped products with a single batch stride per
+ * operand. These are typically many tiny products, so the batch is always
+ * spread across the threads, with each product single threaded.
+ */
+{% for T in all_types %}
+void pybli_{{ T.char }}gemm_batch_strided(
+    bool a_trans, bool a_conj,
+    bool b_trans, bool b_conj,
+    dim_t   m,
+    dim_t   n,
+    dim_t   k,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.ctype }}*  b, inc_t rsb, inc_t csb,
+    {{ T.scalar_sig("beta") }},
+    {{T.ctype }}*  c, inc_t rsc, inc_t csc,
+    dim_t batch, inc_t bsa, inc_t bsb, inc_t bsc,
+    dim_t nthreads
+) {
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    nthreads = pybli_resolve_nthreads(nthreads);
+    dim_t inner = batch > 1 ? 1 : nthreads;
+    {{ T.char }}gemm_batch_t p = {
+        from_trans_conj(a_trans, a_conj),
+        from_trans_conj(b_trans, b_conj),
+        m, n, k,
+        alpha, beta,
+        a, rsa, csa,
+        b, rsb, csb,
+        c, rsc, csc,
+        1, &batch, &bsa, &bsb, &bsc,
+        inner
+    };
+    if ({{ T.char }}gemm_batch_collapse(
+            &p, a_trans, a_conj, b_trans, b_conj, batch, nthreads)) {
+        return;
+    }
+    pybli_parallel_for(batch, nthreads, {{ T.char }}gemm_batch_task, &p);
+}
+{% endfor %}
+
+/* GEMM_GROUPED
+ *
+ * A group of independent products of varying sizes. Each problem is one row
+ * of ``desc``, laid out as:
+ *
+ *   (m, n, k, a, rsa, csa, b, rsb, csb, c, rsc, csc)
+ *
+ * Problems are handed out to the threads largest first, so the ones left
+ * over at the end of the group are the cheapest.
+ */
+#define PYBLI_GROUP_NDESC 12
+
+typedef struct {
+    double cost;
+    dim_t index;
+} pybli_cost_t;
+
+static int pybli_cost_cmp(const void* x, const void* y) {
+    double cx = ((const pybli_cost_t*)x)->cost;
+    double cy = ((const pybli_cost_t*)y)->cost;
+    return (cx < cy) - (cx > cy);
+}
+
+/* Order the problems in ``desc`` by decreasing number of multiply-adds.
+ * Returns NULL if either buffer couldn't be allocated, in which case the
+ * caller runs the problems unsorted. */
+static dim_t* pybli_group_order(dim_t nprob, int64_t* desc) {
+    pybli_cost_t* costs = malloc(sizeof(pybli_cost_t) * nprob);
+    if (costs == NULL) {
+        return NULL;
+    }
+    dim_t* order = malloc(sizeof(dim_t) * nprob);
+    if (order == NULL) {
+        free(costs);
+        return NULL;
+    }
+    for (dim_t i = 0; i < nprob; i++) {
+        int64_t* d = desc + PYBLI_GROUP_NDESC * i;
+        costs[i].cost = (double)d[0] * d[1] * d[2];
+        costs[i].index = i;
+    }
+    qsort(costs, nprob, sizeof(pybli_cost_t), pybli_cost_cmp);
+    for (dim_t i = 0; i < nprob; i++) {
+        order[i] = costs[i].index;
+    }
+    free(costs);
+    return order;
+}
+
+/* Check whether the problems in ``desc`` share one operand and tile one
+ * larger product in order (see "Batches with a shared operand"). If so,
+ * ``fused`` is set to the descriptor of that product. */
+static bool pybli_group_fuse(
+    dim_t nprob, int64_t* desc, int64_t size, int64_t* fused
+) {
+    if (nprob < 2) {
+        return false;
+    }
+    int64_t* d0 = desc;
+    int64_t m = d0[0], n = d0[1];
+    bool rows = true, cols = true;
+    for (dim_t i = 1; i < nprob && (rows || cols); i++) {
+        int64_t* prev = desc + PYBLI_GROUP_NDESC * (i - 1);
+        int64_t* d = desc + PYBLI_GROUP_NDESC * i;
+        bool same_strides = (d[4] == d0[4] && d[5] == d0[5] &&
+                             d[7] == d0[7] && d[8] == d0[8] &&
+                             d[10] == d0[10] && d[11] == d0[11] &&
+                             d[2] == d0[2]);
+        /* Shared b, with a and c stacked by rows */
+        rows = (rows && same_strides && d[1] == d0[1] && d[6] == d0[6] &&
+                d[3] == prev[3] + prev[0] * prev[4] * size &&
+                d[9] == prev[9] + prev[0] * prev[10] * size);
+        /* Shared a, with b and c stacked by columns */
+        cols = (cols && same_strides && d[0] == d0[0] && d[3] == d0[3] &&
+                d[6] == prev[6] + prev[1] * prev[8] * size &&
+                d[9] == prev[9] + prev[1] * prev[11] * size);
+        m += d[0];
+        n += d[1];
+    }
+    if (!rows && !cols) {
+        return false;
+    }
+    memcpy(fused, d0, sizeof(int64_t) * PYBLI_GROUP_NDESC);
+    if (rows) {
+        fused[0] = m;
+    } else {
+        fused[1] = n;
+    }
+    return true;
+}
+
+{% for T in all_types %}
+typedef struct {
+    {{ T.ctype }} alpha;
+    {{ T.ctype }} beta;
+    int64_t* desc;
+    dim_t* order;
+    dim_t nthreads;
+} {{ T.char }}gemm_group_t;
+
+static void {{ T.char }}gemm_group_task(dim_t i, void* data) {
+    {{ T.char }}gemm_group_t* p = data;
+    int64_t* d = p->desc + PYBLI_GROUP_NDESC * (p->order ? p->order[i] : i);
+    rntm_t rntm = BLIS_RNTM_INITIALIZER;
+    bli_rntm_set_num_threads(p->nthreads, &rntm);
+    bli_{{ T.char }}gemm_ex(
+        BLIS_NO_TRANSPOSE, BLIS_NO_TRANSPOSE,
+        d[0], d[1], d[2],
+        &p->alpha,
+        ({{ T.ctype }}*)(intptr_t)d[3], d[4], d[5],
+        ({{ T.ctype }}*)(intptr_t)d[6], d[7], d[8],
+        &p->beta,
+        ({{ T.ctype }}*)(intptr_t)d[9], d[10], d[11],
+        NULL,
+        &rntm
+    );
+}
+
+void pybli_{{ T.char }}gemm_group(
+    {{ T.scalar_sig("alpha") }},
+    {{ T.scalar_sig("beta") }},
+    dim_t nprob, int64_t* desc,
+    dim_t nthreads
+) {
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    if (nprob <= 0) {
+        return;
+    }
+    nthreads = pybli_resolve_nthreads(nthreads);
+    int64_t fused[PYBLI_GROUP_NDESC];
+    if (pybli_group_fuse(nprob, desc, sizeof({{ T.ctype }}), fused)) {
+        {{ T.char }}gemm_group_t p = {alpha, beta, fused, NULL, nthreads};
+        {{ T.char }}gemm_group_task(0, &p);
+        pybli_count_collapsed();
+        return;
+    }
+    dim_t outer = bli_min(nprob, nthreads);
+    /* If the order can't be allocated the problems are run unsorted (as
+     * given in ``desc``), the same results in a less balanced schedule */
+    dim_t* order = pybli_group_order(nprob, desc);
+    {{ T.char }}gemm_group_t p = {alpha, beta, desc, order, nthreads / outer};
+    pybli_parallel_for(nprob, outer, {{ T.char }}gemm_group_task, &p);
+    free(order);
+}
+{% endfor %}
+
+/* GEMM_PLANAR
+ *
+ * A complex product on planar storage, where the real and imaginary parts
+ * of each operand are separate real matrices. Computed with four real
+ * products:
+ *
+ *   c_r = alpha (a_r b_r - a_i b_i) + beta c_r
+ *   c_i = alpha (a_r b_i + a_i b_r) + beta c_i
+ *
+ * Conjugating an operand negates the terms with its imaginary part.
+ */
+{% for T in all_types if not T.is_complex %}
+void pybli_{{ T.char }}gemm_planar(
+    bool a_trans, bool a_conj,
+    bool b_trans, bool b_conj,
+    dim_t   m,
+    dim_t   n,
+    dim_t   k,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  ar, inc_t rsar, inc_t csar,
+    {{ T.ctype }}*  ai, inc_t rsai, inc_t csai,
+    {{ T.ctype }}*  br, inc_t rsbr, inc_t csbr,
+    {{ T.ctype }}*  bi, inc_t rsbi, inc_t csbi,
+    {{ T.scalar_sig("beta") }},
+    {{ T.ctype }}*  cr, inc_t rscr, inc_t cscr,
+    {{ T.ctype }}*  ci, inc_t rsci, inc_t csci,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    trans_t ta = from_trans_conj(a_trans, false);
+    trans_t tb = from_trans_conj(b_trans, false);
+    {{ T.ctype }} one = 1;
+    {{ T.ctype }} alpha_ii = (a_conj == b_conj) ? -alpha : alpha;
+    {{ T.ctype }} alpha_ri = b_conj ? -alpha : alpha;
+    {{ T.ctype }} alpha_ir = a_conj ? -alpha : alpha;
+
+    bli_{{ T.char }}gemm_ex(ta, tb, m, n, k, &alpha, ar, rsar, csar,
+                   br, rsbr, csbr, &beta, cr, rscr, cscr, NULL, &rntm);
+    bli_{{ T.char }}gemm_ex(ta, tb, m, n, k, &alpha_ii, ai, rsai, csai,
+                   bi, rsbi, csbi, &one, cr, rscr, cscr, NULL, &rntm);
+    bli_{{ T.char }}gemm_ex(ta, tb, m, n, k, &alpha_ri, ar, rsar, csar,
+                   bi, rsbi, csbi, &beta, ci, rsci, csci, NULL, &rntm);
+    bli_{{ T.char }}gemm_ex(ta, tb, m, n, k, &alpha_ir, ai, rsai, csai,
+                   br, rsbr, csbr, &one, ci, rsci, csci, NULL, &rntm);
+}
+{% endfor %}
+
+/* GEMMT */
+{% for T in all_types %}
+void pybli_{{ T.char }}gemmt(
+    bool a_trans, bool a_conj,
+    bool b_trans, bool b_conj,
+    bool c_upper,
+    dim_t   m,
+    dim_t   k,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.ctype }}*  b, inc_t rsb, inc_t csb,
+    {{ T.scalar_sig("beta") }},
+    {{T.ctype }}*  c, inc_t rsc, inc_t csc,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    bli_{{ T.char }}gemmt_ex(
+        from_upper(c_upper),
+        from_trans_conj(a_trans, a_conj),
+        from_trans_conj(b_trans, b_conj),
+        m, k,
+        &alpha,
+        a, rsa, csa,
+        b, rsb, csb,
+        &beta,
+        c, rsc, csc,
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
+
+/* SYMM */
+{% for T in all_types %}
+void pybli_{{ T.char }}symm(
+    bool a_right,
+    bool a_upper,
+    bool a_conj,
+    bool b_trans, bool b_conj,
+    dim_t   m,
+    dim_t   n,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.ctype }}*  b, inc_t rsb, inc_t csb,
+    {{ T.scalar_sig("beta") }},
+    {{T.ctype }}*  c, inc_t rsc, inc_t csc,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    bli_{{ T.char }}symm_ex(
+        from_right(a_right),
+        from_upper(a_upper),
+        from_conj(a_conj),
+        from_trans_conj(b_trans, b_conj),
+        m, n,
+        &alpha,
+        a, rsa, csa,
+        b, rsb, csb,
+        &beta,
+        c, rsc, csc,
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
 
-/* GEMM */
+/* HEMM */
 {% for T in all_types %}
-void pybli_{{ T.char }}gemm(
-    bool a_trans, bool a_conj,
+void pybli_{{ T.char }}hemm(
+    bool a_right,
+    bool a_upper,
+    bool a_conj,
     bool b_trans, bool b_conj,
     dim_t   m,
     dim_t   n,
-    dim_t   k,
-    {{ T.alpha_sig }},
+    {{ T.scalar_sig("alpha") }},
     {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
     {{ T.ctype }}*  b, inc_t rsb, inc_t csb,
-    {{ T.beta_sig }},
+    {{ T.scalar_sig("beta") }},
     {{T.ctype }}*  c, inc_t rsc, inc_t csc,
     dim_t nthreads
 ) {
     INIT_RNTM;
     {% if T.is_complex %}
-    {{ T.alpha_init }};
-    {{ T.beta_init }};
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
     {% endif %}
-    bli_{{ T.char }}gemm_ex(
-        from_trans_conj(a_trans, a_conj),
+    bli_{{ T.char }}hemm_ex(
+        from_right(a_right),
+        from_upper(a_upper),
+        from_conj(a_conj),
         from_trans_conj(b_trans, b_conj),
-        m, n, k,
+        m, n,
         &alpha,
         a, rsa, csa,
         b, rsb, csb,
@@ -59,25 +1065,132 @@ void pybli_{{ T.char }}gemm(
 }
 {% endfor %}
 
+/* SYRK/HERK with fused triangle mirroring
+ *
+ * Computes the lower triangle one block row at a time (an off-diagonal GEMM
+ * panel plus a diagonal rank-k block), and mirrors each block row into the
+ * upper triangle immediately after, while it is still in cache. This avoids
+ * a separate full pass over the output (as in rank-k update + mksymm). An
+ * upper triangle is handled by operating on the transpose of C.
+ */
+#define PYBLI_FUSED_MB 128
+{% for T in all_types %}
+{% for op, herm in [("syrk", False), ("herk", True)] %}
+static void {{ T.char }}{{ op }}_full(
+    bool a_trans,
+    bool a_conj,
+    bool c_upper,
+    dim_t   m,
+    dim_t   k,
+    {{ T.ctype }}*  alpha,
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.ctype }}*  beta,
+    {{ T.ctype }}*  c, inc_t rsc, inc_t csc,
+    rntm_t* rntm
+) {
+    {% if herm and T.is_complex %}
+    {{ T.rtype }} alpha_r = alpha->real;
+    {{ T.rtype }} beta_r = beta->real;
+    {% endif %}
+    if (c_upper) {
+        inc_t tmp = rsc;
+        rsc = csc;
+        csc = tmp;
+        {% if herm %}
+        a_conj = !a_conj;
+        {% endif %}
+    }
+    /* Strides of op_a(a), ignoring conjugation */
+    inc_t rso = a_trans ? csa : rsa;
+    inc_t cso = a_trans ? rsa : csa;
+
+    for (dim_t i = 0; i < m; i += PYBLI_FUSED_MB) {
+        dim_t ib = bli_min(PYBLI_FUSED_MB, m - i);
+        {{ T.ctype }}* ai = a + i * rso;
+        {{ T.ctype }}* ci = c + i * rsc;
+
+        if (i > 0) {
+            bli_{{ T.char }}gemm_ex(
+                from_trans_conj(false, a_conj),
+                {% if herm %}
+                from_trans_conj(true, !a_conj),
+                {% else %}
+                from_trans_conj(true, a_conj),
+                {% endif %}
+                ib, i, k,
+                alpha,
+                ai, rso, cso,
+                a, rso, cso,
+                beta,
+                ci, rsc, csc,
+                NULL,
+                rntm
+            );
+        }
+        bli_{{ T.char }}{{ op }}_ex(
+            BLIS_LOWER,
+            from_trans_conj(false, a_conj),
+            ib, k,
+            {% if herm and T.is_complex %}
+            &alpha_r,
+            {% else %}
+            alpha,
+            {% endif %}
+            ai, rso, cso,
+            {% if herm and T.is_complex %}
+            &beta_r,
+            {% else %}
+            beta,
+            {% endif %}
+            ci + i * csc, rsc, csc,
+            NULL,
+            rntm
+        );
+        for (dim_t j = 0; j < i + ib; j++) {
+            for (dim_t ii = bli_max(j - i + 1, 0); ii < ib; ii++) {
+                {{ T.ctype }}* src = ci + ii * rsc + j * csc;
+                {{ T.ctype }}* dst = c + j * rsc + (i + ii) * csc;
+                {% if herm and T.is_complex %}
+                dst->real = src->real;
+                dst->imag = -src->imag;
+                {% else %}
+                *dst = *src;
+                {% endif %}
+            }
+        }
+    }
+}
+{% endfor %}
+{% endfor %}
+
 /* SYRK */
 {% for T in all_types %}
 void pybli_{{ T.char }}syrk(
     bool a_trans,
     bool a_conj,
     bool c_upper,
+    bool c_full,
     dim_t   m,
     dim_t   k,
-    {{ T.alpha_sig }},
+    {{ T.scalar_sig("alpha") }},
     {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
-    {{ T.beta_sig }},
+    {{ T.scalar_sig("beta") }},
     {{T.ctype }}*  c, inc_t rsc, inc_t csc,
     dim_t nthreads
 ) {
     INIT_RNTM;
     {% if T.is_complex %}
-    {{ T.alpha_init }};
-    {{ T.beta_init }};
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
     {% endif %}
+    if (c_full) {
+        {{ T.char }}syrk_full(
+            a_trans, a_conj, c_upper, m, k,
+            &alpha, a, rsa, csa, &beta, c, rsc, csc,
+            &rntm
+        );
+        return;
+    }
     bli_{{ T.char }}syrk_ex(
         from_upper(c_upper),
         from_trans_conj(a_trans, a_conj),
@@ -92,6 +1205,122 @@ void pybli_{{ T.char }}syrk(
 }
 {% endfor %}
 
+/* HERK */
+{% for T in all_types %}
+void pybli_{{ T.char }}herk(
+    bool a_trans,
+    bool a_conj,
+    bool c_upper,
+    bool c_full,
+    dim_t   m,
+    dim_t   k,
+    {{ T.scalar_sig("alpha", real=True) }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.scalar_sig("beta", real=True) }},
+    {{T.ctype }}*  c, inc_t rsc, inc_t csc,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    if (c_full) {
+        {% if T.is_complex %}
+        {{ T.ctype }} alpha_c = {alpha, 0};
+        {{ T.ctype }} beta_c = {beta, 0};
+        {% else %}
+        {{ T.ctype }} alpha_c = alpha;
+        {{ T.ctype }} beta_c = beta;
+        {% endif %}
+        {{ T.char }}herk_full(
+            a_trans, a_conj, c_upper, m, k,
+            &alpha_c, a, rsa, csa, &beta_c, c, rsc, csc,
+            &rntm
+        );
+        return;
+    }
+    bli_{{ T.char }}herk_ex(
+        from_upper(c_upper),
+        from_trans_conj(a_trans, a_conj),
+        m, k,
+        &alpha,
+        a, rsa, csa,
+        &beta,
+        c, rsc, csc,
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
+
+/* SYR2K */
+{% for T in all_types %}
+void pybli_{{ T.char }}syr2k(
+    bool a_trans, bool a_conj,
+    bool b_trans, bool b_conj,
+    bool c_upper,
+    dim_t   m,
+    dim_t   k,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.ctype }}*  b, inc_t rsb, inc_t csb,
+    {{ T.scalar_sig("beta") }},
+    {{T.ctype }}*  c, inc_t rsc, inc_t csc,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    bli_{{ T.char }}syr2k_ex(
+        from_upper(c_upper),
+        from_trans_conj(a_trans, a_conj),
+        from_trans_conj(b_trans, b_conj),
+        m, k,
+        &alpha,
+        a, rsa, csa,
+        b, rsb, csb,
+        &beta,
+        c, rsc, csc,
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
+
+/* HER2K */
+{% for T in all_types %}
+void pybli_{{ T.char }}her2k(
+    bool a_trans, bool a_conj,
+    bool b_trans, bool b_conj,
+    bool c_upper,
+    dim_t   m,
+    dim_t   k,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.ctype }}*  b, inc_t rsb, inc_t csb,
+    {{ T.scalar_sig("beta", real=True) }},
+    {{T.ctype }}*  c, inc_t rsc, inc_t csc,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {% endif %}
+    bli_{{ T.char }}her2k_ex(
+        from_upper(c_upper),
+        from_trans_conj(a_trans, a_conj),
+        from_trans_conj(b_trans, b_conj),
+        m, k,
+        &alpha,
+        a, rsa, csa,
+        b, rsb, csb,
+        &beta,
+        c, rsc, csc,
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
+
 /* MKSYMM */
 {% for T in all_types %}
 void pybli_{{ T.char }}mksymm(
@@ -110,3 +1339,290 @@ void pybli_{{ T.char }}mksymm(
     );
 }
 {% endfor %}
+
+/* MKHERM */
+{% for T in all_types %}
+void pybli_{{ T.char }}mkherm(
+    bool upper,
+    dim_t   m,
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    dim_t nthreads
+) {
+    INIT_RNTM;
+    bli_{{ T.char }}mkherm_ex(
+        from_upper(upper),
+        m,
+        a, rsa, csa,
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
+
+/* SYRK_BATCH and MKSYMM_BATCH
+ *
+ * Many independent rank-k updates (optionally mirrored into full symmetric
+ * matrices) or triangle mirrorings, spread across the threads. The problems
+ * are either a single strided stack (``desc`` is NULL, and problem ``i`` is
+ * offset by ``i * bsa`` and ``i * bsc``), or a group with one row per problem
+ * in ``desc``, laid out as:
+ *
+ *   syrk:   (m, k, a, rsa, csa, c, rsc, csc)
+ *   mksymm: (m, a, rsa, csa)
+ */
+#define PYBLI_SYRK_NDESC 8
+#define PYBLI_MKSYMM_NDESC 4
+
+/* Split ``nthreads`` across ``nprob`` problems of unknown sizes */
+static void pybli_group_threads(
+    dim_t nprob, dim_t nthreads, dim_t* outer, dim_t* inner
+) {
+    *outer = bli_max(bli_min(nprob, nthreads), 1);
+    *inner = nthreads / *outer;
+}
+
+{% for T in all_types %}
+typedef struct {
+    bool a_trans, a_conj;
+    bool c_upper, c_full;
+    {{ T.ctype }} alpha;
+    {{ T.ctype }} beta;
+    dim_t m, k;
+    {{ T.ctype }}* a; inc_t rsa, csa;
+    {{ T.ctype }}* c; inc_t rsc, csc;
+    inc_t bsa, bsc;
+    int64_t* desc;
+    dim_t nthreads;
+} {{ T.char }}syrk_batch_t;
+
+static void {{ T.char }}syrk_batch_task(dim_t i, void* data) {
+    {{ T.char }}syrk_batch_t* p = data;
+    dim_t m = p->m, k = p->k;
+    {{ T.ctype }}* a; inc_t rsa = p->rsa, csa = p->csa;
+    {{ T.ctype }}* c; inc_t rsc = p->rsc, csc = p->csc;
+    if (p->desc != NULL) {
+        int64_t* d = p->desc + PYBLI_SYRK_NDESC * i;
+        m = d[0];
+        k = d[1];
+        a = ({{ T.ctype }}*)(intptr_t)d[2];
+        rsa = d[3];
+        csa = d[4];
+        c = ({{ T.ctype }}*)(intptr_t)d[5];
+        rsc = d[6];
+        csc = d[7];
+    } else {
+        a = p->a + i * p->bsa;
+        c = p->c + i * p->bsc;
+    }
+    rntm_t rntm = BLIS_RNTM_INITIALIZER;
+    bli_rntm_set_num_threads(p->nthreads, &rntm);
+    if (p->c_full) {
+        {{ T.char }}syrk_full(
+            p->a_trans, p->a_conj, p->c_upper, m, k,
+            &p->alpha, a, rsa, csa, &p->beta, c, rsc, csc,
+            &rntm
+        );
+        return;
+    }
+    bli_{{ T.char }}syrk_ex(
+        from_upper(p->c_upper),
+        from_trans_conj(p->a_trans, p->a_conj),
+        m, k,
+        &p->alpha,
+        a, rsa, csa,
+        &p->beta,
+        c, rsc, csc,
+        NULL,
+        &rntm
+    );
+}
+
+void pybli_{{ T.char }}syrk_batch(
+    bool a_trans,
+    bool a_conj,
+    bool c_upper,
+    bool c_full,
+    dim_t   m,
+    dim_t   k,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    {{ T.scalar_sig("beta") }},
+    {{T.ctype }}*  c, inc_t rsc, inc_t csc,
+    dim_t batch, inc_t bsa, inc_t bsc,
+    dim_t nthreads
+) {
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    dim_t outer, inner;
+    pybli_batch_threads(
+        batch, m, m, k, pybli_resolve_nthreads(nthreads), &outer, &inner
+    );
+    {{ T.char }}syrk_batch_t p = {
+        a_trans, a_conj,
+        c_upper, c_full,
+        alpha, beta,
+        m, k,
+        a, rsa, csa,
+        c, rsc, csc,
+        bsa, bsc,
+        NULL,
+        inner
+    };
+    pybli_parallel_for(batch, outer, {{ T.char }}syrk_batch_task, &p);
+}
+
+void pybli_{{ T.char }}syrk_group(
+    bool a_trans,
+    bool a_conj,
+    bool c_upper,
+    bool c_full,
+    {{ T.scalar_sig("alpha") }},
+    {{ T.scalar_sig("beta") }},
+    dim_t nprob, int64_t* desc,
+    dim_t nthreads
+) {
+    {% if T.is_complex %}
+    {{ T.scalar_init("alpha") }};
+    {{ T.scalar_init("beta") }};
+    {% endif %}
+    dim_t outer, inner;
+    pybli_group_threads(
+        nprob, pybli_resolve_nthreads(nthreads), &outer, &inner
+    );
+    {{ T.char }}syrk_batch_t p = {
+        a_trans, a_conj,
+        c_upper, c_full,
+        alpha, beta,
+        0, 0,
+        NULL, 0, 0,
+        NULL, 0, 0,
+        0, 0,
+        desc,
+        inner
+    };
+    pybli_parallel_for(nprob, outer, {{ T.char }}syrk_batch_task, &p);
+}
+
+typedef struct {
+    bool upper;
+    dim_t m;
+    {{ T.ctype }}* a; inc_t rsa, csa;
+    inc_t bsa;
+    int64_t* desc;
+    dim_t nthreads;
+} {{ T.char }}mksymm_batch_t;
+
+static void {{ T.char }}mksymm_batch_task(dim_t i, void* data) {
+    {{ T.char }}mksymm_batch_t* p = data;
+    dim_t m = p->m;
+    {{ T.ctype }}* a; inc_t rsa = p->rsa, csa = p->csa;
+    if (p->desc != NULL) {
+        int64_t* d = p->desc + PYBLI_MKSYMM_NDESC * i;
+        m = d[0];
+        a = ({{ T.ctype }}*)(intptr_t)d[1];
+        rsa = d[2];
+        csa = d[3];
+    } else {
+        a = p->a + i * p->bsa;
+    }
+    rntm_t rntm = BLIS_RNTM_INITIALIZER;
+    bli_rntm_set_num_threads(p->nthreads, &rntm);
+    bli_{{ T.char }}mksymm_ex(
+        from_upper(p->upper),
+        m,
+        a, rsa, csa,
+        NULL,
+        &rntm
+    );
+}
+
+void pybli_{{ T.char }}mksymm_batch(
+    bool upper,
+    dim_t   m,
+    {{ T.ctype }}*  a, inc_t rsa, inc_t csa,
+    dim_t batch, inc_t bsa,
+    dim_t nthreads
+) {
+    dim_t outer, inner;
+    pybli_group_threads(
+        batch, pybli_resolve_nthreads(nthreads), &outer, &inner
+    );
+    {{ T.char }}mksymm_batch_t p = {upper, m, a, rsa, csa, bsa, NULL, inner};
+    pybli_parallel_for(batch, outer, {{ T.char }}mksymm_batch_task, &p);
+}
+
+void pybli_{{ T.char }}mksymm_group(
+    bool upper,
+    dim_t nprob, int64_t* desc,
+    dim_t nthreads
+) {
+    dim_t outer, inner;
+    pybli_group_threads(
+        nprob, pybli_resolve_nthreads(nthreads), &outer, &inner
+    );
+    {{ T.char }}mksymm_batch_t p = {upper, 0, NULL, 0, 0, 0, desc, inner};
+    pybli_parallel_for(nprob, outer, {{ T.char }}mksymm_batch_task, &p);
+}
+{% endfor %}
+
+/* Operations generated from the specs in pyblis/_spec.py */
+{% for op in ops %}
+/* {{ op.name|upper }} */
+{% for T in all_types %}
+void pybli_{{ T.char }}{{ op.name }}(
+    {{ op.c_params(T)|join(",\n    ") }}
+) {
+    INIT_RNTM;
+    {%- if T.is_complex %}
+    {%- for s in op.op.scalars if not s.real %}
+    {{ T.scalar_init(s.name) }};
+    {%- endfor %}
+    {%- endif %}
+    bli_{{ T.char }}{{ op.name }}_ex(
+        {{ op.c_call(T)|join(",\n        ") }},
+        NULL,
+        &rntm
+    );
+}
+{% endfor %}
+{%- endfor %}
+
+/* C API
+ *
+ * A table of every public function above, looked up by name (without the
+ * ``pybli_`` prefix). Exported to compiled extensions through the
+ * ``pyblis._lib._C_API`` capsule, see ``pyblis/pyblis.h`` for the types.
+ */
+
+/* pyblis.h spells dim_t and inc_t as int64_t */
+typedef char pybli_check_dim_t[sizeof(dim_t) == sizeof(int64_t) ? 1 : -1];
+typedef char pybli_check_inc_t[sizeof(inc_t) == sizeof(int64_t) ? 1 : -1];
+
+typedef struct {
+    const char* name;
+    void* func;
+} pybli_capi_entry_t;
+
+typedef struct {
+    int version;
+    int64_t size;
+    const pybli_capi_entry_t* entries;
+} pybli_capi_t;
+
+static const pybli_capi_entry_t pybli_capi_entries[] = {
+{%- for k in kernels %}
+    {"{{ k.name }}", (void*)pybli_{{ k.name }}},
+{%- endfor %}
+};
+
+static const pybli_capi_t pybli_capi = {
+    {{ capi_version }},
+    sizeof(pybli_capi_entries) / sizeof(pybli_capi_entry_t),
+    pybli_capi_entries
+};
+
+const void* pybli_get_capi(void) {
+    return &pybli_capi;
+}
@@ -1,5 +1,33 @@
 from . import lib
-from ._wrappers import dot
+from ._wrappers import dot, matmul
+from .lib import (gemm_grouped, gemm_planar, gemm_blocksparse,
+                  set_num_threads, get_num_threads)
+from ._dispatch import (patch_numpy, unpatch_numpy, is_numpy_patched,
+                        numpy_patched, get_dispatch_counts,
+                        reset_dispatch_counts)
+from ._auto import AutoDot, auto_dot
+from ._packed import PackedSymmetric
+from ._structured import Symmetric, Hermitian, Triangular
+
+try:
+    # Requires threadpoolctl >= 3.2, for custom controllers
+    from . import _threadpool
+except ImportError:
+    pass
+else:
+    _threadpool.register()
+
+def get_include():
+    """The directory containing ``pyblis.h``, ``capi.pxd`` and
+    ``pyblis_cblas.h``, for building extensions against the pyblis C API."""
+    import os
+    return os.path.dirname(os.path.abspath(__file__))
+
+def get_library():
+    """The path of the pyblis shared library, for linking native code against
+    its CBLAS interface (see ``pyblis_cblas.h``)."""
+    from . import _lib
+    return _lib.libblis._name
 
 def _init_numba():
     """Initialize the numba extension"""
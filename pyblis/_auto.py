@@ -0,0 +1,251 @@
+"""Per-shape selection between pyblis and NumPy's BLAS for ``dot``"""
+import atexit
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from . import _dispatch, _wrappers
+
+_DTYPES = _dispatch._DTYPES
+
+_BACKENDS = ("pyblis", "numpy")
+
+# Weight of a new sample in the running time of a backend
+_SMOOTHING = 0.25
+
+# Timed runs of each backend when calibrating a new key, after a warm-up run
+_CALIBRATION_REPEATS = 3
+
+_TABLE_VERSION = 1
+
+
+def _layout(a):
+    if a.flags.c_contiguous:
+        return "C"
+    elif a.flags.f_contiguous:
+        return "F"
+    return "S"
+
+
+def _bucket(shape):
+    """Dimensions rounded down to a power of 2, as exponents"""
+    return tuple(d.bit_length() for d in shape)
+
+
+class AutoDot(object):
+    """A ``dot`` choosing the faster of pyblis and NumPy per kind of call.
+
+    Calls are keyed by the dtype, the shapes of the operands bucketed by
+    powers of 2, their memory layouts, whether ``b`` is a transposed view
+    of ``a`` (computed with a rank-k update by pyblis), and whether an
+    ``out`` array is provided. The first call with a new key calibrates
+    it, running each backend once to warm up (starting threads, filling
+    caches), then timing a few more runs of each, alternating which backend
+    goes first and keeping the fastest time of each. Later calls with that
+    key use the faster backend.
+    Calls that only one backend supports (e.g. other dtypes, or an ``out``
+    NumPy rejects) go to that backend without timing, as do calls with an
+    ``out`` overlapping ``a`` or ``b``, which go to NumPy.
+
+    Parameters
+    ----------
+    path : str, optional
+        A JSON file to persist the decision table to. It's loaded on first
+        use if it exists, and saved on exit if anything changed. If not
+        provided the table is only kept in memory (see ``save`` and
+        ``load``).
+    sample_rate : float, optional
+        The fraction of calls with a known key that also time the other
+        backend, to recalibrate the table online (e.g. as load on the
+        machine changes). Each sample runs the product twice. Default is
+        0.01, 0 disables recalibration.
+
+    Examples
+    --------
+    >>> dot = pyblis.AutoDot("dot-table.json")
+    >>> res = dot(a, b)
+    >>> dot.backend_for(a, b)
+    'pyblis'
+    """
+    def __init__(self, path=None, sample_rate=0.01):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.path = path
+        self.sample_rate = sample_rate
+        self._times = {}
+        self._loaded = path is None
+        self._dirty = False
+        if path is not None:
+            atexit.register(self._save_if_dirty)
+
+    def _key(self, a, b, out):
+        return (a.dtype.name, _bucket(a.shape), _bucket(b.shape), _layout(a),
+                _layout(b),
+                a.ndim == b.ndim == 2 and _wrappers._is_transpose(a, b),
+                out is not None)
+
+    def _candidates(self, a, b, out):
+        """The backends supporting this call"""
+        if (type(a) is not np.ndarray or type(b) is not np.ndarray or
+                a.dtype not in _DTYPES or a.dtype != b.dtype or
+                not 1 <= a.ndim <= 2 or not 1 <= b.ndim <= 2):
+            return ("numpy",)
+        if out is not None:
+            if a.ndim == 1 and b.ndim == 1:
+                return ("numpy",)
+            # Writing into an operand is left to NumPy, which buffers it
+            if np.may_share_memory(out, a) or np.may_share_memory(out, b):
+                return ("numpy",)
+            if (type(out) is not np.ndarray or out.dtype != a.dtype or
+                    not out.flags.c_contiguous):
+                return ("pyblis",)
+        return _BACKENDS
+
+    def _run(self, backend, a, b, out, nthreads):
+        if backend == "pyblis":
+            return _wrappers.dot(a, b, out=out, nthreads=nthreads)
+        return _dispatch._numpy_dot(a, b, out=out)
+
+    def _timed(self, backend, a, b, out, nthreads):
+        start = time.perf_counter()
+        res = self._run(backend, a, b, out, nthreads)
+        return res, time.perf_counter() - start
+
+    def _record(self, key, backend, elapsed):
+        times = self._times.setdefault(key, {})
+        old = times.get(backend)
+        times[backend] = (elapsed if old is None else
+                          old + _SMOOTHING * (elapsed - old))
+        self._dirty = True
+
+    def _choose(self, key):
+        times = self._times.get(key)
+        if times is None or len(times) < len(_BACKENDS):
+            return None
+        return min(_BACKENDS, key=times.__getitem__)
+
+    def _calibrate(self, key, a, b, out, nthreads):
+        """Time both backends for a new key, returning the result"""
+        for backend in _BACKENDS:
+            res = self._run(backend, a, b, out, nthreads)
+        best = {}
+        for i in range(_CALIBRATION_REPEATS):
+            for backend in _BACKENDS[::1 if i % 2 else -1]:
+                res, elapsed = self._timed(backend, a, b, out, nthreads)
+                best[backend] = min(elapsed, best.get(backend, elapsed))
+        for backend, elapsed in best.items():
+            self._record(key, backend, elapsed)
+        return res
+
+    def __call__(self, a, b, out=None, nthreads=-1):
+        """Compute ``np.dot(a, b)`` with the faster backend.
+
+        Parameters
+        ----------
+        a, b : np.ndarray
+            1 or 2 dimensional arrays.
+        out : np.ndarray, optional
+            An optional output array. If not provided, a new array will be
+            allocated.
+        nthreads : int
+            The number of threads pyblis uses. Defaults to the process-wide
+            default (see ``pyblis.set_num_threads``).
+        """
+        candidates = self._candidates(a, b, out)
+        if len(candidates) == 1:
+            return self._run(candidates[0], a, b, out, nthreads)
+        if not self._loaded:
+            self._load_default()
+        key = self._key(a, b, out)
+        best = self._choose(key)
+        if best is None:
+            return self._calibrate(key, a, b, out, nthreads)
+        if self.sample_rate and random.random() < self.sample_rate:
+            other = _BACKENDS[best == "pyblis"]
+            scratch = None if out is None else np.empty_like(out)
+            _, elapsed = self._timed(other, a, b, scratch, nthreads)
+            self._record(key, other, elapsed)
+            res, elapsed = self._timed(best, a, b, out, nthreads)
+            self._record(key, best, elapsed)
+            return res
+        return self._run(best, a, b, out, nthreads)
+
+    def backend_for(self, a, b, out=None):
+        """The backend a call with these arguments would use.
+
+        Returns
+        -------
+        backend : {'pyblis', 'numpy'} or None
+            None if the key isn't calibrated yet.
+        """
+        candidates = self._candidates(a, b, out)
+        if len(candidates) == 1:
+            return candidates[0]
+        if not self._loaded:
+            self._load_default()
+        return self._choose(self._key(a, b, out))
+
+    @property
+    def table(self):
+        """The decision table, as a dict mapping keys to the running time of
+        each backend in seconds."""
+        return {k: dict(v) for k, v in self._times.items()}
+
+    def clear(self):
+        """Forget all timings, recalibrating every key on its next call."""
+        self._times.clear()
+        self._loaded = True
+        self._dirty = True
+
+    def save(self, path=None):
+        """Write the decision table to ``path`` (default ``self.path``) as
+        JSON."""
+        path = self.path if path is None else path
+        if path is None:
+            raise ValueError("No path provided to save the table to")
+        entries = [{"key": list(k), "times": v}
+                   for k, v in self._times.items()]
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": _TABLE_VERSION, "entries": entries}, f)
+        os.replace(tmp, path)
+        if path == self.path:
+            self._dirty = False
+
+    def load(self, path=None):
+        """Merge a decision table saved by ``save`` into this one, with the
+        loaded timings taking precedence."""
+        path = self.path if path is None else path
+        if path is None:
+            raise ValueError("No path provided to load the table from")
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != _TABLE_VERSION:
+            raise ValueError("Unsupported table version %r in %r"
+                             % (data.get("version"), path))
+        for entry in data["entries"]:
+            dtype, a_shape, b_shape, a_layout, b_layout, trans, out = entry["key"]
+            key = (dtype, tuple(a_shape), tuple(b_shape), a_layout, b_layout,
+                   trans, out)
+            self._times[key] = {k: v for k, v in entry["times"].items()
+                                if k in _BACKENDS}
+        self._loaded = True
+
+    def _load_default(self):
+        self._loaded = True
+        if os.path.exists(self.path):
+            self.load()
+
+    def _save_if_dirty(self):
+        if self._dirty:
+            self.save()
+
+
+# The instance shared by the process, persisted to the file named by the
+# ``PYBLIS_AUTO_DOT_TABLE`` environment variable if set
+auto_dot = AutoDot(os.environ.get("PYBLIS_AUTO_DOT_TABLE"))
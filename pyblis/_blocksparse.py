@@ -0,0 +1,193 @@
+"""Matrix multiplication of block-sparse operands"""
+import numpy as np
+
+from . import _core
+
+
+def _ntiles(dim, size):
+    return -(-dim // size)
+
+
+def _tile_sizes(tile):
+    if isinstance(tile, (int, np.integer)):
+        tile = (tile, tile, tile)
+    if not (isinstance(tile, tuple) and len(tile) == 3 and
+            all(isinstance(t, (int, np.integer)) for t in tile)):
+        raise TypeError("`tile` must be an int or a tuple of 3 ints")
+    if min(tile) <= 0:
+        raise ValueError("`tile` sizes must be positive")
+    return tuple(int(t) for t in tile)
+
+
+def _occupancy(name, x, mask, rows, cols):
+    """The occupancy of the ``(rows, cols)`` tiles of ``x``, as a 2
+    dimensional bool array"""
+    grid = (_ntiles(x.shape[0], rows), _ntiles(x.shape[1], cols))
+    if mask is None:
+        nonzero = x != 0
+        if 0 in grid:
+            return nonzero[:grid[0], :grid[1]]
+        nonzero = np.logical_or.reduceat(nonzero, np.arange(0, x.shape[0], rows),
+                                         axis=0)
+        return np.logical_or.reduceat(nonzero, np.arange(0, x.shape[1], cols),
+                                      axis=1)
+    if isinstance(mask, tuple):
+        # Block-CSR: the tile columns of tile row i are
+        # indices[indptr[i]:indptr[i + 1]]
+        indptr, indices = (np.asarray(m, dtype=np.intp) for m in mask)
+        if indptr.shape != (grid[0] + 1,) or indptr[-1] != len(indices):
+            raise ValueError("`%s` block-CSR indptr doesn't match the %d "
+                             "tile rows" % (name, grid[0]))
+        if len(indices) and not (0 <= indices.min() and
+                                 indices.max() < grid[1]):
+            raise ValueError("`%s` block-CSR indices out of bounds" % name)
+        out = np.zeros(grid, dtype=bool)
+        out[np.repeat(np.arange(grid[0]), np.diff(indptr)), indices] = True
+        return out
+    mask = np.asarray(mask, dtype=bool)
+    if mask.shape != grid:
+        raise ValueError("`%s` must have shape %r (one element per tile), "
+                         "got %r" % (name, grid, mask.shape))
+    return mask
+
+
+def _schedule(a_occ, b_occ):
+    """The tile products to compute, grouped into rounds.
+
+    Returns the ``(i, j, k0, k1)`` tile indices of each product, adding the
+    product of tile columns ``[k0, k1)`` of tile row ``i`` of ``a`` and tile
+    rows ``[k0, k1)`` of tile column ``j`` of ``b`` to tile ``(i, j)`` of the
+    output, and the round of each product. Consecutive non-zero ``k`` are
+    merged into one product, and the products updating the same output tile
+    are spread over successive rounds, so that each round can run in
+    parallel without two products writing the same tile."""
+    i, k, j = [], [], []
+    for kk in range(a_occ.shape[1]):
+        rows = np.flatnonzero(a_occ[:, kk])
+        cols = np.flatnonzero(b_occ[kk])
+        if len(rows) and len(cols):
+            i.append(np.repeat(rows, len(cols)))
+            j.append(np.tile(cols, len(rows)))
+            k.append(np.full(len(rows) * len(cols), kk))
+    if not i:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, empty, empty, empty
+    i, k, j = np.concatenate(i), np.concatenate(k), np.concatenate(j)
+
+    order = np.lexsort((k, j, i))
+    i, j, k = i[order], j[order], k[order]
+    new_tile = np.ones(len(i), dtype=bool)
+    new_tile[1:] = (i[1:] != i[:-1]) | (j[1:] != j[:-1])
+    new_run = new_tile.copy()
+    new_run[1:] |= k[1:] != k[:-1] + 1
+
+    starts = np.flatnonzero(new_run)
+    ends = np.append(starts[1:], len(i))
+    i, j, k0, k1 = i[starts], j[starts], k[starts], k[ends - 1] + 1
+    # The index of each run among the runs for its output tile
+    tile_start = np.maximum.accumulate(
+        np.where(new_tile[starts], np.arange(len(starts)), 0)
+    )
+    rounds = np.arange(len(starts)) - tile_start
+    return i, j, k0, k1, rounds
+
+
+def _descriptors(a, b, out, i, j, k0, k1, tile):
+    """The ``gemm_grouped`` descriptors of the given tile products"""
+    tm, tk, tn = tile
+    m, k = a.shape
+    n = b.shape[1]
+    r0, c0, kk0 = i * tm, j * tn, k0 * tk
+    size = a.itemsize
+    desc = np.empty((len(i), 12), dtype=np.int64)
+    desc[:, 0] = np.minimum(r0 + tm, m) - r0
+    desc[:, 1] = np.minimum(c0 + tn, n) - c0
+    desc[:, 2] = np.minimum(k1 * tk, k) - kk0
+    for col, x, rows, cols in [(3, a, r0, kk0), (6, b, kk0, c0),
+                               (9, out, r0, c0)]:
+        desc[:, col] = x.ctypes.data + rows * x.strides[0] + cols * x.strides[1]
+        desc[:, col + 1] = x.strides[0] // size
+        desc[:, col + 2] = x.strides[1] // size
+    return desc
+
+
+def gemm_blocksparse(a, b, a_mask=None, b_mask=None, tile=64, out=None,
+                     alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply two block-sparse matrices, skipping the zero tiles.
+
+    Solves ``out = alpha * a.dot(b) + beta * out``, where ``a`` and ``b``
+    are stored densely but only some of their tiles are non-zero. Only the
+    products of non-zero tiles of ``a`` with non-zero tiles of ``b`` are
+    computed (with runs of consecutive tiles along the inner dimension
+    merged into a single product), accumulating into the dense ``out``.
+
+    The products are run through ``gemm_grouped``, in parallel, in rounds
+    where no two products update the same output tile. The number of
+    rounds is the largest number of (merged) products into one output tile.
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T]
+        Two identically typed 2 dimensional arrays, where ``T`` is one of
+        (float64, float32, complex128, complex64).
+    a_mask, b_mask : np.ndarray[bool] or tuple, optional
+        The occupancy of the tiles of ``a`` and ``b``, either as a bool array
+        with one element per tile, or as a block-CSR ``(indptr, indices)``
+        pair, where ``indices[indptr[i]:indptr[i + 1]]`` are the non-zero
+        tile columns of tile row ``i``. Tiles marked as zero aren't read. If
+        not provided, found by scanning the operand for non-zero elements.
+    tile : int or tuple of 3 ints, optional
+        The tile sizes ``(tm, tk, tn)``, with the tiles of ``a`` of shape
+        ``(tm, tk)`` and the tiles of ``b`` of shape ``(tk, tn)``. An int is
+        used for all three. Tiles on the last row or column of tiles may be
+        smaller. Default is 64.
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input arrays.
+        If not provided, a new array will be allocated.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    ctx = _core._CTX
+    arrays = {"a": a, "b": b}
+    if out is not None:
+        arrays["out"] = out
+    ctx.check_is_2d_array(**arrays)
+    dtype = ctx.check_uniform_dtype(**arrays)
+    ctx.check_ints(nthreads=nthreads)
+    alpha = ctx.check_cast_scalar("alpha", alpha, dtype)
+    beta = ctx.check_cast_scalar("beta", beta, dtype)
+    tm, tk, tn = tile = _tile_sizes(tile)
+
+    m, k = a.shape
+    if b.shape[0] != k:
+        raise ValueError("b shape mismatch")
+    n = b.shape[1]
+    if out is None:
+        out = np.zeros((m, n), dtype=dtype)
+    elif out.shape != (m, n):
+        raise ValueError("Output shape mismatch")
+    elif beta == 0:
+        out[...] = 0
+    elif beta != 1:
+        out *= beta
+
+    a_occ = _occupancy("a_mask", a, a_mask, tm, tk)
+    b_occ = _occupancy("b_mask", b, b_mask, tk, tn)
+    i, j, k0, k1, rounds = _schedule(a_occ, b_occ)
+
+    gemm_group = ctx.get_lib_func("gemm_group_desc", dtype)
+    for r in range(rounds.max() + 1 if len(rounds) else 0):
+        sel = rounds == r
+        desc = _descriptors(a, b, out, i[sel], j[sel], k0[sel], k1[sel],
+                            tile)
+        gemm_group(desc, alpha, dtype.type(1), nthreads)
+    return out
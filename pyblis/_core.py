@@ -1,12 +1,15 @@
+import inspect
+
 import numpy as np
 
-from . import _lib
+from . import _lib, _spec
 
 __all__ = ("gemm",)
 
 
 class TypingContext(object):
-    # Subclasses should define prefixes mapping, and override methods below
+    # Subclasses should define prefixes and real_dtypes mappings, the
+    # half_dtype (float16, or None if unsupported), and override methods below
     def error(self, msg):
         raise NotImplementedError
 
@@ -25,6 +28,20 @@ class TypingContext(object):
     def check_cast_scalar(self, name, val, dtype):
         raise NotImplementedError
 
+    def group_items(self, name, group):
+        """Validate ``group`` is a sequence of tuples of length 3, returning
+        a list of the item types to check"""
+        raise NotImplementedError
+
+    def list_items(self, name, lst):
+        """Validate ``lst`` is a sequence, returning a list of the item types
+        to check"""
+        raise NotImplementedError
+
+    def as_dtype(self, name, val):
+        """Convert a dtype specifier ``val`` to a dtype"""
+        raise NotImplementedError
+
     def ndim(self, a):
         return a.ndim
 
@@ -35,6 +52,25 @@ class TypingContext(object):
         if dtype not in self.prefixes:
             self.error("No implementation for arrays of dtype %r" % dtype)
 
+    def real_dtype(self, dtype):
+        return self.real_dtypes[dtype]
+
+    def is_complex(self, dtype):
+        return self.real_dtypes[dtype] != dtype
+
+    def is_double(self, dtype):
+        return self.prefixes[dtype] in "dz"
+
+    def is_half(self, dtype):
+        return self.half_dtype is not None and dtype == self.half_dtype
+
+    def check_is_1d_array(self, **kwargs):
+        for k, v in kwargs.items():
+            if not self.is_ndarray(v):
+                self.error("`%s` must be a NumPy ndarray" % k)
+            elif not self.ndim(v) == 1:
+                self.error("`%s` must be 1 dimensional" % k)
+
     def check_is_2d_array(self, **kwargs):
         for k, v in kwargs.items():
             if not self.is_ndarray(v):
@@ -42,6 +78,31 @@ class TypingContext(object):
             elif not self.ndim(v) == 2:
                 self.error("`%s` must be 2 dimensional" % k)
 
+    def check_is_3d_array(self, **kwargs):
+        for k, v in kwargs.items():
+            if not self.is_ndarray(v):
+                self.error("`%s` must be a NumPy ndarray" % k)
+            elif not self.ndim(v) == 3:
+                self.error("`%s` must be 3 dimensional" % k)
+
+    def check_is_batched_array(self, **kwargs):
+        for k, v in kwargs.items():
+            if not self.is_ndarray(v):
+                self.error("`%s` must be a NumPy ndarray" % k)
+            elif not self.ndim(v) >= 2:
+                self.error("`%s` must be at least 2 dimensional" % k)
+
+    def check_is_list_of_2d_arrays(self, name, lst):
+        arrays = {}
+        for i, item in enumerate(self.list_items(name, lst)):
+            arrays["%s[%d]" % (name, i)] = item
+        self.check_is_2d_array(**arrays)
+        return arrays
+
+    def has_uniform_dtype(self, **kwargs):
+        dtypes = [self.dtype(v) for v in kwargs.values()]
+        return all(d == dtypes[0] for d in dtypes)
+
     def check_uniform_dtype(self, **kwargs):
         params = list(kwargs.items())
         dtype = self.dtype(params[0][1])
@@ -66,19 +127,55 @@ class TypingContext(object):
         prefix = self.prefixes[dtype]
         return getattr(_lib, prefix + name)
 
+    def check_dotv(self, x, y, x_conj=False, y_conj=False, nthreads=-1):
+        self.check_is_1d_array(x=x, y=y)
+        dtype = self.check_uniform_dtype(x=x, y=y)
+
+        self.check_bools(x_conj=x_conj, y_conj=y_conj)
+        self.check_ints(nthreads=nthreads)
+
+        return self.get_lib_func("dotv", dtype)
+
+    def check_gemv(
+        self, a, x, out=None, a_trans=False, a_conj=False, x_conj=False,
+        alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        self.check_is_2d_array(a=a)
+        vectors = {"x": x}
+        if not self.is_none(out):
+            vectors["out"] = out
+        self.check_is_1d_array(**vectors)
+        dtype = self.check_uniform_dtype(a=a, **vectors)
+
+        self.check_bools(a_trans=a_trans, a_conj=a_conj, x_conj=x_conj)
+        self.check_ints(nthreads=nthreads)
+
+        alpha = self.check_cast_scalar("alpha", alpha, dtype)
+        beta = self.check_cast_scalar("beta", beta, dtype)
+
+        gemv = self.get_lib_func("gemv", dtype)
+
+        return gemv, alpha, beta
+
     def check_gemm(
         self, a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
-        b_conj=False, alpha=1.0, beta=0.0, nthreads=-1
+        b_conj=False, alpha=1.0, beta=0.0, nthreads=-1, comp_dtype=None
     ):
         arrays = {"a": a, "b": b}
         if not self.is_none(out):
             arrays["out"] = out
         self.check_is_2d_array(**arrays)
-        dtype = self.check_uniform_dtype(**arrays)
 
         self.check_bools(a_trans=a_trans, a_conj=a_conj, b_trans=b_trans, b_conj=b_conj)
         self.check_ints(nthreads=nthreads)
 
+        if self.is_half(self.dtype(a)) or self.is_half(self.dtype(b)):
+            return self.check_gemm_half(arrays, alpha, beta, comp_dtype)
+        if not self.is_none(comp_dtype) or not self.has_uniform_dtype(**arrays):
+            return self.check_gemm_mixed(arrays, alpha, beta, comp_dtype)
+
+        dtype = self.check_uniform_dtype(**arrays)
+
         alpha = self.check_cast_scalar("alpha", alpha, dtype)
         beta = self.check_cast_scalar("beta", beta, dtype)
 
@@ -86,9 +183,211 @@ class TypingContext(object):
 
         return gemm, alpha, beta
 
+    def check_gemm_mixed(self, arrays, alpha=1.0, beta=0.0, comp_dtype=None):
+        for k, v in arrays.items():
+            self.check_dtype(self.dtype(v))
+        a_dtype = self.dtype(arrays["a"])
+        b_dtype = self.dtype(arrays["b"])
+        is_complex = self.is_complex(a_dtype) or self.is_complex(b_dtype)
+        if "out" in arrays:
+            out_dtype = self.dtype(arrays["out"])
+            if is_complex and not self.is_complex(out_dtype):
+                self.error("`out` must be complex if `a` or `b` is complex, "
+                           "got %r" % out_dtype)
+        else:
+            # The dtype with the widest domain and precision of `a` and `b`
+            is_double = self.is_double(a_dtype) or self.is_double(b_dtype)
+            dtypes = dict((v, k) for k, v in self.prefixes.items())
+            out_dtype = dtypes["sdcz"[2 * is_complex + is_double]]
+
+        if self.is_none(comp_dtype):
+            comp_prec = -1
+        else:
+            comp_dtype = self.as_dtype("comp_dtype", comp_dtype)
+            if comp_dtype not in self.prefixes or self.is_complex(comp_dtype):
+                self.error("`comp_dtype` must be float32 or float64, got %r"
+                           % comp_dtype)
+            comp_prec = int(self.is_double(comp_dtype))
+
+        alpha = self.check_cast_scalar("alpha", alpha, out_dtype)
+        beta = self.check_cast_scalar("beta", beta, out_dtype)
+
+        gemm = _lib.gemm_mixed(self.prefixes[a_dtype], self.prefixes[b_dtype],
+                               self.prefixes[out_dtype], comp_prec)
+
+        return gemm, alpha, beta
+
+    def check_gemm_half(self, arrays, alpha=1.0, beta=0.0, comp_dtype=None):
+        single = dict((v, k) for k, v in self.prefixes.items())["s"]
+        for k in ["a", "b"]:
+            dtype = self.dtype(arrays[k])
+            if not (self.is_half(dtype) or dtype == single):
+                self.error("`%s` must be float16 or float32 when multiplying "
+                           "float16 operands, got %r" % (k, dtype))
+        if "out" in arrays and self.dtype(arrays["out"]) != single:
+            self.error("`out` must be float32 when multiplying float16 "
+                       "operands, got %r" % self.dtype(arrays["out"]))
+        if (not self.is_none(comp_dtype) and
+                self.as_dtype("comp_dtype", comp_dtype) != single):
+            self.error("`comp_dtype` must be float32 when multiplying float16 "
+                       "operands")
+
+        alpha = self.check_cast_scalar("alpha", alpha, single)
+        beta = self.check_cast_scalar("beta", beta, single)
+
+        a_prefix = "h" if self.is_half(self.dtype(arrays["a"])) else "s"
+        b_prefix = "h" if self.is_half(self.dtype(arrays["b"])) else "s"
+        gemm = _lib.gemm_mixed(a_prefix, b_prefix, "s", -1)
+
+        return gemm, alpha, beta
+
+    def check_gemm_batched(
+        self, a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+        b_conj=False, alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        arrays = {"a": a, "b": b}
+        if not self.is_none(out):
+            arrays["out"] = out
+        self.check_is_batched_array(**arrays)
+        dtype = self.check_uniform_dtype(**arrays)
+
+        self.check_bools(a_trans=a_trans, a_conj=a_conj, b_trans=b_trans, b_conj=b_conj)
+        self.check_ints(nthreads=nthreads)
+
+        alpha = self.check_cast_scalar("alpha", alpha, dtype)
+        beta = self.check_cast_scalar("beta", beta, dtype)
+
+        gemm_batched = self.get_lib_func("gemm_batched", dtype)
+
+        return gemm_batched, alpha, beta
+
+    def check_gemm_batched_strided(
+        self, a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+        b_conj=False, alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        arrays = {"a": a, "b": b}
+        if not self.is_none(out):
+            arrays["out"] = out
+        self.check_is_3d_array(**arrays)
+        dtype = self.check_uniform_dtype(**arrays)
+
+        self.check_bools(a_trans=a_trans, a_conj=a_conj, b_trans=b_trans, b_conj=b_conj)
+        self.check_ints(nthreads=nthreads)
+
+        alpha = self.check_cast_scalar("alpha", alpha, dtype)
+        beta = self.check_cast_scalar("beta", beta, dtype)
+
+        gemm_batched_strided = self.get_lib_func("gemm_batched_strided", dtype)
+
+        return gemm_batched_strided, alpha, beta
+
+    def check_gemm_grouped(self, problems, alpha=1.0, beta=0.0, nthreads=-1):
+        arrays = {}
+        for i, (a, b, out) in enumerate(self.group_items("problems", problems)):
+            arrays["problems[%d][0]" % i] = a
+            arrays["problems[%d][1]" % i] = b
+            if not self.is_none(out):
+                arrays["problems[%d][2]" % i] = out
+        self.check_is_2d_array(**arrays)
+        dtype = self.check_uniform_dtype(**arrays) if arrays else self.default_dtype
+
+        self.check_ints(nthreads=nthreads)
+
+        alpha = self.check_cast_scalar("alpha", alpha, dtype)
+        beta = self.check_cast_scalar("beta", beta, dtype)
+
+        gemm_grouped = self.get_lib_func("gemm_grouped", dtype)
+
+        return gemm_grouped, alpha, beta
+
+    def check_gemm_planar(
+        self, ar, ai, br, bi, out_r=None, out_i=None, a_trans=False,
+        a_conj=False, b_trans=False, b_conj=False, alpha=1.0, beta=0.0,
+        nthreads=-1
+    ):
+        arrays = {"ar": ar, "ai": ai, "br": br, "bi": bi}
+        if not self.is_none(out_r):
+            arrays["out_r"] = out_r
+        if not self.is_none(out_i):
+            arrays["out_i"] = out_i
+        self.check_is_2d_array(**arrays)
+        dtype = self.check_uniform_dtype(**arrays)
+        if self.is_complex(dtype):
+            self.error("Planar operands must be real, got %r" % dtype)
+
+        self.check_bools(a_trans=a_trans, a_conj=a_conj, b_trans=b_trans, b_conj=b_conj)
+        self.check_ints(nthreads=nthreads)
+
+        alpha = self.check_cast_scalar("alpha", alpha, dtype)
+        beta = self.check_cast_scalar("beta", beta, dtype)
+
+        gemm_planar = self.get_lib_func("gemm_planar", dtype)
+
+        return gemm_planar, alpha, beta
+
+    def check_gemmt(
+        self, a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+        b_conj=False, out_upper=False, alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        arrays = {"a": a, "b": b}
+        if not self.is_none(out):
+            arrays["out"] = out
+        self.check_is_2d_array(**arrays)
+        dtype = self.check_uniform_dtype(**arrays)
+
+        self.check_bools(a_trans=a_trans, a_conj=a_conj, b_trans=b_trans,
+                         b_conj=b_conj, out_upper=out_upper)
+        self.check_ints(nthreads=nthreads)
+
+        alpha = self.check_cast_scalar("alpha", alpha, dtype)
+        beta = self.check_cast_scalar("beta", beta, dtype)
+
+        gemmt = self.get_lib_func("gemmt", dtype)
+
+        return gemmt, alpha, beta
+
+    def _check_symm_like(
+        self, name, a, b, out, a_right, a_upper, a_conj, b_trans, b_conj,
+        alpha, beta, nthreads
+    ):
+        arrays = {"a": a, "b": b}
+        if not self.is_none(out):
+            arrays["out"] = out
+        self.check_is_2d_array(**arrays)
+        dtype = self.check_uniform_dtype(**arrays)
+
+        self.check_bools(a_right=a_right, a_upper=a_upper, a_conj=a_conj,
+                         b_trans=b_trans, b_conj=b_conj)
+        self.check_ints(nthreads=nthreads)
+
+        alpha = self.check_cast_scalar("alpha", alpha, dtype)
+        beta = self.check_cast_scalar("beta", beta, dtype)
+
+        func = self.get_lib_func(name, dtype)
+
+        return func, alpha, beta
+
+    def check_symm(
+        self, a, b, out=None, a_right=False, a_upper=False, a_conj=False,
+        b_trans=False, b_conj=False, alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        return self._check_symm_like(
+            "symm", a, b, out, a_right, a_upper, a_conj, b_trans, b_conj,
+            alpha, beta, nthreads
+        )
+
+    def check_hemm(
+        self, a, b, out=None, a_right=False, a_upper=False, a_conj=False,
+        b_trans=False, b_conj=False, alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        return self._check_symm_like(
+            "hemm", a, b, out, a_right, a_upper, a_conj, b_trans, b_conj,
+            alpha, beta, nthreads
+        )
+
     def check_syrk(
         self, a, out=None, a_trans=False, a_conj=False, out_upper=False,
-        alpha=1.0, beta=0.0, nthreads=-1
+        out_full=False, alpha=1.0, beta=0.0, nthreads=-1
     ):
         arrays = {"a": a}
         if not self.is_none(out):
@@ -96,7 +395,8 @@ class TypingContext(object):
         self.check_is_2d_array(**arrays)
         dtype = self.check_uniform_dtype(**arrays)
 
-        self.check_bools(a_trans=a_trans, a_conj=a_conj, out_upper=out_upper)
+        self.check_bools(a_trans=a_trans, a_conj=a_conj, out_upper=out_upper,
+                         out_full=out_full)
         self.check_ints(nthreads=nthreads)
 
         alpha = self.check_cast_scalar("alpha", alpha, dtype)
@@ -106,14 +406,154 @@ class TypingContext(object):
 
         return syrk, alpha, beta
 
-    def check_mksymm(self, a, upper, nthreads=-1):
+    def check_herk(
+        self, a, out=None, a_trans=False, a_conj=False, out_upper=False,
+        out_full=False, alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        arrays = {"a": a}
+        if not self.is_none(out):
+            arrays["out"] = out
+        self.check_is_2d_array(**arrays)
+        dtype = self.check_uniform_dtype(**arrays)
+
+        self.check_bools(a_trans=a_trans, a_conj=a_conj, out_upper=out_upper,
+                         out_full=out_full)
+        self.check_ints(nthreads=nthreads)
+
+        rdtype = self.real_dtype(dtype)
+        alpha = self.check_cast_scalar("alpha", alpha, rdtype)
+        beta = self.check_cast_scalar("beta", beta, rdtype)
+
+        herk = self.get_lib_func("herk", dtype)
+
+        return herk, alpha, beta
+
+    def check_syrk_batched(
+        self, a, out=None, a_trans=False, a_conj=False, out_upper=False,
+        out_full=False, alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        if self.is_ndarray(a):
+            arrays = {"a": a}
+            if not self.is_none(out):
+                arrays["out"] = out
+            self.check_is_3d_array(**arrays)
+            name = "syrk_batched"
+        else:
+            arrays = self.check_is_list_of_2d_arrays("a", a)
+            if not self.is_none(out):
+                arrays.update(self.check_is_list_of_2d_arrays("out", out))
+            name = "syrk_grouped"
+        dtype = self.check_uniform_dtype(**arrays) if arrays else self.default_dtype
+
+        self.check_bools(a_trans=a_trans, a_conj=a_conj, out_upper=out_upper,
+                         out_full=out_full)
+        self.check_ints(nthreads=nthreads)
+
+        alpha = self.check_cast_scalar("alpha", alpha, dtype)
+        beta = self.check_cast_scalar("beta", beta, dtype)
+
+        syrk_batched = self.get_lib_func(name, dtype)
+
+        return syrk_batched, alpha, beta
+
+    def _check_rank2k(
+        self, name, a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper,
+        alpha, beta, nthreads, real_beta
+    ):
+        arrays = {"a": a, "b": b}
+        if not self.is_none(out):
+            arrays["out"] = out
+        self.check_is_2d_array(**arrays)
+        dtype = self.check_uniform_dtype(**arrays)
+
+        self.check_bools(a_trans=a_trans, a_conj=a_conj, b_trans=b_trans,
+                         b_conj=b_conj, out_upper=out_upper)
+        self.check_ints(nthreads=nthreads)
+
+        alpha = self.check_cast_scalar("alpha", alpha, dtype)
+        beta_dtype = self.real_dtype(dtype) if real_beta else dtype
+        beta = self.check_cast_scalar("beta", beta, beta_dtype)
+
+        func = self.get_lib_func(name, dtype)
+
+        return func, alpha, beta
+
+    def check_syr2k(
+        self, a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+        b_conj=False, out_upper=False, alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        return self._check_rank2k(
+            "syr2k", a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper,
+            alpha, beta, nthreads, False
+        )
+
+    def check_her2k(
+        self, a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+        b_conj=False, out_upper=False, alpha=1.0, beta=0.0, nthreads=-1
+    ):
+        return self._check_rank2k(
+            "her2k", a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper,
+            alpha, beta, nthreads, True
+        )
+
+    def _check_mk(self, name, a, upper, nthreads):
         self.check_is_2d_array(a=a)
         dtype = self.dtype(a)
         self.check_dtype(dtype)
         self.check_bools(upper=upper)
         self.check_ints(nthreads=nthreads)
 
-        return self.get_lib_func("mksymm", dtype)
+        return self.get_lib_func(name, dtype)
+
+    def check_op(self, op, args):
+        """Check the arguments to an operation generated from a spec.
+
+        ``op`` is an ``Op`` from ``_spec.OPS``, and ``args`` maps each of its
+        parameters to a value. Returns the typed implementation, and a
+        mapping of the scalars cast to the dtype of the operands."""
+        arrays = {}
+        for o in op.operands:
+            if o.is_scalar:
+                continue
+            val = args[o.name]
+            if o.mode == "out" and self.is_none(val):
+                continue
+            if o.ndim == 1:
+                self.check_is_1d_array(**{o.name: val})
+            else:
+                self.check_is_2d_array(**{o.name: val})
+            arrays[o.name] = val
+        dtype = self.check_uniform_dtype(**arrays)
+
+        self.check_bools(**{f.name: args[f.name] for f in op.flags})
+        self.check_ints(nthreads=args["nthreads"])
+
+        rdtype = self.real_dtype(dtype)
+        scalars = {s.name: self.check_cast_scalar(s.name, args[s.name],
+                                                  rdtype if s.real else dtype)
+                   for s in op.scalars}
+
+        return self.get_lib_func(op.name, dtype), scalars
+
+    def check_mksymm(self, a, upper, nthreads=-1):
+        return self._check_mk("mksymm", a, upper, nthreads)
+
+    def check_mkherm(self, a, upper, nthreads=-1):
+        return self._check_mk("mkherm", a, upper, nthreads)
+
+    def check_mksymm_batched(self, a, upper, nthreads=-1):
+        if self.is_ndarray(a):
+            self.check_is_3d_array(a=a)
+            arrays = {"a": a}
+            name = "mksymm_batched"
+        else:
+            arrays = self.check_is_list_of_2d_arrays("a", a)
+            name = "mksymm_grouped"
+        dtype = self.check_uniform_dtype(**arrays) if arrays else self.default_dtype
+        self.check_bools(upper=upper)
+        self.check_ints(nthreads=nthreads)
+
+        return self.get_lib_func(name, dtype)
 
 
 class PythonTyping(TypingContext):
@@ -122,6 +562,15 @@ class PythonTyping(TypingContext):
                 np.dtype('c8'): 'c',
                 np.dtype('c16'): 'z'}
 
+    real_dtypes = {np.dtype('f4'): np.dtype('f4'),
+                   np.dtype('f8'): np.dtype('f8'),
+                   np.dtype('c8'): np.dtype('f4'),
+                   np.dtype('c16'): np.dtype('f8')}
+
+    default_dtype = np.dtype('f8')
+
+    half_dtype = np.dtype('f2')
+
     def error(self, msg):
         raise TypeError(msg)
 
@@ -143,105 +592,740 @@ class PythonTyping(TypingContext):
         except TypeError as exc:
             self.error("%s %s" % (name, exc))
 
+    def group_items(self, name, group):
+        if not isinstance(group, (list, tuple)):
+            self.error("`%s` must be a list of tuples" % name)
+        for i, item in enumerate(group):
+            if not (isinstance(item, tuple) and len(item) == 3):
+                self.error("`%s[%d]` must be a tuple of length 3" % (name, i))
+        return group
+
+    def list_items(self, name, lst):
+        if not isinstance(lst, (list, tuple)):
+            self.error("`%s` must be a NumPy ndarray or a list" % name)
+        return lst
+
+    def as_dtype(self, name, val):
+        try:
+            return np.dtype(val)
+        except TypeError:
+            self.error("`%s` must be a dtype, got %r" % (name, val))
+
 
 _CTX = PythonTyping()
 
 
-def gemm(a, b, out=None, a_trans=False, a_conj=False,
-         b_trans=False, b_conj=False, alpha=1.0, beta=0.0, nthreads=-1):
-    """Multiply two matrices.
+def dotv(x, y, x_conj=False, y_conj=False, nthreads=-1):
+    """Compute the dot product of two vectors.
 
-    Solves ``out = alpha * op_a(a).dot(op_b(b)) + beta * out``.
+    Solves ``rho = op_x(x).dot(op_y(y))``.
 
-    Where ``op_a`` and ``op_b`` indicate any transpose/conjugate operation
-    specified on ``a`` or ``b`` respectively.
+    Where ``op_x`` and ``op_y`` indicate any conjugate operation specified on
+    ``x`` or ``y`` respectively.
 
     Parameters
     ----------
-    a, b : np.ndarray[T]
-        Two identically typed arrays, where ``T`` is one of
+    x, y : np.ndarray[T]
+        Two identically typed 1 dimensional arrays, where ``T`` is one of
         (float64, float32, complex128, complex64).
-    out : np.ndarray[T], optional
-        An optional output array, must match the type of the input arrays. If
-        not provided, a new array will be allocated.
-    a_trans, b_trans : bool, optional
-        Whether to transpose ``a`` and ``b`` respectively. Default is False.
-    a_conj, b_conj : bool, optional
-        Whether to conjugate ``a`` and ``b`` respectively. Default is False.
-    alpha : T
-        The ``alpha`` factor. Default is 1.
-    beta : T
-        The ``beta`` factor. Default is 0.
+    x_conj, y_conj : bool, optional
+        Whether to conjugate ``x`` and ``y`` respectively. Default is False.
     nthreads : int
-        The number of threads to use. Defaults to deriving from environment
-        variables (e.g. ``BLIS_NUM_THREADS``).
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
 
     Returns
     -------
-    out : np.ndarray[T]
+    rho : T
     """
-    gemm, alpha, beta = _CTX.check_gemm(
-        a, b, out, a_trans, a_conj, b_trans, b_conj, alpha, beta, nthreads
-    )
-    return gemm(a, b, out, a_trans, a_conj, b_trans, b_conj, alpha, beta, nthreads)
+    dotv = _CTX.check_dotv(x, y, x_conj, y_conj, nthreads)
+    return dotv(x, y, x_conj, y_conj, nthreads)
 
 
-def syrk(a, out=None, a_trans=False, a_conj=False, out_upper=False, alpha=1.0,
-         beta=0.0, nthreads=-1):
-    """Multiply a matrix with its transpose.
+def gemv(a, x, out=None, a_trans=False, a_conj=False, x_conj=False,
+         alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply a matrix with a vector.
 
-    Solves ``out = alpha * op_a(a).dot(op_a(a).T) + beta * out``.
+    Solves ``out = alpha * op_a(a).dot(op_x(x)) + beta * out``.
 
-    Where ``op_a`` indicates any transpose/conjugate operation specified
-    on ``a``, and ``out`` is an optional lower/upper triangular matrix.
+    Where ``op_a`` and ``op_x`` indicate any transpose/conjugate operation
+    specified on ``a`` or ``x`` respectively.
 
     Parameters
     ----------
     a : np.ndarray[T]
-        The input array, where ``T`` is one of (float64, float32, complex128,
-        complex64).
+        A 2 dimensional array, where ``T`` is one of (float64, float32,
+        complex128, complex64).
+    x : np.ndarray[T]
+        A 1 dimensional array, must match the type of ``a``.
     out : np.ndarray[T], optional
-        An optional output array, must match the type of the input array. If
-        not provided, a new array will be allocated.
+        An optional 1 dimensional output array, must match the type of the
+        input arrays. If not provided, a new array will be allocated.
     a_trans : bool, optional
         Whether to transpose ``a``. Default is False.
-    a_conj : bool, optional
-        Whether to conjugate ``a``. Default is False.
-    out_upper : bool, optional
-        Whether ``out`` is an upper (``True``) or lower (``False``) triangular
-        matrix. Default is False.
+    a_conj, x_conj : bool, optional
+        Whether to conjugate ``a`` and ``x`` respectively. Default is False.
     alpha : T
         The ``alpha`` factor. Default is 1.
     beta : T
         The ``beta`` factor. Default is 0.
     nthreads : int
-        The number of threads to use. Defaults to deriving from environment
-        variables (e.g. ``BLIS_NUM_THREADS``).
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
 
     Returns
     -------
     out : np.ndarray[T]
     """
-    syrk, alpha, beta = _CTX.check_syrk(
-        a, out, a_trans, a_conj, out_upper, alpha, beta, nthreads
+    gemv, alpha, beta = _CTX.check_gemv(
+        a, x, out, a_trans, a_conj, x_conj, alpha, beta, nthreads
     )
-    return syrk(a, out, a_trans, a_conj, out_upper, alpha, beta, nthreads)
+    return gemv(a, x, out, a_trans, a_conj, x_conj, alpha, beta, nthreads)
 
 
-def mksymm(a, upper=False, nthreads=-1):
-    """Convert a triangular matrix into a symmetric matrix.
+def gemm(a, b, out=None, a_trans=False, a_conj=False,
+         b_trans=False, b_conj=False, alpha=1.0, beta=0.0, nthreads=-1,
+         comp_dtype=None):
+    """Multiply two matrices.
 
-    Parameters
-    ----------
-    a : np.ndarray[T]
-        A triangular square matrix, where ``T`` is one of (float64, float32,
-        complex128, complex64).
+    Solves ``out = alpha * op_a(a).dot(op_b(b)) + beta * out``.
+
+    Where ``op_a`` and ``op_b`` indicate any transpose/conjugate operation
+    specified on ``a`` or ``b`` respectively.
+
+    The operands may have different precisions and domains, for example
+    ``float32`` inputs with a ``float64`` output, or a real ``a`` with a
+    complex ``b``. Operands are converted as they're packed by BLIS, no
+    upcast copies are made, and real operands aren't promoted to complex
+    (so a real times complex product takes half the FLOPs of the complex
+    product).
+
+    ``float16`` operands are also supported (with ``float32`` operands and
+    output), for storing large operands compactly. These are widened to
+    ``float32`` a block at a time as the product consumes them, so a full
+    ``float32`` copy is never made. Not supported in numba.
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T]
+        Two arrays, where ``T`` is one of (float64, float32, complex128,
+        complex64).
+    out : np.ndarray[T], optional
+        An optional output array, must be complex if either input is. If not
+        provided, a new array will be allocated with the widest domain and
+        precision of ``a`` and ``b``.
+    a_trans, b_trans : bool, optional
+        Whether to transpose ``a`` and ``b`` respectively. Default is False.
+    a_conj, b_conj : bool, optional
+        Whether to conjugate ``a`` and ``b`` respectively. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+    comp_dtype : {float32, float64}, optional
+        The precision to compute (and accumulate) the product in. Defaults to
+        the precision of ``out``.
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    gemm, alpha, beta = _CTX.check_gemm(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, alpha, beta, nthreads,
+        comp_dtype
+    )
+    return gemm(a, b, out, a_trans, a_conj, b_trans, b_conj, alpha, beta, nthreads)
+
+
+def gemm_batched(a, b, out=None, a_trans=False, a_conj=False,
+                 b_trans=False, b_conj=False, alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply two stacks of matrices.
+
+    Solves ``out[i] = alpha * op_a(a[i]).dot(op_b(b[i])) + beta * out[i]``
+    for every index ``i`` into the leading (batch) dimensions.
+
+    Where ``op_a`` and ``op_b`` indicate any transpose/conjugate operation
+    specified on the matrices in ``a`` or ``b`` respectively. The batch
+    dimensions of ``a`` and ``b`` are broadcast together, as in
+    ``np.matmul``. The whole batch is run in a single native call, with
+    threads spread across the batch for small products, and within each
+    product for large ones. If one operand is shared by the whole batch (e.g.
+    ``gemm_batched(a, w)`` with a 2 dimensional ``w``), and the stacks of the
+    other operand and ``out`` are contiguous, the batch is run as a single
+    large product instead (see ``get_collapsed_count``).
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T]
+        Two identically typed arrays of at least 2 dimensions, where ``T``
+        is one of (float64, float32, complex128, complex64).
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input arrays. If
+        not provided, a new array will be allocated.
+    a_trans, b_trans : bool, optional
+        Whether to transpose ``a`` and ``b`` respectively. Default is False.
+    a_conj, b_conj : bool, optional
+        Whether to conjugate ``a`` and ``b`` respectively. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    gemm_batched, alpha, beta = _CTX.check_gemm_batched(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, alpha, beta, nthreads
+    )
+    return gemm_batched(a, b, out, a_trans, a_conj, b_trans, b_conj, alpha,
+                        beta, nthreads)
+
+
+def gemm_batched_strided(a, b, out=None, a_trans=False, a_conj=False,
+                         b_trans=False, b_conj=False, alpha=1.0, beta=0.0,
+                         nthreads=-1):
+    """Multiply two equal-length stacks of identically shaped matrices.
+
+    Solves ``out[i] = alpha * op_a(a[i]).dot(op_b(b[i])) + beta * out[i]``
+    for every ``i`` in the first dimension.
+
+    Where ``op_a`` and ``op_b`` indicate any transpose/conjugate operation
+    specified on the matrices in ``a`` or ``b`` respectively. Each operand may
+    have any batch stride (including 0, e.g. from ``np.broadcast_to``). The
+    batch is validated once and run in a single native call, parallelized
+    across the batch rather than within each product. This is the fastest
+    option for many tiny products; see ``gemm_batched`` for broadcasting
+    over several batch dimensions.
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T]
+        Two identically typed 3 dimensional arrays, where ``T`` is one of
+        (float64, float32, complex128, complex64).
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input arrays. If
+        not provided, a new array will be allocated.
+    a_trans, b_trans : bool, optional
+        Whether to transpose ``a`` and ``b`` respectively. Default is False.
+    a_conj, b_conj : bool, optional
+        Whether to conjugate ``a`` and ``b`` respectively. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    gemm_batched_strided, alpha, beta = _CTX.check_gemm_batched_strided(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, alpha, beta, nthreads
+    )
+    return gemm_batched_strided(a, b, out, a_trans, a_conj, b_trans, b_conj,
+                                alpha, beta, nthreads)
+
+
+def gemm_grouped(problems, alpha=1.0, beta=0.0, nthreads=-1):
+    """Perform a group of independent matrix multiplications.
+
+    Solves ``out = alpha * a.dot(b) + beta * out`` for every ``(a, b, out)``
+    in ``problems``.
+
+    Unlike ``gemm_batched``, the problems may all have different shapes. The
+    whole group is validated up front and run in a single native call, with
+    the problems load-balanced across the threads (largest first). Groups
+    that are really one larger product (a shared ``b`` with each ``a`` and
+    ``out`` the next block of rows of a larger array, or a shared ``a`` with
+    each ``b`` and ``out`` the next block of columns) are run as that product
+    instead (see ``get_collapsed_count``).
+
+    Parameters
+    ----------
+    problems : list of tuples
+        A list of ``(a, b, out)`` tuples of identically typed 2 dimensional
+        arrays, where the type is one of (float64, float32, complex128,
+        complex64). ``out`` may be None, in which case a new array will be
+        allocated. In numba this must be a (typed) list, and ``out`` must be
+        provided.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    outs : list of np.ndarray[T]
+        The output of each problem, in order.
+    """
+    gemm_grouped, alpha, beta = _CTX.check_gemm_grouped(problems, alpha, beta, nthreads)
+    return gemm_grouped(problems, alpha, beta, nthreads)
+
+
+def gemm_planar(ar, ai, br, bi, out_r=None, out_i=None, a_trans=False,
+                a_conj=False, b_trans=False, b_conj=False, alpha=1.0, beta=0.0,
+                nthreads=-1):
+    """Multiply two complex matrices stored in planar form.
+
+    Solves ``out = alpha * op_a(a).dot(op_b(b)) + beta * out``, where each
+    complex matrix is stored as two real matrices holding its real and
+    imaginary parts (e.g. ``a = ar + 1j * ai``).
+
+    The product is computed with four real matrix multiplications directly
+    on the planar storage, so the operands never need to be interleaved
+    into (or split back out of) a complex array.
+
+    Parameters
+    ----------
+    ar, ai, br, bi : np.ndarray[T]
+        The real and imaginary parts of ``a`` and ``b``, all identically
+        typed, where ``T`` is one of (float64, float32).
+    out_r, out_i : np.ndarray[T], optional
+        Optional output arrays for the real and imaginary parts of the
+        result. If not provided, new arrays will be allocated.
+    a_trans, b_trans : bool, optional
+        Whether to transpose ``a`` and ``b`` respectively. Default is False.
+    a_conj, b_conj : bool, optional
+        Whether to conjugate ``a`` and ``b`` respectively. Default is False.
+    alpha : T
+        The ``alpha`` factor, must be real. Default is 1.
+    beta : T
+        The ``beta`` factor, must be real. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out_r, out_i : np.ndarray[T]
+    """
+    gemm_planar, alpha, beta = _CTX.check_gemm_planar(
+        ar, ai, br, bi, out_r, out_i, a_trans, a_conj, b_trans, b_conj, alpha,
+        beta, nthreads
+    )
+    return gemm_planar(ar, ai, br, bi, out_r, out_i, a_trans, a_conj, b_trans,
+                       b_conj, alpha, beta, nthreads)
+
+
+def gemmt(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+          b_conj=False, out_upper=False, alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply two matrices, computing only one triangle of the result.
+
+    Solves ``out = alpha * op_a(a).dot(op_b(b)) + beta * out``, updating
+    only the lower/upper triangle of ``out``.
+
+    Where ``op_a`` and ``op_b`` indicate any transpose/conjugate operation
+    specified on ``a`` or ``b`` respectively. Useful when the product is
+    known to be symmetric, as only half of the FLOPs are performed.
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T]
+        Two identically typed arrays, where ``T`` is one of
+        (float64, float32, complex128, complex64). The product of the two
+        must be square.
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input arrays. If
+        not provided, a new array will be allocated.
+    a_trans, b_trans : bool, optional
+        Whether to transpose ``a`` and ``b`` respectively. Default is False.
+    a_conj, b_conj : bool, optional
+        Whether to conjugate ``a`` and ``b`` respectively. Default is False.
+    out_upper : bool, optional
+        Whether to compute the upper (``True``) or lower (``False``) triangle
+        of ``out``. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    gemmt, alpha, beta = _CTX.check_gemmt(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper, alpha, beta,
+        nthreads
+    )
+    return gemmt(a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper,
+                 alpha, beta, nthreads)
+
+
+def symm(a, b, out=None, a_right=False, a_upper=False, a_conj=False,
+         b_trans=False, b_conj=False, alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply a symmetric matrix with another matrix.
+
+    Solves ``out = alpha * op_a(a).dot(op_b(b)) + beta * out``, or
+    ``out = alpha * op_b(b).dot(op_a(a)) + beta * out`` if ``a_right``.
+
+    Where ``a`` is a symmetric matrix of which only the lower/upper triangle
+    is referenced, and ``op_a`` and ``op_b`` indicate any transpose/conjugate
+    operation specified on ``a`` or ``b`` respectively.
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T]
+        Two identically typed arrays, where ``T`` is one of
+        (float64, float32, complex128, complex64). ``a`` must be square.
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input arrays. If
+        not provided, a new array will be allocated.
+    a_right : bool, optional
+        Whether ``a`` is on the right (``True``) or left (``False``) side of
+        the product. Default is False.
+    a_upper : bool, optional
+        Whether the upper (``True``) or lower (``False``) triangle of ``a`` is
+        referenced. Default is False.
+    a_conj : bool, optional
+        Whether to conjugate ``a``. Default is False.
+    b_trans : bool, optional
+        Whether to transpose ``b``. Default is False.
+    b_conj : bool, optional
+        Whether to conjugate ``b``. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    symm, alpha, beta = _CTX.check_symm(
+        a, b, out, a_right, a_upper, a_conj, b_trans, b_conj, alpha, beta,
+        nthreads
+    )
+    return symm(a, b, out, a_right, a_upper, a_conj, b_trans, b_conj, alpha,
+                beta, nthreads)
+
+
+def hemm(a, b, out=None, a_right=False, a_upper=False, a_conj=False,
+         b_trans=False, b_conj=False, alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply a Hermitian matrix with another matrix.
+
+    Solves ``out = alpha * op_a(a).dot(op_b(b)) + beta * out``, or
+    ``out = alpha * op_b(b).dot(op_a(a)) + beta * out`` if ``a_right``.
+
+    Where ``a`` is a Hermitian matrix of which only the lower/upper triangle
+    is referenced, and ``op_a`` and ``op_b`` indicate any transpose/conjugate
+    operation specified on ``a`` or ``b`` respectively. For real dtypes this
+    is equivalent to ``symm``.
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T]
+        Two identically typed arrays, where ``T`` is one of
+        (float64, float32, complex128, complex64). ``a`` must be square.
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input arrays. If
+        not provided, a new array will be allocated.
+    a_right : bool, optional
+        Whether ``a`` is on the right (``True``) or left (``False``) side of
+        the product. Default is False.
+    a_upper : bool, optional
+        Whether the upper (``True``) or lower (``False``) triangle of ``a`` is
+        referenced. Default is False.
+    a_conj : bool, optional
+        Whether to conjugate ``a``. Default is False.
+    b_trans : bool, optional
+        Whether to transpose ``b``. Default is False.
+    b_conj : bool, optional
+        Whether to conjugate ``b``. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    hemm, alpha, beta = _CTX.check_hemm(
+        a, b, out, a_right, a_upper, a_conj, b_trans, b_conj, alpha, beta,
+        nthreads
+    )
+    return hemm(a, b, out, a_right, a_upper, a_conj, b_trans, b_conj, alpha,
+                beta, nthreads)
+
+
+def syrk(a, out=None, a_trans=False, a_conj=False, out_upper=False,
+         out_full=False, alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply a matrix with its transpose.
+
+    Solves ``out = alpha * op_a(a).dot(op_a(a).T) + beta * out``.
+
+    Where ``op_a`` indicates any transpose/conjugate operation specified
+    on ``a``, and ``out`` is an optional lower/upper triangular matrix.
+
+    Parameters
+    ----------
+    a : np.ndarray[T]
+        The input array, where ``T`` is one of (float64, float32, complex128,
+        complex64).
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input array. If
+        not provided, a new array will be allocated.
+    a_trans : bool, optional
+        Whether to transpose ``a``. Default is False.
+    a_conj : bool, optional
+        Whether to conjugate ``a``. Default is False.
+    out_upper : bool, optional
+        Whether ``out`` is an upper (``True``) or lower (``False``) triangular
+        matrix. Default is False.
+    out_full : bool, optional
+        Whether to also fill in the other triangle, returning the full
+        symmetric matrix. The mirroring is fused with the update, which
+        avoids a separate ``mksymm`` pass. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    syrk, alpha, beta = _CTX.check_syrk(
+        a, out, a_trans, a_conj, out_upper, out_full, alpha, beta, nthreads
+    )
+    return syrk(a, out, a_trans, a_conj, out_upper, out_full, alpha, beta,
+                nthreads)
+
+
+def herk(a, out=None, a_trans=False, a_conj=False, out_upper=False,
+         out_full=False, alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply a matrix with its conjugate transpose.
+
+    Solves ``out = alpha * op_a(a).dot(op_a(a).conj().T) + beta * out``.
+
+    Where ``op_a`` indicates any transpose/conjugate operation specified
+    on ``a``, and ``out`` is an optional lower/upper triangular matrix. For
+    real dtypes this is equivalent to ``syrk``.
+
+    Parameters
+    ----------
+    a : np.ndarray[T]
+        The input array, where ``T`` is one of (float64, float32, complex128,
+        complex64).
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input array. If
+        not provided, a new array will be allocated.
+    a_trans : bool, optional
+        Whether to transpose ``a``. Default is False.
+    a_conj : bool, optional
+        Whether to conjugate ``a``. Default is False.
+    out_upper : bool, optional
+        Whether ``out`` is an upper (``True``) or lower (``False``) triangular
+        matrix. Default is False.
+    out_full : bool, optional
+        Whether to also fill in the other triangle, returning the full
+        Hermitian matrix. The mirroring is fused with the update, which
+        avoids a separate ``mkherm`` pass. Default is False.
+    alpha : R
+        The ``alpha`` factor, where ``R`` is the real type corresponding to
+        ``T``. Default is 1.
+    beta : R
+        The ``beta`` factor, where ``R`` is the real type corresponding to
+        ``T``. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    herk, alpha, beta = _CTX.check_herk(
+        a, out, a_trans, a_conj, out_upper, out_full, alpha, beta, nthreads
+    )
+    return herk(a, out, a_trans, a_conj, out_upper, out_full, alpha, beta,
+                nthreads)
+
+
+def syrk_batched(a, out=None, a_trans=False, a_conj=False, out_upper=False,
+                 out_full=False, alpha=1.0, beta=0.0, nthreads=-1):
+    """Perform many independent symmetric rank-k updates.
+
+    Solves ``out[i] = alpha * op_a(a[i]).dot(op_a(a[i]).T) + beta * out[i]``
+    for every matrix ``a[i]`` in a 3 dimensional stack, or in a list of
+    (possibly differently shaped) matrices.
+
+    Where ``op_a`` indicates any transpose/conjugate operation specified on
+    the matrices in ``a``. All updates are run in a single native call,
+    parallelized across the problems. As in ``syrk``, only the lower (or
+    upper) triangle of each output is updated, unless ``out_full`` is set.
+
+    Parameters
+    ----------
+    a : np.ndarray[T] or list of np.ndarray[T]
+        A 3 dimensional array, or a list of identically typed 2 dimensional
+        arrays, where ``T`` is one of (float64, float32, complex128,
+        complex64).
+    out : np.ndarray[T] or list of np.ndarray[T], optional
+        An optional output, matching the form and type of ``a``. If not
+        provided, new arrays will be allocated.
+    a_trans : bool, optional
+        Whether to transpose the matrices in ``a``. Default is False.
+    a_conj : bool, optional
+        Whether to conjugate the matrices in ``a``. Default is False.
+    out_upper : bool, optional
+        Whether to store the outputs in the lower (``False``) or upper
+        (``True``) triangles. Default is False.
+    out_full : bool, optional
+        Whether to also mirror each triangle into the other half, producing
+        full symmetric matrices in the same pass. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T] or list of np.ndarray[T]
+        A 3 dimensional array if ``a`` is an array, otherwise a list.
+    """
+    syrk_batched, alpha, beta = _CTX.check_syrk_batched(
+        a, out, a_trans, a_conj, out_upper, out_full, alpha, beta, nthreads
+    )
+    return syrk_batched(a, out, a_trans, a_conj, out_upper, out_full, alpha,
+                        beta, nthreads)
+
+
+def syr2k(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+          b_conj=False, out_upper=False, alpha=1.0, beta=0.0, nthreads=-1):
+    """Perform a symmetric rank-2k update.
+
+    Solves ``out = alpha * op_a(a).dot(op_b(b).T) + alpha * op_b(b).dot(op_a(a).T)
+    + beta * out``.
+
+    Where ``op_a`` and ``op_b`` indicate any transpose/conjugate operation
+    specified on ``a`` or ``b`` respectively, and ``out`` is an optional
+    lower/upper triangular matrix.
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T]
+        Two identically typed and shaped arrays, where ``T`` is one of
+        (float64, float32, complex128, complex64).
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input arrays. If
+        not provided, a new array will be allocated.
+    a_trans, b_trans : bool, optional
+        Whether to transpose ``a`` and ``b`` respectively. Default is False.
+    a_conj, b_conj : bool, optional
+        Whether to conjugate ``a`` and ``b`` respectively. Default is False.
+    out_upper : bool, optional
+        Whether ``out`` is an upper (``True``) or lower (``False``) triangular
+        matrix. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    syr2k, alpha, beta = _CTX.check_syr2k(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper, alpha, beta,
+        nthreads
+    )
+    return syr2k(a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper,
+                 alpha, beta, nthreads)
+
+
+def her2k(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+          b_conj=False, out_upper=False, alpha=1.0, beta=0.0, nthreads=-1):
+    """Perform a Hermitian rank-2k update.
+
+    Solves ``out = alpha * op_a(a).dot(op_b(b).conj().T) +
+    conj(alpha) * op_b(b).dot(op_a(a).conj().T) + beta * out``.
+
+    Where ``op_a`` and ``op_b`` indicate any transpose/conjugate operation
+    specified on ``a`` or ``b`` respectively, and ``out`` is an optional
+    lower/upper triangular matrix. For real dtypes this is equivalent to
+    ``syr2k``.
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T]
+        Two identically typed and shaped arrays, where ``T`` is one of
+        (float64, float32, complex128, complex64).
+    out : np.ndarray[T], optional
+        An optional output array, must match the type of the input arrays. If
+        not provided, a new array will be allocated.
+    a_trans, b_trans : bool, optional
+        Whether to transpose ``a`` and ``b`` respectively. Default is False.
+    a_conj, b_conj : bool, optional
+        Whether to conjugate ``a`` and ``b`` respectively. Default is False.
+    out_upper : bool, optional
+        Whether ``out`` is an upper (``True``) or lower (``False``) triangular
+        matrix. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : R
+        The ``beta`` factor, where ``R`` is the real type corresponding to
+        ``T``. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : np.ndarray[T]
+    """
+    her2k, alpha, beta = _CTX.check_her2k(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper, alpha, beta,
+        nthreads
+    )
+    return her2k(a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper,
+                 alpha, beta, nthreads)
+
+
+def mksymm(a, upper=False, nthreads=-1):
+    """Convert a triangular matrix into a symmetric matrix.
+
+    Parameters
+    ----------
+    a : np.ndarray[T]
+        A triangular square matrix, where ``T`` is one of (float64, float32,
+        complex128, complex64).
     upper : bool, optional
         Whether ``a`` is an upper (``True``) or lower (``False``) triangular
         matrix. Default is False.
     nthreads : int
-        The number of threads to use. Defaults to deriving from environment
-        variables (e.g. ``BLIS_NUM_THREADS``).
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
 
     Returns
     -------
@@ -249,3 +1333,199 @@ def mksymm(a, upper=False, nthreads=-1):
     """
     mksymm = _CTX.check_mksymm(a, upper, nthreads)
     return mksymm(a, upper, nthreads)
+
+
+def mkherm(a, upper=False, nthreads=-1):
+    """Convert a triangular matrix into a Hermitian matrix.
+
+    Parameters
+    ----------
+    a : np.ndarray[T]
+        A triangular square matrix, where ``T`` is one of (float64, float32,
+        complex128, complex64).
+    upper : bool, optional
+        Whether ``a`` is an upper (``True``) or lower (``False``) triangular
+        matrix. Default is False.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    a : np.ndarray[T]
+    """
+    mkherm = _CTX.check_mkherm(a, upper, nthreads)
+    return mkherm(a, upper, nthreads)
+
+
+def mksymm_batched(a, upper=False, nthreads=-1):
+    """Convert many triangular matrices into symmetric matrices.
+
+    All matrices are processed in a single native call, parallelized across
+    the matrices.
+
+    Parameters
+    ----------
+    a : np.ndarray[T] or list of np.ndarray[T]
+        A 3 dimensional stack of triangular square matrices, or a list of
+        identically typed triangular square matrices, where ``T`` is one of
+        (float64, float32, complex128, complex64).
+    upper : bool, optional
+        Whether the matrices are upper (``True``) or lower (``False``)
+        triangular. Default is False.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    a : np.ndarray[T] or list of np.ndarray[T]
+    """
+    mksymm_batched = _CTX.check_mksymm_batched(a, upper, nthreads)
+    return mksymm_batched(a, upper, nthreads)
+
+
+def set_num_threads(nthreads):
+    """Set the default number of threads for all operations.
+
+    Used by any call with ``nthreads=-1`` (the default), including calls from
+    numba compiled code and through the C API. ``threadpoolctl`` also limits
+    the threads through this default, if installed.
+
+    Parameters
+    ----------
+    nthreads : int
+        The number of threads. Values <= 0 restore the default from the
+        environment (e.g. ``BLIS_NUM_THREADS``).
+    """
+    _CTX.check_ints(nthreads=nthreads)
+    _lib.pybli_set_num_threads(nthreads)
+
+
+def get_num_threads():
+    """The default number of threads for all operations.
+
+    Returns
+    -------
+    nthreads : int
+    """
+    return _lib.pybli_get_num_threads()
+
+
+def get_collapsed_count():
+    """The number of batches or groups run as a single large product.
+
+    Products in ``gemm_batched``, ``gemm_batched_strided`` and
+    ``gemm_grouped`` (and ``matmul``) that share one operand, with the other
+    operand and output of each product tiling a larger matrix, are run as
+    one large GEMM rather than many small ones. This counts how many times
+    that has happened in this process.
+
+    Returns
+    -------
+    count : int
+    """
+    return _lib.pybli_get_collapsed_count()
+
+
+def reset_collapsed_count():
+    """Reset the count returned by ``get_collapsed_count`` to zero."""
+    _lib.pybli_reset_collapsed_count()
+
+
+def op_signature(op):
+    """The signature of the public function for ``op``, an ``Op`` from
+    ``_spec.OPS``"""
+    return inspect.Signature([
+        inspect.Parameter(name, inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                          default=default)
+        for name, default in op.parameters()
+    ])
+
+
+# The types of scalar outputs in docstrings, by ``Operand.dtype``
+_SCALAR_TYPES = {None: "T", "real": "R", "index": "int"}
+
+
+def _op_docstring(op):
+    arrays = [o for o in op.operands if o.mode != "out"]
+    lines = [op.summary, ""]
+    lines.extend(_wrap("Solves ``%s``." % op.equation, indent=""))
+    lines.append("")
+    if any(f.kind in ("trans", "conj") for f in op.flags):
+        lines.extend([
+            "Where ``op_*`` indicates any transpose/conjugate operation",
+            "specified on the respective operand.",
+            ""
+        ])
+    lines.extend(["Parameters", "----------"])
+    for o in op.operands:
+        if o.is_scalar:
+            continue
+        kind = "%d dimensional array" % o.ndim
+        if o is arrays[0]:
+            desc = ("A %s, where ``T`` is one of (float64, float32, "
+                    "complex128, complex64). %s" % (kind, o.doc))
+        elif o.mode == "out":
+            desc = ("An optional %s, must match the type of the input arrays. "
+                    "%s If not provided, a new array will be allocated."
+                    % (kind, o.doc))
+        else:
+            desc = ("A %s, must match the type of ``%s``. %s"
+                    % (kind, arrays[0].name, o.doc))
+        optional = ", optional" if o.mode == "out" else ""
+        lines.append("%s : np.ndarray[T]%s" % (o.name, optional))
+        lines.extend(_wrap(desc))
+    for f in op.flags:
+        lines.append("%s : bool, optional" % f.name)
+        lines.extend(_wrap(f.doc))
+    for s in op.scalars:
+        lines.append("%s : %s" % (s.name, "R" if s.real else "T"))
+        lines.extend(_wrap(s.doc))
+    lines.extend([
+        "nthreads : int",
+        "    The number of threads to use. Defaults to the process-wide default (see",
+        "    ``pyblis.set_num_threads``).",
+        "",
+        "Returns",
+        "-------",
+    ])
+    for o in op.outputs:
+        if o.is_scalar:
+            lines.append("%s : %s" % (o.name, _SCALAR_TYPES[o.dtype]))
+            lines.extend(_wrap(o.doc))
+        else:
+            lines.append("%s : np.ndarray[T]" % o.name)
+    return "\n    ".join(lines).replace("\n    \n", "\n\n") + "\n    "
+
+
+def _wrap(text, indent="    ", width=74):
+    lines = []
+    for word in text.split():
+        if lines and len(lines[-1]) + len(word) < width:
+            lines[-1] += " " + word
+        else:
+            lines.append(indent + word)
+    return lines
+
+
+def _make_op(op):
+    signature = op_signature(op)
+
+    def func(*args, **kwargs):
+        args = signature.bind(*args, **kwargs)
+        args.apply_defaults()
+        impl, scalars = _CTX.check_op(op, args.arguments)
+        kwargs = dict(args.arguments)
+        kwargs.update(scalars)
+        return impl(**kwargs)
+
+    func.__name__ = func.__qualname__ = op.name
+    func.__doc__ = _op_docstring(op)
+    func.__signature__ = signature
+    return func
+
+
+# The operations generated from the specs in ``_spec.OPS``
+for _op in _spec.OPS:
+    globals()[_op.name] = _make_op(_op)
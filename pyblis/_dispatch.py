@@ -0,0 +1,140 @@
+"""Opt-in routing of ``np.dot`` and ``np.matmul`` to pyblis"""
+import contextlib
+import functools
+
+import numpy as np
+
+from . import _wrappers
+
+_DTYPES = frozenset(map(np.dtype, ['f4', 'f8', 'c8', 'c16']))
+
+# The original NumPy functions, captured at import so that ``unpatch_numpy``
+# and the fallback path work however many times ``patch_numpy`` is called.
+_numpy_dot = np.dot
+_numpy_matmul = np.matmul
+
+_counts = {"routed": 0, "fallback": 0}
+
+
+def _supported(a, b, out):
+    """Whether a product of ``a`` and ``b`` into ``out`` can be routed.
+
+    Only exact ndarrays (not subclasses, which may override the product) of
+    a single supported dtype are routed. An ``out`` overlapping either
+    operand is left to NumPy, which buffers it."""
+    if type(a) is not np.ndarray or type(b) is not np.ndarray:
+        return False
+    if a.dtype not in _DTYPES or a.dtype != b.dtype:
+        return False
+    if out is not None:
+        if type(out) is not np.ndarray or out.dtype != a.dtype:
+            return False
+        if np.may_share_memory(out, a) or np.may_share_memory(out, b):
+            return False
+    return True
+
+
+@functools.wraps(_numpy_dot)
+def dot(a, b, out=None):
+    if (_supported(a, b, out) and 1 <= a.ndim <= 2 and 1 <= b.ndim <= 2 and
+            # NumPy only accepts C contiguous outputs for dot
+            (out is None or out.flags.c_contiguous)):
+        try:
+            res = _wrappers.dot(a, b, out=out)
+        except (TypeError, ValueError):
+            # Let NumPy raise its own error for invalid shapes
+            pass
+        else:
+            _counts["routed"] += 1
+            return res
+    _counts["fallback"] += 1
+    return _numpy_dot(a, b, out=out)
+
+
+@functools.wraps(_numpy_matmul)
+def matmul(a, b, out=None, **kwargs):
+    if isinstance(out, tuple) and len(out) == 1:
+        out = out[0]
+    if not kwargs and _supported(a, b, out) and a.ndim and b.ndim:
+        try:
+            res = _wrappers.matmul(a, b, out=out)
+        except (TypeError, ValueError):
+            pass
+        else:
+            _counts["routed"] += 1
+            return res
+    _counts["fallback"] += 1
+    return _numpy_matmul(a, b, out=out, **kwargs)
+
+
+def patch_numpy():
+    """Route ``np.dot`` and ``np.matmul`` to ``pyblis.dot`` and
+    ``pyblis.matmul``.
+
+    Products of NumPy arrays with a single dtype of (float64, float32,
+    complex128, complex64) are computed by BLIS. Everything else (other
+    dtypes, mixed dtypes, array subclasses and array-likes, an ``out`` that
+    overlaps an operand, or ``np.matmul`` with keyword arguments other than
+    ``out``) falls back to the original NumPy function, as do products that
+    are invalid, so NumPy raises the errors. ``get_dispatch_counts`` reports
+    how many calls took each path.
+
+    Only lookups through the ``numpy`` module see the patch, so functions
+    imported before patching (``from numpy import dot``) are unaffected. The
+    ``@`` operator can't be patched, as NumPy binds it in C on the immutable
+    ``ndarray`` type; use ``np.matmul`` instead.
+
+    Calling this when already patched does nothing. See also
+    ``unpatch_numpy`` and ``numpy_patched``.
+    """
+    np.dot = dot
+    np.matmul = matmul
+
+
+def unpatch_numpy():
+    """Restore the original ``np.dot`` and ``np.matmul``"""
+    np.dot = _numpy_dot
+    np.matmul = _numpy_matmul
+
+
+def is_numpy_patched():
+    """Whether ``np.dot`` and ``np.matmul`` are routed to pyblis"""
+    return np.dot is dot and np.matmul is matmul
+
+
+@contextlib.contextmanager
+def numpy_patched():
+    """A context manager routing ``np.dot`` and ``np.matmul`` to pyblis
+    within its body (see ``patch_numpy``).
+
+    On exit NumPy is restored to its state on entry, so nesting this inside
+    a ``patch_numpy`` call leaves NumPy patched.
+
+    Examples
+    --------
+    >>> with pyblis.numpy_patched():
+    ...     res = np.dot(a, b)
+    """
+    saved = np.dot, np.matmul
+    patch_numpy()
+    try:
+        yield
+    finally:
+        np.dot, np.matmul = saved
+
+
+def get_dispatch_counts():
+    """The number of patched ``np.dot`` and ``np.matmul`` calls that were
+    routed to pyblis, and that fell back to NumPy.
+
+    Returns
+    -------
+    counts : dict
+        A dict with keys ``"routed"`` and ``"fallback"``.
+    """
+    return dict(_counts)
+
+
+def reset_dispatch_counts():
+    """Reset the counts returned by ``get_dispatch_counts`` to zero."""
+    _counts["routed"] = _counts["fallback"] = 0
@@ -2,8 +2,8 @@ import numba as nb
 from numba.extending import overload
 from numba.errors import TypingError
 
-from . import lib, _wrappers
-from ._core import TypingContext
+from . import lib, _dispatch, _spec, _wrappers
+from ._core import TypingContext, op_signature
 
 
 class NumbaTyping(TypingContext):
@@ -12,6 +12,16 @@ class NumbaTyping(TypingContext):
                 nb.complex64: 'c',
                 nb.complex128: 'z'}
 
+    real_dtypes = {nb.float32: nb.float32,
+                   nb.float64: nb.float64,
+                   nb.complex64: nb.float32,
+                   nb.complex128: nb.float64}
+
+    default_dtype = nb.float64
+
+    # numba doesn't support float16 arrays
+    half_dtype = None
+
     def error(self, msg):
         raise TypingError(msg)
 
@@ -41,24 +51,157 @@ class NumbaTyping(TypingContext):
             self.error("`%s` should have dtype %r, got %r" % (name, dtype, val))
         return val
 
+    def group_items(self, name, group):
+        if not (isinstance(group, (nb.types.List, nb.types.ListType)) and
+                isinstance(group.dtype, nb.types.BaseTuple) and
+                len(group.dtype) == 3):
+            self.error("`%s` must be a list of tuples of length 3" % name)
+        if any(self.is_none(t) for t in group.dtype.types):
+            self.error("`%s` items can't contain None in numba" % name)
+        return [group.dtype.types]
+
+    def list_items(self, name, lst):
+        if not isinstance(lst, (nb.types.List, nb.types.ListType)):
+            self.error("`%s` must be a NumPy ndarray or a list" % name)
+        return [lst.dtype]
+
+    def as_dtype(self, name, val):
+        if not isinstance(val, (nb.types.NumberClass, nb.types.DType)):
+            self.error("`%s` must be a dtype, got %r" % (name, val))
+        return val.dtype
+
 
 _CTX = NumbaTyping()
 
 
+@overload(lib.dotv)
+def overload_dotv(x, y, x_conj=False, y_conj=False, nthreads=-1):
+    return _CTX.check_dotv(x, y, x_conj, y_conj, nthreads)
+
+
+@overload(lib.gemv)
+def overload_gemv(a, x, out=None, a_trans=False, a_conj=False, x_conj=False,
+                  alpha=1.0, beta=0.0, nthreads=-1):
+    return _CTX.check_gemv(
+        a, x, out, a_trans, a_conj, x_conj, alpha, beta, nthreads
+    )[0]
+
+
 @overload(lib.gemm)
 def overload_gemm(a, b, out=None, a_trans=False, a_conj=False,
                   b_trans=False, b_conj=False, alpha=1.0,
-                  beta=0.0, nthreads=-1):
+                  beta=0.0, nthreads=-1, comp_dtype=None):
     return _CTX.check_gemm(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, alpha, beta, nthreads,
+        comp_dtype
+    )[0]
+
+
+@overload(lib.gemm_batched)
+def overload_gemm_batched(a, b, out=None, a_trans=False, a_conj=False,
+                          b_trans=False, b_conj=False, alpha=1.0, beta=0.0,
+                          nthreads=-1):
+    return _CTX.check_gemm_batched(
         a, b, out, a_trans, a_conj, b_trans, b_conj, alpha, beta, nthreads
     )[0]
 
 
+@overload(lib.gemm_batched_strided)
+def overload_gemm_batched_strided(a, b, out=None, a_trans=False, a_conj=False,
+                                  b_trans=False, b_conj=False, alpha=1.0,
+                                  beta=0.0, nthreads=-1):
+    return _CTX.check_gemm_batched_strided(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, alpha, beta, nthreads
+    )[0]
+
+
+@overload(lib.gemm_grouped)
+def overload_gemm_grouped(problems, alpha=1.0, beta=0.0, nthreads=-1):
+    return _CTX.check_gemm_grouped(problems, alpha, beta, nthreads)[0]
+
+
+@overload(lib.gemm_planar)
+def overload_gemm_planar(ar, ai, br, bi, out_r=None, out_i=None, a_trans=False,
+                         a_conj=False, b_trans=False, b_conj=False, alpha=1.0,
+                         beta=0.0, nthreads=-1):
+    return _CTX.check_gemm_planar(
+        ar, ai, br, bi, out_r, out_i, a_trans, a_conj, b_trans, b_conj, alpha,
+        beta, nthreads
+    )[0]
+
+
+@overload(lib.gemmt)
+def overload_gemmt(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+                   b_conj=False, out_upper=False, alpha=1.0, beta=0.0,
+                   nthreads=-1):
+    return _CTX.check_gemmt(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper, alpha, beta,
+        nthreads
+    )[0]
+
+
+@overload(lib.symm)
+def overload_symm(a, b, out=None, a_right=False, a_upper=False, a_conj=False,
+                  b_trans=False, b_conj=False, alpha=1.0, beta=0.0,
+                  nthreads=-1):
+    return _CTX.check_symm(
+        a, b, out, a_right, a_upper, a_conj, b_trans, b_conj, alpha, beta,
+        nthreads
+    )[0]
+
+
+@overload(lib.hemm)
+def overload_hemm(a, b, out=None, a_right=False, a_upper=False, a_conj=False,
+                  b_trans=False, b_conj=False, alpha=1.0, beta=0.0,
+                  nthreads=-1):
+    return _CTX.check_hemm(
+        a, b, out, a_right, a_upper, a_conj, b_trans, b_conj, alpha, beta,
+        nthreads
+    )[0]
+
+
 @overload(lib.syrk)
 def overload_syrk(a, out=None, a_trans=False, a_conj=False, out_upper=False,
-                  alpha=1.0, beta=0.0, nthreads=-1):
+                  out_full=False, alpha=1.0, beta=0.0, nthreads=-1):
     return _CTX.check_syrk(
-        a, out, a_trans, a_conj, out_upper, alpha, beta, nthreads
+        a, out, a_trans, a_conj, out_upper, out_full, alpha, beta, nthreads
+    )[0]
+
+
+@overload(lib.herk)
+def overload_herk(a, out=None, a_trans=False, a_conj=False, out_upper=False,
+                  out_full=False, alpha=1.0, beta=0.0, nthreads=-1):
+    return _CTX.check_herk(
+        a, out, a_trans, a_conj, out_upper, out_full, alpha, beta, nthreads
+    )[0]
+
+
+@overload(lib.syrk_batched)
+def overload_syrk_batched(a, out=None, a_trans=False, a_conj=False,
+                          out_upper=False, out_full=False, alpha=1.0, beta=0.0,
+                          nthreads=-1):
+    return _CTX.check_syrk_batched(
+        a, out, a_trans, a_conj, out_upper, out_full, alpha, beta, nthreads
+    )[0]
+
+
+@overload(lib.syr2k)
+def overload_syr2k(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+                   b_conj=False, out_upper=False, alpha=1.0, beta=0.0,
+                   nthreads=-1):
+    return _CTX.check_syr2k(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper, alpha, beta,
+        nthreads
+    )[0]
+
+
+@overload(lib.her2k)
+def overload_her2k(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+                   b_conj=False, out_upper=False, alpha=1.0, beta=0.0,
+                   nthreads=-1):
+    return _CTX.check_her2k(
+        a, b, out, a_trans, a_conj, b_trans, b_conj, out_upper, alpha, beta,
+        nthreads
     )[0]
 
 
@@ -67,7 +210,89 @@ def overload_mksymm(a, upper=False, nthreads=-1):
     return _CTX.check_mksymm(a, upper, nthreads)
 
 
+@overload(lib.mkherm)
+def overload_mkherm(a, upper=False, nthreads=-1):
+    return _CTX.check_mkherm(a, upper, nthreads)
+
+
+@overload(lib.mksymm_batched)
+def overload_mksymm_batched(a, upper=False, nthreads=-1):
+    return _CTX.check_mksymm_batched(a, upper, nthreads)
+
+
+def _overload_op(op):
+    signature = op_signature(op)
+
+    def overload_op(*args, **kwargs):
+        args = signature.bind(*args, **kwargs)
+        args.apply_defaults()
+        return _CTX.check_op(op, args.arguments)[0]
+
+    overload_op.__signature__ = signature
+    overload(getattr(lib, op.name))(overload_op)
+
+
+for _op in _spec.OPS:
+    _overload_op(_op)
+
+
+@overload(_wrappers._is_transpose)
+def overload_is_transpose(a, b):
+    return _wrappers._is_transpose
+
+
+@overload(_wrappers._is_conj_transpose)
+def overload_is_conj_transpose(a, b):
+    return _wrappers._is_conj_transpose
+
+
 @overload(_wrappers.dot)
 def overload_dot(a, b, out=None, nthreads=-1):
-    _CTX.check_gemm(a, b, out=out, nthreads=nthreads)
-    return _wrappers.dot
+    ndims = None
+    if _CTX.is_ndarray(a) and _CTX.is_ndarray(b):
+        ndims = (_CTX.ndim(a), _CTX.ndim(b))
+    if ndims == (1, 1):
+        if not _CTX.is_none(out):
+            _CTX.error("`out` is not supported for vector-vector products")
+        _CTX.check_dotv(a, b, nthreads=nthreads)
+        return _wrappers._dot_vv
+    elif ndims == (2, 1):
+        _CTX.check_gemv(a, b, out=out, nthreads=nthreads)
+        return _wrappers._dot_mv
+    elif ndims == (1, 2):
+        _CTX.check_gemv(b, a, out=out, nthreads=nthreads)
+        return _wrappers._dot_vm
+    else:
+        _CTX.check_gemm(a, b, out=out, nthreads=nthreads)
+        arrays = {"a": a, "b": b}
+        if not _CTX.is_none(out):
+            arrays["out"] = out
+        if not _CTX.has_uniform_dtype(**arrays):
+            return _wrappers._dot_mm_mixed
+        return _wrappers._dot_mm
+
+
+@overload(_wrappers.matmul)
+def overload_matmul(a, b, out=None, nthreads=-1):
+    if _CTX.is_ndarray(a) and _CTX.is_ndarray(b):
+        if _CTX.ndim(a) <= 2 and _CTX.ndim(b) <= 2:
+            return overload_dot(a, b, out=out, nthreads=nthreads)
+        elif _CTX.ndim(a) == 1 or _CTX.ndim(b) == 1:
+            _CTX.error("Broadcasting 1 dimensional operands against stacks of "
+                       "matrices is not supported in numba")
+    _CTX.check_gemm_batched(a, b, out=out, nthreads=nthreads)
+    return _wrappers._matmul_batched
+
+
+@overload(_dispatch.dot)
+def overload_patched_dot(a, b, out=None):
+    # Functions compiled while NumPy is patched look up the patched ``np.dot``,
+    # keep numba's own implementation for them
+    numpy_dot = _dispatch._numpy_dot
+
+    def patched_dot(a, b, out=None):
+        if out is None:
+            return numpy_dot(a, b)
+        return numpy_dot(a, b, out)
+
+    return patched_dot
@@ -0,0 +1,369 @@
+"""Symmetric and Hermitian matrices in packed triangular storage"""
+import numpy as np
+
+from . import _core
+
+# The number of elements in the dense scratch buffer used a block of rows at a
+# time by packed operations, bounding their extra memory
+_SCRATCH_SIZE = 1 << 22
+
+
+def _packed_size(n):
+    return n * (n + 1) // 2
+
+
+def _packed_n(size):
+    """The dimension of a matrix packed into ``size`` elements"""
+    n = int((np.sqrt(8 * size + 1) - 1) / 2)
+    while _packed_size(n) < size:
+        n += 1
+    return n
+
+
+class PackedSymmetric(object):
+    """A symmetric or Hermitian matrix, storing only one triangle.
+
+    The triangle is stored row by row in a 1 dimensional array of
+    ``n * (n + 1) // 2`` elements, half the memory of the full matrix. With
+    ``upper=False`` row ``i`` holds ``a[i, :i + 1]``, with ``upper=True`` it
+    holds ``a[i, i:]``. For symmetric matrices these are LAPACK's column
+    major ``'U'`` and ``'L'`` packed formats respectively.
+
+    Elements are read with ``p[i, j]`` from either triangle, and ``p.dot(x)``
+    (or ``p @ x``) multiplies with a vector or matrix without expanding ``p``.
+
+    Parameters
+    ----------
+    data : np.ndarray[T]
+        The packed triangle, where ``T`` is one of (float64, float32,
+        complex128, complex64). Used without copying.
+    upper : bool, optional
+        Whether ``data`` holds the upper (``True``) or lower (``False``)
+        triangle. Default is False.
+    hermitian : bool, optional
+        Whether the matrix is Hermitian rather than symmetric, the other
+        triangle holding the conjugated elements. Default is False.
+
+    See Also
+    --------
+    pyblis.lib.syrk_packed, pyblis.lib.herk_packed
+    """
+    def __init__(self, data, upper=False, hermitian=False):
+        _core._CTX.check_is_1d_array(data=data)
+        _core._CTX.check_dtype(data.dtype)
+        _core._CTX.check_bools(upper=upper, hermitian=hermitian)
+        n = _packed_n(data.shape[0])
+        if _packed_size(n) != data.shape[0]:
+            raise ValueError("`data` has %d elements, which isn't the size of "
+                             "a packed triangle" % data.shape[0])
+        self.data = data
+        self.n = n
+        self.upper = upper
+        self.hermitian = hermitian
+
+    @classmethod
+    def empty(cls, n, dtype='f8', upper=False, hermitian=False):
+        """A new ``n x n`` packed matrix, with uninitialized elements."""
+        return cls(np.empty(_packed_size(n), dtype=dtype), upper, hermitian)
+
+    @classmethod
+    def from_dense(cls, a, upper=False, hermitian=False):
+        """Pack one triangle of a square matrix.
+
+        Parameters
+        ----------
+        a : np.ndarray[T]
+            A square matrix, only the triangle given by ``upper`` is read.
+        upper : bool, optional
+            Whether to pack the upper (``True``) or lower (``False``)
+            triangle. Default is False.
+        hermitian : bool, optional
+            Whether ``a`` is Hermitian rather than symmetric. Default is
+            False.
+        """
+        _core._CTX.check_is_2d_array(a=a)
+        if a.shape[0] != a.shape[1]:
+            raise ValueError("`a` must be square")
+        out = cls.empty(a.shape[0], a.dtype, upper, hermitian)
+        for i0, i1, c0, c1, mask, start, stop in out._blocks():
+            out.data[start:stop] = a[i0:i1, c0:c1][mask]
+        return out
+
+    @property
+    def shape(self):
+        return (self.n, self.n)
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    def __repr__(self):
+        return "PackedSymmetric<n=%d, dtype=%s, upper=%s, hermitian=%s>" % (
+            self.n, self.dtype, self.upper, self.hermitian
+        )
+
+    def _offset(self, i):
+        """The offset of the first element of row ``i`` in ``data``"""
+        if self.upper:
+            return i * self.n - i * (i - 1) // 2
+        return i * (i + 1) // 2
+
+    def _blocks(self):
+        """Split the rows into blocks of at most ``_SCRATCH_SIZE`` elements.
+
+        Yields the row range ``[i0, i1)``, the column range ``[c0, c1)``
+        spanning the triangle in those rows, a mask selecting the triangle
+        from the dense ``(i1 - i0, c1 - c0)`` block, and the range of
+        ``data`` holding it (in the order the mask selects elements)."""
+        n = self.n
+        rows = max(1, min(n, _SCRATCH_SIZE // max(n, 1)))
+        for i0 in range(0, n, rows):
+            i1 = min(i0 + rows, n)
+            c0, c1 = (i0, n) if self.upper else (0, i1)
+            r = np.arange(i0, i1)[:, None]
+            c = np.arange(c0, c1)[None, :]
+            mask = c >= r if self.upper else c <= r
+            yield (i0, i1, c0, c1, mask, self._offset(i0), self._offset(i1))
+
+    def _scratch(self):
+        rows = max(1, min(self.n, _SCRATCH_SIZE // max(self.n, 1)))
+        return np.empty(rows * self.n, dtype=self.dtype)
+
+    def __getitem__(self, key):
+        if not (isinstance(key, tuple) and len(key) == 2):
+            raise IndexError("PackedSymmetric must be indexed as p[i, j]")
+        i, j = (np.asarray(k) for k in key)
+        if not (np.issubdtype(i.dtype, np.integer) and
+                np.issubdtype(j.dtype, np.integer)):
+            raise IndexError("Only integers and integer arrays are valid "
+                             "indices")
+        n = self.n
+        i = np.where(i < 0, i + n, i).astype(np.int64)
+        j = np.where(j < 0, j + n, j).astype(np.int64)
+        if np.any((i < 0) | (i >= n) | (j < 0) | (j >= n)):
+            raise IndexError("index out of bounds for shape %r"
+                             % (self.shape,))
+        # Elements of the other triangle are read from their mirror
+        swap = j < i if self.upper else j > i
+        row = np.where(swap, j, i)
+        col = np.where(swap, i, j)
+        index = self._offset(row) + (col - row if self.upper else col)
+        val = self.data[index]
+        if self.hermitian:
+            val = np.where(swap, np.conj(val), val)
+        return val[()]
+
+    def to_dense(self, out=None, nthreads=-1):
+        """Expand to the full ``n x n`` matrix.
+
+        Parameters
+        ----------
+        out : np.ndarray[T], optional
+            An optional output array, must match the type of ``data``. If
+            not provided, a new array will be allocated.
+        nthreads : int
+            The number of threads to use. Defaults to the process-wide
+            default (see ``pyblis.set_num_threads``).
+
+        Returns
+        -------
+        out : np.ndarray[T]
+        """
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        else:
+            _core._CTX.check_is_2d_array(out=out)
+            if out.shape != self.shape:
+                raise ValueError("Output shape mismatch")
+        for i0, i1, c0, c1, mask, start, stop in self._blocks():
+            out[i0:i1, c0:c1][mask] = self.data[start:stop]
+        mk = _core.mkherm if self.hermitian else _core.mksymm
+        return mk(out, upper=self.upper, nthreads=nthreads)
+
+    def dot(self, x, out=None, nthreads=-1):
+        """Multiply with a vector or matrix, without expanding this matrix.
+
+        The product is computed a block of rows at a time, each unpacked
+        into a bounded scratch buffer and applied twice (directly and
+        transposed) to cover both triangles.
+
+        Parameters
+        ----------
+        x : np.ndarray[T]
+            A 1 or 2 dimensional array with ``n`` rows, must match the type
+            of ``data``.
+        out : np.ndarray[T], optional
+            An optional output array, with the shape of ``x``. If not
+            provided, a new array will be allocated.
+        nthreads : int
+            The number of threads to use. Defaults to the process-wide
+            default (see ``pyblis.set_num_threads``).
+
+        Returns
+        -------
+        out : np.ndarray[T]
+        """
+        if not isinstance(x, np.ndarray) or x.ndim not in (1, 2):
+            raise TypeError("`x` must be a 1 or 2 dimensional NumPy ndarray")
+        if x.shape[0] != self.n:
+            raise ValueError("x shape mismatch")
+        _core._CTX.check_uniform_dtype(data=self.data, x=x)
+        if out is None:
+            out = np.zeros(x.shape, dtype=self.dtype)
+        else:
+            if not isinstance(out, np.ndarray) or out.shape != x.shape:
+                raise ValueError("Output shape mismatch")
+            out[...] = 0
+        if x.ndim == 1:
+            def update(s, x, out, trans):
+                _core.gemv(s, x, out=out, a_trans=trans,
+                           a_conj=trans and self.hermitian, beta=1.0,
+                           nthreads=nthreads)
+        else:
+            def update(s, x, out, trans):
+                _core.gemm(s, x, out=out, a_trans=trans,
+                           a_conj=trans and self.hermitian, beta=1.0,
+                           nthreads=nthreads)
+        scratch = self._scratch()
+        for i0, i1, c0, c1, mask, start, stop in self._blocks():
+            s = scratch[:(i1 - i0) * (c1 - c0)].reshape(i1 - i0, c1 - c0)
+            s.fill(0)
+            s[mask] = self.data[start:stop]
+            update(s, x[c0:c1], out[i0:i1], False)
+            # The diagonal was applied above, the mirrored pass covers only
+            # the strict triangle
+            r = np.arange(i1 - i0)
+            s[r, r + i0 - c0] = 0
+            update(s, x[i0:i1], out[c0:c1], True)
+        return out
+
+    def __matmul__(self, x):
+        return self.dot(x)
+
+
+def _rank_k_packed(herm, a, out, a_trans, a_conj, out_upper, alpha, beta,
+                   nthreads):
+    ctx = _core._CTX
+    ctx.check_is_2d_array(a=a)
+    dtype = ctx.check_uniform_dtype(a=a)
+    ctx.check_bools(a_trans=a_trans, a_conj=a_conj, out_upper=out_upper)
+    ctx.check_ints(nthreads=nthreads)
+    scalar_dtype = ctx.real_dtype(dtype) if herm else dtype
+    alpha = ctx.check_cast_scalar("alpha", alpha, scalar_dtype)
+    beta = ctx.check_cast_scalar("beta", beta, scalar_dtype)
+
+    op_a = a.T if a_trans else a
+    n = op_a.shape[0]
+    if out is None:
+        out = PackedSymmetric.empty(n, dtype, out_upper, herm)
+        beta = scalar_dtype.type(0)
+    else:
+        if not isinstance(out, PackedSymmetric):
+            ctx.error("`out` must be a PackedSymmetric")
+        if out.dtype != dtype:
+            ctx.error("Non-uniform dtypes found, `out`'s dtype is %r not %r"
+                      % (out.dtype, dtype))
+        if out.n != n:
+            raise ValueError("Output shape mismatch")
+        if out.upper != out_upper or out.hermitian != herm:
+            raise ValueError("`out` must be %s %s" % (
+                "upper" if out_upper else "lower",
+                "Hermitian" if herm else "symmetric"
+            ))
+
+    scratch = out._scratch()
+    for i0, i1, c0, c1, mask, start, stop in out._blocks():
+        s = scratch[:(i1 - i0) * (c1 - c0)].reshape(i1 - i0, c1 - c0)
+        if beta != 0:
+            s[mask] = out.data[start:stop]
+        _core.gemm(op_a[i0:i1], op_a[c0:c1], out=s, a_conj=a_conj,
+                   b_trans=True, b_conj=a_conj != herm, alpha=alpha,
+                   beta=beta, nthreads=nthreads)
+        if herm and ctx.is_complex(dtype):
+            r = np.arange(i1 - i0)
+            s.imag[r, r + i0 - c0] = 0
+        out.data[start:stop] = s[mask]
+    return out
+
+
+def syrk_packed(a, out=None, a_trans=False, a_conj=False, out_upper=False,
+                alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply a matrix with its transpose, into packed storage.
+
+    Solves ``out = alpha * op_a(a).dot(op_a(a).T) + beta * out`` like
+    ``syrk``, but with ``out`` a ``PackedSymmetric`` holding a single
+    triangle, so the full ``m x m`` result is never allocated. The product
+    is computed a block of rows at a time into a bounded scratch buffer.
+    Not supported in numba.
+
+    Parameters
+    ----------
+    a : np.ndarray[T]
+        The input array, where ``T`` is one of (float64, float32, complex128,
+        complex64).
+    out : PackedSymmetric, optional
+        An optional symmetric output, must match the type of the input array
+        and ``out_upper``. If not provided, a new one will be allocated.
+    a_trans : bool, optional
+        Whether to transpose ``a``. Default is False.
+    a_conj : bool, optional
+        Whether to conjugate ``a``. Default is False.
+    out_upper : bool, optional
+        Whether ``out`` stores the upper (``True``) or lower (``False``)
+        triangle. Default is False.
+    alpha : T
+        The ``alpha`` factor. Default is 1.
+    beta : T
+        The ``beta`` factor. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : PackedSymmetric
+    """
+    return _rank_k_packed(False, a, out, a_trans, a_conj, out_upper, alpha,
+                          beta, nthreads)
+
+
+def herk_packed(a, out=None, a_trans=False, a_conj=False, out_upper=False,
+                alpha=1.0, beta=0.0, nthreads=-1):
+    """Multiply a matrix with its conjugate transpose, into packed storage.
+
+    Solves ``out = alpha * op_a(a).dot(op_a(a).conj().T) + beta * out`` like
+    ``herk``, but with ``out`` a Hermitian ``PackedSymmetric`` holding a
+    single triangle, so the full ``m x m`` result is never allocated. Not
+    supported in numba.
+
+    Parameters
+    ----------
+    a : np.ndarray[T]
+        The input array, where ``T`` is one of (float64, float32, complex128,
+        complex64).
+    out : PackedSymmetric, optional
+        An optional Hermitian output, must match the type of the input array
+        and ``out_upper``. If not provided, a new one will be allocated.
+    a_trans : bool, optional
+        Whether to transpose ``a``. Default is False.
+    a_conj : bool, optional
+        Whether to conjugate ``a``. Default is False.
+    out_upper : bool, optional
+        Whether ``out`` stores the upper (``True``) or lower (``False``)
+        triangle. Default is False.
+    alpha : R
+        The ``alpha`` factor, where ``R`` is the real type corresponding to
+        ``T``. Default is 1.
+    beta : R
+        The ``beta`` factor, where ``R`` is the real type corresponding to
+        ``T``. Default is 0.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+
+    Returns
+    -------
+    out : PackedSymmetric
+    """
+    return _rank_k_packed(True, a, out, a_trans, a_conj, out_upper, alpha,
+                          beta, nthreads)
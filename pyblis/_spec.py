@@ -0,0 +1,487 @@
+"""Declarative specs of the BLIS operations with generated bindings.
+
+Each ``Op`` describes a typed BLIS operation: its operands and their shapes,
+flags, scalars, and the order of the arguments to the BLIS function. At
+build time ``lib/generate.py`` emits the C shims and the ctypes bindings
+from these specs, and at runtime ``pyblis`` builds the public functions,
+their validation and the numba overloads from them.
+
+The specs cover the level-1v, level-2 and level-3 operations that aren't
+bound by hand in ``_core.py``, and the vector norms and ``amaxv``. The
+level-1m, level-1d and level-1f operations and the matrix utility operations
+(e.g. ``normfm``) aren't covered. Those take diagonal offsets, a dense or
+triangular ``uplo``, or return a scalar alongside an array, none of which
+the specs describe.
+
+This module is also loaded standalone by the build, so it must not import
+anything from pyblis.
+"""
+from inspect import Parameter
+
+
+class Operand(object):
+    """An array operand, or a scalar output.
+
+    Parameters
+    ----------
+    name : str
+        The argument name.
+    shape : tuple of str
+        The dimensions of the operand (after any transpose), as names of
+        dimensions of the operation. An empty shape is a scalar output, which
+        isn't a parameter of the function but is returned.
+    doc : str
+        The parameter description.
+    mode : {'in', 'out', 'inout'}
+        Inputs and in-place outputs (``inout``) are required. An ``out``
+        operand is optional, and allocated if not provided.
+    trans : str, optional
+        The flag transposing this operand, if any.
+    dtype : {None, 'real', 'index'}, optional
+        The type of a scalar output. By default the dtype of the operands,
+        ``'real'`` for the corresponding real dtype, or ``'index'`` for an
+        index into a vector.
+    """
+    def __init__(self, name, shape, doc, mode="in", trans=None, dtype=None):
+        self.name = name
+        self.shape = shape
+        self.doc = doc
+        self.mode = mode
+        self.trans = trans
+        self.dtype = dtype
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def is_scalar(self):
+        return self.ndim == 0
+
+    @property
+    def is_output(self):
+        return self.mode in ("out", "inout")
+
+    def stored_shape(self):
+        """Expressions for the dimensions of the operand as stored"""
+        if self.trans is None:
+            return list(self.shape)
+        return ["(%s if %s else %s)" % (self.shape[1], self.trans, self.shape[0]),
+                "(%s if %s else %s)" % (self.shape[0], self.trans, self.shape[1])]
+
+
+class Flag(object):
+    """A boolean flag.
+
+    ``kind`` is one of ``trans`` (with an optional ``conj`` flag, combined
+    into a ``trans_t``), ``conj``, ``upper``, ``right`` or ``unit``.
+    """
+    def __init__(self, name, kind, doc, conj=None):
+        self.name = name
+        self.kind = kind
+        self.doc = doc
+        self.conj = conj
+
+
+class Scalar(object):
+    """A scalar factor, with the dtype of the operands, or the corresponding
+    real dtype if ``real``"""
+    def __init__(self, name, default, doc, real=False):
+        self.name = name
+        self.default = default
+        self.doc = doc
+        self.real = real
+
+
+class Op(object):
+    """A BLIS operation.
+
+    Parameters
+    ----------
+    name : str
+        The name of the operation, without the type prefix.
+    summary : str
+        A one line summary.
+    equation : str
+        The operation performed, for the docstring.
+    operands : list of Operand
+        At least one must be an output. Outputs are returned (as a tuple if
+        there are several), a scalar output must be the only one.
+    dims : list of (name, expr)
+        The dimensions of the operation, in order. Each expression may
+        refer to the operands, flags and any earlier dimensions.
+    call : list of str
+        The arguments to the BLIS function, as names of flags, dimensions,
+        scalars and operands. Names starting with ``=`` are passed as is,
+        with ``{ch}`` replaced by the type character (e.g. ``=bli_{ch}0``).
+    flags : list of Flag
+    scalars : list of Scalar
+    """
+    def __init__(self, name, summary, equation, operands, dims, call,
+                 flags=(), scalars=()):
+        self.name = name
+        self.summary = summary
+        self.equation = equation
+        self.operands = list(operands)
+        self.dims = list(dims)
+        self.call = list(call)
+        self.flags = list(flags)
+        self.scalars = list(scalars)
+        self.outputs = [o for o in self.operands if o.is_output]
+        if not self.outputs:
+            raise ValueError("%s must have an output" % name)
+        if any(o.is_scalar for o in self.outputs) and len(self.outputs) > 1:
+            raise ValueError("%s must have a single scalar output" % name)
+
+    def parameters(self):
+        """The parameters of the public function, as (name, default) pairs,
+        with ``default`` ``Parameter.empty`` for required parameters.
+
+        Required operands come first, followed by optional ``out`` operands,
+        flags, scalars and ``nthreads``."""
+        operands = [o for o in self.operands if not o.is_scalar]
+        params = [(o.name, Parameter.empty)
+                  for o in operands if o.mode != "out"]
+        params.extend((o.name, None) for o in operands if o.mode == "out")
+        params.extend((f.name, False) for f in self.flags)
+        params.extend((s.name, s.default) for s in self.scalars)
+        params.append(("nthreads", -1))
+        return params
+
+    def signature(self):
+        """The parameters as Python source, e.g. ``a, out=None``"""
+        return ", ".join(
+            name if default is Parameter.empty else "%s=%r" % (name, default)
+            for name, default in self.parameters()
+        )
+
+
+def _flag(kind, operand, conj=None):
+    docs = {
+        "trans": "Whether to transpose ``%s``. Default is False.",
+        "conj": "Whether to conjugate ``%s``. Default is False.",
+        "upper": ("Whether ``%s`` is stored in the upper triangle, rather "
+                  "than the lower. Default is False."),
+        "right": ("Whether ``%s`` multiplies from the right, rather than the "
+                  "left. Default is False."),
+        "unit": ("Whether ``%s`` has a unit diagonal, which isn't read. "
+                 "Default is False."),
+    }
+    name = "%s_%s" % (operand, kind)
+    return Flag(name, kind, docs[kind] % operand, conj=conj)
+
+
+_ALPHA = Scalar("alpha", 1.0, "The ``alpha`` factor. Default is 1.")
+_BETA = Scalar("beta", 0.0, "The ``beta`` factor. Default is 0.")
+# The factor of ``y`` in the level 1 updates, which default to adding to it
+_BETA_ONE = Scalar("beta", 1.0, "The ``beta`` factor. Default is 1.")
+_REAL_ALPHA = Scalar("alpha", 1.0, "The ``alpha`` factor, where ``R`` is the "
+                     "real type corresponding to ``T``. Default is 1.",
+                     real=True)
+
+
+OPS = [
+    # Level 1
+    Op("axpyv",
+       "Add a scaled vector to another vector, in place.",
+       "y = alpha * op_x(x) + y",
+       operands=[Operand("x", ("n",), "The vector to add."),
+                 Operand("y", ("n",), "The vector to update.", mode="inout")],
+       dims=[("n", "x.shape[0]")],
+       flags=[_flag("conj", "x")],
+       scalars=[_ALPHA],
+       call=["x_conj", "n", "alpha", "x", "y"]),
+    Op("addv",
+       "Add a vector to another vector, in place.",
+       "y = y + op_x(x)",
+       operands=[Operand("x", ("n",), "The vector to add."),
+                 Operand("y", ("n",), "The vector to update.", mode="inout")],
+       dims=[("n", "x.shape[0]")],
+       flags=[_flag("conj", "x")],
+       call=["x_conj", "n", "x", "y"]),
+    Op("subv",
+       "Subtract a vector from another vector, in place.",
+       "y = y - op_x(x)",
+       operands=[Operand("x", ("n",), "The vector to subtract."),
+                 Operand("y", ("n",), "The vector to update.", mode="inout")],
+       dims=[("n", "x.shape[0]")],
+       flags=[_flag("conj", "x")],
+       call=["x_conj", "n", "x", "y"]),
+    Op("axpbyv",
+       "Add a scaled vector to another scaled vector, in place.",
+       "y = alpha * op_x(x) + beta * y",
+       operands=[Operand("x", ("n",), "The vector to add."),
+                 Operand("y", ("n",), "The vector to update.", mode="inout")],
+       dims=[("n", "x.shape[0]")],
+       flags=[_flag("conj", "x")],
+       scalars=[_ALPHA, _BETA_ONE],
+       call=["x_conj", "n", "alpha", "x", "beta", "y"]),
+    Op("xpbyv",
+       "Add a vector to another scaled vector, in place.",
+       "y = op_x(x) + beta * y",
+       operands=[Operand("x", ("n",), "The vector to add."),
+                 Operand("y", ("n",), "The vector to update.", mode="inout")],
+       dims=[("n", "x.shape[0]")],
+       flags=[_flag("conj", "x")],
+       scalars=[_BETA_ONE],
+       call=["x_conj", "n", "x", "beta", "y"]),
+    Op("copyv",
+       "Copy a vector.",
+       "out = op_x(x)",
+       operands=[Operand("x", ("n",), "The vector to copy."),
+                 Operand("out", ("n",), "The output vector.", mode="out")],
+       dims=[("n", "x.shape[0]")],
+       flags=[_flag("conj", "x")],
+       call=["x_conj", "n", "x", "out"]),
+    Op("scalv",
+       "Scale a vector, in place.",
+       "x = alpha * x",
+       operands=[Operand("x", ("n",), "The vector to scale.", mode="inout")],
+       dims=[("n", "x.shape[0]")],
+       scalars=[_ALPHA],
+       call=["=BLIS_NO_CONJUGATE", "n", "alpha", "x"]),
+    Op("scal2v",
+       "Scale a vector into another vector.",
+       "out = alpha * op_x(x)",
+       operands=[Operand("x", ("n",), "The vector to scale."),
+                 Operand("out", ("n",), "The output vector.", mode="out")],
+       dims=[("n", "x.shape[0]")],
+       flags=[_flag("conj", "x")],
+       scalars=[_ALPHA],
+       call=["x_conj", "n", "alpha", "x", "out"]),
+    Op("invertv",
+       "Invert each element of a vector, in place.",
+       "x = 1 / x",
+       operands=[Operand("x", ("n",), "The vector to invert.", mode="inout")],
+       dims=[("n", "x.shape[0]")],
+       call=["n", "x"]),
+    Op("setv",
+       "Set every element of a vector to a scalar, in place.",
+       "x[:] = alpha",
+       operands=[Operand("x", ("n",), "The vector to set.", mode="inout")],
+       dims=[("n", "x.shape[0]")],
+       scalars=[Scalar("alpha", 0.0, "The value to set. Default is 0.")],
+       call=["=BLIS_NO_CONJUGATE", "n", "alpha", "x"]),
+    Op("swapv",
+       "Swap the elements of two vectors, in place.",
+       "x, y = y, x",
+       operands=[Operand("x", ("n",), "The first vector.", mode="inout"),
+                 Operand("y", ("n",), "The second vector.", mode="inout")],
+       dims=[("n", "x.shape[0]")],
+       call=["n", "x", "y"]),
+    Op("dotxv",
+       "Compute the scaled dot product of two vectors.",
+       "rho = alpha * op_x(x).dot(op_y(y))",
+       operands=[Operand("x", ("n",), "The first vector."),
+                 Operand("y", ("n",), "The second vector."),
+                 Operand("rho", (), "The scaled dot product.", mode="out")],
+       dims=[("n", "x.shape[0]")],
+       flags=[_flag("conj", "x"), _flag("conj", "y")],
+       scalars=[_ALPHA],
+       call=["x_conj", "y_conj", "n", "alpha", "x", "y", "=bli_{ch}0",
+             "rho"]),
+    Op("amaxv",
+       "Find the element of a vector with the largest absolute value.",
+       "index = argmax(abs(x.real) + abs(x.imag))",
+       operands=[Operand("x", ("n",), "The vector to search."),
+                 Operand("index", (), "The index of the first element with "
+                         "the largest absolute value (0 for an empty vector).",
+                         mode="out", dtype="index")],
+       dims=[("n", "x.shape[0]")],
+       call=["n", "x", "index"]),
+    Op("asumv",
+       "Sum the absolute values of the elements of a vector.",
+       "asum = sum(abs(x.real) + abs(x.imag))",
+       operands=[Operand("x", ("n",), "The vector to sum."),
+                 Operand("asum", (), "The sum of the absolute values, where "
+                         "``R`` is the real type corresponding to ``T``.",
+                         mode="out", dtype="real")],
+       dims=[("n", "x.shape[0]")],
+       call=["n", "x", "asum"]),
+    Op("normfv",
+       "Compute the Euclidean norm of a vector.",
+       "norm = sqrt(sum(abs(x) ** 2))",
+       operands=[Operand("x", ("n",), "The vector."),
+                 Operand("norm", (), "The Euclidean norm, where ``R`` is the "
+                         "real type corresponding to ``T``.", mode="out",
+                         dtype="real")],
+       dims=[("n", "x.shape[0]")],
+       call=["n", "x", "norm"]),
+    Op("norm1v",
+       "Compute the 1-norm of a vector.",
+       "norm = sum(abs(x))",
+       operands=[Operand("x", ("n",), "The vector."),
+                 Operand("norm", (), "The sum of the absolute values, where "
+                         "``R`` is the real type corresponding to ``T``.",
+                         mode="out", dtype="real")],
+       dims=[("n", "x.shape[0]")],
+       call=["n", "x", "norm"]),
+    Op("normiv",
+       "Compute the infinity norm of a vector.",
+       "norm = max(abs(x))",
+       operands=[Operand("x", ("n",), "The vector."),
+                 Operand("norm", (), "The largest absolute value (0 for an "
+                         "empty vector), where ``R`` is the real type "
+                         "corresponding to ``T``.", mode="out",
+                         dtype="real")],
+       dims=[("n", "x.shape[0]")],
+       call=["n", "x", "norm"]),
+    # Level 2
+    Op("ger",
+       "Rank-1 update of a matrix, in place.",
+       "a = alpha * op_x(x).outer(op_y(y)) + a",
+       operands=[Operand("x", ("m",), "The column vector."),
+                 Operand("y", ("n",), "The row vector."),
+                 Operand("a", ("m", "n"), "The matrix to update.",
+                         mode="inout")],
+       dims=[("m", "x.shape[0]"), ("n", "y.shape[0]")],
+       flags=[_flag("conj", "x"), _flag("conj", "y")],
+       scalars=[_ALPHA],
+       call=["x_conj", "y_conj", "m", "n", "alpha", "x", "y", "a"]),
+    Op("syr",
+       "Symmetric rank-1 update of a matrix, in place.",
+       "a = alpha * op_x(x).outer(op_x(x)) + a",
+       operands=[Operand("x", ("m",), "The vector."),
+                 Operand("a", ("m", "m"), "The symmetric matrix to update, "
+                         "only one triangle is read and written.",
+                         mode="inout")],
+       dims=[("m", "x.shape[0]")],
+       flags=[_flag("upper", "a"), _flag("conj", "x")],
+       scalars=[_ALPHA],
+       call=["a_upper", "x_conj", "m", "alpha", "x", "a"]),
+    Op("syr2",
+       "Symmetric rank-2 update of a matrix, in place.",
+       ("a = alpha * op_x(x).outer(op_y(y)) + alpha * op_y(y).outer(op_x(x)) "
+        "+ a"),
+       operands=[Operand("x", ("m",), "The first vector."),
+                 Operand("y", ("m",), "The second vector."),
+                 Operand("a", ("m", "m"), "The symmetric matrix to update, "
+                         "only one triangle is read and written.",
+                         mode="inout")],
+       dims=[("m", "x.shape[0]")],
+       flags=[_flag("upper", "a"), _flag("conj", "x"), _flag("conj", "y")],
+       scalars=[_ALPHA],
+       call=["a_upper", "x_conj", "y_conj", "m", "alpha", "x", "y", "a"]),
+    Op("her",
+       "Hermitian rank-1 update of a matrix, in place.",
+       "a = alpha * op_x(x).outer(op_x(x).conj()) + a",
+       operands=[Operand("x", ("m",), "The vector."),
+                 Operand("a", ("m", "m"), "The Hermitian matrix to update, "
+                         "only one triangle is read and written.",
+                         mode="inout")],
+       dims=[("m", "x.shape[0]")],
+       flags=[_flag("upper", "a"), _flag("conj", "x")],
+       scalars=[_REAL_ALPHA],
+       call=["a_upper", "x_conj", "m", "alpha", "x", "a"]),
+    Op("her2",
+       "Hermitian rank-2 update of a matrix, in place.",
+       ("a = alpha * op_x(x).outer(op_y(y).conj()) + "
+        "conj(alpha) * op_y(y).outer(op_x(x).conj()) + a"),
+       operands=[Operand("x", ("m",), "The first vector."),
+                 Operand("y", ("m",), "The second vector."),
+                 Operand("a", ("m", "m"), "The Hermitian matrix to update, "
+                         "only one triangle is read and written.",
+                         mode="inout")],
+       dims=[("m", "x.shape[0]")],
+       flags=[_flag("upper", "a"), _flag("conj", "x"), _flag("conj", "y")],
+       scalars=[_ALPHA],
+       call=["a_upper", "x_conj", "y_conj", "m", "alpha", "x", "y", "a"]),
+    Op("symv",
+       "Multiply a symmetric matrix and a vector.",
+       "out = alpha * op_a(a).dot(op_x(x)) + beta * out",
+       operands=[Operand("a", ("m", "m"),
+                         "The symmetric matrix, only one triangle is read."),
+                 Operand("x", ("m",), "The vector."),
+                 Operand("out", ("m",), "The output vector.", mode="out")],
+       dims=[("m", "a.shape[0]")],
+       flags=[_flag("upper", "a"), _flag("conj", "a"), _flag("conj", "x")],
+       scalars=[_ALPHA, _BETA],
+       call=["a_upper", "a_conj", "x_conj", "m", "alpha", "a", "x", "beta",
+             "out"]),
+    Op("hemv",
+       "Multiply a Hermitian matrix and a vector.",
+       "out = alpha * op_a(a).dot(op_x(x)) + beta * out",
+       operands=[Operand("a", ("m", "m"),
+                         "The Hermitian matrix, only one triangle is read."),
+                 Operand("x", ("m",), "The vector."),
+                 Operand("out", ("m",), "The output vector.", mode="out")],
+       dims=[("m", "a.shape[0]")],
+       flags=[_flag("upper", "a"), _flag("conj", "a"), _flag("conj", "x")],
+       scalars=[_ALPHA, _BETA],
+       call=["a_upper", "a_conj", "x_conj", "m", "alpha", "a", "x", "beta",
+             "out"]),
+    Op("trmv",
+       "Multiply a triangular matrix and a vector, in place.",
+       "x = alpha * op_a(a).dot(x)",
+       operands=[Operand("a", ("m", "m"),
+                         "The triangular matrix, only one triangle is read."),
+                 Operand("x", ("m",), "The vector to update.", mode="inout")],
+       dims=[("m", "a.shape[0]")],
+       flags=[_flag("upper", "a"), _flag("trans", "a", conj="a_conj"),
+              _flag("conj", "a"), _flag("unit", "a")],
+       scalars=[_ALPHA],
+       call=["a_upper", "a_trans", "a_unit", "m", "alpha", "a", "x"]),
+    Op("trsv",
+       "Solve a triangular system with a single right hand side, in place.",
+       "x = alpha * inv(op_a(a)).dot(x)",
+       operands=[Operand("a", ("m", "m"),
+                         "The triangular matrix, only one triangle is read."),
+                 Operand("x", ("m",), "The right hand side, overwritten with "
+                         "the solution.", mode="inout")],
+       dims=[("m", "a.shape[0]")],
+       flags=[_flag("upper", "a"), _flag("trans", "a", conj="a_conj"),
+              _flag("conj", "a"), _flag("unit", "a")],
+       scalars=[_ALPHA],
+       call=["a_upper", "a_trans", "a_unit", "m", "alpha", "a", "x"]),
+    # Level 3
+    Op("trmm",
+       "Multiply a triangular matrix and a matrix, in place.",
+       "b = alpha * op_a(a).dot(b), or alpha * b.dot(op_a(a)) if a_right",
+       operands=[Operand("a", ("k", "k"),
+                         "The triangular matrix, only one triangle is read."),
+                 Operand("b", ("m", "n"), "The matrix to update.",
+                         mode="inout")],
+       dims=[("m", "b.shape[0]"), ("n", "b.shape[1]"),
+             ("k", "n if a_right else m")],
+       flags=[_flag("right", "a"), _flag("upper", "a"),
+              _flag("trans", "a", conj="a_conj"), _flag("conj", "a"),
+              _flag("unit", "a")],
+       scalars=[_ALPHA],
+       call=["a_right", "a_upper", "a_trans", "a_unit", "m", "n", "alpha",
+             "a", "b"]),
+    Op("trmm3",
+       "Multiply a triangular matrix and a matrix.",
+       ("out = alpha * op_a(a).dot(op_b(b)) + beta * out, or "
+        "alpha * op_b(b).dot(op_a(a)) + beta * out if a_right"),
+       operands=[Operand("a", ("k", "k"),
+                         "The triangular matrix, only one triangle is read."),
+                 Operand("b", ("m", "n"), "The general matrix.",
+                         trans="b_trans"),
+                 Operand("out", ("m", "n"), "The output matrix.", mode="out")],
+       dims=[("m", "b.shape[1] if b_trans else b.shape[0]"),
+             ("n", "b.shape[0] if b_trans else b.shape[1]"),
+             ("k", "n if a_right else m")],
+       flags=[_flag("right", "a"), _flag("upper", "a"),
+              _flag("trans", "a", conj="a_conj"), _flag("conj", "a"),
+              _flag("unit", "a"), _flag("trans", "b", conj="b_conj"),
+              _flag("conj", "b")],
+       scalars=[_ALPHA, _BETA],
+       call=["a_right", "a_upper", "a_trans", "a_unit", "b_trans", "m", "n",
+             "alpha", "a", "b", "beta", "out"]),
+    Op("trsm",
+       "Solve a triangular system with multiple right hand sides, in place.",
+       ("b = alpha * inv(op_a(a)).dot(b), or alpha * b.dot(inv(op_a(a))) if "
+        "a_right"),
+       operands=[Operand("a", ("k", "k"),
+                         "The triangular matrix, only one triangle is read."),
+                 Operand("b", ("m", "n"), "The right hand sides, overwritten "
+                         "with the solution.", mode="inout")],
+       dims=[("m", "b.shape[0]"), ("n", "b.shape[1]"),
+             ("k", "n if a_right else m")],
+       flags=[_flag("right", "a"), _flag("upper", "a"),
+              _flag("trans", "a", conj="a_conj"), _flag("conj", "a"),
+              _flag("unit", "a")],
+       scalars=[_ALPHA],
+       call=["a_right", "a_upper", "a_trans", "a_unit", "m", "n", "alpha",
+             "a", "b"]),
+]
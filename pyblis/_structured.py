@@ -0,0 +1,172 @@
+"""Wrappers marking an ndarray as symmetric, Hermitian or triangular"""
+import numpy as np
+
+from . import _core
+
+
+class _Structured(object):
+    """Base class for the wrappers.
+
+    Only one triangle of ``array`` is referenced. Products with
+    ``pyblis.dot``, ``pyblis.matmul`` or ``@`` use the kernel for the
+    structure, and converting with ``np.asarray`` or ``to_dense`` expands
+    the full matrix.
+    """
+    # Make NumPy defer ``ndarray @ wrapper`` to ``__rmatmul__``, rather than
+    # converting the wrapper with ``__array__``
+    __array_ufunc__ = None
+
+    ndim = 2
+
+    def __init__(self, array, upper=False):
+        _core._CTX.check_is_2d_array(array=array)
+        _core._CTX.check_dtype(array.dtype)
+        _core._CTX.check_bools(upper=upper)
+        if array.shape[0] != array.shape[1]:
+            raise ValueError("`array` must be square")
+        self.array = array
+        self.upper = upper
+        self._lazy = False
+        self._complete = False
+
+    @classmethod
+    def _lazy_result(cls, array, upper=False):
+        """Wrap a result that owns ``array``, so its other triangle can be
+        filled in place when first needed"""
+        self = cls(array, upper)
+        self._lazy = True
+        return self
+
+    def _mirror(self, mk, nthreads):
+        if not self._lazy:
+            return mk(self.array.copy(), upper=self.upper, nthreads=nthreads)
+        if not self._complete:
+            mk(self.array, upper=self.upper, nthreads=nthreads)
+            self._complete = True
+        return self.array
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    @property
+    def dtype(self):
+        return self.array.dtype
+
+    def __repr__(self):
+        return "%s(%r, upper=%s)" % (type(self).__name__, self.array,
+                                     self.upper)
+
+    def __array__(self, dtype=None, copy=None):
+        out = self.to_dense()
+        return out if dtype is None else out.astype(dtype, copy=False)
+
+    def __matmul__(self, other):
+        from ._wrappers import matmul
+        return matmul(self, other)
+
+    def __rmatmul__(self, other):
+        from ._wrappers import matmul
+        return matmul(other, self)
+
+
+class Symmetric(_Structured):
+    """A symmetric matrix, stored in one triangle of an ndarray.
+
+    Products with other matrices use ``symm`` (and ``symv`` for vectors),
+    reading only the stored triangle, so it needn't be completed with
+    ``mksymm`` first.
+
+    Parameters
+    ----------
+    array : np.ndarray[T]
+        A square matrix, where ``T`` is one of (float64, float32, complex128,
+        complex64). Used without copying.
+    upper : bool, optional
+        Whether the matrix is stored in the upper (``True``) or lower
+        (``False``) triangle. Default is False.
+
+    Examples
+    --------
+    >>> c = pyblis.lib.syrk(a)  # Only the lower triangle is computed
+    >>> res = pyblis.dot(pyblis.Symmetric(c), b)
+    """
+    @property
+    def T(self):
+        return self
+
+    def to_dense(self, nthreads=-1):
+        """The full matrix, as a new array.
+
+        For results of ``pyblis.dot(..., symmetric="lazy")`` the other
+        triangle of ``array`` is filled in place instead, once, and
+        ``array`` is returned.
+        """
+        return self._mirror(_core.mksymm, nthreads)
+
+
+class Hermitian(_Structured):
+    """A Hermitian matrix, stored in one triangle of an ndarray.
+
+    Products with other matrices use ``hemm`` (and ``hemv`` for vectors),
+    reading only the stored triangle, so it needn't be completed with
+    ``mkherm`` first.
+
+    Parameters
+    ----------
+    array : np.ndarray[T]
+        A square matrix, where ``T`` is one of (float64, float32, complex128,
+        complex64). Used without copying.
+    upper : bool, optional
+        Whether the matrix is stored in the upper (``True``) or lower
+        (``False``) triangle. Default is False.
+    """
+    def to_dense(self, nthreads=-1):
+        """The full matrix, as a new array.
+
+        For results of ``pyblis.dot(..., symmetric="lazy")`` the other
+        triangle of ``array`` is filled in place instead, once, and
+        ``array`` is returned.
+        """
+        return self._mirror(_core.mkherm, nthreads)
+
+
+class Triangular(_Structured):
+    """A triangular matrix, stored in one triangle of an ndarray.
+
+    Products with other matrices use ``trmm3`` (and ``trmv`` for vectors),
+    reading only the stored triangle, so the other needn't be zeroed.
+
+    Parameters
+    ----------
+    array : np.ndarray[T]
+        A square matrix, where ``T`` is one of (float64, float32, complex128,
+        complex64). Used without copying.
+    upper : bool, optional
+        Whether the matrix is upper (``True``) or lower (``False``)
+        triangular. Default is False.
+    unit_diag : bool, optional
+        Whether the matrix has a unit diagonal, in which case the diagonal
+        of ``array`` isn't read. Default is False.
+    """
+    def __init__(self, array, upper=False, unit_diag=False):
+        super(Triangular, self).__init__(array, upper)
+        _core._CTX.check_bools(unit_diag=unit_diag)
+        self.unit_diag = unit_diag
+
+    def __repr__(self):
+        return "Triangular(%r, upper=%s, unit_diag=%s)" % (
+            self.array, self.upper, self.unit_diag
+        )
+
+    @property
+    def T(self):
+        return Triangular(self.array.T, not self.upper, self.unit_diag)
+
+    def to_dense(self, nthreads=-1):
+        """The full matrix, with zeros in the other triangle, as a new
+        array"""
+        out = np.triu(self.array) if self.upper else np.tril(self.array)
+        if self.unit_diag:
+            np.fill_diagonal(out, 1)
+        return out
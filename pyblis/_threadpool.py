@@ -0,0 +1,43 @@
+"""A threadpoolctl controller for the pyblis default number of threads.
+
+pyblis statically links BLIS with renamed symbols, so threadpoolctl's own
+BLIS controller doesn't find it. This controller matches the pyblis shared
+library instead, so ``threadpoolctl.threadpool_limits`` caps pyblis along
+with the other BLAS and OpenMP libraries in the process.
+"""
+import ctypes as ct
+
+from threadpoolctl import LibController
+
+
+class PyblisController(LibController):
+    user_api = "blas"
+    internal_api = "pyblis"
+    # The library is named ``_lib``, only files exporting the symbol below
+    # are matched
+    filename_prefixes = ("_lib",)
+    check_symbols = ("pybli_get_num_threads",)
+
+    def get_num_threads(self):
+        func = self.dynlib.pybli_get_num_threads
+        func.restype = ct.c_int64
+        return func()
+
+    def set_num_threads(self, num_threads):
+        func = self.dynlib.pybli_set_num_threads
+        func.argtypes = (ct.c_int64,)
+        func(num_threads)
+
+    def get_version(self):
+        from . import __version__
+        return __version__
+
+
+def register():
+    """Register the controller with threadpoolctl.
+
+    Does nothing on threadpoolctl < 3.2, which can't register controllers.
+    """
+    import threadpoolctl
+    if hasattr(threadpoolctl, "register"):
+        threadpoolctl.register(PyblisController)
@@ -1,28 +1,205 @@
+import numpy as np
+
 from . import lib
+from ._structured import _Structured, Symmetric, Hermitian, Triangular
+
+
+def _is_transpose(a, b):
+    """Whether ``b`` is a transposed view of ``a``"""
+    return (a.ctypes.data == b.ctypes.data and
+            a.shape[0] == b.shape[1] and
+            a.shape[1] == b.shape[0] and
+            a.strides[0] == b.strides[1] and
+            a.strides[1] == b.strides[0])
+
+
+def _is_conj_transpose(a, b):
+    """Whether ``b`` holds the same values as ``a.conj().T``.
+
+    NumPy has no conjugated views, so ``a.conj().T`` is always a copy and
+    can't be detected from the memory layout. Comparing the first row before
+    all values keeps the common (non-matching) case cheap."""
+    if (a.shape[0] != b.shape[1] or
+            a.shape[1] != b.shape[0] or
+            a.shape[0] == 0 or
+            a.shape[1] == 0):
+        return False
+    if not np.all(a[0] == np.conj(b[:, 0])):
+        return False
+    return np.all(a == np.conj(b.T))
+
+
+def _dot_vv(a, b, out=None, nthreads=-1):
+    return lib.dotv(a, b, nthreads=nthreads)
+
+
+def _dot_mv(a, b, out=None, nthreads=-1):
+    return lib.gemv(a, b, out=out, nthreads=nthreads)
+
+
+def _dot_vm(a, b, out=None, nthreads=-1):
+    return lib.gemv(b, a, out=out, a_trans=True, nthreads=nthreads)
+
+
+def _dot_mm(a, b, out=None, nthreads=-1):
+    if _is_transpose(a, b):
+        return lib.syrk(a, out=out, out_full=True, nthreads=nthreads)
+    elif _is_conj_transpose(a, b):
+        return lib.herk(a, out=out, out_full=True, nthreads=nthreads)
+    else:
+        return lib.gemm(a, b, out=out, nthreads=nthreads)
+
+
+def _dot_mm_lazy(a, b, out=None, nthreads=-1):
+    # The rank-k updates fill only the lower triangle, the wrappers mirror it
+    # if a full matrix is needed
+    if _is_transpose(a, b):
+        return Symmetric._lazy_result(lib.syrk(a, out=out, nthreads=nthreads))
+    elif _is_conj_transpose(a, b):
+        return Hermitian._lazy_result(lib.herk(a, out=out, nthreads=nthreads))
+    else:
+        return lib.gemm(a, b, out=out, nthreads=nthreads)
+
 
+def _dot_mm_mixed(a, b, out=None, nthreads=-1):
+    # The rank-k updates need uniform dtypes, only gemm supports mixing them
+    return lib.gemm(a, b, out=out, nthreads=nthreads)
 
-def dot(a, b, out=None, nthreads=-1):
+
+def _dot_structured(a, b, out=None, nthreads=-1):
+    if isinstance(a, _Structured):
+        if isinstance(b, _Structured):
+            b = b.to_dense(nthreads=nthreads)
+        s, x, right = a, b, False
+    else:
+        s, x, right = b, a, True
+    if x.ndim == 1:
+        # ``x.dot(s)`` is ``s.T.dot(x)``
+        if isinstance(s, Triangular):
+            out = lib.copyv(x, out=out, nthreads=nthreads)
+            return lib.trmv(s.array, out, a_upper=s.upper, a_trans=right,
+                            a_unit=s.unit_diag, nthreads=nthreads)
+        elif isinstance(s, Hermitian):
+            return lib.hemv(s.array, x, out=out, a_upper=s.upper,
+                            a_conj=right, nthreads=nthreads)
+        return lib.symv(s.array, x, out=out, a_upper=s.upper,
+                        nthreads=nthreads)
+    elif x.ndim == 2:
+        if isinstance(s, Triangular):
+            return lib.trmm3(s.array, x, out=out, a_right=right,
+                             a_upper=s.upper, a_unit=s.unit_diag,
+                             nthreads=nthreads)
+        mm = lib.hemm if isinstance(s, Hermitian) else lib.symm
+        return mm(s.array, x, out=out, a_right=right, a_upper=s.upper,
+                  nthreads=nthreads)
+    raise ValueError("a and b must be 1 or 2 dimensional")
+
+
+def dot(a, b, out=None, nthreads=-1, symmetric="full"):
     """Perform a matrix multiplication.
 
+    Follows the semantics of ``np.dot`` for 1 and 2 dimensional arrays.
+    Vector-vector, matrix-vector, and vector-matrix products are dispatched
+    to level-1 and level-2 kernels without reshaping either operand.
+
+    Products of a matrix with its own transpose (``dot(a, a.T)``) or
+    conjugate transpose (``dot(a, a.conj().T)``) are computed with a
+    symmetric/Hermitian rank-k update, performing only half the FLOPs.
+
+    Operands wrapped in ``pyblis.Symmetric``, ``pyblis.Hermitian`` or
+    ``pyblis.Triangular`` are multiplied with ``symm``/``symv``,
+    ``hemm``/``hemv`` or ``trmm3``/``trmv`` respectively, reading only their
+    stored triangle.
+
+    Parameters
+    ----------
+    a, b : np.ndarray[T], Symmetric, Hermitian or Triangular
+        Two identically typed 1 or 2 dimensional arrays, where ``T`` is one
+        of (float64, float32, complex128, complex64). Matrix-matrix products
+        of plain arrays may mix precisions and real/complex operands (see
+        ``pyblis.lib.gemm``).
+    out : np.ndarray[T]
+        An optional output array, must match the type of the input arrays
+        (except for mixed dtype matrix-matrix products). If not provided,
+        a new array will be allocated. Not supported for vector-vector
+        products.
+    nthreads : int
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
+    symmetric : {'full', 'lazy'}, optional
+        How to return the result of a rank-k update (``dot(a, a.T)`` or
+        ``dot(a, a.conj().T)``). With ``'full'`` (the default) both triangles
+        are filled in. With ``'lazy'`` only the lower triangle is computed,
+        and returned wrapped in a ``pyblis.Symmetric`` (or
+        ``pyblis.Hermitian``). Products with the wrapper read only that
+        triangle, and ``to_dense()`` or ``np.asarray`` mirror it in place
+        the first time the full matrix is needed. Other products return an
+        array either way. Not supported in numba.
+    """
+    if symmetric not in ("full", "lazy"):
+        raise ValueError("`symmetric` must be 'full' or 'lazy', got %r"
+                         % (symmetric,))
+    if isinstance(a, _Structured) or isinstance(b, _Structured):
+        return _dot_structured(a, b, out=out, nthreads=nthreads)
+    if a.ndim == 1 and b.ndim == 1:
+        if out is not None:
+            raise ValueError("`out` is not supported for vector-vector products")
+        return _dot_vv(a, b, out=out, nthreads=nthreads)
+    elif a.ndim == 2 and b.ndim == 1:
+        return _dot_mv(a, b, out=out, nthreads=nthreads)
+    elif a.ndim == 1 and b.ndim == 2:
+        return _dot_vm(a, b, out=out, nthreads=nthreads)
+    elif a.ndim == 2 and b.ndim == 2:
+        if a.dtype != b.dtype or (out is not None and out.dtype != a.dtype):
+            return _dot_mm_mixed(a, b, out=out, nthreads=nthreads)
+        if symmetric == "lazy":
+            return _dot_mm_lazy(a, b, out=out, nthreads=nthreads)
+        return _dot_mm(a, b, out=out, nthreads=nthreads)
+    raise ValueError("a and b must be 1 or 2 dimensional")
+
+
+def _matmul_batched(a, b, out=None, nthreads=-1):
+    return lib.gemm_batched(a, b, out=out, nthreads=nthreads)
+
+
+def matmul(a, b, out=None, nthreads=-1):
+    """Matrix product of two arrays.
+
+    Follows the semantics of ``np.matmul``. Arrays of more than 2 dimensions
+    are treated as stacks of matrices in the last two dimensions, with the
+    leading dimensions broadcast together. The whole stack is computed in a
+    single native call, with threads spread across the stack or within each
+    product depending on their size. A stack multiplied by a single shared
+    matrix (e.g. ``matmul(a, w)`` with a contiguous 3 dimensional ``a``) is
+    computed as one large product.
+
+    Structured matrices (``pyblis.Symmetric``, ``pyblis.Hermitian`` and
+    ``pyblis.Triangular``) are multiplied as in ``pyblis.dot``.
+
     Parameters
     ----------
-    a, b : np.ndarray[T]
+    a, b : np.ndarray[T], Symmetric, Hermitian or Triangular
         Two identically typed arrays, where ``T`` is one of
         (float64, float32, complex128, complex64).
     out : np.ndarray[T]
         An optional output array, must match the type of the input arrays. If
         not provided, a new array will be allocated.
     nthreads : int
-        The number of threads to use. Defaults to deriving from environment
-        variables (e.g. ``BLIS_NUM_THREADS``).
+        The number of threads to use. Defaults to the process-wide default (see
+        ``pyblis.set_num_threads``).
     """
-    if a.ndim != 2 or b.ndim != 2:
-        raise ValueError("a and b must be 2 dimensional")
-    if (a.ctypes.data == b.ctypes.data and
-            a.shape[0] == b.shape[1] and
-            a.shape[1] == b.shape[0] and
-            a.strides[0] == b.strides[1] and
-            a.strides[1] == b.strides[0]):
-        return lib.mksymm(lib.syrk(a, out=out, nthreads=nthreads))
-    else:
-        return lib.gemm(a, b, out=out, nthreads=nthreads)
+    if a.ndim == 0 or b.ndim == 0:
+        raise ValueError("matmul does not support 0 dimensional operands")
+    if a.ndim <= 2 and b.ndim <= 2:
+        return dot(a, b, out=out, nthreads=nthreads)
+    if a.ndim == 1:
+        res = _matmul_batched(a[np.newaxis, :], b,
+                              None if out is None else out[..., np.newaxis, :],
+                              nthreads)
+        return res[..., 0, :] if out is None else out
+    if b.ndim == 1:
+        res = _matmul_batched(a, b[:, np.newaxis],
+                              None if out is None else out[..., np.newaxis],
+                              nthreads)
+        return res[..., 0] if out is None else out
+    return _matmul_batched(a, b, out=out, nthreads=nthreads)
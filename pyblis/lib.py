@@ -1 +1,16 @@
-from ._core import gemm, syrk, mksymm
+from ._core import (dotv, gemv, gemm, gemm_batched, gemm_batched_strided,
+                    gemm_grouped, gemm_planar, gemmt, symm, hemm, syrk,
+                    syrk_batched, herk, syr2k, her2k, mksymm, mksymm_batched,
+                    mkherm, get_collapsed_count, reset_collapsed_count,
+                    set_num_threads, get_num_threads)
+# Generated from the specs in _spec.py
+from ._core import (axpyv, addv, subv, axpbyv, xpbyv, copyv, scalv, scal2v,
+                    invertv, setv, swapv, dotxv, amaxv, asumv, normfv, norm1v,
+                    normiv, ger, syr, syr2, her, her2, symv, hemv, trmv, trsv,
+                    trmm, trmm3, trsm)
+# Products of block-sparse matrices
+from ._blocksparse import gemm_blocksparse
+# Rank-k updates into packed triangular storage
+from ._packed import syrk_packed, herk_packed
+# Whether the native CBLAS interface was built (see ``pyblis.get_library``)
+from ._lib import HAS_CBLAS
@@ -0,0 +1,450 @@
+"""A drop-in for ``scipy.linalg.blas``, backed by pyblis.
+
+Mirrors the signatures and return conventions of the SciPy wrappers for the
+routines pyblis implements, so code written against SciPy can switch by
+changing the import::
+
+    from pyblis import scipy_blas as blas
+
+    c = blas.dgemm(1.0, a, b, trans_b=1)
+
+As in SciPy:
+
+- Inputs are converted to the type of the routine (e.g. ``float64`` for
+  ``dgemm``). Outputs that are allocated are Fortran ordered.
+- Outputs passed in (``c``, ``y``, ...) are only updated in place if the
+  matching ``overwrite_*`` flag is set. The level 1 routines (``axpy``,
+  ``scal``, ``copy``) always update ``y`` (or ``x``) in place, unless it had
+  to be converted.
+- ``trans`` flags are 0 (none), 1 (transpose) or 2 (conjugate transpose).
+  ``lower``, ``side`` and ``diag`` select the lower triangle, multiplying
+  from the right, and a unit diagonal respectively.
+- Vectors are indexed by ``offx``/``incx`` (and ``n``), with negative
+  increments traversing the vector backwards.
+
+Unlike SciPy, an output passed in with ``overwrite_*`` set is updated in
+place whatever its memory layout, rather than only when Fortran ordered.
+Every routine also takes an extra ``nthreads`` argument, the number of
+threads to use. Defaults to the process-wide default (see
+``pyblis.set_num_threads``).
+"""
+import numpy as np
+
+from . import lib
+
+__all__ = ["get_blas_funcs"]
+
+_DTYPES = {
+    's': np.dtype('f4'),
+    'd': np.dtype('f8'),
+    'c': np.dtype('c8'),
+    'z': np.dtype('c16'),
+}
+_PREFIXES = {dtype: prefix for prefix, dtype in _DTYPES.items()}
+
+
+def _asarray(name, x, dtype, ndim):
+    x = np.asarray(x, dtype=dtype)
+    if x.ndim != ndim:
+        raise ValueError("`%s` must be a %d dimensional array" % (name, ndim))
+    return x
+
+
+def _output(name, c, dtype, shape, overwrite):
+    """The output to update, copying ``c`` unless ``overwrite``"""
+    if c is None:
+        return np.zeros(shape, dtype=dtype, order='F')
+    out = _asarray(name, c, dtype, len(shape))
+    if out.shape != shape:
+        raise ValueError("`%s` must have shape %s, got %s"
+                         % (name, shape, out.shape))
+    return out if overwrite else out.copy(order='F')
+
+
+def _default_n(x, off, inc):
+    return (len(x) - off) // abs(inc)
+
+
+def _strided(name, x, n, off, inc):
+    """The ``n`` elements of ``x`` starting at ``off``, ``inc`` apart"""
+    if inc == 0:
+        raise ValueError("`inc%s` must be non-zero" % name)
+    if off < 0 or n < 0:
+        raise ValueError("`off%s` and `n` must be non-negative" % name)
+    if n > 0 and off + (n - 1) * abs(inc) >= len(x):
+        raise ValueError("`%s` is too short for n=%d with off%s=%d, inc%s=%d"
+                         % (name, n, name, off, name, inc))
+    view = x[off:off + (n - 1) * abs(inc) + 1:abs(inc)] if n > 0 else x[:0]
+    return view[::-1] if inc < 0 else view
+
+
+def _trans(trans):
+    """(transpose, conjugate) for a SciPy ``trans`` flag"""
+    if trans not in (0, 1, 2):
+        raise ValueError("`trans` must be 0, 1 or 2, got %r" % (trans,))
+    return trans != 0, trans == 2
+
+
+def _routine(prefix, name, func, signature, backend):
+    func.__name__ = func.__qualname__ = prefix + name
+    func.__doc__ = (
+        "%s\n\nMirrors ``scipy.linalg.blas.%s%s``, computed with "
+        "``pyblis.lib.%s``." % (signature % (prefix + name), prefix, name, backend)
+    )
+    func.typecode = prefix
+    func.dtype = _DTYPES[prefix]
+    __all__.append(func.__name__)
+    globals()[func.__name__] = func
+
+
+# Level 1
+
+def _make_axpy(prefix):
+    dtype = _DTYPES[prefix]
+
+    def axpy(x, y, n=None, a=1.0, offx=0, incx=1, offy=0, incy=1, nthreads=-1):
+        x = _asarray("x", x, dtype, 1)
+        y = _asarray("y", y, dtype, 1)
+        if n is None:
+            n = _default_n(x, offx, incx)
+        lib.axpyv(_strided("x", x, n, offx, incx),
+                  _strided("y", y, n, offy, incy),
+                  alpha=a, nthreads=nthreads)
+        return y
+
+    _routine(prefix, "axpy", axpy,
+             "z = %s(x, y, [n, a, offx, incx, offy, incy, nthreads])", "axpyv")
+
+
+def _make_scal(prefix, name="scal", real_alpha=False):
+    dtype = _DTYPES[prefix]
+
+    def scal(a, x, n=None, offx=0, incx=1, nthreads=-1):
+        x = _asarray("x", x, dtype, 1)
+        if n is None:
+            n = _default_n(x, offx, incx)
+        lib.scalv(_strided("x", x, n, offx, incx), alpha=a, nthreads=nthreads)
+        return x
+
+    def rscal(a, x, n=None, offx=0, incx=1, overwrite_x=0, nthreads=-1):
+        a = float(a)
+        x = _asarray("x", x, dtype, 1)
+        if not overwrite_x:
+            x = x.copy()
+        return scal(a, x, n, offx, incx, nthreads)
+
+    if real_alpha:
+        _routine(prefix, name, rscal,
+                 "x = %s(a, x, [n, offx, incx, overwrite_x, nthreads])", "scalv")
+    else:
+        _routine(prefix, name, scal,
+                 "x = %s(a, x, [n, offx, incx, nthreads])", "scalv")
+
+
+def _make_copy(prefix):
+    dtype = _DTYPES[prefix]
+
+    def copy(x, y, n=None, offx=0, incx=1, offy=0, incy=1, nthreads=-1):
+        x = _asarray("x", x, dtype, 1)
+        y = _asarray("y", y, dtype, 1)
+        if n is None:
+            n = _default_n(x, offx, incx)
+        lib.copyv(_strided("x", x, n, offx, incx),
+                  out=_strided("y", y, n, offy, incy), nthreads=nthreads)
+        return y
+
+    _routine(prefix, "copy", copy,
+             "y = %s(x, y, [n, offx, incx, offy, incy, nthreads])", "copyv")
+
+
+def _make_dot(prefix, name, conj):
+    dtype = _DTYPES[prefix]
+
+    def dot(x, y, n=None, offx=0, incx=1, offy=0, incy=1, nthreads=-1):
+        x = _asarray("x", x, dtype, 1)
+        y = _asarray("y", y, dtype, 1)
+        if n is None:
+            n = _default_n(x, offx, incx)
+        res = lib.dotv(_strided("x", x, n, offx, incx),
+                       _strided("y", y, n, offy, incy),
+                       x_conj=conj, nthreads=nthreads)
+        return res.item()
+
+    _routine(prefix, name, dot,
+             "xy = %s(x, y, [n, offx, incx, offy, incy, nthreads])", "dotv")
+
+
+# Level 2
+
+def _make_gemv(prefix):
+    dtype = _DTYPES[prefix]
+
+    def gemv(alpha, a, x, beta=0.0, y=None, offx=0, incx=1, offy=0, incy=1,
+             trans=0, overwrite_y=0, nthreads=-1):
+        a = _asarray("a", a, dtype, 2)
+        x = _asarray("x", x, dtype, 1)
+        a_trans, a_conj = _trans(trans)
+        nx, ny = a.shape if a_trans else a.shape[::-1]
+        if y is None:
+            y = np.zeros(offy + max(ny - 1, 0) * abs(incy) + 1, dtype=dtype)
+        else:
+            y = _asarray("y", y, dtype, 1)
+            y = y if overwrite_y else y.copy()
+        lib.gemv(a, _strided("x", x, nx, offx, incx),
+                 out=_strided("y", y, ny, offy, incy), a_trans=a_trans,
+                 a_conj=a_conj, alpha=alpha, beta=beta, nthreads=nthreads)
+        return y
+
+    _routine(prefix, "gemv", gemv,
+             "y = %s(alpha, a, x, [beta, y, offx, incx, offy, incy, trans, "
+             "overwrite_y, nthreads])", "gemv")
+
+
+def _make_ger(prefix, name, conj):
+    dtype = _DTYPES[prefix]
+
+    def ger(alpha, x, y, incx=1, incy=1, a=None, overwrite_x=1, overwrite_y=1,
+            overwrite_a=0, nthreads=-1):
+        x = _asarray("x", x, dtype, 1)
+        y = _asarray("y", y, dtype, 1)
+        x = _strided("x", x, _default_n(x, 0, incx), 0, incx)
+        y = _strided("y", y, _default_n(y, 0, incy), 0, incy)
+        a = _output("a", a, dtype, (len(x), len(y)), overwrite_a)
+        return lib.ger(x, y, a, y_conj=conj, alpha=alpha, nthreads=nthreads)
+
+    _routine(prefix, name, ger,
+             "a = %s(alpha, x, y, [incx, incy, a, overwrite_x, overwrite_y, "
+             "overwrite_a, nthreads])", "ger")
+
+
+def _make_symv(prefix, name, backend):
+    dtype = _DTYPES[prefix]
+    func = getattr(lib, backend)
+
+    def symv(alpha, a, x, beta=0.0, y=None, offx=0, incx=1, offy=0, incy=1,
+             lower=0, overwrite_y=0, nthreads=-1):
+        a = _asarray("a", a, dtype, 2)
+        x = _asarray("x", x, dtype, 1)
+        n = a.shape[0]
+        if y is None:
+            y = np.zeros(offy + max(n - 1, 0) * abs(incy) + 1, dtype=dtype)
+        else:
+            y = _asarray("y", y, dtype, 1)
+            y = y if overwrite_y else y.copy()
+        func(a, _strided("x", x, n, offx, incx),
+             out=_strided("y", y, n, offy, incy), a_upper=not lower,
+             alpha=alpha, beta=beta, nthreads=nthreads)
+        return y
+
+    _routine(prefix, name, symv,
+             "y = %s(alpha, a, x, [beta, y, offx, incx, offy, incy, lower, "
+             "overwrite_y, nthreads])", backend)
+
+
+def _make_trmv(prefix, name):
+    dtype = _DTYPES[prefix]
+    func = getattr(lib, name)
+
+    def trmv(a, x, offx=0, incx=1, lower=0, trans=0, diag=0, overwrite_x=0,
+             nthreads=-1):
+        a = _asarray("a", a, dtype, 2)
+        x = _asarray("x", x, dtype, 1)
+        x = x if overwrite_x else x.copy()
+        a_trans, a_conj = _trans(trans)
+        func(a, _strided("x", x, a.shape[0], offx, incx), a_upper=not lower,
+             a_trans=a_trans, a_conj=a_conj, a_unit=bool(diag),
+             nthreads=nthreads)
+        return x
+
+    def trsv(a, x, incx=1, offx=0, lower=0, trans=0, diag=0, overwrite_x=0,
+             nthreads=-1):
+        return trmv(a, x, offx, incx, lower, trans, diag, overwrite_x,
+                    nthreads)
+
+    if name == "trmv":
+        _routine(prefix, name, trmv,
+                 "x = %s(a, x, [offx, incx, lower, trans, diag, overwrite_x, "
+                 "nthreads])", name)
+    else:
+        _routine(prefix, name, trsv,
+                 "xout = %s(a, x, [incx, offx, lower, trans, diag, "
+                 "overwrite_x, nthreads])", name)
+
+
+# Level 3
+
+def _make_gemm(prefix):
+    dtype = _DTYPES[prefix]
+
+    def gemm(alpha, a, b, beta=0.0, c=None, trans_a=0, trans_b=0,
+             overwrite_c=0, nthreads=-1):
+        a = _asarray("a", a, dtype, 2)
+        b = _asarray("b", b, dtype, 2)
+        a_trans, a_conj = _trans(trans_a)
+        b_trans, b_conj = _trans(trans_b)
+        m = a.shape[1] if a_trans else a.shape[0]
+        n = b.shape[0] if b_trans else b.shape[1]
+        c = _output("c", c, dtype, (m, n), overwrite_c)
+        return lib.gemm(a, b, out=c, a_trans=a_trans, a_conj=a_conj,
+                        b_trans=b_trans, b_conj=b_conj, alpha=alpha,
+                        beta=beta, nthreads=nthreads)
+
+    _routine(prefix, "gemm", gemm,
+             "c = %s(alpha, a, b, [beta, c, trans_a, trans_b, overwrite_c, "
+             "nthreads])", "gemm")
+
+
+def _make_symm(prefix, name):
+    dtype = _DTYPES[prefix]
+    func = getattr(lib, name)
+
+    def symm(alpha, a, b, beta=0.0, c=None, side=0, lower=0, overwrite_c=0,
+             nthreads=-1):
+        a = _asarray("a", a, dtype, 2)
+        b = _asarray("b", b, dtype, 2)
+        c = _output("c", c, dtype, b.shape, overwrite_c)
+        return func(a, b, out=c, a_right=bool(side), a_upper=not lower,
+                    alpha=alpha, beta=beta, nthreads=nthreads)
+
+    _routine(prefix, name, symm,
+             "c = %s(alpha, a, b, [beta, c, side, lower, overwrite_c, "
+             "nthreads])", name)
+
+
+def _syrk_trans(trans, hermitian, is_complex):
+    """(transpose, conjugate) for the ``trans`` flag of a rank-k update.
+
+    Like BLAS, the complex routines only accept 0 and one of 1 (symmetric)
+    or 2 (Hermitian)."""
+    a_trans, a_conj = _trans(trans)
+    if is_complex and trans == (1 if hermitian else 2):
+        raise ValueError("`trans` must be 0 or %d" % (2 if hermitian else 1))
+    return a_trans, hermitian and a_trans
+
+
+def _make_syrk(prefix, name):
+    dtype = _DTYPES[prefix]
+    func = getattr(lib, name)
+    hermitian = name == "herk"
+
+    def syrk(alpha, a, beta=0.0, c=None, trans=0, lower=0, overwrite_c=0,
+             nthreads=-1):
+        a = _asarray("a", a, dtype, 2)
+        a_trans, a_conj = _syrk_trans(trans, hermitian, dtype.kind == 'c')
+        n = a.shape[1] if a_trans else a.shape[0]
+        c = _output("c", c, dtype, (n, n), overwrite_c)
+        return func(a, out=c, a_trans=a_trans, a_conj=a_conj,
+                    out_upper=not lower, alpha=alpha, beta=beta,
+                    nthreads=nthreads)
+
+    _routine(prefix, name, syrk,
+             "c = %s(alpha, a, [beta, c, trans, lower, overwrite_c, "
+             "nthreads])", name)
+
+
+def _make_syr2k(prefix, name):
+    dtype = _DTYPES[prefix]
+    func = getattr(lib, name)
+    hermitian = name == "her2k"
+
+    def syr2k(alpha, a, b, beta=0.0, c=None, trans=0, lower=0, overwrite_c=0,
+              nthreads=-1):
+        a = _asarray("a", a, dtype, 2)
+        b = _asarray("b", b, dtype, 2)
+        a_trans, a_conj = _syrk_trans(trans, hermitian, dtype.kind == 'c')
+        n = a.shape[1] if a_trans else a.shape[0]
+        c = _output("c", c, dtype, (n, n), overwrite_c)
+        return func(a, b, out=c, a_trans=a_trans, a_conj=a_conj,
+                    b_trans=a_trans, b_conj=a_conj, out_upper=not lower,
+                    alpha=alpha, beta=beta, nthreads=nthreads)
+
+    _routine(prefix, name, syr2k,
+             "c = %s(alpha, a, b, [beta, c, trans, lower, overwrite_c, "
+             "nthreads])", name)
+
+
+def _make_trmm(prefix, name):
+    dtype = _DTYPES[prefix]
+    func = getattr(lib, name)
+
+    def trmm(alpha, a, b, side=0, lower=0, trans_a=0, diag=0, overwrite_b=0,
+             nthreads=-1):
+        a = _asarray("a", a, dtype, 2)
+        b = _output("b", b, dtype, np.shape(b), overwrite_b)
+        a_trans, a_conj = _trans(trans_a)
+        return func(a, b, a_right=bool(side), a_upper=not lower,
+                    a_trans=a_trans, a_conj=a_conj, a_unit=bool(diag),
+                    alpha=alpha, nthreads=nthreads)
+
+    _routine(prefix, name, trmm,
+             "b = %s(alpha, a, b, [side, lower, trans_a, diag, overwrite_b, "
+             "nthreads])", name)
+
+
+for _prefix in "sdcz":
+    _is_complex = _DTYPES[_prefix].kind == 'c'
+    _make_axpy(_prefix)
+    _make_scal(_prefix)
+    _make_copy(_prefix)
+    _make_gemv(_prefix)
+    _make_trmv(_prefix, "trmv")
+    _make_trmv(_prefix, "trsv")
+    _make_gemm(_prefix)
+    _make_symm(_prefix, "symm")
+    _make_syrk(_prefix, "syrk")
+    _make_syr2k(_prefix, "syr2k")
+    _make_trmm(_prefix, "trmm")
+    _make_trmm(_prefix, "trsm")
+    if _is_complex:
+        # csscal and zdscal, scaling by a real alpha
+        _make_scal(_prefix, "sd"[_prefix == 'z'] + "scal", real_alpha=True)
+        _make_dot(_prefix, "dotc", conj=True)
+        _make_dot(_prefix, "dotu", conj=False)
+        _make_ger(_prefix, "geru", conj=False)
+        _make_ger(_prefix, "gerc", conj=True)
+        _make_symv(_prefix, "hemv", "hemv")
+        _make_symm(_prefix, "hemm")
+        _make_syrk(_prefix, "herk")
+        _make_syr2k(_prefix, "her2k")
+    else:
+        _make_dot(_prefix, "dot", conj=False)
+        _make_ger(_prefix, "ger", conj=False)
+        _make_symv(_prefix, "symv", "symv")
+
+
+def get_blas_funcs(names, arrays=(), dtype=None):
+    """Return the routines for ``names`` that best match the arrays.
+
+    Mirrors ``scipy.linalg.get_blas_funcs``.
+
+    Parameters
+    ----------
+    names : str or sequence of str
+        Names of the routines, without the type prefix (e.g. ``"gemm"``).
+    arrays : sequence of np.ndarray, optional
+        Arrays used to pick the type of the routines, defaulting to
+        ``float64``.
+    dtype : dtype, optional
+        Use this type instead of deriving it from ``arrays``.
+
+    Returns
+    -------
+    funcs : callable or list of callable
+        A single routine if ``names`` is a string, otherwise a list.
+    """
+    if dtype is None:
+        dtypes = [np.asarray(a).dtype for a in arrays]
+        dtype = np.result_type(*dtypes) if dtypes else np.dtype('f8')
+    dtype = np.dtype(dtype)
+    if dtype not in _PREFIXES:
+        dtype = np.dtype('c16' if dtype.kind == 'c' else 'f8')
+    prefix = _PREFIXES[dtype]
+
+    single = isinstance(names, str)
+    funcs = []
+    for name in ([names] if single else names):
+        func = globals().get(prefix + name)
+        if func is None:
+            raise ValueError("BLAS function %s could not be found" % name)
+        funcs.append(func)
+    return funcs[0] if single else funcs
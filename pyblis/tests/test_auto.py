@@ -0,0 +1,167 @@
+import json
+
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import pyblis
+from pyblis import _auto
+
+from .utils import Base, all_dtypes
+
+
+class Recorder(pyblis.AutoDot):
+    """Records which backends ran"""
+    def __init__(self, *args, **kwargs):
+        super(Recorder, self).__init__(*args, **kwargs)
+        self.runs = []
+
+    def _run(self, backend, a, b, out, nthreads):
+        self.runs.append(backend)
+        return super(Recorder, self)._run(backend, a, b, out, nthreads)
+
+
+def set_times(dot, a, b, pyblis_time, numpy_time, out=None):
+    dot._times[dot._key(a, b, out)] = {"pyblis": pyblis_time,
+                                       "numpy": numpy_time}
+
+
+class TestAutoDot(Base):
+    @all_dtypes
+    def test_results(self, dtype):
+        dot = pyblis.AutoDot(sample_rate=1)
+        a = self.rand(dtype, (3, 4))
+        b = self.rand(dtype, (4, 5))
+        x = self.rand(dtype, 4)
+        for _ in range(2):
+            assert_allclose(dot(a, b), a.dot(b), rtol=1e-5)
+            assert_allclose(dot(a, x), a.dot(x), rtol=1e-5)
+            assert_allclose(dot(x, x), x.dot(x), rtol=1e-5)
+            assert_allclose(dot(a, a.T), a.dot(a.T), rtol=1e-5)
+            out = np.empty((3, 5), dtype=dtype)
+            assert dot(a, b, out=out) is out
+            assert_allclose(out, a.dot(b), rtol=1e-5)
+
+    def test_calibrates_then_routes(self):
+        dot = Recorder(sample_rate=0)
+        a = np.ones((3, 4))
+        b = np.ones((4, 5))
+        assert dot.backend_for(a, b) is None
+        dot(a, b)
+        # A warm-up run of each, then timed runs in alternating order
+        n = _auto._CALIBRATION_REPEATS
+        assert dot.runs[:2] == ["pyblis", "numpy"]
+        assert dot.runs[2:4] == ["numpy", "pyblis"]
+        assert dot.runs.count("pyblis") == dot.runs.count("numpy") == n + 1
+        assert dot.backend_for(a, b) in ("numpy", "pyblis")
+
+        for best, other in [("pyblis", "numpy"), ("numpy", "pyblis")]:
+            set_times(dot, a, b, *((1, 2) if best == "pyblis" else (2, 1)))
+            del dot.runs[:]
+            dot(a, b)
+            assert dot.runs == [best]
+            # The same bucket
+            dot(np.ones((2, 5)), np.ones((5, 7)))
+            assert dot.runs == [best, best]
+            # A different bucket, layout or flags is calibrated separately
+            for args in [(np.ones((30, 4)), b), (a.T.copy().T, b), (a, a.T)]:
+                assert dot.backend_for(*args) is None
+
+    def test_calibration_keeps_fastest(self):
+        class Scripted(pyblis.AutoDot):
+            # The first timed run of pyblis is slow (e.g. starting threads)
+            times = {"pyblis": [5.0, 1.0, 1.5], "numpy": [2.0, 2.5, 3.0]}
+
+            def _timed(self, backend, a, b, out, nthreads):
+                res = self._run(backend, a, b, out, nthreads)
+                return res, self.times[backend].pop(0)
+
+        dot = Scripted(sample_rate=0)
+        a = np.ones((3, 3))
+        dot(a, a)
+        assert dot.backend_for(a, a) == "pyblis"
+        assert dot.table[dot._key(a, a, None)] == {"pyblis": 1.0,
+                                                   "numpy": 2.0}
+
+    def test_sampling(self):
+        dot = Recorder(sample_rate=1)
+        a = np.ones((3, 4))
+        b = np.ones((4, 5))
+        set_times(dot, a, b, 1.0, 2.0)
+        out = np.zeros((3, 5))
+        set_times(dot, a, b, 1.0, 2.0, out=out)
+        dot(a, b)
+        assert dot.runs == ["numpy", "pyblis"]
+        times = dot.table[dot._key(a, b, None)]
+        # Updated towards the (much faster) measured times
+        assert times["pyblis"] < 1.0
+        assert times["numpy"] < 2.0
+
+        # The other backend writes to a scratch array
+        res = dot(a, b, out=out)
+        assert res is out
+        assert_allclose(out, 4)
+
+    def test_single_backend_calls(self):
+        dot = Recorder()
+        ints = np.ones((3, 4), dtype='i8')
+        dot(ints, ints.T)
+        dot(np.ones((3, 4)), np.ones((4, 5), dtype='f4'))
+        dot(np.ones((2, 3, 4)), np.ones((4, 5)))
+        # NumPy only supports C contiguous out
+        out = np.zeros((5, 3)).T
+        res = dot(np.ones((3, 4)), np.ones((4, 5)), out=out)
+        assert res is out
+        assert_allclose(out, 4)
+        assert dot.runs == ["numpy", "numpy", "numpy", "pyblis"]
+        assert dot.table == {}
+
+    def test_overlapping_out(self):
+        dot = Recorder(sample_rate=1)
+        for i in range(2):
+            a = self.rand('f8', (4, 4))
+            b = self.rand('f8', (4, 4))
+            sol = a.dot(b)
+            out = (a, b)[i]
+            # Even for a calibrated key, timing both backends would compute
+            # from an overwritten operand
+            set_times(dot, a, b, 1.0, 2.0, out=out)
+            assert dot.backend_for(a, b, out=out) == "numpy"
+            assert dot(a, b, out=out) is out
+            assert_allclose(out, sol)
+        assert dot.runs == ["numpy", "numpy"]
+
+    def test_persistence(self, tmpdir):
+        path = str(tmpdir.join("sub", "table.json"))
+        dot = pyblis.AutoDot(path, sample_rate=0)
+        a = np.ones((3, 4), dtype='f4')
+        dot(a, a.T)
+        dot.save()
+        with open(path) as f:
+            assert json.load(f)["version"] == _auto._TABLE_VERSION
+
+        dot2 = pyblis.AutoDot(path)
+        assert dot2.backend_for(a, a.T) == dot.backend_for(a, a.T)
+        assert dot2.table == dot.table
+
+        dot2.clear()
+        assert dot2.table == {}
+        assert dot2.backend_for(a, a.T) is None
+
+    def test_errors(self, tmpdir):
+        with pytest.raises(ValueError):
+            pyblis.AutoDot(sample_rate=2)
+        with pytest.raises(ValueError):
+            pyblis.AutoDot().save()
+        path = str(tmpdir.join("table.json"))
+        with open(path, "w") as f:
+            json.dump({"version": 0, "entries": []}, f)
+        with pytest.raises(ValueError) as exc:
+            pyblis.AutoDot().load(path)
+        assert "version" in str(exc.value)
+
+    def test_shared_instance(self):
+        assert isinstance(pyblis.auto_dot, pyblis.AutoDot)
+        a = np.ones((3, 4))
+        assert_allclose(pyblis.auto_dot(a, a.T), a.dot(a.T))
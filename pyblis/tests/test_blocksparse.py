@@ -0,0 +1,113 @@
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import pyblis
+from pyblis import _blocksparse
+
+from .utils import Base, all_dtypes, rtol
+
+
+class TestGemmBlocksparse(Base):
+    def blocksparse(self, dtype, shape, tile, density=0.3):
+        """A random matrix and its tile occupancy mask"""
+        grid = tuple(-(-d // t) for d, t in zip(shape, tile))
+        mask = np.random.uniform(size=grid) < density
+        full = np.kron(mask, np.ones(tile, dtype=bool))[:shape[0], :shape[1]]
+        return np.where(full, self.rand(dtype, shape), 0).astype(dtype), mask
+
+    @all_dtypes
+    def test_masks(self, dtype):
+        # Sizes that aren't multiples of the tiles
+        a, a_mask = self.blocksparse(dtype, (23, 30), (4, 3))
+        b, b_mask = self.blocksparse(dtype, (30, 17), (3, 5))
+        res = pyblis.gemm_blocksparse(a, b, a_mask, b_mask, tile=(4, 3, 5))
+        assert_allclose(res, a.dot(b), rtol=rtol(dtype), atol=1e-5)
+
+        # Derived from the operands
+        res = pyblis.gemm_blocksparse(a, b, tile=(4, 3, 5))
+        assert_allclose(res, a.dot(b), rtol=rtol(dtype), atol=1e-5)
+
+    @all_dtypes
+    def test_out_alpha_beta(self, dtype):
+        a, a_mask = self.blocksparse(dtype, (16, 16), (4, 4))
+        b, b_mask = self.blocksparse(dtype, (16, 8), (4, 4))
+        c = self.rand(dtype, (16, 8))
+        out = c.copy()
+        res = pyblis.gemm_blocksparse(a, b, a_mask, b_mask, tile=4, out=out,
+                                      alpha=2.0, beta=3.0)
+        assert res is out
+        assert_allclose(res, 2 * a.dot(b) + 3 * c, rtol=rtol(dtype),
+                        atol=1e-5)
+
+        out = np.full((16, 8), np.nan, dtype=dtype)
+        pyblis.gemm_blocksparse(a, b, a_mask, b_mask, tile=4, out=out)
+        assert_allclose(out, a.dot(b), rtol=rtol(dtype), atol=1e-5)
+
+    def test_strided(self):
+        a, a_mask = self.blocksparse('f8', (12, 20), (4, 5))
+        b, b_mask = self.blocksparse('f8', (20, 12), (5, 4))
+        a_f = np.asfortranarray(a)
+        out = np.zeros((12, 12)).T
+        pyblis.gemm_blocksparse(a_f, b.T.copy().T, a_mask, b_mask,
+                                tile=(4, 5, 4), out=out)
+        assert_allclose(out, a.dot(b))
+
+    def test_zero_tiles_not_read(self):
+        a = np.ones((4, 4))
+        b = np.ones((4, 4))
+        a[:2, 2:] = np.nan
+        a_mask = np.array([[True, False], [True, True]])
+        res = pyblis.gemm_blocksparse(a, b, a_mask, None, tile=2)
+        sol = np.where(np.arange(4)[:, None] < 2, 2.0, 4.0) * np.ones((4, 4))
+        assert_allclose(res, sol)
+
+    def test_block_csr(self):
+        a, a_mask = self.blocksparse('f8', (9, 12), (3, 4))
+        b, b_mask = self.blocksparse('f8', (12, 6), (4, 3))
+        indptr = np.concatenate([[0], np.cumsum(a_mask.sum(axis=1))])
+        indices = np.nonzero(a_mask)[1]
+        res = pyblis.gemm_blocksparse(a, b, (indptr, indices), b_mask,
+                                      tile=(3, 4, 3))
+        assert_allclose(res, a.dot(b))
+
+    def test_schedule(self):
+        a_occ = np.array([[1, 1, 0, 1],
+                          [0, 0, 1, 0]], dtype=bool)
+        b_occ = np.ones((4, 1), dtype=bool)
+        i, j, k0, k1, rounds = _blocksparse._schedule(a_occ, b_occ)
+        # Tiles 0 and 1 are merged, tile 3 runs in a second round
+        products = sorted(zip(i, j, k0, k1, rounds))
+        assert products == [(0, 0, 0, 2, 0), (0, 0, 3, 4, 1),
+                            (1, 0, 2, 3, 0)]
+
+    def test_empty(self):
+        a = np.zeros((8, 8))
+        res = pyblis.gemm_blocksparse(a, a, tile=4)
+        assert_allclose(res, 0)
+        out = np.ones((8, 8))
+        pyblis.gemm_blocksparse(a, a, tile=4, out=out, beta=2.0)
+        assert_allclose(out, 2)
+        res = pyblis.gemm_blocksparse(np.ones((3, 0)), np.ones((0, 2)))
+        assert_allclose(res, np.zeros((3, 2)))
+
+    def test_errors(self):
+        a = np.ones((4, 4))
+        with pytest.raises(ValueError):
+            pyblis.gemm_blocksparse(a, np.ones((3, 4)))
+        with pytest.raises(TypeError):
+            pyblis.gemm_blocksparse(a, a.astype('f4'))
+        with pytest.raises(ValueError):
+            pyblis.gemm_blocksparse(a, a, a_mask=np.ones((3, 2), dtype=bool),
+                                    tile=2)
+        with pytest.raises(ValueError):
+            pyblis.gemm_blocksparse(a, a, a_mask=([0, 1], [0]), tile=2)
+        with pytest.raises(ValueError):
+            pyblis.gemm_blocksparse(a, a, a_mask=([0, 1, 2], [0, 2]), tile=2)
+        with pytest.raises(TypeError):
+            pyblis.gemm_blocksparse(a, a, tile=(2, 2))
+        with pytest.raises(ValueError):
+            pyblis.gemm_blocksparse(a, a, tile=0)
+        with pytest.raises(ValueError):
+            pyblis.gemm_blocksparse(a, a, out=np.ones((4, 3)))
@@ -0,0 +1,154 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import pyblis
+
+CC = os.environ.get("CC", "cc")
+
+pytestmark = [
+    pytest.mark.skipif(not pyblis.lib.HAS_CBLAS,
+                       reason="pyblis built without the CBLAS interface"),
+    pytest.mark.skipif(shutil.which(CC) is None,
+                       reason="no C compiler available")
+]
+
+# Written against the standard cblas.h names, mapped to pyblis by
+# PYBLIS_CBLAS_NAMES. Prints each result as a name followed by its values.
+PROGRAM = r"""
+#define PYBLIS_CBLAS_NAMES
+#include <stdio.h>
+#include "pyblis_cblas.h"
+
+static void show(const char *name, const double *x, int n) {
+    int i;
+    printf("%s", name);
+    for (i = 0; i < n; i++) printf(" %.17g", x[i]);
+    printf("\n");
+}
+
+int main(void) {
+    double a[6] = {1, 2, 3, 4, 5, 6};
+    double b[6] = {-1, 0.5, 2, 3, -2, 1};
+    double c[9] = {0};
+    double za[8] = {1, 2, -1, 0.5, 3, -1, 2, 2};
+    double zb[8] = {0.5, 1, 2, -3, 1, 1, -1, 4};
+    double zc[8] = {0};
+    double alpha[2] = {1, 1}, beta[2] = {0, 0}, one[2] = {1, 0};
+    double x[3] = {1, 2, 3}, y[3] = {10, 20, 30};
+    double d[2];
+    int i;
+
+    cblas_dgemm(CblasRowMajor, CblasNoTrans, CblasNoTrans, 2, 2, 3,
+                1.0, a, 3, b, 2, 0.0, c, 2);
+    show("dgemm_row", c, 4);
+
+    cblas_dgemm(CblasColMajor, CblasNoTrans, CblasNoTrans, 3, 3, 2,
+                2.0, a, 3, b, 2, 0.0, c, 3);
+    show("dgemm_col", c, 9);
+
+    cblas_zgemm(CblasRowMajor, CblasConjTrans, CblasNoTrans, 2, 2, 2,
+                alpha, za, 2, zb, 2, beta, zc, 2);
+    show("zgemm", zc, 8);
+
+    for (i = 0; i < 4; i++) c[i] = -1;
+    cblas_dsyrk(CblasRowMajor, CblasUpper, CblasNoTrans, 2, 3,
+                1.0, a, 3, 0.0, c, 2);
+    show("dsyrk", c, 4);
+
+    for (i = 0; i < 8; i++) zc[i] = zb[i];
+    cblas_ztrsm(CblasRowMajor, CblasLeft, CblasLower, CblasNoTrans,
+                CblasNonUnit, 2, 2, one, za, 2, zc, 2);
+    show("ztrsm", zc, 8);
+
+    cblas_daxpy(3, 2.0, x, -1, y, 1);
+    show("daxpy", y, 3);
+
+    d[0] = cblas_ddot(3, x, 1, y, 1);
+    show("ddot", d, 1);
+
+    cblas_zdotc_sub(4, za, 1, zb, 1, d);
+    show("zdotc", d, 2);
+
+    pybli_set_num_threads(2);
+    d[0] = (double)pybli_get_num_threads();
+    show("nthreads", d, 1);
+    return 0;
+}
+"""
+
+
+@pytest.fixture(scope="module")
+def results(tmpdir_factory):
+    tmpdir = tmpdir_factory.mktemp("cblas")
+    source = str(tmpdir.join("prog.c"))
+    exe = str(tmpdir.join("prog"))
+    with open(source, "w") as f:
+        f.write(PROGRAM)
+    library = pyblis.get_library()
+    subprocess.check_call([CC, source, "-o", exe, "-I", pyblis.get_include(),
+                           library,
+                           "-Wl,-rpath," + os.path.dirname(library)])
+    out = subprocess.check_output([exe]).decode()
+    res = {}
+    for line in out.splitlines():
+        name, *values = line.split()
+        res[name] = np.array([float(v) for v in values])
+    return res
+
+
+def as_complex(x):
+    return x.view('c16')
+
+
+a = np.arange(1.0, 7.0)
+b = np.array([-1, 0.5, 2, 3, -2, 1])
+za = np.array([1, 2, -1, 0.5, 3, -1, 2, 2]).view('c16').reshape(2, 2)
+zb = np.array([0.5, 1, 2, -3, 1, 1, -1, 4]).view('c16').reshape(2, 2)
+
+
+def test_gemm(results):
+    sol = a.reshape(2, 3).dot(b.reshape(3, 2))
+    assert_allclose(results["dgemm_row"].reshape(2, 2), sol)
+    # The same buffers, read as column major
+    sol = 2 * a.reshape(2, 3).T.dot(b.reshape(3, 2).T)
+    assert_allclose(results["dgemm_col"].reshape(3, 3).T, sol)
+    sol = (1 + 1j) * za.conj().T.dot(zb)
+    assert_allclose(as_complex(results["zgemm"]).reshape(2, 2), sol)
+
+
+def test_syrk(results):
+    a2 = a.reshape(2, 3)
+    c = results["dsyrk"].reshape(2, 2)
+    assert_allclose(np.triu(c), np.triu(a2.dot(a2.T)))
+    # The lower triangle isn't referenced
+    assert c[1, 0] == -1
+
+
+def test_trsm(results):
+    x = as_complex(results["ztrsm"]).reshape(2, 2)
+    assert_allclose(np.tril(za).dot(x), zb)
+
+
+def test_level1(results):
+    x = np.array([1.0, 2, 3])
+    y = np.array([10.0, 20, 30]) + 2 * x[::-1]
+    assert_allclose(results["daxpy"], y)
+    assert_allclose(results["ddot"], [x.dot(y)])
+    sol = np.vdot(za.ravel(), zb.ravel())
+    assert_allclose(results["zdotc"], [sol.real, sol.imag])
+
+
+def test_num_threads(results):
+    assert results["nthreads"][0] == 2
+
+
+def test_get_library():
+    assert os.path.exists(pyblis.get_library())
+    assert os.path.exists(os.path.join(pyblis.get_include(),
+                                       "pyblis_cblas.h"))
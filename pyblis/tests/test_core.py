@@ -1,3 +1,10 @@
+import ctypes as ct
+import importlib
+import inspect
+import os
+import sys
+import types
+
 import pytest
 
 import numpy as np
@@ -8,6 +15,128 @@ import pyblis
 from .utils import Base, all_dtypes
 
 
+class DOTVTests(Base):
+    def x_y(self, dtype):
+        return self.rand(dtype, 5), self.rand(dtype, 5)
+
+    @all_dtypes
+    def test_base(self, dtype):
+        x, y = self.x_y(dtype)
+        res = self.call_base(x, y)
+        assert_allclose(res, x.dot(y), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_conjugate(self, dtype):
+        x, y = self.x_y(dtype)
+        res = self.call(x, y, x_conj=True, y_conj=True)
+        assert_allclose(res, x.conj().dot(y.conj()), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_strides(self, dtype):
+        x, y = self.x_y(dtype)
+        res = self.call(x[::2], y[::-2])
+        assert_allclose(res, x[::2].dot(y[::-2]), rtol=1e-5)
+
+    def test_errors_mismatch_dtypes(self):
+        x, y = self.x_y('f4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(x, y.astype('f8'))
+        assert "Non-uniform" in str(exc.value)
+
+    def test_errors_wrong_dimensions(self):
+        x, y = self.x_y('f8')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(x, np.ones((5, 1)))
+        assert "1 dimensional" in str(exc.value)
+
+    def test_error_shape_mismatch(self):
+        x, y = self.x_y('f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(x, y[:3])
+        assert "shape mismatch" in str(exc.value)
+
+
+class TestDOTVCtypes(DOTVTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.dotv(*args, **kwargs)
+
+
+class GEMVTests(Base):
+    def a_x(self, dtype):
+        return self.rand(dtype, (3, 4)), self.rand(dtype, 4)
+
+    @all_dtypes
+    def test_base(self, dtype):
+        a, x = self.a_x(dtype)
+        res = self.call_base(a, x)
+        assert_allclose(res, a.dot(x), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_out(self, dtype):
+        a, x = self.a_x(dtype)
+        out = np.zeros(3, dtype=dtype)
+        res = self.call(a, x, out=out)
+        assert res is out
+        assert_allclose(res, a.dot(x), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_alpha_beta(self, dtype):
+        a, x = self.a_x(dtype)
+        alpha = self.rand(dtype)
+        beta = self.rand(dtype)
+        out = np.ones(3, dtype=dtype)
+        self.call(a, x, out=out, alpha=alpha, beta=beta)
+        assert_allclose(out, alpha * a.dot(x) + beta, rtol=1e-5)
+
+    @all_dtypes
+    def test_with_transpose_conjugate(self, dtype):
+        a, x = self.a_x(dtype)
+        res = self.call(a.T, x, a_trans=True, a_conj=True, x_conj=True)
+        assert_allclose(res, a.conj().dot(x.conj()), rtol=1e-5)
+
+        y = self.rand(dtype, 3)
+        res = self.call(a, y, a_trans=True)
+        assert_allclose(res, a.T.dot(y), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_strides(self, dtype):
+        a, x = self.a_x(dtype)
+        res = self.call(a[:, ::2], x[::2])
+        assert_allclose(res, a[:, ::2].dot(x[::2]), rtol=1e-5)
+
+    def test_errors_mismatch_dtypes(self):
+        a, x = self.a_x('f4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, x.astype('f8'))
+        assert "Non-uniform" in str(exc.value)
+
+    def test_errors_wrong_dimensions(self):
+        a, x = self.a_x('f8')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, a)
+        assert "1 dimensional" in str(exc.value)
+
+    def test_error_shape_mismatch(self):
+        a, x = self.a_x('f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a, x[:3])
+        assert "shape mismatch" in str(exc.value)
+
+        out = np.zeros(4, dtype='f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a, x, out=out)
+        assert "shape mismatch" in str(exc.value)
+
+
+class TestGEMVCtypes(GEMVTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.gemv(*args, **kwargs)
+
+
 class GEMMTests(Base):
     def a_b(self, dtype):
         a = self.rand(dtype, (3, 4))
@@ -78,12 +207,98 @@ class GEMMTests(Base):
             self.call(a, b)
         assert "No implementation" in str(exc.value)
 
-    def test_errors_mismatch_dtypes(self):
+    @pytest.mark.parametrize('a_dtype, b_dtype, out_dtype', [
+        ('f4', 'f4', 'f8'), ('f8', 'f8', 'f4'), ('f4', 'f8', 'f8'),
+        ('c8', 'c8', 'c16'), ('c16', 'c8', 'c8')
+    ])
+    def test_mixed_precision(self, a_dtype, b_dtype, out_dtype):
+        a = self.rand(a_dtype, (3, 4))
+        b = self.rand(b_dtype, (4, 5))
+        out = np.ones(shape=(3, 5), dtype=out_dtype)
+        res = self.call(a, b, out=out, alpha=2.0, beta=0.5)
+        assert res is out
+        sol = 2 * a.astype('c16').dot(b.astype('c16')) + 0.5
+        assert_allclose(res, sol, rtol=1e-5)
+
+    def test_mixed_precision_with_transpose(self):
         a, b = self.a_b('f4')
         b = b.astype('f8')
+        res = self.call(b, a, a_trans=True, b_trans=True)
+        assert res.dtype == np.dtype('f8')
+        assert_allclose(res, b.T.dot(a.T.astype('f8')), rtol=1e-5)
+
+        res = self.call(a[::2], b[:, ::2])
+        assert_allclose(res, a[::2].astype('f8').dot(b[:, ::2]), rtol=1e-5)
+
+    def test_mixed_precision_allocates_widest(self):
+        a, b = self.a_b('c8')
+        res = self.call(a, b.astype('c16'))
+        assert res.dtype == np.dtype('c16')
+        res = self.call(a.astype('f8'), b.real)
+        assert res.dtype == np.dtype('f8')
+
+    def test_comp_dtype(self):
+        # Small terms are lost when accumulating in single precision
+        k = 1000
+        a = np.full((1, k), 2.0 ** -24, dtype='f4')
+        a[0, 0] = 1
+        b = np.ones((k, 1), dtype='f4')
+        exact = 1 + (k - 1) * 2.0 ** -24
+        out = np.zeros((1, 1), dtype='f8')
+        self.call(a, b, out=out, comp_dtype=np.float64)
+        assert out[0, 0] == exact
+        self.call(a, b, out=out, comp_dtype=np.float32)
+        assert out[0, 0] < exact
+        # Uniform operands can be computed in a different precision too
+        res = self.call(a.astype('f8'), b.astype('f8'), comp_dtype=np.float32)
+        assert res[0, 0] < exact
+
+    @pytest.mark.parametrize('a_dtype, b_dtype, out_dtype', [
+        ('f8', 'c16', 'c16'), ('c16', 'f8', 'c16'), ('f8', 'f8', 'c16'),
+        ('f4', 'c16', 'c16'), ('f8', 'c8', 'c8')
+    ])
+    def test_mixed_domain(self, a_dtype, b_dtype, out_dtype):
+        a = self.rand(a_dtype, (3, 4))
+        b = self.rand(b_dtype, (4, 5))
+        out = self.rand(out_dtype, (3, 5))
+        sol = (1 + 2j) * a.astype('c16').dot(b.astype('c16')) + 0.5j * out
+        res = self.call(a, b, out=out, alpha=1 + 2j, beta=0.5j)
+        assert res is out
+        assert_allclose(res, sol, rtol=1e-5)
+
+    def test_mixed_domain_with_transpose_conjugate(self):
+        a, b = self.a_b('f8')
+        b = self.rand('c16', (4, 5))
+        res = self.call(b, a, a_trans=True, a_conj=True, b_trans=True)
+        assert_allclose(res, b.conj().T.dot(a.T))
+
+        res = self.call(a[::2], b[:, ::2], b_conj=True)
+        assert_allclose(res, a[::2].dot(b[:, ::2].conj()))
+
+    def test_mixed_domain_allocates_widest(self):
+        a, b = self.a_b('f8')
+        res = self.call(a, b.astype('c8'))
+        assert res.dtype == np.dtype('c16')
+        assert_allclose(res, a.dot(b), rtol=1e-5)
+        res = self.call(a.astype('f4'), b.astype('c8'))
+        assert res.dtype == np.dtype('c8')
+
+    def test_errors_mismatch_dtypes(self):
+        a, b = self.a_b('f4')
+        b = b.astype('c8')
         with pytest.raises(self.error_cls) as exc:
-            self.call(a, b)
-        assert "Non-uniform" in str(exc.value)
+            self.call(a, b, out=np.zeros((3, 5), dtype='f4'))
+        assert "must be complex" in str(exc.value)
+
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b.real.astype('i4'))
+        assert "No implementation" in str(exc.value)
+
+    def test_errors_comp_dtype(self):
+        a, b = self.a_b('f4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b, comp_dtype=np.complex128)
+        assert "comp_dtype" in str(exc.value)
 
     def test_errors_not_ndarray(self):
         with pytest.raises(self.error_cls) as exc:
@@ -129,173 +344,1103 @@ class TestGEMMCtypes(GEMMTests):
     def call(self, *args, **kwargs):
         return pyblis.lib.gemm(*args, **kwargs)
 
+    # float16 arrays aren't supported by numba, so these are ctypes only
+    @pytest.mark.parametrize('a_dtype, b_dtype', [
+        ('f2', 'f2'), ('f2', 'f4'), ('f4', 'f2')
+    ])
+    def test_half(self, a_dtype, b_dtype):
+        # Spans several of the blocks that are widened at a time
+        a = self.rand(a_dtype, (30, 600))
+        b = self.rand(b_dtype, (600, 20))
+        res = self.call(a, b)
+        assert res.dtype == np.dtype('f4')
+        sol = a.astype('f8').dot(b.astype('f8'))
+        assert_allclose(res, sol, rtol=1e-4, atol=1e-4)
 
-class SYRKTests(Base):
-    def a(self, dtype):
-        return self.rand(dtype, (3, 4))
+        out = np.ones((30, 20), dtype='f4')
+        res = self.call(a, b, out=out, alpha=2.0, beta=0.5)
+        assert res is out
+        assert_allclose(res, 2 * sol + 0.5, rtol=1e-4, atol=1e-4)
 
-    def sol(self, a, out=None, a_trans=False, a_conj=False, out_upper=False,
-            alpha=1.0, beta=0.0):
-        if a_conj:
-            a = a.conj()
-        aa = a.T.dot(a) if a_trans else a.dot(a.T)
-        aa = np.triu(aa) if out_upper else np.tril(aa)
-        alpha_aa = alpha * aa
-        if out is not None:
-            inds = np.triu_indices_from(out) if out_upper else np.tril_indices_from(out)
-            np.multiply.at(out, inds, beta)
-            out += alpha_aa
-        else:
-            out = alpha_aa
-        return out
+    def test_half_tiled(self):
+        # Spans several tiles along m, n and k, with transposed operands
+        a = self.rand('f2', (300, 1100))
+        b = self.rand('f2', (4200, 300))
+        out = np.ones((1100, 4200), dtype='f4')
+        self.call(a, b, a_trans=True, b_trans=True, out=out, beta=0.5)
+        sol = a.T.astype('f8').dot(b.T.astype('f8'))
+        assert_allclose(out, sol + 0.5, rtol=1e-4, atol=1e-3)
+
+    def test_half_with_transpose_and_strides(self):
+        a = self.rand('f2', (8, 6))
+        b = self.rand('f2', (5, 8))
+        res = self.call(a, b, a_trans=True, b_trans=True)
+        assert_allclose(res, a.T.astype('f4').dot(b.T), rtol=1e-4)
+
+        b = self.rand('f4', (12, 5))
+        res = self.call(a[::2, ::-1], b[::2])
+        assert_allclose(res, a[::2, ::-1].astype('f4').dot(b[::2]), rtol=1e-4)
+
+    def test_half_empty(self):
+        a = np.zeros((3, 0), dtype='f2')
+        b = np.zeros((0, 4), dtype='f2')
+        out = np.ones((3, 4), dtype='f4')
+        self.call(a, b, out=out, beta=2.0)
+        assert_allclose(out, 2)
+
+    def test_half_special_values(self):
+        vals = np.array([0, -0.0, 1, 6.1e-5, 6e-8, 65504, np.inf, -np.inf],
+                        dtype='f2')
+        a = vals[:, None]
+        b = np.ones((1, 1), dtype='f2')
+        assert_allclose(self.call(a, b)[:, 0], vals.astype('f4'))
+        a = np.array([[np.nan]], dtype='f2')
+        assert np.isnan(self.call(a, b)[0, 0])
+
+    def test_errors_half(self):
+        a, b = self.a_b('f2')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b.astype('f8'))
+        assert "must be float16 or float32" in str(exc.value)
+
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b, out=np.zeros((3, 5), dtype='f8'))
+        assert "`out` must be float32" in str(exc.value)
+
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b, comp_dtype=np.float64)
+        assert "comp_dtype" in str(exc.value)
+
+
+class GEMMBatchedTests(Base):
+    def a_b(self, dtype):
+        a = self.rand(dtype, (2, 3, 4))
+        b = self.rand(dtype, (2, 4, 5))
+        return a, b
 
     @all_dtypes
     def test_base(self, dtype):
-        a = self.a(dtype)
-        res = self.call_base(a)
-        sol = self.sol(a)
-        assert_allclose(res, sol)
+        a, b = self.a_b(dtype)
+        res = self.call_base(a, b)
+        assert_allclose(res, np.matmul(a, b), rtol=1e-5)
 
     @all_dtypes
     def test_with_out(self, dtype):
-        a = self.a(dtype)
-        out = np.zeros(shape=(3, 3), dtype=dtype)
-        res = self.call(a, out=out)
-        sol = self.sol(a)
+        a, b = self.a_b(dtype)
+        out = np.zeros(shape=(2, 3, 5), dtype=dtype)
+        res = self.call(a, b, out=out)
         assert res is out
-        assert_allclose(res, sol)
+        assert_allclose(res, np.matmul(a, b), rtol=1e-5)
 
     @all_dtypes
-    def test_with_alpha(self, dtype):
-        a = self.a(dtype)
+    def test_with_alpha_beta(self, dtype):
+        a, b = self.a_b(dtype)
         alpha = self.rand(dtype)
-        res = self.call(a, alpha=alpha)
-        sol = self.sol(a, alpha=alpha)
-        assert_allclose(res, sol)
-
-    @all_dtypes
-    def test_with_beta(self, dtype):
-        a = self.a(dtype)
         beta = self.rand(dtype)
-        res = np.ones(shape=(3, 3), dtype=dtype)
-        sol = np.ones(shape=(3, 3), dtype=dtype)
-        self.call(a, out=res, beta=beta)
-        self.sol(a, out=sol, beta=beta)
-        assert_allclose(res, sol)
+        out = np.ones(shape=(2, 3, 5), dtype=dtype)
+        self.call(a, b, out=out, alpha=alpha, beta=beta)
+        assert_allclose(out, alpha * np.matmul(a, b) + beta, rtol=1e-5)
 
     @all_dtypes
-    def test_with_transpose(self, dtype):
-        a = self.a(dtype)
-        res = self.call(a, a_trans=True)
-        sol = self.sol(a, a_trans=True)
-        assert_allclose(res, sol)
+    def test_with_transpose_conjugate(self, dtype):
+        a, b = self.a_b(dtype)
+        at = a.transpose(0, 2, 1)
+        res = self.call(at, b, a_trans=True, a_conj=True, b_conj=True)
+        assert_allclose(res, np.matmul(a.conj(), b.conj()), rtol=1e-5)
 
     @all_dtypes
-    def test_with_conjugate(self, dtype):
-        a = self.a(dtype)
-        res = self.call(a, a_conj=True)
-        sol = self.sol(a, a_conj=True)
-        assert_allclose(res, sol)
+    def test_broadcasting(self, dtype):
+        a = self.rand(dtype, (3, 4))
+        b = self.rand(dtype, (2, 4, 5))
+        assert_allclose(self.call(a, b), np.matmul(a, b), rtol=1e-5)
 
-    @all_dtypes
-    def test_with_transpose_conjugate(self, dtype):
-        a = self.a(dtype)
-        res = self.call(a, a_trans=True, a_conj=True)
-        sol = self.sol(a, a_trans=True, a_conj=True)
-        assert_allclose(res, sol)
+        a = self.rand(dtype, (2, 1, 3, 4))
+        b = self.rand(dtype, (5, 4, 5))
+        assert_allclose(self.call(a, b), np.matmul(a, b), rtol=1e-5)
 
     @all_dtypes
     def test_with_strides(self, dtype):
-        a = self.a(dtype)
-        res = self.call(a.T)
-        sol = self.sol(a.T)
-        assert_allclose(res, sol)
-
-        res = self.call(a[::2])
-        sol = self.sol(a[::2])
-        assert_allclose(res, sol)
+        a = self.rand(dtype, (4, 3, 6))
+        b = self.rand(dtype, (4, 5, 3))
+        a2 = a[::2, :, ::2]
+        b2 = b[::2].transpose(0, 2, 1)
+        res = self.call(a2, b2)
+        assert_allclose(res, np.matmul(a2, b2), rtol=1e-5)
 
-    def test_errors_unsupported_dtype(self):
-        a = self.a('i4')
-        with pytest.raises(self.error_cls) as exc:
-            self.call(a)
-        assert "No implementation" in str(exc.value)
+    @pytest.mark.parametrize('shape', [(64, 8, 8), (3, 200, 200)])
+    def test_threading(self, shape):
+        a = self.rand('f8', shape)
+        b = self.rand('f8', shape)
+        res = self.call(a, b, nthreads=4)
+        assert_allclose(res, np.matmul(a, b))
 
     def test_errors_mismatch_dtypes(self):
-        a = self.a('f4')
-        out = np.zeros((3, 3), dtype='f8')
+        a, b = self.a_b('f4')
         with pytest.raises(self.error_cls) as exc:
-            self.call(a, out=out)
+            self.call(a, b.astype('f8'))
         assert "Non-uniform" in str(exc.value)
 
-    def test_errors_not_ndarray(self):
-        with pytest.raises(self.error_cls) as exc:
-            self.call(1)
-        assert "NumPy ndarray" in str(exc.value)
-
     def test_errors_wrong_dimensions(self):
+        a, b = self.a_b('f8')
         with pytest.raises(self.error_cls) as exc:
-            self.call(np.array([1, 2, 3.]))
-        assert "2 dimensional" in str(exc.value)
-
-    def test_errors_bad_flags(self):
-        a = self.a('f4')
-        with pytest.raises(self.error_cls) as exc:
-            self.call(a, a_trans=1)
-        assert "bool" in str(exc.value)
-
-    def test_errors_bad_nthreads(self):
-        a = self.a('f4')
-        with pytest.raises(self.error_cls) as exc:
-            self.call(a, nthreads='oops')
-        assert "nthreads" in str(exc.value)
+            self.call(a, np.ones(4))
+        assert "at least 2 dimensional" in str(exc.value)
 
     def test_error_shape_mismatch(self):
+        # Bad batch
+        a = self.rand('f8', (2, 3, 4))
+        b = self.rand('f8', (3, 4, 5))
+        with pytest.raises(ValueError):
+            self.call(a, b)
+
         # Bad out
-        a = self.a('f8')
-        out = np.zeros((3, 4), dtype='f8')
+        a, b = self.a_b('f8')
+        out = np.zeros((3, 3, 5), dtype='f8')
         with pytest.raises(ValueError) as exc:
-            self.call(a, out=out)
+            self.call(a, b, out=out)
         assert "shape mismatch" in str(exc.value)
 
+    @all_dtypes
+    def test_collapse_shared_b(self, dtype):
+        a = self.rand(dtype, (2, 3, 4, 5))
+        w = self.rand(dtype, (5, 2))
+        pyblis.lib.reset_collapsed_count()
+        res = self.call(a, w)
+        assert pyblis.lib.get_collapsed_count() == 1
+        assert_allclose(res, np.matmul(a, w), rtol=1e-5)
+
+    @all_dtypes
+    def test_collapse_shared_a(self, dtype):
+        w = self.rand(dtype, (3, 4))
+        # Each b[i] and out[i] is a block of columns of a larger matrix
+        b = self.rand(dtype, (4, 6, 5)).transpose(1, 0, 2)
+        out = np.zeros((3, 6, 5), dtype=dtype).transpose(1, 0, 2)
+        pyblis.lib.reset_collapsed_count()
+        self.call(w, b, out=out)
+        assert pyblis.lib.get_collapsed_count() == 1
+        assert_allclose(out, np.matmul(w, b), rtol=1e-5)
+
+    def test_no_collapse_without_shared_operand(self):
+        a = self.rand('f8', (6, 3, 4))
+        w = self.rand('f8', (4, 5))
+        pyblis.lib.reset_collapsed_count()
+        res = self.call(a[::2], w)
+        assert_allclose(res, np.matmul(a[::2], w))
+        res = self.call(a, np.broadcast_to(w, (6, 4, 5)).copy())
+        assert_allclose(res, np.matmul(a, w))
+        assert pyblis.lib.get_collapsed_count() == 0
 
-class TestSYRKCtypes(SYRKTests):
+
+class TestGEMMBatchedCtypes(GEMMBatchedTests):
     error_cls = TypeError
 
     def call(self, *args, **kwargs):
-        return pyblis.lib.syrk(*args, **kwargs)
+        return pyblis.lib.gemm_batched(*args, **kwargs)
 
 
-class MKSYMMTests(Base):
-    def a(self, dtype):
-        return self.rand(dtype, (3, 3))
+class GEMMBatchedStridedTests(Base):
+    def a_b(self, dtype, batch=2):
+        a = self.rand(dtype, (batch, 3, 4))
+        b = self.rand(dtype, (batch, 4, 5))
+        return a, b
 
-    def sol(self, a, upper=False):
-        mask = (np.tril if upper else np.triu)(np.ones(a.shape, dtype='b'))
-        return np.where(mask, a.T, a)
+    @all_dtypes
+    def test_base(self, dtype):
+        a, b = self.a_b(dtype)
+        res = self.call_base(a, b)
+        assert_allclose(res, np.matmul(a, b), rtol=1e-5)
 
-    @pytest.mark.parametrize('upper', [False, True])
     @all_dtypes
-    def test_mksymm(self, dtype, upper):
-        a = self.a(dtype)
-        sol = self.sol(a, upper=upper)
-        res = self.call(a, upper=upper)
-        assert_allclose(res, sol)
+    def test_with_out(self, dtype):
+        a, b = self.a_b(dtype)
+        out = np.zeros(shape=(2, 3, 5), dtype=dtype)
+        res = self.call(a, b, out=out)
+        assert res is out
+        assert_allclose(res, np.matmul(a, b), rtol=1e-5)
 
-    @pytest.mark.parametrize('upper', [False, True])
     @all_dtypes
-    def test_with_strides(self, dtype, upper):
-        a = self.a(dtype)
-        sol = self.sol(a.T, upper=upper)
-        res = self.call(a.T, upper=upper)
-        assert_allclose(res, sol)
+    def test_with_alpha_beta(self, dtype):
+        a, b = self.a_b(dtype)
+        alpha = self.rand(dtype)
+        beta = self.rand(dtype)
+        out = np.ones(shape=(2, 3, 5), dtype=dtype)
+        self.call(a, b, out=out, alpha=alpha, beta=beta)
+        assert_allclose(out, alpha * np.matmul(a, b) + beta, rtol=1e-5)
 
-        a = self.a(dtype)
-        sol = self.sol(a[::2, ::2], upper=upper)
-        res = self.call(a[::2, ::2], upper=upper)
-        assert_allclose(res, sol)
+    @all_dtypes
+    def test_with_transpose_conjugate(self, dtype):
+        a, b = self.a_b(dtype)
+        bt = b.transpose(0, 2, 1)
+        res = self.call(a, bt, a_conj=True, b_trans=True, b_conj=True)
+        assert_allclose(res, np.matmul(a.conj(), b.conj()), rtol=1e-5)
 
-    def test_errors_unsupported_dtype(self):
+    @all_dtypes
+    def test_with_batch_strides(self, dtype):
+        a, b = self.a_b(dtype, batch=6)
+        # Non-contiguous batch, and a broadcast (zero stride) operand
+        b0 = np.broadcast_to(b[0], (3, 4, 5))
+        res = self.call(a[::2], b0)
+        assert_allclose(res, np.matmul(a[::2], b0), rtol=1e-5)
+
+        # Batch stored in the middle dimension
+        out = np.zeros((3, 6, 5), dtype=dtype).transpose(1, 0, 2)
+        res = self.call(a, b, out=out, nthreads=3)
+        assert_allclose(res, np.matmul(a, b), rtol=1e-5)
+
+    def test_many_small(self):
+        a = self.rand('f8', (1000, 4, 4))
+        b = self.rand('f8', (1000, 4, 4))
+        res = self.call(a, b, nthreads=4)
+        assert_allclose(res, np.matmul(a, b))
+
+    def test_errors_wrong_dimensions(self):
+        a, b = self.a_b('f8')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b[0])
+        assert "3 dimensional" in str(exc.value)
+
+    def test_error_shape_mismatch(self):
+        a, _ = self.a_b('f8')
+        _, b = self.a_b('f8', batch=3)
+        with pytest.raises(ValueError) as exc:
+            self.call(a, b)
+        assert "shape mismatch" in str(exc.value)
+
+        a, b = self.a_b('f8')
+        out = np.zeros((2, 3, 4), dtype='f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a, b, out=out)
+        assert "shape mismatch" in str(exc.value)
+
+    def test_collapse_shared_b(self):
+        a = self.rand('f8', (6, 3, 4))
+        w = np.broadcast_to(self.rand('f8', (4, 5)), (6, 4, 5))
+        pyblis.lib.reset_collapsed_count()
+        res = self.call(a, w)
+        assert pyblis.lib.get_collapsed_count() == 1
+        assert_allclose(res, np.matmul(a, w))
+
+
+class TestGEMMBatchedStridedCtypes(GEMMBatchedStridedTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.gemm_batched_strided(*args, **kwargs)
+
+
+class GEMMGroupedTests(Base):
+    shapes = [(3, 4, 5), (1, 1, 1), (20, 7, 13), (6, 9, 2), (0, 3, 4)]
+
+    def group(self, problems):
+        return problems
+
+    def problems(self, dtype, shapes=None):
+        shapes = self.shapes if shapes is None else shapes
+        return [(self.rand(dtype, (m, k)),
+                 self.rand(dtype, (k, n)),
+                 np.zeros((m, n), dtype=dtype))
+                for m, k, n in shapes]
+
+    @all_dtypes
+    def test_base(self, dtype):
+        problems = self.problems(dtype)
+        res = self.call_base(self.group(problems))
+        assert len(res) == len(problems)
+        for (a, b, out), r in zip(problems, res):
+            assert r is out
+            assert_allclose(r, a.dot(b), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_alpha_beta(self, dtype):
+        problems = self.problems(dtype)
+        for _, _, out in problems:
+            out[:] = 1
+        alpha = self.rand(dtype)
+        beta = self.rand(dtype)
+        self.call(self.group(problems), alpha=alpha, beta=beta)
+        for a, b, out in problems:
+            assert_allclose(out, alpha * a.dot(b) + beta, rtol=1e-5)
+
+    @all_dtypes
+    def test_non_contiguous(self, dtype):
+        problems = [(self.rand(dtype, (k, m)).T,
+                     self.rand(dtype, (n, 2 * k))[:, ::2].T,
+                     np.zeros((n, m), dtype=dtype).T)
+                    for m, k, n in [(4, 3, 10), (8, 5, 6)]]
+        self.call(self.group(problems), nthreads=2)
+        for a, b, out in problems:
+            assert_allclose(out, a.dot(b), rtol=1e-5)
+
+    def test_many_problems(self):
+        shapes = [(i % 7 + 1, i % 5 + 1, i % 3 + 1) for i in range(200)]
+        problems = self.problems('f8', shapes)
+        self.call(self.group(problems), nthreads=4)
+        for a, b, out in problems:
+            assert_allclose(out, a.dot(b))
+
+    def test_errors_wrong_dimensions(self):
+        problems = self.problems('f8', [(3, 4, 5)])
+        a, b, out = problems[0]
+        with pytest.raises(self.error_cls) as exc:
+            self.call(self.group([(a, b[0], out)]))
+        assert "2 dimensional" in str(exc.value)
+
+    def test_errors_dtype_mismatch(self):
+        problems = self.problems('f8') + self.problems('f4')
+        with pytest.raises(self.error_cls):
+            self.call(self.group(problems))
+
+    def test_error_shape_mismatch(self):
+        a, b, out = self.problems('f8', [(3, 4, 5)])[0]
+        with pytest.raises(ValueError) as exc:
+            self.call(self.group([(a, b.T, out)]))
+        assert "shape mismatch" in str(exc.value)
+
+        with pytest.raises(ValueError) as exc:
+            self.call(self.group([(a, b, out.T)]))
+        assert "shape mismatch" in str(exc.value)
+
+    @all_dtypes
+    def test_collapse_shared_b(self, dtype):
+        a = self.rand(dtype, (10, 4))
+        w = self.rand(dtype, (4, 5))
+        out = np.zeros((10, 5), dtype=dtype)
+        problems = [(a[i:j], w, out[i:j]) for i, j in [(0, 3), (3, 7), (7, 10)]]
+        pyblis.lib.reset_collapsed_count()
+        self.call(self.group(problems))
+        assert pyblis.lib.get_collapsed_count() == 1
+        assert_allclose(out, a.dot(w), rtol=1e-5)
+
+    @all_dtypes
+    def test_collapse_shared_a(self, dtype):
+        w = self.rand(dtype, (3, 4))
+        b = self.rand(dtype, (4, 10))
+        out = np.zeros((3, 10), dtype=dtype)
+        problems = [(w, b[:, i:j], out[:, i:j]) for i, j in [(0, 2), (2, 7), (7, 10)]]
+        pyblis.lib.reset_collapsed_count()
+        self.call(self.group(problems))
+        assert pyblis.lib.get_collapsed_count() == 1
+        assert_allclose(out, w.dot(b), rtol=1e-5)
+
+    def test_no_collapse_out_of_order(self):
+        a = self.rand('f8', (10, 4))
+        w = self.rand('f8', (4, 5))
+        out = np.zeros((10, 5))
+        problems = [(a[i:j], w, out[i:j]) for i, j in [(3, 7), (0, 3), (7, 10)]]
+        pyblis.lib.reset_collapsed_count()
+        self.call(self.group(problems))
+        assert pyblis.lib.get_collapsed_count() == 0
+        assert_allclose(out, a.dot(w))
+
+
+class TestGEMMGroupedCtypes(GEMMGroupedTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.gemm_grouped(*args, **kwargs)
+
+    def test_without_out(self):
+        problems = [(a, b, None) for a, b, _ in self.problems('f8')]
+        res = self.call(problems)
+        for (a, b, _), r in zip(problems, res):
+            assert_allclose(r, a.dot(b))
+
+    def test_empty(self):
+        assert self.call([]) == []
+
+    def test_errors_not_a_group(self):
+        a, b, out = self.problems('f8', [(3, 4, 5)])[0]
+        with pytest.raises(TypeError):
+            self.call((a, b, out))
+        with pytest.raises(TypeError):
+            self.call([(a, b)])
+
+
+real_dtypes = pytest.mark.parametrize('dtype', ['f4', 'f8'])
+
+
+class GEMMPlanarTests(Base):
+    def a_b(self, dtype):
+        a = self.rand({'f4': 'c8', 'f8': 'c16'}[dtype], (3, 4))
+        b = self.rand({'f4': 'c8', 'f8': 'c16'}[dtype], (4, 5))
+        return a, b
+
+    def planar(self, *args, **kwargs):
+        a, b = args[:2]
+        return self.call(a.real, a.imag, b.real, b.imag, *args[2:], **kwargs)
+
+    @real_dtypes
+    def test_base(self, dtype):
+        a, b = self.a_b(dtype)
+        res_r, res_i = self.call_base(a.real, a.imag, b.real, b.imag)
+        sol = a.dot(b)
+        assert_allclose(res_r, sol.real, rtol=1e-5, atol=1e-5)
+        assert_allclose(res_i, sol.imag, rtol=1e-5, atol=1e-5)
+
+    @real_dtypes
+    def test_with_out(self, dtype):
+        a, b = self.a_b(dtype)
+        out_r = np.ones(shape=(3, 5), dtype=dtype)
+        out_i = np.ones(shape=(3, 5), dtype=dtype)
+        res_r, res_i = self.planar(a, b, out_r, out_i, alpha=2.0, beta=0.5)
+        assert res_r is out_r
+        assert res_i is out_i
+        sol = 2 * a.dot(b) + 0.5 * (1 + 1j)
+        assert_allclose(out_r, sol.real, rtol=1e-5, atol=1e-5)
+        assert_allclose(out_i, sol.imag, rtol=1e-5, atol=1e-5)
+
+    @real_dtypes
+    @pytest.mark.parametrize('a_conj', [False, True])
+    @pytest.mark.parametrize('b_conj', [False, True])
+    def test_with_transpose_conjugate(self, dtype, a_conj, b_conj):
+        a, b = self.a_b(dtype)
+        res_r, res_i = self.planar(b, a, a_trans=True, a_conj=a_conj,
+                                   b_trans=True, b_conj=b_conj)
+        op_a = b.T.conj() if a_conj else b.T
+        op_b = a.T.conj() if b_conj else a.T
+        sol = op_a.dot(op_b)
+        assert_allclose(res_r, sol.real, rtol=1e-5, atol=1e-5)
+        assert_allclose(res_i, sol.imag, rtol=1e-5, atol=1e-5)
+
+    @real_dtypes
+    def test_with_strides(self, dtype):
+        a, b = self.a_b(dtype)
+        # Planar views of interleaved complex arrays are strided
+        res_r, res_i = self.planar(a[::2], b[:, ::2])
+        sol = a[::2].dot(b[:, ::2])
+        assert_allclose(res_r, sol.real, rtol=1e-5, atol=1e-5)
+        assert_allclose(res_i, sol.imag, rtol=1e-5, atol=1e-5)
+
+    def test_errors_complex_dtype(self):
+        a, b = self.a_b('f8')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, a, b, b)
+        assert "must be real" in str(exc.value)
+
+    def test_errors_mismatch_dtypes(self):
+        a, b = self.a_b('f8')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a.real, a.imag.astype('f4'), b.real, b.imag)
+        assert "Non-uniform" in str(exc.value)
+
+    def test_errors_shape_mismatch(self):
+        a, b = self.a_b('f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a.real, a.imag[:2], b.real, b.imag)
+        assert "ai shape mismatch" in str(exc.value)
+        with pytest.raises(ValueError) as exc:
+            self.call(a.real, a.imag, b.real, b.imag[:2])
+        assert "bi shape mismatch" in str(exc.value)
+        with pytest.raises(ValueError) as exc:
+            self.call(a.real, a.imag, b.real, b.imag, np.zeros((3, 4)))
+        assert "Output shape mismatch" in str(exc.value)
+
+
+class TestGEMMPlanarCtypes(GEMMPlanarTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.gemm_planar(*args, **kwargs)
+
+
+class GEMMTTests(Base):
+    def a_b(self, dtype):
+        a = self.rand(dtype, (3, 4))
+        b = self.rand(dtype, (4, 3))
+        return a, b
+
+    def sol(self, a, b, out=None, out_upper=False, alpha=1.0, beta=0.0):
+        ab = alpha * a.dot(b)
+        ab = np.triu(ab) if out_upper else np.tril(ab)
+        if out is not None:
+            inds = np.triu_indices_from(out) if out_upper else np.tril_indices_from(out)
+            np.multiply.at(out, inds, beta)
+            out += ab
+        else:
+            out = ab
+        return out
+
+    @all_dtypes
+    def test_base(self, dtype):
+        a, b = self.a_b(dtype)
+        res = self.call_base(a, b)
+        assert_allclose(res, self.sol(a, b), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_out(self, dtype):
+        a, b = self.a_b(dtype)
+        out = np.zeros(shape=(3, 3), dtype=dtype)
+        res = self.call(a, b, out=out)
+        assert res is out
+        assert_allclose(res, self.sol(a, b), rtol=1e-5)
+
+    @pytest.mark.parametrize('out_upper', [False, True])
+    @all_dtypes
+    def test_with_alpha_beta(self, dtype, out_upper):
+        a, b = self.a_b(dtype)
+        alpha = self.rand(dtype)
+        beta = self.rand(dtype)
+        res = np.ones(shape=(3, 3), dtype=dtype)
+        sol = np.ones(shape=(3, 3), dtype=dtype)
+        self.call(a, b, out=res, out_upper=out_upper, alpha=alpha, beta=beta)
+        self.sol(a, b, out=sol, out_upper=out_upper, alpha=alpha, beta=beta)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @all_dtypes
+    def test_with_transpose_conjugate(self, dtype):
+        a, b = self.a_b(dtype)
+        res = self.call(b, a, a_trans=True, a_conj=True, b_trans=True,
+                        b_conj=True)
+        sol = self.sol(b.conj().T, a.conj().T)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @all_dtypes
+    def test_with_strides(self, dtype):
+        a, b = self.a_b(dtype)
+        res = self.call(a[:, ::2], b[::2])
+        sol = self.sol(a[:, ::2], b[::2])
+        assert_allclose(res, sol, rtol=1e-5)
+
+    def test_errors_mismatch_dtypes(self):
+        a, b = self.a_b('f4')
+        b = b.astype('f8')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b)
+        assert "Non-uniform" in str(exc.value)
+
+    def test_errors_bad_flags(self):
+        a, b = self.a_b('f4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b, out_upper=1)
+        assert "bool" in str(exc.value)
+
+    def test_error_shape_mismatch(self):
+        # Product not square
+        a = self.rand('f8', (3, 4))
+        b = self.rand('f8', (4, 5))
+        with pytest.raises(ValueError) as exc:
+            self.call(a, b)
+        assert "shape mismatch" in str(exc.value)
+
+        # Bad out
+        a, b = self.a_b('f8')
+        out = np.zeros((3, 4), dtype='f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a, b, out=out)
+        assert "shape mismatch" in str(exc.value)
+
+
+class TestGEMMTCtypes(GEMMTTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.gemmt(*args, **kwargs)
+
+
+class SYMMTests(Base):
+    hermitian = False
+
+    def a_b(self, dtype, a_right=False):
+        a = self.rand(dtype, (4, 4) if a_right else (3, 3))
+        if self.hermitian:
+            a[np.diag_indices_from(a)] = a.diagonal().real
+        b = self.rand(dtype, (3, 4))
+        return a, b
+
+    def dense(self, a, a_upper=False):
+        tri = np.triu(a) if a_upper else np.tril(a)
+        other = tri.conj().T if self.hermitian else tri.T
+        return tri + other - np.diag(tri.diagonal())
+
+    def sol(self, a, b, a_right=False, a_upper=False, a_conj=False,
+            b_trans=False, b_conj=False, alpha=1.0):
+        a = self.dense(a, a_upper=a_upper)
+        if a_conj:
+            a = a.conj()
+        if b_conj:
+            b = b.conj()
+        if b_trans:
+            b = b.T
+        return alpha * (b.dot(a) if a_right else a.dot(b))
+
+    @all_dtypes
+    def test_base(self, dtype):
+        a, b = self.a_b(dtype)
+        res = self.call_base(a, b)
+        sol = self.sol(a, b)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @all_dtypes
+    def test_with_out(self, dtype):
+        a, b = self.a_b(dtype)
+        out = np.zeros(shape=(3, 4), dtype=dtype)
+        res = self.call(a, b, out=out)
+        assert res is out
+        assert_allclose(res, self.sol(a, b), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_alpha(self, dtype):
+        a, b = self.a_b(dtype)
+        alpha = self.rand(dtype)
+        res = self.call(a, b, alpha=alpha)
+        assert_allclose(res, self.sol(a, b, alpha=alpha), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_beta(self, dtype):
+        a, b = self.a_b(dtype)
+        beta = self.rand(dtype)
+        out = np.ones(shape=(3, 4), dtype=dtype)
+        self.call(a, b, out=out, beta=beta)
+        assert_allclose(out, beta + self.sol(a, b), rtol=1e-5)
+
+    @pytest.mark.parametrize('a_upper', [False, True])
+    @pytest.mark.parametrize('a_right', [False, True])
+    @all_dtypes
+    def test_with_side_and_uplo(self, dtype, a_right, a_upper):
+        a, b = self.a_b(dtype, a_right=a_right)
+        res = self.call(a, b, a_right=a_right, a_upper=a_upper)
+        sol = self.sol(a, b, a_right=a_right, a_upper=a_upper)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @all_dtypes
+    def test_with_transpose_conjugate(self, dtype):
+        a, b = self.a_b(dtype, a_right=True)
+        res = self.call(a, b.T, a_right=True, a_conj=True, b_trans=True,
+                        b_conj=True)
+        sol = self.sol(a, b, a_right=True, a_conj=True, b_conj=True)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @all_dtypes
+    def test_with_strides(self, dtype):
+        a, b = self.a_b(dtype)
+        res = self.call(a.T, b[:, ::2])
+        sol = self.sol(a.T, b[:, ::2])
+        assert_allclose(res, sol, rtol=1e-5)
+
+    def test_errors_unsupported_dtype(self):
+        a, b = self.a_b('i4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b)
+        assert "No implementation" in str(exc.value)
+
+    def test_errors_mismatch_dtypes(self):
+        a, b = self.a_b('f4')
+        b = b.astype('f8')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b)
+        assert "Non-uniform" in str(exc.value)
+
+    def test_errors_bad_flags(self):
+        a, b = self.a_b('f4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b, a_upper=1)
+        assert "bool" in str(exc.value)
+
+    def test_error_not_square(self):
+        a = np.zeros((3, 4), dtype='f8')
+        b = np.zeros((4, 4), dtype='f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a, b)
+        assert "square" in str(exc.value)
+
+    def test_error_shape_mismatch(self):
+        # Bad b
+        a, b = self.a_b('f8', a_right=True)
+        with pytest.raises(ValueError) as exc:
+            self.call(a, b)
+        assert "shape mismatch" in str(exc.value)
+
+        # Bad out
+        a, b = self.a_b('f8')
+        out = np.zeros((4, 4), dtype='f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a, b, out=out)
+        assert "shape mismatch" in str(exc.value)
+
+
+class TestSYMMCtypes(SYMMTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.symm(*args, **kwargs)
+
+
+class HEMMTests(SYMMTests):
+    hermitian = True
+
+
+class TestHEMMCtypes(HEMMTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.hemm(*args, **kwargs)
+
+
+class SYRKTests(Base):
+    def a(self, dtype):
+        return self.rand(dtype, (3, 4))
+
+    def sol(self, a, out=None, a_trans=False, a_conj=False, out_upper=False,
+            alpha=1.0, beta=0.0):
+        if a_conj:
+            a = a.conj()
+        aa = a.T.dot(a) if a_trans else a.dot(a.T)
+        aa = np.triu(aa) if out_upper else np.tril(aa)
+        alpha_aa = alpha * aa
+        if out is not None:
+            inds = np.triu_indices_from(out) if out_upper else np.tril_indices_from(out)
+            np.multiply.at(out, inds, beta)
+            out += alpha_aa
+        else:
+            out = alpha_aa
+        return out
+
+    @all_dtypes
+    def test_base(self, dtype):
+        a = self.a(dtype)
+        res = self.call_base(a)
+        sol = self.sol(a)
+        assert_allclose(res, sol)
+
+    @all_dtypes
+    def test_with_out(self, dtype):
+        a = self.a(dtype)
+        out = np.zeros(shape=(3, 3), dtype=dtype)
+        res = self.call(a, out=out)
+        sol = self.sol(a)
+        assert res is out
+        assert_allclose(res, sol)
+
+    @all_dtypes
+    def test_with_alpha(self, dtype):
+        a = self.a(dtype)
+        alpha = self.rand(dtype)
+        res = self.call(a, alpha=alpha)
+        sol = self.sol(a, alpha=alpha)
+        assert_allclose(res, sol)
+
+    @all_dtypes
+    def test_with_beta(self, dtype):
+        a = self.a(dtype)
+        beta = self.rand(dtype)
+        res = np.ones(shape=(3, 3), dtype=dtype)
+        sol = np.ones(shape=(3, 3), dtype=dtype)
+        self.call(a, out=res, beta=beta)
+        self.sol(a, out=sol, beta=beta)
+        assert_allclose(res, sol)
+
+    @all_dtypes
+    def test_with_transpose(self, dtype):
+        a = self.a(dtype)
+        res = self.call(a, a_trans=True)
+        sol = self.sol(a, a_trans=True)
+        assert_allclose(res, sol)
+
+    @all_dtypes
+    def test_with_conjugate(self, dtype):
+        a = self.a(dtype)
+        res = self.call(a, a_conj=True)
+        sol = self.sol(a, a_conj=True)
+        assert_allclose(res, sol)
+
+    @all_dtypes
+    def test_with_transpose_conjugate(self, dtype):
+        a = self.a(dtype)
+        res = self.call(a, a_trans=True, a_conj=True)
+        sol = self.sol(a, a_trans=True, a_conj=True)
+        assert_allclose(res, sol)
+
+    def full_sol(self, a):
+        return a.dot(a.T)
+
+    @pytest.mark.parametrize('out_upper', [False, True])
+    @all_dtypes
+    def test_with_out_full(self, dtype, out_upper):
+        a = self.a(dtype)
+        res = self.call(a, out_upper=out_upper, out_full=True)
+        assert_allclose(res, self.full_sol(a), rtol=1e-5)
+
+        out = np.ones(shape=(4, 4), dtype=dtype)
+        res = self.call(a, out=out, a_trans=True, out_upper=out_upper,
+                        out_full=True, beta=0.5)
+        assert res is out
+        assert_allclose(res, 0.5 + self.full_sol(a.T), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_out_full_multiple_blocks(self, dtype):
+        a = self.rand(dtype, (300, 10))
+        res = self.call(a.T, a_trans=True, out_full=True)
+        assert_allclose(res, self.full_sol(a), rtol=1e-4)
+
+    @all_dtypes
+    def test_with_strides(self, dtype):
+        a = self.a(dtype)
+        res = self.call(a.T)
+        sol = self.sol(a.T)
+        assert_allclose(res, sol)
+
+        res = self.call(a[::2])
+        sol = self.sol(a[::2])
+        assert_allclose(res, sol)
+
+    def test_errors_unsupported_dtype(self):
+        a = self.a('i4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a)
+        assert "No implementation" in str(exc.value)
+
+    def test_errors_mismatch_dtypes(self):
+        a = self.a('f4')
+        out = np.zeros((3, 3), dtype='f8')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, out=out)
+        assert "Non-uniform" in str(exc.value)
+
+    def test_errors_not_ndarray(self):
+        with pytest.raises(self.error_cls) as exc:
+            self.call(1)
+        assert "NumPy ndarray" in str(exc.value)
+
+    def test_errors_wrong_dimensions(self):
+        with pytest.raises(self.error_cls) as exc:
+            self.call(np.array([1, 2, 3.]))
+        assert "2 dimensional" in str(exc.value)
+
+    def test_errors_bad_flags(self):
+        a = self.a('f4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, a_trans=1)
+        assert "bool" in str(exc.value)
+
+    def test_errors_bad_nthreads(self):
+        a = self.a('f4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, nthreads='oops')
+        assert "nthreads" in str(exc.value)
+
+    def test_error_shape_mismatch(self):
+        # Bad out
+        a = self.a('f8')
+        out = np.zeros((3, 4), dtype='f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a, out=out)
+        assert "shape mismatch" in str(exc.value)
+
+
+class TestSYRKCtypes(SYRKTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.syrk(*args, **kwargs)
+
+
+class HERKTests(SYRKTests):
+    def sol(self, a, out=None, a_trans=False, a_conj=False, out_upper=False,
+            alpha=1.0, beta=0.0):
+        if a_conj:
+            a = a.conj()
+        if a_trans:
+            a = a.T
+        aa = a.dot(a.conj().T)
+        aa = np.triu(aa) if out_upper else np.tril(aa)
+        alpha_aa = alpha * aa
+        if out is not None:
+            inds = np.triu_indices_from(out) if out_upper else np.tril_indices_from(out)
+            np.multiply.at(out, inds, beta)
+            out += alpha_aa
+        else:
+            out = alpha_aa
+        return out
+
+    def full_sol(self, a):
+        return a.dot(a.conj().T)
+
+    def real_scalar(self, dtype):
+        return self.rand(np.empty(0, dtype=dtype).real.dtype)
+
+    @all_dtypes
+    def test_with_alpha(self, dtype):
+        a = self.a(dtype)
+        alpha = self.real_scalar(dtype)
+        res = self.call(a, alpha=alpha)
+        sol = self.sol(a, alpha=alpha)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @all_dtypes
+    def test_with_beta(self, dtype):
+        a = self.a(dtype)
+        beta = self.real_scalar(dtype)
+        res = np.ones(shape=(3, 3), dtype=dtype)
+        sol = np.ones(shape=(3, 3), dtype=dtype)
+        self.call(a, out=res, beta=beta)
+        self.sol(a, out=sol, beta=beta)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    def test_errors_complex_scalar(self):
+        a = self.a('c16')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, alpha=1j)
+        assert "alpha" in str(exc.value)
+
+
+class TestHERKCtypes(HERKTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.herk(*args, **kwargs)
+
+
+class SYR2KTests(Base):
+    hermitian = False
+
+    def a_b(self, dtype):
+        a = self.rand(dtype, (3, 4))
+        b = self.rand(dtype, (3, 4))
+        return a, b
+
+    def scalar(self, dtype):
+        return self.rand(dtype)
+
+    def sol(self, a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+            b_conj=False, out_upper=False, alpha=1.0, beta=0.0):
+        if a_conj:
+            a = a.conj()
+        if a_trans:
+            a = a.T
+        if b_conj:
+            b = b.conj()
+        if b_trans:
+            b = b.T
+        if self.hermitian:
+            ab = alpha * a.dot(b.conj().T) + np.conj(alpha) * b.dot(a.conj().T)
+        else:
+            ab = alpha * (a.dot(b.T) + b.dot(a.T))
+        ab = np.triu(ab) if out_upper else np.tril(ab)
+        if out is not None:
+            inds = np.triu_indices_from(out) if out_upper else np.tril_indices_from(out)
+            np.multiply.at(out, inds, beta)
+            out += ab
+        else:
+            out = ab
+        return out
+
+    @all_dtypes
+    def test_base(self, dtype):
+        a, b = self.a_b(dtype)
+        res = self.call_base(a, b)
+        sol = self.sol(a, b)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @all_dtypes
+    def test_with_out(self, dtype):
+        a, b = self.a_b(dtype)
+        out = np.zeros(shape=(3, 3), dtype=dtype)
+        res = self.call(a, b, out=out)
+        assert res is out
+        assert_allclose(res, self.sol(a, b), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_alpha(self, dtype):
+        a, b = self.a_b(dtype)
+        alpha = self.rand(dtype)
+        res = self.call(a, b, alpha=alpha)
+        assert_allclose(res, self.sol(a, b, alpha=alpha), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_beta(self, dtype):
+        a, b = self.a_b(dtype)
+        beta = self.scalar(dtype)
+        res = np.ones(shape=(3, 3), dtype=dtype)
+        sol = np.ones(shape=(3, 3), dtype=dtype)
+        self.call(a, b, out=res, beta=beta)
+        self.sol(a, b, out=sol, beta=beta)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @pytest.mark.parametrize('out_upper', [False, True])
+    @all_dtypes
+    def test_with_transpose_conjugate(self, dtype, out_upper):
+        a, b = self.a_b(dtype)
+        res = self.call(a.T, b, a_trans=True, a_conj=True, b_conj=True,
+                        out_upper=out_upper)
+        sol = self.sol(a, b, a_conj=True, b_conj=True, out_upper=out_upper)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    def test_errors_mismatch_dtypes(self):
+        a, b = self.a_b('f4')
+        b = b.astype('f8')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b)
+        assert "Non-uniform" in str(exc.value)
+
+    def test_errors_bad_flags(self):
+        a, b = self.a_b('f4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a, b, out_upper=1)
+        assert "bool" in str(exc.value)
+
+    def test_error_shape_mismatch(self):
+        a, b = self.a_b('f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a, b.T)
+        assert "shape mismatch" in str(exc.value)
+
+        out = np.zeros((3, 4), dtype='f8')
+        with pytest.raises(ValueError) as exc:
+            self.call(a, b, out=out)
+        assert "shape mismatch" in str(exc.value)
+
+
+class TestSYR2KCtypes(SYR2KTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.syr2k(*args, **kwargs)
+
+
+class HER2KTests(SYR2KTests):
+    hermitian = True
+
+    def scalar(self, dtype):
+        return self.rand(np.empty(0, dtype=dtype).real.dtype)
+
+
+class TestHER2KCtypes(HER2KTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.her2k(*args, **kwargs)
+
+
+class MKSYMMTests(Base):
+    def a(self, dtype):
+        return self.rand(dtype, (3, 3))
+
+    def sol(self, a, upper=False):
+        mask = (np.tril if upper else np.triu)(np.ones(a.shape, dtype='b'))
+        return np.where(mask, a.T, a)
+
+    @pytest.mark.parametrize('upper', [False, True])
+    @all_dtypes
+    def test_mksymm(self, dtype, upper):
+        a = self.a(dtype)
+        sol = self.sol(a, upper=upper)
+        res = self.call(a, upper=upper)
+        assert_allclose(res, sol)
+
+    @pytest.mark.parametrize('upper', [False, True])
+    @all_dtypes
+    def test_with_strides(self, dtype, upper):
+        a = self.a(dtype)
+        sol = self.sol(a.T, upper=upper)
+        res = self.call(a.T, upper=upper)
+        assert_allclose(res, sol)
+
+        a = self.a(dtype)
+        sol = self.sol(a[::2, ::2], upper=upper)
+        res = self.call(a[::2, ::2], upper=upper)
+        assert_allclose(res, sol)
+
+    def test_errors_unsupported_dtype(self):
         a = self.a('i4')
         with pytest.raises(self.error_cls) as exc:
             self.call(a)
@@ -323,3 +1468,707 @@ class TestMKSYMMCtypes(MKSYMMTests):
 
     def call(self, *args, **kwargs):
         return pyblis.lib.mksymm(*args, **kwargs)
+
+
+class MKHERMTests(MKSYMMTests):
+    def a(self, dtype):
+        a = self.rand(dtype, (3, 3))
+        a[np.diag_indices_from(a)] = a.diagonal().real
+        return a
+
+    def sol(self, a, upper=False):
+        mask = (np.tril if upper else np.triu)(np.ones(a.shape, dtype='b'))
+        return np.where(mask, a.T.conj(), a)
+
+
+class TestMKHERMCtypes(MKHERMTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.mkherm(*args, **kwargs)
+
+
+class SYRKBatchedTests(Base):
+    shapes = [(3, 4), (1, 2), (5, 5), (140, 3), (0, 2)]
+
+    def group(self, arrays):
+        return arrays
+
+    def sol(self, a, a_trans=False, a_conj=False, out_upper=False,
+            out_full=False, alpha=1.0):
+        if a_conj:
+            a = a.conj()
+        if a_trans:
+            a = a.T
+        res = alpha * a.dot(a.T)
+        if out_full:
+            return res
+        return np.triu(res) if out_upper else np.tril(res)
+
+    @all_dtypes
+    def test_stack(self, dtype):
+        a = self.rand(dtype, (5, 3, 4))
+        res = self.call_base(a)
+        assert res.shape == (5, 3, 3)
+        for ai, r in zip(a, res):
+            assert_allclose(r, self.sol(ai), rtol=1e-5)
+
+    @pytest.mark.parametrize('out_upper', [False, True])
+    @all_dtypes
+    def test_stack_with_options(self, dtype, out_upper):
+        a = self.rand(dtype, (5, 4, 3))
+        out = np.zeros((5, 3, 3), dtype=dtype)
+        alpha = self.rand(dtype)
+        res = self.call(a, out=out, a_trans=True, a_conj=True,
+                        out_upper=out_upper, alpha=alpha)
+        assert res is out
+        for ai, r in zip(a, res):
+            sol = self.sol(ai, a_trans=True, a_conj=True, out_upper=out_upper,
+                           alpha=alpha)
+            assert_allclose(r, sol, rtol=1e-5)
+
+    @pytest.mark.parametrize('out_upper', [False, True])
+    @all_dtypes
+    def test_stack_with_out_full(self, dtype, out_upper):
+        a = self.rand(dtype, (6, 3, 4))
+        out = np.ones((6, 3, 3), dtype=dtype)
+        self.call(a, out=out, out_upper=out_upper, out_full=True, beta=2.0)
+        for ai, r in zip(a, out):
+            assert_allclose(r, self.sol(ai, out_full=True) + 2, rtol=1e-5)
+
+    @all_dtypes
+    def test_stack_with_strides(self, dtype):
+        a = self.rand(dtype, (10, 3, 4))[::2]
+        out = np.zeros((3, 3, 5), dtype=dtype).transpose(2, 1, 0)
+        self.call(a, out=out, out_full=True, nthreads=2)
+        for ai, r in zip(a, out):
+            assert_allclose(r, self.sol(ai, out_full=True), rtol=1e-5)
+
+    @all_dtypes
+    def test_list(self, dtype):
+        a = [self.rand(dtype, s) for s in self.shapes]
+        res = self.call_base(self.group(a))
+        assert len(res) == len(a)
+        for ai, r in zip(a, res):
+            assert_allclose(r, self.sol(ai), rtol=1e-5)
+
+    @pytest.mark.parametrize('out_upper', [False, True])
+    @all_dtypes
+    def test_list_with_out_full(self, dtype, out_upper):
+        a = [self.rand(dtype, s) for s in self.shapes]
+        out = [np.zeros((s[0], s[0]), dtype=dtype) for s in self.shapes]
+        res = self.call(self.group(a), out=self.group(out),
+                        out_upper=out_upper, out_full=True, nthreads=3)
+        for ai, r, o in zip(a, res, out):
+            assert r is o
+            assert_allclose(r, self.sol(ai, out_full=True), rtol=1e-5)
+
+    def test_errors_wrong_dimensions(self):
+        with pytest.raises(self.error_cls) as exc:
+            self.call(self.rand('f8', (3, 4)))
+        assert "3 dimensional" in str(exc.value)
+
+        with pytest.raises(self.error_cls) as exc:
+            self.call(self.group([self.rand('f8', 3)]))
+        assert "2 dimensional" in str(exc.value)
+
+    def test_errors_unsupported_dtype(self):
+        a = self.rand('i4', (2, 3, 3))
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a)
+        assert "No implementation" in str(exc.value)
+
+    def test_error_shape_mismatch(self):
+        a = self.rand('f8', (2, 3, 4))
+        with pytest.raises(ValueError) as exc:
+            self.call(a, out=np.zeros((2, 4, 4)))
+        assert "shape mismatch" in str(exc.value)
+
+        a = [self.rand('f8', (3, 4))]
+        with pytest.raises(ValueError) as exc:
+            self.call(self.group(a), out=self.group([np.zeros((4, 4))]))
+        assert "shape mismatch" in str(exc.value)
+
+        with pytest.raises(ValueError) as exc:
+            self.call(self.group(a), out=self.group([np.zeros((3, 3))] * 2))
+        assert "length mismatch" in str(exc.value)
+
+
+class TestSYRKBatchedCtypes(SYRKBatchedTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.syrk_batched(*args, **kwargs)
+
+    def test_empty(self):
+        assert self.call([]) == []
+
+    def test_errors_mismatched_forms(self):
+        a = [self.rand('f8', (3, 4)), self.rand('f4', (3, 4))]
+        with pytest.raises(TypeError) as exc:
+            self.call(a)
+        assert "Non-uniform" in str(exc.value)
+
+        with pytest.raises(TypeError) as exc:
+            self.call(self.rand('f8', (2, 3, 4)), out=[np.zeros((3, 3))] * 2)
+        assert "NumPy ndarray" in str(exc.value)
+
+
+class MKSYMMBatchedTests(MKSYMMTests):
+    shapes = [(3, 3), (1, 1), (6, 6), (0, 0)]
+
+    def group(self, arrays):
+        return arrays
+
+    @pytest.mark.parametrize('upper', [False, True])
+    @all_dtypes
+    def test_mksymm(self, dtype, upper):
+        a = self.rand(dtype, (4, 3, 3))
+        sol = np.stack([self.sol(ai, upper=upper) for ai in a])
+        res = self.call(a, upper=upper)
+        assert res is a
+        assert_allclose(res, sol)
+
+    @pytest.mark.parametrize('upper', [False, True])
+    @all_dtypes
+    def test_with_strides(self, dtype, upper):
+        a = self.rand(dtype, (8, 3, 3))[::2].transpose(0, 2, 1)
+        sol = np.stack([self.sol(ai, upper=upper) for ai in a])
+        res = self.call(a, upper=upper, nthreads=2)
+        assert_allclose(res, sol)
+
+    @pytest.mark.parametrize('upper', [False, True])
+    @all_dtypes
+    def test_list(self, dtype, upper):
+        a = [self.rand(dtype, s) for s in self.shapes]
+        sol = [self.sol(ai, upper=upper) for ai in a]
+        self.call(self.group(a), upper=upper, nthreads=2)
+        for ai, s in zip(a, sol):
+            assert_allclose(ai, s)
+
+    def test_errors_unsupported_dtype(self):
+        a = self.rand('i4', (2, 3, 3))
+        with pytest.raises(self.error_cls) as exc:
+            self.call(a)
+        assert "No implementation" in str(exc.value)
+
+    def test_errors_wrong_dimensions(self):
+        with pytest.raises(self.error_cls) as exc:
+            self.call(self.rand('f8', (3, 3)))
+        assert "3 dimensional" in str(exc.value)
+
+        with pytest.raises(self.error_cls) as exc:
+            self.call(self.group([self.rand('f8', 3)]))
+        assert "2 dimensional" in str(exc.value)
+
+    def test_error_not_square(self):
+        with pytest.raises(ValueError) as exc:
+            self.call(self.rand('f8', (2, 3, 4)))
+        assert "square" in str(exc.value)
+
+        with pytest.raises(ValueError) as exc:
+            self.call(self.group([self.rand('f8', (3, 4))]))
+        assert "square" in str(exc.value)
+
+
+class TestMKSYMMBatchedCtypes(MKSYMMBatchedTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.lib.mksymm_batched(*args, **kwargs)
+
+
+class SpecOpsTests(Base):
+    """Tests for the operations generated from ``pyblis._spec``"""
+    def tri(self, a, upper=False, unit=False):
+        t = np.triu(a) if upper else np.tril(a)
+        if unit:
+            t[np.diag_indices_from(t)] = 1
+        return t
+
+    def tri_a(self, dtype, n):
+        # Well conditioned, for the solves
+        a = self.rand(dtype, (n, n))
+        a[np.diag_indices_from(a)] += 4
+        return a
+
+    def op(self, a, trans=False, conj=False):
+        a = a.conj() if conj else a
+        return a.T if trans else a
+
+    @pytest.mark.parametrize('x_conj', [False, True])
+    @all_dtypes
+    def test_axpyv(self, dtype, x_conj):
+        x, y = self.rand(dtype, 10), self.rand(dtype, 10)
+        alpha = self.rand(dtype)
+        sol = alpha * self.op(x, conj=x_conj) + y
+        res = self.call("axpyv", x, y, x_conj=x_conj, alpha=alpha)
+        assert res is y
+        assert_allclose(res, sol, rtol=1e-4)
+
+    @pytest.mark.parametrize('x_conj', [False, True])
+    @all_dtypes
+    def test_addv_subv(self, dtype, x_conj):
+        x, y = self.rand(dtype, 10), self.rand(dtype, 10)
+        op_x = self.op(x, conj=x_conj)
+        res = self.call("addv", x, y.copy(), x_conj=x_conj)
+        assert_allclose(res, y + op_x, rtol=1e-4)
+        res = self.call("subv", x[::2], y[::-2].copy(), x_conj=x_conj)
+        assert_allclose(res, y[::-2] - op_x[::2], rtol=1e-4)
+
+    @all_dtypes
+    def test_axpbyv_xpbyv(self, dtype):
+        x, y = self.rand(dtype, 10), self.rand(dtype, 10)
+        alpha, beta = self.rand(dtype), self.rand(dtype)
+        res = self.call("axpbyv", x, y.copy(), x_conj=True, alpha=alpha,
+                        beta=beta)
+        assert_allclose(res, alpha * x.conj() + beta * y, rtol=1e-4)
+        res = self.call("xpbyv", x, y.copy(), beta=beta)
+        assert_allclose(res, x + beta * y, rtol=1e-4)
+        # Adds to y by default
+        res = self.call("axpbyv", x, y.copy(), alpha=alpha)
+        assert_allclose(res, alpha * x + y, rtol=1e-4)
+
+    @all_dtypes
+    def test_scal2v(self, dtype):
+        x = self.rand(dtype, 10)
+        alpha = self.rand(dtype)
+        assert_allclose(self.call("scal2v", x, alpha=alpha), alpha * x,
+                        rtol=1e-4)
+        out = np.zeros(5, dtype=dtype)
+        res = self.call("scal2v", x[::2], out=out, x_conj=True, alpha=alpha)
+        assert res is out
+        assert_allclose(res, alpha * x[::2].conj(), rtol=1e-4)
+
+    @all_dtypes
+    def test_invertv(self, dtype):
+        x = self.rand(dtype, 10)
+        sol = 1 / x
+        res = self.call("invertv", x)
+        assert res is x
+        assert_allclose(res, sol, rtol=1e-4)
+
+    @all_dtypes
+    def test_setv(self, dtype):
+        x = self.rand(dtype, 10)
+        alpha = self.rand(dtype)
+        res = self.call("setv", x[::2], alpha=alpha)
+        assert_allclose(x[::2], alpha)
+        assert res.base is x
+        assert_allclose(self.call("setv", x), 0)
+
+    @all_dtypes
+    def test_swapv(self, dtype):
+        x, y = self.rand(dtype, 10), self.rand(dtype, 5)
+        x0, y0 = x.copy(), y.copy()
+        res_x, res_y = self.call("swapv", x[::2], y)
+        assert_allclose(res_x, y0)
+        assert_allclose(res_y, x0[::2])
+        assert_allclose(x[1::2], x0[1::2])
+
+    @pytest.mark.parametrize('x_conj, y_conj', [(False, False), (True, False),
+                                                (False, True)])
+    @all_dtypes
+    def test_dotxv(self, dtype, x_conj, y_conj):
+        x, y = self.rand(dtype, 10), self.rand(dtype, 10)
+        alpha = self.rand(dtype)
+        res = self.call("dotxv", x, y, x_conj=x_conj, y_conj=y_conj,
+                        alpha=alpha)
+        sol = alpha * self.op(x, conj=x_conj).dot(self.op(y, conj=y_conj))
+        assert np.asarray(res).shape == ()
+        assert_allclose(res, sol, rtol=1e-4)
+
+    @all_dtypes
+    def test_amaxv_asumv_norms(self, dtype):
+        x = self.rand(dtype, 10)
+        absolute = np.abs(x.real) + np.abs(x.imag)
+
+        index = self.call("amaxv", x[::-1])
+        assert index == np.argmax(absolute[::-1])
+        assert isinstance(index, (int, np.integer))
+
+        asum = self.call("asumv", x[::2])
+        assert_allclose(asum, absolute[::2].sum(), rtol=1e-4)
+        assert np.isrealobj(asum)
+
+        for name, order in [("normfv", None), ("norm1v", 1),
+                            ("normiv", np.inf)]:
+            norm = self.call(name, x)
+            assert_allclose(norm, np.linalg.norm(x, order), rtol=1e-4)
+            assert np.isrealobj(norm)
+
+        # The first of equal elements
+        assert self.call("amaxv", np.array([1, -3, 3], dtype=dtype)) == 1
+
+    @pytest.mark.parametrize('upper', [False, True])
+    @all_dtypes
+    def test_syr_syr2(self, dtype, upper):
+        x, y = self.rand(dtype, 4), self.rand(dtype, 4)
+        a = self.rand(dtype, (4, 4))
+        alpha = self.rand(dtype)
+
+        sol = alpha * np.outer(x, x) + a
+        res = self.call("syr", x, a.copy(), a_upper=upper, alpha=alpha)
+        assert_allclose(self.tri(res, upper), self.tri(sol, upper), rtol=1e-4)
+        # The other triangle isn't written
+        assert_allclose(self.tri(res, not upper) - np.diag(res.diagonal()),
+                        self.tri(a, not upper) - np.diag(a.diagonal()))
+
+        sol = (alpha * np.outer(x.conj(), y) + alpha * np.outer(y, x.conj()) +
+               a)
+        res = self.call("syr2", x, y, a.copy(), a_upper=upper, x_conj=True,
+                        alpha=alpha)
+        assert_allclose(self.tri(res, upper), self.tri(sol, upper), rtol=1e-4)
+
+    @pytest.mark.parametrize('upper', [False, True])
+    @all_dtypes
+    def test_her_her2(self, dtype, upper):
+        x, y = self.rand(dtype, 4), self.rand(dtype, 4)
+        a = self.rand(dtype, (4, 4)).T
+        a[np.diag_indices_from(a)] = a.diagonal().real
+        alpha = self.rand(dtype)
+        real_alpha = alpha.real
+
+        sol = real_alpha * np.outer(x, x.conj()) + a
+        res = self.call("her", x, a.copy(), a_upper=upper, alpha=real_alpha)
+        assert_allclose(self.tri(res, upper), self.tri(sol, upper), rtol=1e-4)
+
+        sol = (alpha * np.outer(x, y.conj()) +
+               np.conj(alpha) * np.outer(y, x.conj()) + a)
+        res = self.call("her2", x, y, a.copy(), a_upper=upper, alpha=alpha)
+        assert_allclose(self.tri(res, upper), self.tri(sol, upper), rtol=1e-4)
+
+    @all_dtypes
+    def test_copyv(self, dtype):
+        x = self.rand(dtype, 10)
+        assert_allclose(self.call("copyv", x[::2]), x[::2])
+
+        out = np.zeros(5, dtype=dtype)
+        res = self.call("copyv", x[::-2], out=out, x_conj=True)
+        assert res is out
+        assert_allclose(res, x[::-2].conj())
+
+    @all_dtypes
+    def test_scalv(self, dtype):
+        x = self.rand(dtype, 10)
+        alpha = self.rand(dtype)
+        sol = x * alpha
+        res = self.call("scalv", x, alpha=alpha)
+        assert res is x
+        assert_allclose(res, sol, rtol=1e-4)
+
+    @pytest.mark.parametrize('conj', [False, True])
+    @all_dtypes
+    def test_ger(self, dtype, conj):
+        x, y = self.rand(dtype, 3), self.rand(dtype, 4)
+        a = self.rand(dtype, (4, 3)).T
+        alpha = self.rand(dtype)
+        sol = alpha * np.outer(self.op(x, conj=conj), y) + a
+        res = self.call("ger", x, y, a, x_conj=conj, alpha=alpha)
+        assert res is a
+        assert_allclose(res, sol, rtol=1e-4)
+
+    @pytest.mark.parametrize('upper', [False, True])
+    @all_dtypes
+    def test_symv(self, dtype, upper):
+        a, x = self.rand(dtype, (4, 4)), self.rand(dtype, 4)
+        t = self.tri(a, upper)
+        full = t + self.tri(a, upper).T - np.diag(a.diagonal())
+        alpha, beta = self.rand(dtype), self.rand(dtype)
+        out = self.rand(dtype, 4)
+        sol = alpha * full.dot(x) + beta * out
+        res = self.call("symv", a, x, out=out, a_upper=upper, alpha=alpha,
+                        beta=beta)
+        assert res is out
+        assert_allclose(res, sol, rtol=1e-4)
+
+    @pytest.mark.parametrize('upper', [False, True])
+    @all_dtypes
+    def test_hemv(self, dtype, upper):
+        a, x = self.rand(dtype, (4, 4)), self.rand(dtype, 4)
+        a[np.diag_indices_from(a)] = a.diagonal().real
+        t = self.tri(a, upper)
+        full = t + t.T.conj() - np.diag(a.diagonal())
+        res = self.call("hemv", a, x, a_upper=upper, x_conj=True)
+        assert_allclose(res, full.dot(x.conj()), rtol=1e-4)
+
+    @pytest.mark.parametrize('upper, trans, unit', [
+        (False, False, False), (True, False, False), (False, True, False),
+        (True, True, True)
+    ])
+    @all_dtypes
+    def test_trmv_trsv(self, dtype, upper, trans, unit):
+        a, x = self.tri_a(dtype, 5), self.rand(dtype, 5)
+        t = self.op(self.tri(a, upper, unit), trans)
+        kwargs = dict(a_upper=upper, a_trans=trans, a_unit=unit)
+
+        res = self.call("trmv", a, x.copy(), **kwargs)
+        assert_allclose(res, t.dot(x), rtol=1e-4)
+
+        res = self.call("trsv", a, x.copy(), **kwargs)
+        assert_allclose(res, np.linalg.solve(t, x), rtol=1e-4)
+
+    @pytest.mark.parametrize('right, upper, trans', [
+        (False, False, False), (True, False, False), (False, True, True),
+        (True, True, True)
+    ])
+    @all_dtypes
+    def test_trmm_trsm(self, dtype, right, upper, trans):
+        b = self.rand(dtype, (3, 4))
+        a = self.tri_a(dtype, 4 if right else 3)
+        t = self.op(self.tri(a, upper), trans, conj=True)
+        alpha = self.rand(dtype)
+        kwargs = dict(a_right=right, a_upper=upper, a_trans=trans, a_conj=True,
+                      alpha=alpha)
+
+        res = self.call("trmm", a, b.copy(), **kwargs)
+        sol = alpha * (b.dot(t) if right else t.dot(b))
+        assert_allclose(res, sol, rtol=1e-4)
+
+        res = self.call("trsm", a, b.copy(), **kwargs)
+        if right:
+            sol = alpha * np.linalg.solve(t.T, b.T).T
+        else:
+            sol = alpha * np.linalg.solve(t, b)
+        assert_allclose(res, sol, rtol=1e-4)
+
+    @pytest.mark.parametrize('right, b_trans', [
+        (False, False), (True, False), (False, True), (True, True)
+    ])
+    @all_dtypes
+    def test_trmm3(self, dtype, right, b_trans):
+        b = self.rand(dtype, (3, 4))
+        a = self.tri_a(dtype, 4 if right else 3)
+        t = self.tri(a, upper=True)
+        out = self.rand(dtype, (3, 4))
+        beta = self.rand(dtype)
+        sol = (b.dot(t) if right else t.dot(b)) + beta * out
+        res = self.call("trmm3", a, b.T.copy() if b_trans else b, out=out,
+                        a_right=right, a_upper=True, b_trans=b_trans,
+                        beta=beta)
+        assert res is out
+        assert_allclose(res, sol, rtol=1e-4)
+
+        res = self.call("trmm3", a, b, a_right=right, a_upper=True)
+        assert_allclose(res, b.dot(t) if right else t.dot(b), rtol=1e-4)
+
+    def test_empty(self):
+        x = np.zeros(0)
+        assert self.call("axpyv", x, x.copy()).shape == (0,)
+        assert self.call("trmm3", np.zeros((0, 0)), np.zeros((0, 2))).shape == (0, 2)
+        assert self.call("asumv", x) == 0
+        assert self.call("normiv", x) == 0
+        assert self.call("amaxv", x) == 0
+
+    def test_errors_mismatch_dtypes(self):
+        a, x = self.rand('f8', (3, 3)), self.rand('f4', 3)
+        with pytest.raises(self.error_cls) as exc:
+            self.call("trmv", a, x)
+        assert "Non-uniform" in str(exc.value)
+
+    def test_errors_wrong_dimensions(self):
+        with pytest.raises(self.error_cls) as exc:
+            self.call("scalv", self.rand('f8', (3, 3)))
+        assert "1 dimensional" in str(exc.value)
+
+        with pytest.raises(self.error_cls) as exc:
+            self.call("trsm", self.rand('f8', 3), self.rand('f8', (3, 3)))
+        assert "2 dimensional" in str(exc.value)
+
+    def test_errors_unsupported_dtype(self):
+        x = np.arange(3, dtype='i4')
+        with pytest.raises(self.error_cls) as exc:
+            self.call("copyv", x)
+        assert "No implementation" in str(exc.value)
+
+    def test_errors_not_bool(self):
+        with pytest.raises(self.error_cls) as exc:
+            self.call("copyv", self.rand('f8', 3), x_conj=1)
+        assert "x_conj" in str(exc.value)
+
+    def test_errors_real_scalar(self):
+        x, a = self.rand('c16', 3), self.rand('c16', (3, 3))
+        with pytest.raises(self.error_cls) as exc:
+            self.call("her", x, a, alpha=1j)
+        assert "alpha" in str(exc.value)
+
+    def test_error_shape_mismatch(self):
+        with pytest.raises(ValueError) as exc:
+            self.call("ger", self.rand('f8', 3), self.rand('f8', 4),
+                      self.rand('f8', (4, 3)))
+        assert "a shape mismatch" in str(exc.value)
+
+        with pytest.raises(ValueError) as exc:
+            self.call("trsm", self.rand('f8', (3, 3)), self.rand('f8', (3, 4)),
+                      a_right=True)
+        assert "a shape mismatch" in str(exc.value)
+
+        with pytest.raises(ValueError) as exc:
+            self.call("copyv", self.rand('f8', 3), out=np.zeros(4))
+        assert "Output shape mismatch" in str(exc.value)
+
+
+class TestSpecOpsCtypes(SpecOpsTests):
+    error_cls = TypeError
+
+    def call(self, name, *args, **kwargs):
+        return getattr(pyblis.lib, name)(*args, **kwargs)
+
+    def test_signatures_and_docstrings(self):
+        from pyblis._spec import OPS
+        for op in OPS:
+            func = getattr(pyblis.lib, op.name)
+            params = inspect.signature(func).parameters
+            assert [(p.name, p.default) for p in params.values()] == op.parameters()
+            assert func.__name__ == op.name
+            assert op.summary in func.__doc__
+            for name, _ in op.parameters():
+                assert "%s : " % name in func.__doc__
+            returns = func.__doc__.split("Returns")[1]
+            for o in op.outputs:
+                assert "%s : " % o.name in returns
+        # Scalar outputs are returned, not passed
+        params = inspect.signature(pyblis.lib.dotxv).parameters
+        assert "rho" not in params
+
+    @all_dtypes
+    def test_scalar_output_dtypes(self, dtype):
+        x = self.rand(dtype, 3)
+        real_dtype = x.real.dtype
+        assert self.call("asumv", x).dtype == real_dtype
+        assert self.call("normfv", x).dtype == real_dtype
+        assert self.call("norm1v", x).dtype == real_dtype
+        assert self.call("normiv", x).dtype == real_dtype
+        assert self.call("dotxv", x, x).dtype == x.dtype
+        assert self.call("amaxv", x).dtype == np.dtype('i8')
+
+    def test_positional_and_keyword_arguments(self):
+        x = self.rand('f8', 3)
+        res = pyblis.lib.axpyv(x, np.zeros(3), False, 2.0)
+        assert_allclose(res, 2 * x)
+        with pytest.raises(TypeError):
+            pyblis.lib.axpyv(x)
+        with pytest.raises(TypeError):
+            pyblis.lib.axpyv(x, x, foo=1)
+
+
+class CAPIEntry(ct.Structure):
+    _fields_ = [("name", ct.c_char_p), ("func", ct.c_void_p)]
+
+
+class CAPI(ct.Structure):
+    _fields_ = [("version", ct.c_int), ("size", ct.c_int64),
+                ("entries", ct.POINTER(CAPIEntry))]
+
+
+class TestCAPI(object):
+    def capi(self):
+        capsule = pyblis._lib._C_API
+        get_name = ct.pythonapi.PyCapsule_GetName
+        get_name.argtypes = (ct.py_object,)
+        get_name.restype = ct.c_char_p
+        name = get_name(capsule)
+        assert name == b"pyblis._lib._C_API"
+
+        get_pointer = ct.pythonapi.PyCapsule_GetPointer
+        get_pointer.argtypes = (ct.py_object, ct.c_char_p)
+        get_pointer.restype = ct.POINTER(CAPI)
+        return get_pointer(capsule, name).contents
+
+    def entries(self):
+        api = self.capi()
+        return {api.entries[i].name.decode(): api.entries[i].func
+                for i in range(api.size)}
+
+    def test_version(self):
+        assert self.capi().version == pyblis._lib.CAPI_VERSION
+
+    def test_exports_every_kernel(self):
+        entries = self.entries()
+        kernels = {name[len("pybli_"):] for name in dir(pyblis._lib)
+                   if name.startswith("pybli_") and name != "pybli_get_capi"}
+        assert kernels == set(entries)
+        for name in ["dgemm", "zgemm_batch", "sgemm_planar", "gemm_mixed",
+                     "ctrsm"]:
+            assert name in entries
+
+    def test_call_kernel(self):
+        ddotv_t = ct.CFUNCTYPE(
+            None, ct.c_bool, ct.c_bool, ct.c_int64, ct.c_void_p, ct.c_int64,
+            ct.c_void_p, ct.c_int64, ct.c_void_p, ct.c_int64
+        )
+        ddotv = ddotv_t(self.entries()["ddotv"])
+        x = np.arange(5.0)
+        rho = np.zeros(1)
+        ddotv(False, False, 5, x.ctypes.data, 1, x.ctypes.data, 1,
+              rho.ctypes.data, 1)
+        assert rho[0] == x.dot(x)
+
+    def test_get_include(self):
+        include = pyblis.get_include()
+        assert os.path.exists(os.path.join(include, "pyblis.h"))
+        assert os.path.exists(os.path.join(include, "capi.pxd"))
+
+
+class TestNumThreads(object):
+    def setup_method(self):
+        self.initial = pyblis.get_num_threads()
+
+    def teardown_method(self):
+        pyblis.set_num_threads(-1)
+
+    def test_set_get(self):
+        assert self.initial >= 1
+        pyblis.set_num_threads(3)
+        assert pyblis.get_num_threads() == 3
+        assert pyblis.lib.get_num_threads() == 3
+        pyblis.set_num_threads(-1)
+        assert pyblis.get_num_threads() == self.initial
+        pyblis.set_num_threads(0)
+        assert pyblis.get_num_threads() == self.initial
+
+        with pytest.raises(TypeError):
+            pyblis.set_num_threads(2.0)
+
+    def test_default_used_by_operations(self):
+        a = np.random.normal(size=(200, 300))
+        b = np.random.normal(size=(300, 100))
+        sol = a.dot(b)
+        for nthreads in [1, 4]:
+            pyblis.set_num_threads(nthreads)
+            assert_allclose(pyblis.lib.gemm(a, b), sol)
+            assert_allclose(pyblis.lib.gemm_batched(a[None], b[None])[0], sol)
+            assert_allclose(pyblis.dot(a, a.T), a.dot(a.T))
+
+    def test_threadpoolctl(self):
+        threadpoolctl = pytest.importorskip("threadpoolctl")
+        if not hasattr(threadpoolctl, "register"):
+            pytest.skip("threadpoolctl < 3.2")
+        pyblis.set_num_threads(4)
+        info = [lib for lib in threadpoolctl.threadpool_info()
+                if lib["internal_api"] == "pyblis"]
+        assert len(info) == 1
+        assert info[0]["user_api"] == "blas"
+        assert info[0]["num_threads"] == 4
+        assert info[0]["version"] == pyblis.__version__
+
+        with threadpoolctl.threadpool_limits(1):
+            assert pyblis.get_num_threads() == 1
+        assert pyblis.get_num_threads() == 4
+
+        with threadpoolctl.threadpool_limits(2, user_api="blas"):
+            assert pyblis.get_num_threads() == 2
+        assert pyblis.get_num_threads() == 4
+
+    def test_threadpoolctl_without_register(self, monkeypatch):
+        pytest.importorskip("threadpoolctl")
+        # threadpoolctl < 3.2 has the controller base class, but no way to
+        # register one. Importing pyblis must still work.
+        old = types.ModuleType("threadpoolctl")
+        old.LibController = object
+        monkeypatch.setitem(sys.modules, "threadpoolctl", old)
+        monkeypatch.delitem(sys.modules, "pyblis._threadpool")
+        monkeypatch.delattr(pyblis, "_threadpool")
+        importlib.reload(pyblis)
+        assert pyblis._threadpool is sys.modules["pyblis._threadpool"]
+        pyblis._threadpool.register()
@@ -0,0 +1,144 @@
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import pyblis
+
+from .utils import Base, all_dtypes
+
+# The original functions, before any patching in these tests
+numpy_dot = np.dot
+numpy_matmul = np.matmul
+
+
+@pytest.fixture
+def patched():
+    pyblis.reset_dispatch_counts()
+    with pyblis.numpy_patched():
+        yield
+    assert np.dot is numpy_dot
+    assert np.matmul is numpy_matmul
+
+
+def check_counts(routed, fallback):
+    assert pyblis.get_dispatch_counts() == {"routed": routed,
+                                            "fallback": fallback}
+
+
+def test_patch_unpatch():
+    assert not pyblis.is_numpy_patched()
+    pyblis.patch_numpy()
+    try:
+        assert pyblis.is_numpy_patched()
+        assert np.dot is not numpy_dot
+        assert np.matmul is not numpy_matmul
+        assert np.dot.__name__ == "dot"
+        assert np.matmul.__name__ == "matmul"
+        # Patching twice is fine
+        pyblis.patch_numpy()
+        # Nested context leaves NumPy patched on exit
+        with pyblis.numpy_patched():
+            pass
+        assert pyblis.is_numpy_patched()
+    finally:
+        pyblis.unpatch_numpy()
+    assert not pyblis.is_numpy_patched()
+    assert np.dot is numpy_dot
+    assert np.matmul is numpy_matmul
+
+
+def test_context_restores_on_error():
+    with pytest.raises(RuntimeError):
+        with pyblis.numpy_patched():
+            assert pyblis.is_numpy_patched()
+            raise RuntimeError
+    assert not pyblis.is_numpy_patched()
+
+
+@pytest.mark.usefixtures("patched")
+class TestPatched(Base):
+    @all_dtypes
+    def test_dot(self, dtype):
+        a = self.rand(dtype, (3, 4))
+        b = self.rand(dtype, (4, 5))
+        x = self.rand(dtype, 4)
+        assert_allclose(np.dot(a, b), numpy_dot(a, b), rtol=1e-5)
+        assert_allclose(np.dot(a, x), numpy_dot(a, x), rtol=1e-5)
+        assert_allclose(np.dot(x, b), numpy_dot(x, b), rtol=1e-5)
+        assert_allclose(np.dot(x, x), numpy_dot(x, x), rtol=1e-5)
+        out = np.empty((3, 5), dtype=dtype)
+        assert np.dot(a, b, out=out) is out
+        assert_allclose(out, numpy_dot(a, b), rtol=1e-5)
+        check_counts(5, 0)
+
+    @all_dtypes
+    def test_matmul(self, dtype):
+        a = self.rand(dtype, (2, 3, 4))
+        b = self.rand(dtype, (4, 5))
+        assert_allclose(np.matmul(a, b), numpy_matmul(a, b), rtol=1e-5)
+        assert_allclose(np.matmul(a[0], b), numpy_matmul(a[0], b), rtol=1e-5)
+        out = np.empty((2, 3, 5), dtype=dtype)
+        assert np.matmul(a, b, out=out) is out
+        assert np.matmul(a, b, out=(out,)) is out
+        assert_allclose(out, numpy_matmul(a, b), rtol=1e-5)
+        check_counts(4, 0)
+
+    def test_fallbacks(self):
+        a = np.arange(12.0).reshape((3, 4))
+        b = np.arange(20.0).reshape((4, 5))
+        ints = np.arange(12).reshape((3, 4))
+        sol = numpy_dot(a, b)
+        # Unsupported dtype
+        assert_allclose(np.dot(ints, b), sol)
+        # Mixed dtypes
+        assert_allclose(np.dot(a.astype('f4'), b), sol)
+        # Non-native byte order
+        assert_allclose(np.dot(a.astype('>f8'), b), sol)
+        # Array-likes and scalars
+        assert_allclose(np.dot(a.tolist(), b), sol)
+        assert_allclose(np.dot(a, 2.0), 2 * a)
+        # Subclasses
+        res = np.dot(np.asmatrix(a), b)
+        assert isinstance(res, np.matrix)
+        # More than 2 dimensions in dot
+        c = np.ones((2, 3, 4))
+        assert np.dot(c, b).shape == (2, 3, 5)
+        # Non-contiguous out for dot is rejected by NumPy
+        with pytest.raises(ValueError):
+            np.dot(a, b, out=np.empty((5, 3)).T)
+        # matmul keywords other than out
+        assert np.matmul(a, b, dtype='f4').dtype == np.float32
+        check_counts(0, 9)
+
+    def test_overlapping_out(self):
+        a = np.arange(9.0).reshape((3, 3))
+        b = np.eye(3) * 2
+        sol = numpy_dot(a, b)
+        assert_allclose(np.dot(a, b, out=a), sol)
+        check_counts(0, 1)
+
+    def test_errors_from_numpy(self):
+        a = np.ones((3, 4))
+        with pytest.raises(ValueError) as exc:
+            np.dot(a, a)
+        assert "not aligned" in str(exc.value)
+        with pytest.raises(ValueError) as exc:
+            np.matmul(a, a)
+        assert "mismatch" in str(exc.value)
+        check_counts(0, 2)
+
+
+def test_numba_under_patch():
+    nb = pytest.importorskip("numba")
+    with pyblis.numpy_patched():
+        @nb.jit(nopython=True)
+        def func(a, b, out):
+            np.dot(a, b, out)
+            return np.dot(a, b)
+
+        a = np.arange(6.0).reshape((2, 3))
+        out = np.empty((2, 2))
+        res = func(a, a.T, out)
+    assert_allclose(res, numpy_dot(a, a.T))
+    assert_allclose(out, numpy_dot(a, a.T))
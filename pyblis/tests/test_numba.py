@@ -5,10 +5,45 @@ nb = pytest.importorskip("numba")
 import pyblis
 import pyblis._numba
 
-from .test_core import GEMMTests, SYRKTests, MKSYMMTests
+from .test_core import (DOTVTests, GEMVTests, GEMMTests, GEMMBatchedTests,
+                        GEMMBatchedStridedTests, GEMMGroupedTests,
+                        GEMMPlanarTests, GEMMTTests, SYMMTests, HEMMTests,
+                        SYRKTests, SYRKBatchedTests, HERKTests, SYR2KTests,
+                        HER2KTests, MKSYMMTests, MKSYMMBatchedTests,
+                        MKHERMTests, SpecOpsTests)
 from .utils import NumbaMixin
 
 
+class TestDOTVNumba(NumbaMixin, DOTVTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(x, y):
+            return pyblis.lib.dotv(x, y)
+
+        @nb.jit(nopython=True)
+        def full(x, y, x_conj=False, y_conj=False, nthreads=-1):
+            return pyblis.lib.dotv(x, y, x_conj=x_conj, y_conj=y_conj,
+                                   nthreads=nthreads)
+        return base, full
+
+
+class TestGEMVNumba(NumbaMixin, GEMVTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a, x):
+            return pyblis.lib.gemv(a, x)
+
+        @nb.jit(nopython=True)
+        def full(a, x, out=None, a_trans=False, a_conj=False, x_conj=False,
+                 alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.gemv(a, x, out=out, a_trans=a_trans, a_conj=a_conj,
+                                   x_conj=x_conj, alpha=alpha, beta=beta,
+                                   nthreads=nthreads)
+        return base, full
+
+
 class TestGEMMNumba(NumbaMixin, GEMMTests):
     @classmethod
     def compile(cls):
@@ -18,10 +53,136 @@ class TestGEMMNumba(NumbaMixin, GEMMTests):
 
         @nb.jit(nopython=True)
         def full(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
-                 b_conj=False, alpha=1.0, beta=0.0, nthreads=-1):
+                 b_conj=False, alpha=1.0, beta=0.0, nthreads=-1,
+                 comp_dtype=None):
             return pyblis.lib.gemm(a, b, out=out, a_trans=a_trans, a_conj=a_conj,
                                    b_trans=b_trans, b_conj=b_conj, alpha=alpha,
-                                   beta=beta, nthreads=nthreads)
+                                   beta=beta, nthreads=nthreads,
+                                   comp_dtype=comp_dtype)
+        return base, full
+
+
+class TestGEMMBatchedNumba(NumbaMixin, GEMMBatchedTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a, b):
+            return pyblis.lib.gemm_batched(a, b)
+
+        @nb.jit(nopython=True)
+        def full(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+                 b_conj=False, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.gemm_batched(a, b, out=out, a_trans=a_trans,
+                                           a_conj=a_conj, b_trans=b_trans,
+                                           b_conj=b_conj, alpha=alpha, beta=beta,
+                                           nthreads=nthreads)
+        return base, full
+
+
+class TestGEMMBatchedStridedNumba(NumbaMixin, GEMMBatchedStridedTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a, b):
+            return pyblis.lib.gemm_batched_strided(a, b)
+
+        @nb.jit(nopython=True)
+        def full(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+                 b_conj=False, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.gemm_batched_strided(
+                a, b, out=out, a_trans=a_trans, a_conj=a_conj, b_trans=b_trans,
+                b_conj=b_conj, alpha=alpha, beta=beta, nthreads=nthreads
+            )
+        return base, full
+
+
+class TestGEMMGroupedNumba(NumbaMixin, GEMMGroupedTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(problems):
+            return pyblis.gemm_grouped(problems)
+
+        @nb.jit(nopython=True)
+        def full(problems, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.gemm_grouped(problems, alpha=alpha, beta=beta,
+                                       nthreads=nthreads)
+        return base, full
+
+    def group(self, problems):
+        return nb.typed.List(problems)
+
+    def test_errors_dtype_mismatch(self):
+        # Typed lists can't hold problems of different dtypes
+        with pytest.raises(Exception):
+            self.group(self.problems('f8') + self.problems('f4'))
+
+
+class TestGEMMPlanarNumba(NumbaMixin, GEMMPlanarTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(ar, ai, br, bi):
+            return pyblis.lib.gemm_planar(ar, ai, br, bi)
+
+        @nb.jit(nopython=True)
+        def full(ar, ai, br, bi, out_r=None, out_i=None, a_trans=False,
+                 a_conj=False, b_trans=False, b_conj=False, alpha=1.0,
+                 beta=0.0, nthreads=-1):
+            return pyblis.lib.gemm_planar(ar, ai, br, bi, out_r=out_r,
+                                          out_i=out_i, a_trans=a_trans,
+                                          a_conj=a_conj, b_trans=b_trans,
+                                          b_conj=b_conj, alpha=alpha,
+                                          beta=beta, nthreads=nthreads)
+        return base, full
+
+
+class TestGEMMTNumba(NumbaMixin, GEMMTTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a, b):
+            return pyblis.lib.gemmt(a, b)
+
+        @nb.jit(nopython=True)
+        def full(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+                 b_conj=False, out_upper=False, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.gemmt(a, b, out=out, a_trans=a_trans, a_conj=a_conj,
+                                    b_trans=b_trans, b_conj=b_conj,
+                                    out_upper=out_upper, alpha=alpha, beta=beta,
+                                    nthreads=nthreads)
+        return base, full
+
+
+class TestSYMMNumba(NumbaMixin, SYMMTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a, b):
+            return pyblis.lib.symm(a, b)
+
+        @nb.jit(nopython=True)
+        def full(a, b, out=None, a_right=False, a_upper=False, a_conj=False,
+                 b_trans=False, b_conj=False, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.symm(a, b, out=out, a_right=a_right, a_upper=a_upper,
+                                   a_conj=a_conj, b_trans=b_trans, b_conj=b_conj,
+                                   alpha=alpha, beta=beta, nthreads=nthreads)
+        return base, full
+
+
+class TestHEMMNumba(NumbaMixin, HEMMTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a, b):
+            return pyblis.lib.hemm(a, b)
+
+        @nb.jit(nopython=True)
+        def full(a, b, out=None, a_right=False, a_upper=False, a_conj=False,
+                 b_trans=False, b_conj=False, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.hemm(a, b, out=out, a_right=a_right, a_upper=a_upper,
+                                   a_conj=a_conj, b_trans=b_trans, b_conj=b_conj,
+                                   alpha=alpha, beta=beta, nthreads=nthreads)
         return base, full
 
 
@@ -34,10 +195,60 @@ class TestSYRKNumba(NumbaMixin, SYRKTests):
 
         @nb.jit(nopython=True)
         def full(a, out=None, a_trans=False, a_conj=False, out_upper=False,
-                 alpha=1.0, beta=0.0, nthreads=-1):
+                 out_full=False, alpha=1.0, beta=0.0, nthreads=-1):
             return pyblis.lib.syrk(a, out=out, a_trans=a_trans, a_conj=a_conj,
-                                   out_upper=out_upper, alpha=alpha, beta=beta,
-                                   nthreads=nthreads)
+                                   out_upper=out_upper, out_full=out_full,
+                                   alpha=alpha, beta=beta, nthreads=nthreads)
+        return base, full
+
+
+class TestHERKNumba(NumbaMixin, HERKTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a):
+            return pyblis.lib.herk(a)
+
+        @nb.jit(nopython=True)
+        def full(a, out=None, a_trans=False, a_conj=False, out_upper=False,
+                 out_full=False, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.herk(a, out=out, a_trans=a_trans, a_conj=a_conj,
+                                   out_upper=out_upper, out_full=out_full,
+                                   alpha=alpha, beta=beta, nthreads=nthreads)
+        return base, full
+
+
+class TestSYR2KNumba(NumbaMixin, SYR2KTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a, b):
+            return pyblis.lib.syr2k(a, b)
+
+        @nb.jit(nopython=True)
+        def full(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+                 b_conj=False, out_upper=False, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.syr2k(a, b, out=out, a_trans=a_trans, a_conj=a_conj,
+                                    b_trans=b_trans, b_conj=b_conj,
+                                    out_upper=out_upper, alpha=alpha, beta=beta,
+                                    nthreads=nthreads)
+        return base, full
+
+
+class TestHER2KNumba(NumbaMixin, HER2KTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a, b):
+            return pyblis.lib.her2k(a, b)
+
+        @nb.jit(nopython=True)
+        def full(a, b, out=None, a_trans=False, a_conj=False, b_trans=False,
+                 b_conj=False, out_upper=False, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.her2k(a, b, out=out, a_trans=a_trans, a_conj=a_conj,
+                                    b_trans=b_trans, b_conj=b_conj,
+                                    out_upper=out_upper, alpha=alpha, beta=beta,
+                                    nthreads=nthreads)
         return base, full
 
 
@@ -49,3 +260,68 @@ class TestMKSYMMNumba(NumbaMixin, MKSYMMTests):
             return pyblis.lib.mksymm(a, upper=upper, nthreads=nthreads)
 
         return full, full
+
+
+class TestMKHERMNumba(NumbaMixin, MKHERMTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def full(a, upper=False, nthreads=-1):
+            return pyblis.lib.mkherm(a, upper=upper, nthreads=nthreads)
+
+        return full, full
+
+
+class TestSYRKBatchedNumba(NumbaMixin, SYRKBatchedTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a):
+            return pyblis.lib.syrk_batched(a)
+
+        @nb.jit(nopython=True)
+        def full(a, out=None, a_trans=False, a_conj=False, out_upper=False,
+                 out_full=False, alpha=1.0, beta=0.0, nthreads=-1):
+            return pyblis.lib.syrk_batched(
+                a, out=out, a_trans=a_trans, a_conj=a_conj, out_upper=out_upper,
+                out_full=out_full, alpha=alpha, beta=beta, nthreads=nthreads
+            )
+        return base, full
+
+    def group(self, arrays):
+        return nb.typed.List(arrays)
+
+
+class TestMKSYMMBatchedNumba(NumbaMixin, MKSYMMBatchedTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def full(a, upper=False, nthreads=-1):
+            return pyblis.lib.mksymm_batched(a, upper=upper, nthreads=nthreads)
+
+        return full, full
+
+    def group(self, arrays):
+        return nb.typed.List(arrays)
+
+
+class TestSpecOpsNumba(NumbaMixin, SpecOpsTests):
+    @classmethod
+    def setup_class(cls):
+        from pyblis._spec import OPS
+        cls.funcs = {op.name: cls.compile_op(op) for op in OPS}
+
+    @staticmethod
+    def compile_op(op):
+        # A jitted function with the signature of ``op``, passing every
+        # argument through by keyword
+        names = [name for name, _ in op.parameters()]
+        source = "def call(%s):\n    return func(%s)\n" % (
+            op.signature(), ", ".join("%s=%s" % (n, n) for n in names)
+        )
+        namespace = {"func": getattr(pyblis.lib, op.name)}
+        exec(source, namespace)
+        return nb.jit(nopython=True)(namespace["call"])
+
+    def call(self, name, *args, **kwargs):
+        return self.funcs[name](*args, **kwargs)
@@ -5,7 +5,7 @@ nb = pytest.importorskip("numba")
 import pyblis
 import pyblis._numba
 
-from .test_wrappers import DotTests
+from .test_wrappers import DotTests, MatmulTests
 from .utils import NumbaMixin
 
 
@@ -21,3 +21,17 @@ class TestDotNumba(NumbaMixin, DotTests):
             return pyblis.dot(a, b, out=out, nthreads=nthreads)
 
         return base, full
+
+
+class TestMatmulNumba(NumbaMixin, MatmulTests):
+    @classmethod
+    def compile(cls):
+        @nb.jit(nopython=True)
+        def base(a, b):
+            return pyblis.matmul(a, b)
+
+        @nb.jit(nopython=True)
+        def full(a, b, out=None, nthreads=-1):
+            return pyblis.matmul(a, b, out=out, nthreads=nthreads)
+
+        return base, full
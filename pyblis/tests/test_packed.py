@@ -0,0 +1,157 @@
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import pyblis
+from pyblis import _packed
+
+from .utils import Base, all_dtypes, rtol
+
+layouts = pytest.mark.parametrize('upper, hermitian', [
+    (False, False), (True, False), (False, True), (True, True)
+])
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """Split even small matrices into several blocks of rows"""
+    monkeypatch.setattr(_packed, "_SCRATCH_SIZE", 20)
+
+
+class TestPackedSymmetric(Base):
+    def dense(self, dtype, n, hermitian):
+        a = self.rand(dtype, (n, n))
+        if hermitian:
+            a = a + a.conj().T
+            np.fill_diagonal(a, a.diagonal().real)
+            return a
+        return a + a.T
+
+    @all_dtypes
+    @layouts
+    def test_round_trip(self, dtype, upper, hermitian, small_blocks):
+        a = self.dense(dtype, 9, hermitian)
+        p = pyblis.PackedSymmetric.from_dense(a, upper, hermitian)
+        assert p.shape == (9, 9)
+        assert p.dtype == a.dtype
+        assert p.data.shape == (45,)
+        assert_allclose(p.to_dense(), a)
+        out = np.zeros((9, 9), dtype=dtype, order='F')
+        assert p.to_dense(out=out) is out
+        assert_allclose(out, a)
+
+    @layouts
+    def test_storage_order(self, upper, hermitian):
+        a = np.arange(16.0).reshape(4, 4)
+        p = pyblis.PackedSymmetric.from_dense(a, upper, hermitian)
+        tri = np.triu_indices(4) if upper else np.tril_indices(4)
+        assert_allclose(p.data, a[tri])
+
+    @all_dtypes
+    @layouts
+    def test_getitem(self, dtype, upper, hermitian):
+        a = self.dense(dtype, 5, hermitian)
+        p = pyblis.PackedSymmetric.from_dense(a, upper, hermitian)
+        for i in range(5):
+            for j in range(5):
+                assert p[i, j] == a[i, j]
+        assert p[-1, 0] == a[-1, 0]
+        i, j = np.array([0, 4, 2]), np.array([[3], [1]])
+        assert_allclose(p[i, j], a[i, j])
+        assert p[i, j].shape == (2, 3)
+
+    def test_getitem_errors(self):
+        p = pyblis.PackedSymmetric.empty(3)
+        with pytest.raises(IndexError):
+            p[3, 0]
+        with pytest.raises(IndexError):
+            p[0, -4]
+        with pytest.raises(IndexError):
+            p[0]
+        with pytest.raises(IndexError):
+            p[:, 0]
+
+    @all_dtypes
+    @layouts
+    def test_dot(self, dtype, upper, hermitian, small_blocks):
+        a = self.dense(dtype, 9, hermitian)
+        p = pyblis.PackedSymmetric.from_dense(a, upper, hermitian)
+        tol = rtol(dtype)
+        x = self.rand(dtype, 9)
+        assert_allclose(p.dot(x), a.dot(x), rtol=tol)
+        assert_allclose(p @ x, a.dot(x), rtol=tol)
+        x = self.rand(dtype, (9, 4))
+        out = np.full((9, 4), np.nan, dtype=dtype)
+        assert p.dot(x, out=out) is out
+        assert_allclose(out, a.dot(x), rtol=tol)
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            pyblis.PackedSymmetric(np.zeros(5))
+        with pytest.raises(TypeError):
+            pyblis.PackedSymmetric(np.zeros(6, dtype='i8'))
+        with pytest.raises(TypeError):
+            pyblis.PackedSymmetric(np.zeros((3, 2)))
+        with pytest.raises(ValueError):
+            pyblis.PackedSymmetric.from_dense(np.zeros((3, 2)))
+        p = pyblis.PackedSymmetric.empty(3)
+        with pytest.raises(ValueError):
+            p.dot(np.zeros(4))
+        with pytest.raises(TypeError):
+            p.dot(np.zeros(3, dtype='f4'))
+        with pytest.raises(ValueError):
+            p.to_dense(out=np.zeros((3, 4)))
+
+
+class TestRankKPacked(Base):
+    @all_dtypes
+    @pytest.mark.parametrize('herm', [False, True])
+    @pytest.mark.parametrize('a_trans', [False, True])
+    @pytest.mark.parametrize('out_upper', [False, True])
+    def test_rank_k(self, dtype, herm, a_trans, out_upper, small_blocks):
+        a = self.rand(dtype, (5, 11) if a_trans else (11, 5))
+        op_a = a.T if a_trans else a
+        func = pyblis.lib.herk_packed if herm else pyblis.lib.syrk_packed
+        sol = op_a.dot(op_a.conj().T if herm else op_a.T)
+        res = func(a, a_trans=a_trans, out_upper=out_upper)
+        assert isinstance(res, pyblis.PackedSymmetric)
+        assert res.hermitian == herm
+        assert res.upper == out_upper
+        assert_allclose(res.to_dense(), sol, rtol=rtol(dtype))
+        if herm:
+            assert np.all(np.diagonal(res.to_dense()).imag == 0)
+
+    @all_dtypes
+    @pytest.mark.parametrize('herm', [False, True])
+    def test_conj_alpha_beta(self, dtype, herm, small_blocks):
+        a = self.rand(dtype, (7, 3))
+        op_a = a.conj()
+        c = op_a.dot(op_a.conj().T if herm else op_a.T)
+        func = pyblis.lib.herk_packed if herm else pyblis.lib.syrk_packed
+        out = pyblis.PackedSymmetric.from_dense(c, hermitian=herm)
+        res = func(a, out=out, a_conj=True, alpha=2.0, beta=3.0)
+        assert res is out
+        assert_allclose(res.to_dense(), 5 * c, rtol=rtol(dtype))
+
+    def test_matches_syrk(self):
+        a = self.rand('f8', (50, 20))
+        full = pyblis.lib.syrk(a, out_full=True)
+        res = pyblis.lib.syrk_packed(a)
+        assert_allclose(res.to_dense(), full)
+
+    def test_errors(self):
+        a = np.ones((4, 3))
+        with pytest.raises(TypeError):
+            pyblis.lib.syrk_packed(a.astype('i8'))
+        with pytest.raises(TypeError):
+            pyblis.lib.syrk_packed(a, out=np.zeros((4, 4)))
+        with pytest.raises(TypeError):
+            pyblis.lib.syrk_packed(a, out=pyblis.PackedSymmetric.empty(4, 'f4'))
+        with pytest.raises(ValueError):
+            pyblis.lib.syrk_packed(a, out=pyblis.PackedSymmetric.empty(3))
+        with pytest.raises(ValueError):
+            pyblis.lib.syrk_packed(a, out=pyblis.PackedSymmetric.empty(4),
+                                   out_upper=True)
+        with pytest.raises(ValueError):
+            pyblis.lib.herk_packed(a, out=pyblis.PackedSymmetric.empty(4))
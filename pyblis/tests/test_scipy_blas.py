@@ -0,0 +1,327 @@
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+from pyblis import scipy_blas
+
+from .utils import Base
+
+prefixes = pytest.mark.parametrize('prefix', ['s', 'd', 'c', 'z'])
+
+DTYPES = {'s': 'f4', 'd': 'f8', 'c': 'c8', 'z': 'c16'}
+
+
+class TestScipyBlas(Base):
+    def func(self, prefix, name):
+        return getattr(scipy_blas, prefix + name)
+
+    @prefixes
+    def test_axpy_in_place(self, prefix):
+        dtype = DTYPES[prefix]
+        x, y = self.rand(dtype, 7), self.rand(dtype, 7)
+        sol = y + 2 * x
+        res = self.func(prefix, "axpy")(x, y, a=2.0)
+        assert res is y
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @prefixes
+    def test_axpy_offsets_and_increments(self, prefix):
+        dtype = DTYPES[prefix]
+        x, y = self.rand(dtype, 7), self.rand(dtype, 7)
+        sol = y.copy()
+        sol[4::-2] += x[1::2]
+        res = self.func(prefix, "axpy")(x, y.copy(), n=3, offx=1, incx=2,
+                                        incy=-2)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    def test_default_n(self):
+        # As in SciPy, ``n`` defaults to ``(len(x) - offx) // abs(incx)``
+        x = np.arange(5.0)
+        res = scipy_blas.dscal(2.0, x, incx=2)
+        assert_allclose(res, [0, 1, 4, 3, 4])
+        x = np.arange(5.0)
+        assert scipy_blas.ddot(x, x, offx=1, offy=1) == 30
+
+    def test_casts_to_routine_type(self):
+        y = np.zeros(3, dtype='f4')
+        res = scipy_blas.daxpy(np.ones(3), y)
+        assert res.dtype == np.float64
+        assert res is not y
+        assert_allclose(y, 0)
+
+    @prefixes
+    def test_scal_and_copy(self, prefix):
+        dtype = DTYPES[prefix]
+        x = self.rand(dtype, 6)
+        sol = x * 3
+        assert self.func(prefix, "scal")(3.0, x) is x
+        assert_allclose(x, sol, rtol=1e-5)
+
+        y = np.zeros(6, dtype=dtype)
+        res = self.func(prefix, "copy")(x, y, incx=2, offy=1)
+        assert res is y
+        assert_allclose(y[1:4], x[::2])
+
+    def test_real_scal_copies(self):
+        x = np.arange(3.0) + 1j
+        res = scipy_blas.zdscal(2.0, x)
+        assert res is not x
+        assert_allclose(res, 2 * x)
+        assert scipy_blas.csscal(2.0, x.astype('c8'), overwrite_x=1).dtype == 'c8'
+
+    @prefixes
+    def test_dot(self, prefix):
+        dtype = DTYPES[prefix]
+        x, y = self.rand(dtype, 5), self.rand(dtype, 5)
+        if prefix in 'cz':
+            res = self.func(prefix, "dotc")(x, y)
+            assert isinstance(res, complex)
+            assert_allclose(res, x.conj().dot(y), rtol=1e-5)
+            res = self.func(prefix, "dotu")(x, y)
+            assert_allclose(res, x.dot(y), rtol=1e-5)
+        else:
+            res = self.func(prefix, "dot")(x, y)
+            assert isinstance(res, float)
+            assert_allclose(res, x.dot(y), rtol=1e-5)
+
+    @prefixes
+    @pytest.mark.parametrize('trans', [0, 1, 2])
+    def test_gemv(self, prefix, trans):
+        dtype = DTYPES[prefix]
+        a = self.rand(dtype, (3, 4))
+        op_a = [a, a.T, a.T.conj()][trans]
+        x = self.rand(dtype, op_a.shape[1])
+        res = self.func(prefix, "gemv")(2.0, a, x, trans=trans)
+        assert_allclose(res, 2 * op_a.dot(x), rtol=1e-4)
+
+        y = self.rand(dtype, 2 * op_a.shape[0])
+        sol = y.copy()
+        sol[::2] = op_a.dot(x) + 0.5 * y[::2]
+        res = self.func(prefix, "gemv")(1.0, a, x, beta=0.5, y=y, incy=2,
+                                        trans=trans)
+        assert res is not y
+        assert_allclose(res, sol, rtol=1e-4)
+
+    @prefixes
+    def test_ger(self, prefix):
+        dtype = DTYPES[prefix]
+        x, y = self.rand(dtype, 3), self.rand(dtype, 4)
+        names = ["geru", "gerc"] if prefix in 'cz' else ["ger"]
+        for name in names:
+            op_y = y.conj() if name == "gerc" else y
+            res = self.func(prefix, name)(2.0, x, y)
+            assert_allclose(res, 2 * np.outer(x, op_y), rtol=1e-5)
+
+            a = self.rand(dtype, (3, 4))
+            res = self.func(prefix, name)(1.0, x, y, a=a)
+            assert res is not a
+            assert_allclose(res, np.outer(x, op_y) + a, rtol=1e-5)
+
+    @prefixes
+    @pytest.mark.parametrize('lower', [0, 1])
+    def test_symv_hemv(self, prefix, lower):
+        dtype = DTYPES[prefix]
+        a, x = self.rand(dtype, (4, 4)), self.rand(dtype, 4)
+        if prefix in 'cz':
+            a[np.diag_indices_from(a)] = a.diagonal().real
+            tri = np.tril(a) if lower else np.triu(a)
+            full = tri + np.tril(tri, -1).T.conj() + np.triu(tri, 1).T.conj()
+            name = "hemv"
+        else:
+            tri = np.tril(a) if lower else np.triu(a)
+            full = tri + np.tril(tri, -1).T + np.triu(tri, 1).T
+            name = "symv"
+        res = self.func(prefix, name)(1.0, a, x, lower=lower)
+        assert_allclose(res, full.dot(x), rtol=1e-4)
+
+    @prefixes
+    @pytest.mark.parametrize('trans', [0, 1, 2])
+    def test_trmv_trsv(self, prefix, trans):
+        dtype = DTYPES[prefix]
+        a = self.rand(dtype, (4, 4)) + 4 * np.eye(4, dtype=dtype)
+        x = self.rand(dtype, 4)
+        t = np.tril(a)
+        op_t = [t, t.T, t.T.conj()][trans]
+
+        res = self.func(prefix, "trmv")(a, x, lower=1, trans=trans)
+        assert res is not x
+        assert_allclose(res, op_t.dot(x), rtol=1e-4)
+
+        res = self.func(prefix, "trsv")(a, x, lower=1, trans=trans)
+        assert_allclose(res, np.linalg.solve(op_t, x), rtol=1e-4)
+
+        t = np.triu(a)
+        t[np.diag_indices_from(t)] = 1
+        res = self.func(prefix, "trmv")(a, x.copy(), diag=1, overwrite_x=1)
+        assert_allclose(res, t.dot(x), rtol=1e-4)
+
+    @prefixes
+    @pytest.mark.parametrize('trans_a', [0, 1, 2])
+    def test_gemm(self, prefix, trans_a):
+        dtype = DTYPES[prefix]
+        a = self.rand(dtype, (3, 4))
+        op_a = [a, a.T, a.T.conj()][trans_a]
+        b = self.rand(dtype, (5, op_a.shape[1]))
+        res = self.func(prefix, "gemm")(2.0, a, b, trans_a=trans_a, trans_b=1)
+        assert res.flags.f_contiguous
+        assert_allclose(res, 2 * op_a.dot(b.T), rtol=1e-4)
+
+        c = self.rand(dtype, (op_a.shape[0], 5))
+        sol = op_a.dot(b.T) + 0.5 * c
+        res = self.func(prefix, "gemm")(1.0, a, b, beta=0.5, c=c,
+                                        trans_a=trans_a, trans_b=1)
+        assert res is not c
+        assert_allclose(res, sol, rtol=1e-4)
+        res = self.func(prefix, "gemm")(1.0, a, b, beta=0.5, c=c,
+                                        trans_a=trans_a, trans_b=1,
+                                        overwrite_c=1)
+        assert res is c
+        assert_allclose(res, sol, rtol=1e-4)
+
+    @prefixes
+    @pytest.mark.parametrize('side', [0, 1])
+    def test_symm_hemm(self, prefix, side):
+        dtype = DTYPES[prefix]
+        a = self.rand(dtype, (3, 3))
+        b = self.rand(dtype, (3, 3))
+        names = ["symm", "hemm"] if prefix in 'cz' else ["symm"]
+        for name in names:
+            if name == "hemm":
+                a[np.diag_indices_from(a)] = a.diagonal().real
+            t = np.triu(a)
+            mirror = t.T.conj() if name == "hemm" else t.T
+            full = t + mirror - np.diag(t.diagonal())
+            res = self.func(prefix, name)(1.0, a, b, side=side)
+            assert_allclose(res, b.dot(full) if side else full.dot(b),
+                            rtol=1e-4)
+
+    @prefixes
+    @pytest.mark.parametrize('lower', [0, 1])
+    def test_syrk_syr2k(self, prefix, lower):
+        dtype = DTYPES[prefix]
+        a, b = self.rand(dtype, (3, 4)), self.rand(dtype, (3, 4))
+        tri = np.tril if lower else np.triu
+
+        res = self.func(prefix, "syrk")(1.0, a, lower=lower)
+        assert_allclose(res, tri(a.dot(a.T)), rtol=1e-4)
+        res = self.func(prefix, "syrk")(1.0, a, trans=1, lower=lower)
+        assert_allclose(res, tri(a.T.dot(a)), rtol=1e-4)
+
+        # The other triangle of ``c`` is left as is
+        c = self.rand(dtype, (3, 3))
+        res = self.func(prefix, "syrk")(1.0, a, beta=1.0, c=c, lower=lower)
+        assert_allclose(tri(res), tri(a.dot(a.T) + c), rtol=1e-4)
+        other = np.triu if lower else np.tril
+        assert_allclose(other(res, 2 * lower - 1), other(c, 2 * lower - 1))
+
+        res = self.func(prefix, "syr2k")(1.0, a, b, lower=lower)
+        assert_allclose(res, tri(a.dot(b.T) + b.dot(a.T)), rtol=1e-4)
+
+    @pytest.mark.parametrize('prefix', ['c', 'z'])
+    def test_herk_her2k(self, prefix):
+        dtype = DTYPES[prefix]
+        a, b = self.rand(dtype, (3, 4)), self.rand(dtype, (3, 4))
+        res = scipy_blas.get_blas_funcs("herk", dtype=dtype)(1.0, a)
+        assert_allclose(res, np.triu(a.dot(a.T.conj())), rtol=1e-4)
+        res = scipy_blas.get_blas_funcs("herk", dtype=dtype)(1.0, a, trans=2)
+        assert_allclose(res, np.triu(a.T.conj().dot(a)), rtol=1e-4)
+
+        alpha = 1 + 2j
+        sol = alpha * a.dot(b.T.conj()) + np.conj(alpha) * b.dot(a.T.conj())
+        res = scipy_blas.get_blas_funcs("her2k", dtype=dtype)(alpha, a, b)
+        assert_allclose(res, np.triu(sol), rtol=1e-4)
+
+        with pytest.raises(ValueError):
+            scipy_blas.get_blas_funcs("herk", dtype=dtype)(1.0, a, trans=1)
+        with pytest.raises(ValueError):
+            scipy_blas.get_blas_funcs("syrk", dtype=dtype)(1.0, a, trans=2)
+
+    @prefixes
+    @pytest.mark.parametrize('side', [0, 1])
+    @pytest.mark.parametrize('trans_a', [0, 1, 2])
+    def test_trmm_trsm(self, prefix, side, trans_a):
+        dtype = DTYPES[prefix]
+        b = self.rand(dtype, (3, 4))
+        n = 4 if side else 3
+        a = self.rand(dtype, (n, n)) + 4 * np.eye(n, dtype=dtype)
+        t = np.triu(a)
+        op_t = [t, t.T, t.T.conj()][trans_a]
+
+        res = self.func(prefix, "trmm")(2.0, a, b, side=side, trans_a=trans_a)
+        assert res is not b
+        assert_allclose(res, 2 * (b.dot(op_t) if side else op_t.dot(b)),
+                        rtol=1e-4)
+
+        res = self.func(prefix, "trsm")(1.0, a, b, side=side, trans_a=trans_a)
+        if side:
+            sol = np.linalg.solve(op_t.T, b.T).T
+        else:
+            sol = np.linalg.solve(op_t, b)
+        assert_allclose(res, sol, rtol=1e-4)
+
+    def test_get_blas_funcs(self):
+        gemm = scipy_blas.get_blas_funcs("gemm")
+        assert gemm is scipy_blas.dgemm
+        assert gemm.typecode == 'd'
+        assert gemm.dtype == np.float64
+
+        arrays = (np.ones(2, dtype='f4'), np.ones(2, dtype='c8'))
+        gemm, axpy = scipy_blas.get_blas_funcs(["gemm", "axpy"], arrays)
+        assert gemm is scipy_blas.cgemm
+        assert axpy is scipy_blas.caxpy
+
+        assert scipy_blas.get_blas_funcs("dot", dtype='i4') is scipy_blas.ddot
+
+        with pytest.raises(ValueError) as exc:
+            scipy_blas.get_blas_funcs("dot", dtype='c16')
+        assert "could not be found" in str(exc.value)
+
+    def test_errors(self):
+        with pytest.raises(ValueError) as exc:
+            scipy_blas.daxpy(np.ones(3), np.ones(2))
+        assert "too short" in str(exc.value)
+
+        with pytest.raises(ValueError) as exc:
+            scipy_blas.dgemm(1.0, np.ones((2, 3)), np.ones((2, 3)))
+        assert "shape mismatch" in str(exc.value)
+
+        with pytest.raises(ValueError) as exc:
+            scipy_blas.dgemm(1.0, np.ones((2, 2)), np.ones((2, 2)), trans_a=3)
+        assert "`trans`" in str(exc.value)
+
+        with pytest.raises(ValueError) as exc:
+            scipy_blas.dgemm(1.0, np.ones((2, 2)), np.ones((2, 2)),
+                             c=np.ones((3, 2)))
+        assert "`c` must have shape" in str(exc.value)
+
+
+def test_matches_scipy():
+    blas = pytest.importorskip("scipy.linalg.blas")
+    rng = np.random.RandomState(42)
+    a = rng.normal(size=(4, 4))
+    b = rng.normal(size=(4, 3))
+    x = rng.normal(size=7)
+
+    calls = [
+        ("dgemm", (1.5, a, b), dict(beta=0.5, c=b.copy(), trans_a=1)),
+        ("dsyrk", (1.0, b), dict(trans=1, lower=1)),
+        ("dsyr2k", (1.0, b, b + 1), dict()),
+        ("dsymm", (1.0, a, b), dict(lower=1)),
+        ("dtrmm", (2.0, a, b), dict(lower=1, diag=1)),
+        ("dtrsm", (1.0, a + 4 * np.eye(4), b), dict(trans_a=1)),
+        ("dgemv", (1.0, a, x), dict(incx=2)),
+        ("dsymv", (1.0, a, x[:4]), dict(lower=1)),
+        ("dtrmv", (a, x[:4]), dict(trans=1)),
+        ("daxpy", (x, x.copy()), dict(a=2.0, incx=-2, incy=2)),
+        ("ddot", (x, x[::-1]), dict(offx=1, offy=1, incx=2)),
+        ("zdotc", (x + 1j, x - 2j), dict()),
+        ("zherk", (1.0, b + 1j * a[:, :3]), dict(trans=2, lower=1)),
+    ]
+    for name, args, kwargs in calls:
+        copy = [np.copy(v) if isinstance(v, np.ndarray) else v for v in args]
+        sol = getattr(blas, name)(*copy, **kwargs)
+        copy = [np.copy(v) if isinstance(v, np.ndarray) else v for v in args]
+        res = getattr(scipy_blas, name)(*copy, **kwargs)
+        assert type(res) is type(sol)
+        assert_allclose(res, sol, rtol=1e-10, err_msg=name)
@@ -0,0 +1,116 @@
+import pytest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import pyblis
+
+from .utils import Base, all_dtypes, rtol
+
+uppers = pytest.mark.parametrize('upper', [False, True])
+
+
+class TestStructured(Base):
+    def half(self, dtype, n, upper):
+        """A matrix with garbage in the triangle that isn't referenced"""
+        a = self.rand(dtype, (n, n))
+        tri = np.tril_indices(n, -1) if upper else np.triu_indices(n, 1)
+        a[tri] = np.nan
+        return a
+
+    def wrappers(self, dtype, upper):
+        a = self.half(dtype, 6, upper)
+        a_herm = a.copy()
+        np.fill_diagonal(a_herm, a.diagonal().real)
+        yield pyblis.Symmetric(a, upper)
+        yield pyblis.Hermitian(a_herm, upper)
+        yield pyblis.Triangular(a, upper)
+        yield pyblis.Triangular(a, upper, unit_diag=True)
+
+    @all_dtypes
+    @uppers
+    def test_to_dense(self, dtype, upper):
+        a = self.half(dtype, 5, upper)
+        tri = np.triu if upper else np.tril
+        full = np.nan_to_num(tri(a))
+        strict = np.nan_to_num(tri(a, 1 if upper else -1))
+
+        sol = strict + strict.T + np.diag(a.diagonal())
+        assert_allclose(pyblis.Symmetric(a, upper).to_dense(), sol)
+        assert_allclose(np.asarray(pyblis.Symmetric(a, upper)), sol)
+
+        a_herm = a.copy()
+        np.fill_diagonal(a_herm, a.diagonal().real)
+        sol = strict + strict.conj().T + np.diag(a.diagonal().real)
+        assert_allclose(pyblis.Hermitian(a_herm, upper).to_dense(), sol)
+
+        assert_allclose(pyblis.Triangular(a, upper).to_dense(), full)
+        unit = pyblis.Triangular(a, upper, unit_diag=True).to_dense()
+        assert_allclose(np.diagonal(unit), 1)
+        # The wrapped array is left untouched
+        assert np.isnan(a).sum() == 10
+
+    @all_dtypes
+    @uppers
+    def test_dot_matrix(self, dtype, upper):
+        b = self.rand(dtype, (6, 4))
+        for s in self.wrappers(dtype, upper):
+            dense = s.to_dense()
+            assert_allclose(pyblis.dot(s, b), dense.dot(b), rtol=rtol(dtype))
+            assert_allclose(pyblis.dot(b.T, s), b.T.dot(dense),
+                            rtol=rtol(dtype))
+            assert_allclose(s @ b, dense.dot(b), rtol=rtol(dtype))
+            assert_allclose(b.T @ s, b.T.dot(dense), rtol=rtol(dtype))
+            out = np.empty((6, 4), dtype=dtype)
+            assert pyblis.matmul(s, b, out=out) is out
+            assert_allclose(out, dense.dot(b), rtol=rtol(dtype))
+
+    @all_dtypes
+    @uppers
+    def test_dot_vector(self, dtype, upper):
+        x = self.rand(dtype, 6)
+        for s in self.wrappers(dtype, upper):
+            dense = s.to_dense()
+            assert_allclose(pyblis.dot(s, x), dense.dot(x), rtol=rtol(dtype))
+            assert_allclose(pyblis.dot(x, s), x.dot(dense), rtol=rtol(dtype))
+            assert_allclose(s @ x, dense.dot(x), rtol=rtol(dtype))
+            out = np.empty(6, dtype=dtype)
+            assert pyblis.dot(s, x, out=out) is out
+            assert_allclose(out, dense.dot(x), rtol=rtol(dtype))
+            # The operand isn't modified in place
+            assert not np.isnan(x).any()
+
+    @uppers
+    def test_both_structured(self, upper):
+        dtype = 'f8'
+        wrappers = list(self.wrappers(dtype, upper))
+        for s in wrappers:
+            for t in wrappers:
+                sol = s.to_dense().dot(t.to_dense())
+                assert_allclose(pyblis.dot(s, t), sol)
+
+    def test_transpose(self):
+        a = self.half('f8', 4, False)
+        s = pyblis.Symmetric(a)
+        assert s.T is s
+        t = pyblis.Triangular(a, unit_diag=True).T
+        assert t.upper and t.unit_diag
+        assert_allclose(t.to_dense(), np.tril(np.nan_to_num(a), -1).T +
+                        np.eye(4))
+        b = self.rand('f8', (4, 3))
+        assert_allclose(pyblis.dot(t, b), t.to_dense().dot(b))
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            pyblis.Symmetric(np.zeros((3, 2)))
+        with pytest.raises(TypeError):
+            pyblis.Symmetric(np.zeros(3))
+        with pytest.raises(TypeError):
+            pyblis.Hermitian(np.zeros((3, 3), dtype='i8'))
+        with pytest.raises(TypeError):
+            pyblis.Triangular(np.zeros((3, 3)), unit_diag=1)
+        s = pyblis.Symmetric(np.zeros((3, 3)))
+        with pytest.raises(ValueError):
+            pyblis.dot(s, np.zeros((4, 2)))
+        with pytest.raises(TypeError):
+            pyblis.dot(s, np.zeros((3, 2), dtype='f4'))
@@ -1,3 +1,5 @@
+import pytest
+
 import numpy as np
 from numpy.testing import assert_allclose
 
@@ -34,9 +36,195 @@ class DotTests(Base):
         sol = a.dot(a.T)
         assert_allclose(res, sol)
 
+        res = self.call_base(a.T, a)
+        sol = a.T.dot(a)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @all_dtypes
+    def test_transpose_with_out(self, dtype):
+        a, _ = self.a_b(dtype)
+        out = np.zeros(shape=(3, 3), dtype=dtype)
+        res = self.call(a, a.T, out=out)
+        assert res is out
+        assert_allclose(res, a.dot(a.T), rtol=1e-5)
+
+        # Transposed output, upper triangle is filled in as well
+        out = np.zeros(shape=(3, 3), dtype=dtype).T
+        res = self.call(a, a.T, out=out)
+        assert_allclose(res, a.dot(a.T), rtol=1e-5)
+
+    @all_dtypes
+    def test_conj_transpose(self, dtype):
+        a, _ = self.a_b(dtype)
+        res = self.call_base(a, a.conj().T)
+        sol = a.dot(a.conj().T)
+        assert_allclose(res, sol, rtol=1e-5)
+
+        res = self.call_base(a.conj().T, a)
+        sol = a.conj().T.dot(a)
+        assert_allclose(res, sol, rtol=1e-5)
+
+    @all_dtypes
+    def test_large_transpose(self, dtype):
+        # Spans multiple blocks of the fused update
+        a = self.rand(dtype, (300, 20))
+        assert_allclose(self.call_base(a, a.T), a.dot(a.T), rtol=1e-4)
+        assert_allclose(self.call_base(a, a.conj().T), a.dot(a.conj().T),
+                        rtol=1e-4)
+
+    @all_dtypes
+    def test_vector_vector(self, dtype):
+        x = self.rand(dtype, 4)
+        y = self.rand(dtype, 4)
+        res = self.call_base(x, y)
+        assert_allclose(res, x.dot(y), rtol=1e-5)
+
+    @all_dtypes
+    def test_matrix_vector(self, dtype):
+        a, b = self.a_b(dtype)
+        x = self.rand(dtype, 4)
+        res = self.call_base(a, x)
+        assert res.shape == (3,)
+        assert_allclose(res, a.dot(x), rtol=1e-5)
+
+        out = np.zeros(5, dtype=dtype)
+        res = self.call(x, b, out=out)
+        assert res is out
+        assert_allclose(res, x.dot(b), rtol=1e-5)
+
+    @all_dtypes
+    def test_vector_matrix_strided(self, dtype):
+        a, _ = self.a_b(dtype)
+        x = self.rand(dtype, 8)
+        res = self.call_base(x[::2], a.T)
+        assert_allclose(res, x[::2].dot(a.T), rtol=1e-5)
+
+    def test_mixed_precision(self):
+        a, b = self.a_b('f4')
+        res = self.call_base(a, b.astype('f8'))
+        assert res.dtype == np.dtype('f8')
+        assert_allclose(res, a.dot(b), rtol=1e-5)
+
+        # Not computed as a rank-k update, which needs uniform dtypes
+        out = np.zeros(shape=(3, 3), dtype='f8')
+        res = self.call(a, a.T, out=out)
+        assert res is out
+        assert_allclose(res, a.astype('f8').dot(a.T), rtol=1e-5)
+
+    def test_mixed_domain(self):
+        a, b = self.a_b('f8')
+        b = b + 1j
+        res = self.call_base(a, b)
+        assert res.dtype == np.dtype('c16')
+        assert_allclose(res, a.dot(b))
+
 
 class TestDot(DotTests):
     error_cls = TypeError
 
     def call(self, *args, **kwargs):
         return pyblis.dot(*args, **kwargs)
+
+    @all_dtypes
+    def test_symmetric_lazy(self, dtype):
+        a, b = self.a_b(dtype)
+        # For real dtypes ``a.conj().T`` is a view, computed with syrk
+        herm = pyblis.Hermitian if dtype in ('c8', 'c16') else pyblis.Symmetric
+        for other, cls in [(a.T, pyblis.Symmetric), (a.conj().T, herm)]:
+            sol = a.dot(other)
+            out = np.full((3, 3), np.nan, dtype=dtype)
+            res = self.call(a, other, out=out, symmetric="lazy")
+            assert isinstance(res, cls)
+            assert res.array is out and not res.upper
+            # Only the lower triangle is filled in
+            assert np.isnan(out[np.triu_indices(3, 1)]).all()
+            assert_allclose(np.tril(out), np.tril(sol), rtol=1e-5)
+
+            # Consumed without completing
+            x = self.rand(dtype, (3, 2))
+            assert_allclose(self.call(res, x), sol.dot(x), rtol=1e-5)
+            assert np.isnan(out[np.triu_indices(3, 1)]).all()
+
+            # Completed in place, once
+            full = res.to_dense()
+            assert full is out
+            assert_allclose(full, sol, rtol=1e-5)
+            assert res.to_dense() is out
+            assert_allclose(np.asarray(res), sol, rtol=1e-5)
+
+        # Other products aren't affected
+        res = self.call(a, b, symmetric="lazy")
+        assert isinstance(res, np.ndarray)
+        assert_allclose(res, a.dot(b), rtol=1e-5)
+
+    def test_symmetric_errors(self):
+        a, _ = self.a_b('f8')
+        with pytest.raises(ValueError):
+            self.call(a, a.T, symmetric="upper")
+
+
+class MatmulTests(Base):
+    @all_dtypes
+    def test_2d(self, dtype):
+        a = self.rand(dtype, (3, 4))
+        b = self.rand(dtype, (4, 5))
+        assert_allclose(self.call_base(a, b), np.matmul(a, b), rtol=1e-5)
+
+    @all_dtypes
+    def test_stacks(self, dtype):
+        a = self.rand(dtype, (2, 3, 4))
+        b = self.rand(dtype, (2, 4, 5))
+        assert_allclose(self.call_base(a, b), np.matmul(a, b), rtol=1e-5)
+
+    @all_dtypes
+    def test_broadcasting(self, dtype):
+        a = self.rand(dtype, (2, 1, 3, 4))
+        b = self.rand(dtype, (5, 4, 5))
+        assert_allclose(self.call_base(a, b), np.matmul(a, b), rtol=1e-5)
+
+        a = self.rand(dtype, (3, 4))
+        assert_allclose(self.call_base(a, b), np.matmul(a, b), rtol=1e-5)
+
+    @all_dtypes
+    def test_with_out(self, dtype):
+        a = self.rand(dtype, (2, 3, 4))
+        b = self.rand(dtype, (4, 5))
+        out = np.zeros(shape=(2, 3, 5), dtype=dtype)
+        res = self.call(a, b, out=out)
+        assert res is out
+        assert_allclose(res, np.matmul(a, b), rtol=1e-5)
+
+    @all_dtypes
+    def test_empty_batch(self, dtype):
+        for a_shape, b_shape, shape in [((0, 3, 4), (1, 4, 5), (0, 3, 5)),
+                                        ((1, 3, 4), (0, 4, 5), (0, 3, 5)),
+                                        ((2, 0, 3, 4), (1, 4, 5), (2, 0, 3, 5))]:
+            a = self.rand(dtype, a_shape)
+            b = self.rand(dtype, b_shape)
+            assert self.call_base(a, b).shape == shape
+            out = np.zeros(shape, dtype=dtype)
+            assert self.call(a, b, out=out) is out
+
+        with pytest.raises(ValueError):
+            self.call_base(self.rand(dtype, (0, 3, 4)),
+                           self.rand(dtype, (2, 4, 5)))
+
+
+class TestMatmul(MatmulTests):
+    error_cls = TypeError
+
+    def call(self, *args, **kwargs):
+        return pyblis.matmul(*args, **kwargs)
+
+    @all_dtypes
+    def test_vector_with_stack(self, dtype):
+        a = self.rand(dtype, (2, 3, 4))
+        x = self.rand(dtype, 4)
+        y = self.rand(dtype, 3)
+        assert_allclose(self.call(a, x), np.matmul(a, x), rtol=1e-5)
+        assert_allclose(self.call(y, a), np.matmul(y, a), rtol=1e-5)
+
+        out = np.zeros((2, 4), dtype=dtype)
+        res = self.call(y, a, out=out)
+        assert res is out
+        assert_allclose(res, np.matmul(y, a), rtol=1e-5)
@@ -6,6 +6,11 @@ import numpy as np
 all_dtypes = pytest.mark.parametrize('dtype', ['f4', 'f8', 'c8', 'c16'])
 
 
+def rtol(dtype):
+    """A relative tolerance for comparing results of the given precision"""
+    return 1e-4 if dtype in ('f4', 'c8') else 1e-10
+
+
 class Base(object):
     def rand(self, dtype, shape=()):
         a = np.random.normal(size=shape).astype(dtype)
@@ -26,6 +26,12 @@ LIB_TGT_DIR = os.path.join(ROOT_DIR, "pyblis")
 LIB_TGT = os.path.join(LIB_TGT_DIR, "_lib.%s" % EXT)
 PY_SOURCE_TGT = os.path.join(LIB_TGT_DIR, "_lib.py")
 PY_SOURCE_TEMPLATE = os.path.join(LIB_TGT_DIR, "_lib.py.template")
+# The C API header, Cython declarations and CBLAS header, generated alongside
+# _lib.py
+CAPI_SOURCES = [
+    (os.path.join(LIB_TGT_DIR, name + ".template"), os.path.join(LIB_TGT_DIR, name))
+    for name in ["pyblis.h", "capi.pxd", "pyblis_cblas.h"]
+]
 
 
 @contextlib.contextmanager
@@ -49,7 +55,7 @@ def _ensure_jinja2(cmd):
 def _ensure_lib(cmd):
     if not os.path.exists(LIB_TGT):
         cmd.run_command("build_ext")
-    if not os.path.exists(PY_SOURCE_TGT):
+    if not all(os.path.exists(t) for t in [PY_SOURCE_TGT] + [t for _, t in CAPI_SOURCES]):
         cmd.run_command("gen_py_source")
 
 
@@ -58,12 +64,14 @@ class build_ext(Command):
 
     user_options = [
         ("bundle-blis", None, "bundle BLIS with the library"),
-        ("build-blis", None, "build BLIS rather than using an installed version")
+        ("build-blis", None, "build BLIS rather than using an installed version"),
+        ("cblas", None, "add a CBLAS interface for native code to the library")
     ]
 
     def initialize_options(self):
         self.bundle_blis = False
         self.build_blis = False
+        self.cblas = False
 
     def finalize_options(self):
         pass
@@ -72,7 +80,8 @@ class build_ext(Command):
         _ensure_jinja2(self)
         cmake_options = [
             "-DPYBLIS_BUILD_BLIS=" + ("on" if self.bundle_blis else "off"),
-            "-DPYBLIS_BUNDLE_BLIS=" + ("on" if self.bundle_blis else "off")
+            "-DPYBLIS_BUNDLE_BLIS=" + ("on" if self.bundle_blis else "off"),
+            "-DPYBLIS_CBLAS=" + ("on" if self.cblas else "off")
         ]
         os.makedirs(LIB_BUILD_DIR, exist_ok=True)
         with changed_dir(LIB_BUILD_DIR):
@@ -94,6 +103,8 @@ class gen_py_source(Command):
     def run(self):
         _ensure_jinja2(self)
         self.spawn([sys.executable, GENERATE_SCRIPT, PY_SOURCE_TEMPLATE, PY_SOURCE_TGT])
+        for template, target in CAPI_SOURCES:
+            self.spawn([sys.executable, GENERATE_SCRIPT, template, target])
 
 
 class build(_build):
@@ -118,7 +129,7 @@ class develop(_develop):
 class clean(_clean):
     def run(self):
         if self.all:
-            for f in [LIB_TGT, PY_SOURCE_TGT]:
+            for f in [LIB_TGT, PY_SOURCE_TGT] + [t for _, t in CAPI_SOURCES]:
                 if os.path.exists(f):
                     os.unlink(f)
         _clean.run(self)
@@ -141,6 +152,7 @@ cmdclass.update(
 
 extras_require = {
     "numba": ["numba"],
+    "threadpoolctl": ["threadpoolctl>=3.2"],
 }
 
 install_requires = ["numpy"]